@@ -14,24 +14,25 @@ from app.db.database import get_db_session
 from app.db.models import User, GPUUsage
 from app.auth.auth_service import get_current_active_user, get_current_admin_user
 from app.services.gpu_manager import GPUManager
-from app.api.schemas import GPUInfo, GPUUsageCreate, GPUUsageResponse
+from app.services.model_optimizer import ModelOptimizer
+from app.services.service_registry import get_gpu_manager, get_model_optimizer
+from app.api.schemas import GPUInfo, GPUHistoryResponse, GPUProcessInfo, GPUUsageCreate, GPUUsageResponse
 
 settings = get_settings()
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# GPU Manager servisi
-gpu_manager = GPUManager()
-
 @router.get("/", response_model=List[GPUInfo])
 async def list_gpus(
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_active_user),
+    gpu_manager: GPUManager = Depends(get_gpu_manager)
 ) -> Any:
     """
     Sunucudaki tüm GPU'ları listeler
     
     Args:
         current_user: Geçerli kullanıcı
+        gpu_manager: GPU yöneticisi
         
     Returns:
         List[GPUInfo]: GPU listesi
@@ -39,10 +40,28 @@ async def list_gpus(
     gpus = gpu_manager.detect_gpus()
     return gpus
 
+@router.get("/reservations", response_model=List[Dict[str, Any]])
+async def list_gpu_reservations(
+    current_user: User = Depends(get_current_active_user),
+    gpu_manager: GPUManager = Depends(get_gpu_manager)
+) -> Any:
+    """
+    Devam eden model yüklemeleri için GPU bellek rezervasyonlarını listeler
+    
+    Args:
+        current_user: Geçerli kullanıcı
+        gpu_manager: GPU yöneticisi
+        
+    Returns:
+        List[Dict[str, Any]]: Rezervasyon listesi
+    """
+    return gpu_manager.reservations.list_reservations()
+
 @router.get("/{gpu_index}", response_model=GPUInfo)
 async def get_gpu(
     gpu_index: int = Path(..., ge=0),
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_active_user),
+    gpu_manager: GPUManager = Depends(get_gpu_manager)
 ) -> Any:
     """
     Belirli bir GPU'nun detaylarını döndürür
@@ -50,6 +69,7 @@ async def get_gpu(
     Args:
         gpu_index: GPU indeksi
         current_user: Geçerli kullanıcı
+        gpu_manager: GPU yöneticisi
         
     Returns:
         GPUInfo: GPU detayları
@@ -70,10 +90,75 @@ async def get_gpu(
         detail=f"GPU bulunamadı: {gpu_index}"
     )
 
+@router.get("/{gpu_index}/history", response_model=GPUHistoryResponse)
+async def get_gpu_history(
+    gpu_index: int = Path(..., ge=0),
+    window: int = Query(900, ge=1, description="Geriye dönük pencere (saniye)"),
+    step: Optional[int] = Query(None, ge=1, description="Örnek aralığı (saniye)"),
+    current_user: User = Depends(get_current_active_user),
+    gpu_manager: GPUManager = Depends(get_gpu_manager)
+) -> Any:
+    """
+    Belirli bir GPU'nun bellek, kullanım ve sıcaklık geçmişini döndürür
+    
+    Args:
+        gpu_index: GPU indeksi
+        window: Geriye dönük pencere (saniye)
+        step: Örnek aralığı (saniye)
+        current_user: Geçerli kullanıcı
+        gpu_manager: GPU yöneticisi
+        
+    Returns:
+        GPUHistoryResponse: Adım başına min/ortalama/maks serileri
+        
+    Raises:
+        HTTPException: GPU için geçmiş bulunamazsa
+    """
+    history = gpu_manager.history.query(gpu_index, window=window, step=step)
+    
+    if history is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"GPU geçmişi bulunamadı: {gpu_index}"
+        )
+    
+    return history
+
+@router.get("/{gpu_index}/processes", response_model=List[GPUProcessInfo])
+async def get_gpu_processes(
+    gpu_index: int = Path(..., ge=0),
+    current_user: User = Depends(get_current_active_user),
+    gpu_manager: GPUManager = Depends(get_gpu_manager),
+    model_optimizer: ModelOptimizer = Depends(get_model_optimizer)
+) -> Any:
+    """
+    Belirli bir GPU'daki süreçleri ve bellek kullanımlarının yüklü modellere dağılımını döndürür
+    
+    Args:
+        gpu_index: GPU indeksi
+        current_user: Geçerli kullanıcı
+        gpu_manager: GPU yöneticisi
+        model_optimizer: Model optimizer
+        
+    Returns:
+        List[GPUProcessInfo]: Süreç listesi
+        
+    Raises:
+        HTTPException: GPU bulunamazsa
+    """
+    if not any(gpu["index"] == gpu_index for gpu in gpu_manager.detect_gpus()):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"GPU bulunamadı: {gpu_index}"
+        )
+    
+    return model_optimizer.attribute_gpu_processes(gpu_manager.get_gpu_processes(gpu_index))
+
 @router.get("/memory/{gpu_index}", response_model=Dict[str, Any])
 async def get_gpu_memory(
     gpu_index: int = Path(..., ge=0),
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_active_user),
+    gpu_manager: GPUManager = Depends(get_gpu_manager)
 ) -> Any:
     """
     Belirli bir GPU'nun bellek kullanımını döndürür
@@ -81,6 +166,7 @@ async def get_gpu_memory(
     Args:
         gpu_index: GPU indeksi
         current_user: Geçerli kullanıcı
+        gpu_manager: GPU yöneticisi
         
     Returns:
         Dict[str, Any]: GPU bellek bilgileri
@@ -110,6 +196,7 @@ async def get_gpu_memory(
 async def record_gpu_usage(
     usage_data: GPUUsageCreate,
     current_user: User = Depends(get_current_active_user),
+    gpu_manager: GPUManager = Depends(get_gpu_manager),
     db: Session = Depends(get_db_session)
 ) -> Any:
     """
@@ -118,6 +205,7 @@ async def record_gpu_usage(
     Args:
         usage_data: GPU kullanım verileri
         current_user: Geçerli kullanıcı
+        gpu_manager: GPU yöneticisi
         db: Veritabanı oturumu
         
     Returns:
@@ -271,7 +359,8 @@ async def list_user_gpu_usage(
 @router.get("/optimal", response_model=Dict[str, Any])
 async def get_optimal_gpu(
     min_memory_mb: int = Query(2000, ge=0),
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_active_user),
+    gpu_manager: GPUManager = Depends(get_gpu_manager)
 ) -> Any:
     """
     En uygun (optimal) GPU'yu döndürür
@@ -279,6 +368,7 @@ async def get_optimal_gpu(
     Args:
         min_memory_mb: Gereken minimum bellek miktarı (MB)
         current_user: Geçerli kullanıcı
+        gpu_manager: GPU yöneticisi
         
     Returns:
         Dict[str, Any]: Optimal GPU bilgisi veya bulunamadı mesajı
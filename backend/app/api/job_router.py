@@ -0,0 +1,66 @@
+"""
+Arka plan işi (model yükleme, ONNX dönüşümü, yerleşim) endpoint'leri
+"""
+import logging
+from typing import Any, Dict, List
+
+from fastapi import APIRouter, Depends, HTTPException, Path, status
+
+from app.config import get_settings
+from app.db.models import User
+from app.auth.auth_service import get_current_active_user
+from app.services.job_queue import JobQueue
+from app.services.service_registry import get_job_queue
+
+settings = get_settings()
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+@router.get("/", response_model=List[Dict[str, Any]])
+async def list_jobs(
+    current_user: User = Depends(get_current_active_user),
+    job_queue: JobQueue = Depends(get_job_queue)
+) -> Any:
+    """
+    İşleri en yeniden eskiye listeler (admin tüm işleri, diğerleri kendi işlerini görür)
+    
+    Args:
+        current_user: Geçerli kullanıcı
+        job_queue: İş kuyruğu
+        
+    Returns:
+        List[Dict[str, Any]]: İş listesi
+    """
+    owner_id = None if current_user.is_admin else current_user.id
+    return [job.to_dict() for job in job_queue.list_jobs(owner_id=owner_id)]
+
+@router.get("/{job_id}", response_model=Dict[str, Any])
+async def get_job(
+    job_id: str = Path(...),
+    current_user: User = Depends(get_current_active_user),
+    job_queue: JobQueue = Depends(get_job_queue)
+) -> Any:
+    """
+    İşin durumunu, aşamasını, süresini ve sonucunu döndürür
+    
+    Args:
+        job_id: İş ID
+        current_user: Geçerli kullanıcı
+        job_queue: İş kuyruğu
+        
+    Returns:
+        Dict[str, Any]: İş durumu
+        
+    Raises:
+        HTTPException: İş bulunamazsa veya kullanıcıya ait değilse
+    """
+    job = job_queue.get(job_id)
+    
+    # Başkasının işini varlığını da belli etmeden gizle
+    if job is None or (job.owner_id != current_user.id and not current_user.is_admin):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"İş bulunamadı: {job_id}"
+        )
+    
+    return job.to_dict()
@@ -1,10 +1,14 @@
 """
 Model yönetimi endpoint'leri
 """
+import asyncio
 import logging
+import math
+import time
 from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Path, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Response, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from app.config import get_settings
@@ -13,20 +17,162 @@ from app.db.models import User, ModelMetadata, ModelVersion
 from app.auth.auth_service import get_current_active_user
 from app.services.hf_integration import HuggingFaceIntegration
 from app.services.gpu_manager import GPUManager
-from app.services.model_optimizer import ModelOptimizer
+from app.services.inference import InferenceService
+from app.services.memory_estimator import estimate_model_memory
+from app.services.job_queue import Job, JobQueue
+from app.services.model_optimizer import ModelOptimizer, replica_index
+from app.services.placement_planner import PlacementPlanner
+from app.services.quantization import quantization_scheme
+from app.services.service_registry import (
+    get_gpu_manager, get_model_optimizer, get_hf_integration, get_job_queue, get_inference_service
+)
+
 from app.api.schemas import (
     ModelResponse, ModelCreate, ModelUpdate, 
-    ModelVersionResponse, ModelOptimizeRequest
+    ModelVersionResponse, ModelOptimizeRequest, ModelPlacementRequest, ModelInferenceRequest,
+    ModelLengthBucketsRequest, ModelReplicasRequest
 )
 
 settings = get_settings()
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# HuggingFace ve model servisleri
-hf_integration = HuggingFaceIntegration(settings.MODEL_STORAGE_PATH)
-gpu_manager = GPUManager()
-model_optimizer = ModelOptimizer()
+def _job_accepted(job: Job, message: str, **extra: Any) -> Dict[str, Any]:
+    """
+    Kuyruğa alınan iş için 202 yanıt gövdesi
+    
+    Args:
+        job: Kuyruğa alınan iş
+        message: Yanıt mesajı
+        
+    Returns:
+        Dict[str, Any]: İş ID'si ve durum adresi
+    """
+    return dict(
+        success=True,
+        message=message,
+        job_id=job.job_id,
+        status_url=f"/jobs/{job.job_id}",
+        **extra
+    )
+
+def _submit_sharded_load(
+    optimize_data: ModelOptimizeRequest,
+    model: ModelMetadata,
+    current_user: User,
+    gpu_manager: GPUManager,
+    model_optimizer: ModelOptimizer,
+    job_queue: JobQueue
+) -> Dict[str, Any]:
+    """
+    Parçalı yükleme planını yapar, GPU başına rezervasyon alır ve yükleme işini başlatır
+    
+    Args:
+        optimize_data: Optimizasyon verileri
+        model: Model kaydı
+        current_user: Geçerli kullanıcı
+        gpu_manager: GPU yöneticisi
+        model_optimizer: Model optimizer
+        job_queue: İş kuyruğu
+        
+    Returns:
+        Dict[str, Any]: İş ID'si, durum adresi ve cihaz haritası
+        
+    Raises:
+        HTTPException: ONNX istenirse, model bütçelere sığmazsa veya iş kuyruğu doluysa
+    """
+    if optimize_data.use_onnx:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ONNX oturumları parçalı yüklenemez"
+        )
+    
+    plan = model_optimizer.plan_sharded(
+        model.model_path,
+        use_fp16=optimize_data.use_fp16,
+        gpu_indices=optimize_data.gpu_indices,
+        task=model.task
+    )
+    if not plan["success"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=plan["message"]
+        )
+    
+    reservations = model_optimizer.reserve_sharded(plan, owner=model.model_id)
+    model_path = model.model_path
+    model_id = model.model_id
+    task = model.task
+    
+    def run(progress) -> Dict[str, Any]:
+        return model_optimizer.load_model_sharded(
+            model_path=model_path,
+            model_id=model_id,
+            plan=plan,
+            use_fp16=optimize_data.use_fp16,
+            reservations=reservations,
+            progress=progress,
+            quantize=optimize_data.quantize,
+            task=task
+        )
+    
+    job = job_queue.submit("load", run, model_id=model_id, owner_id=current_user.id)
+    
+    # Kuyruk doluysa rezervasyonları geri ver
+    if job is None:
+        for reservation in reservations:
+            gpu_manager.reservations.release(reservation)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="İş kuyruğu dolu, daha sonra tekrar deneyin"
+        )
+    
+    return _job_accepted(
+        job,
+        "Parçalı model yükleme işi kuyruğa alındı",
+        model_id=model_id,
+        gpu_index=plan["gpu_index"],
+        device_map=plan["device_map"],
+        device_weights_mb=plan["device_weights_mb"]
+    )
+
+def _replica_status(
+    model_id: str,
+    model_optimizer: ModelOptimizer,
+    inference: InferenceService
+) -> Dict[str, Any]:
+    """
+    Modelin replikaları: GPU, yüklenme durumu ve çıkarım kuyruğu derinliği
+    
+    Args:
+        model_id: Model ID
+        model_optimizer: Model optimizer
+        inference: Çıkarım servisi
+        
+    Returns:
+        Dict[str, Any]: Model ID ve replika listesi
+    """
+    queues = {
+        replica["replica_id"]: replica
+        for replica in inference.stats(model_id).get("replicas", [])
+    }
+    loaded = set(model_optimizer.replica_ids(model_id))
+    
+    return {
+        "model_id": model_id,
+        "replicas": [
+            {
+                "replica_id": replica_id,
+                "gpu_index": gpu_index,
+                "loading": replica_id not in loaded,
+                "queue_depth": queues.get(replica_id, {}).get("queue_depth", 0),
+                "inputs": queues.get(replica_id, {}).get("inputs", 0),
+            }
+            for replica_id, gpu_index in sorted(
+                model_optimizer.replica_gpus(model_id).items(), key=lambda item: replica_index(item[0])
+            )
+        ]
+    }
 
 @router.get("/", response_model=List[ModelResponse])
 async def list_models(
@@ -88,7 +234,8 @@ async def list_models(
 async def create_model(
     model_data: ModelCreate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db_session)
+    db: Session = Depends(get_db_session),
+    hf_integration: HuggingFaceIntegration = Depends(get_hf_integration)
 ) -> Any:
     """
     Hugging Face'den yeni bir model indirir
@@ -97,6 +244,7 @@ async def create_model(
         model_data: Model verileri
         current_user: Geçerli kullanıcı
         db: Veritabanı oturumu
+        hf_integration: HuggingFace entegrasyonu
         
     Returns:
         ModelResponse: İndirilen model
@@ -152,6 +300,189 @@ async def create_model(
     
     return model
 
+@router.post("/placement", response_model=Dict[str, Any])
+async def place_models(
+    placement_data: ModelPlacementRequest,
+    response: Response,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db_session),
+    gpu_manager: GPUManager = Depends(get_gpu_manager),
+    model_optimizer: ModelOptimizer = Depends(get_model_optimizer),
+    job_queue: JobQueue = Depends(get_job_queue)
+) -> Any:
+    """
+    Birden fazla model için GPU yerleşim planı oluşturur ve istenirse uygular
+    
+    Modeller best-fit-decreasing ile GPU'lara paketlenir. apply=True ise
+    yerleşimlerin rezervasyonu ve yüklemesi arka plan işi olarak çalışır;
+    yanıt hemen iş ID'si ile döner (202).
+    
+    Args:
+        placement_data: Yerleştirilecek modeller ve seçenekler
+        response: HTTP yanıtı (durum kodu için)
+        current_user: Geçerli kullanıcı
+        db: Veritabanı oturumu
+        gpu_manager: GPU yöneticisi
+        model_optimizer: Model optimizer
+        job_queue: İş kuyruğu
+        
+    Returns:
+        Dict[str, Any]: Yerleşim planı veya uygulanıyorsa iş bilgisi
+        
+    Raises:
+        HTTPException: Model bulunamazsa, erişim izni yoksa, aynı model birden fazla verilirse
+            veya iş kuyruğu doluysa
+    """
+    model_ids = [item.model_id for item in placement_data.models]
+    if len(set(model_ids)) != len(model_ids):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Aynı model birden fazla kez verilemez"
+        )
+    
+    # Modelleri bul ve erişim kontrolü yap
+    models = {}
+    for model_id in model_ids:
+        model = db.query(ModelMetadata).filter(ModelMetadata.model_id == model_id).first()
+        
+        if not model:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Model bulunamadı: {model_id}"
+            )
+        
+        if model.owner_id != current_user.id and not model.is_public:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Bu modele erişim izniniz yok: {model_id}"
+            )
+        
+        models[model_id] = model
+    
+    # Bellek verilmeyen modeller için ağırlık başlıklarından tahmin (dosya okuması olay döngüsü dışında)
+    requested = []
+    for item in placement_data.models:
+        memory_mb = item.memory_mb or await run_in_threadpool(
+            model_optimizer.estimate_memory_mb,
+            models[item.model_id].model_path,
+            use_fp16=placement_data.use_fp16,
+            quantization=quantization_scheme(placement_data.quantize)
+        )
+        requested.append({"model_id": item.model_id, "memory_mb": memory_mb})
+    
+    planner = PlacementPlanner(gpu_manager)
+    
+    if not placement_data.apply:
+        return planner.plan(requested)
+    
+    def load(placement: Dict[str, Any], reservation) -> Dict[str, Any]:
+        model = models[placement["model_id"]]
+        return model_optimizer.load_model(
+            model_path=model.model_path,
+            model_id=model.model_id,
+            gpu_index=placement["gpu_index"],
+            quantize=placement_data.quantize,
+            use_fp16=placement_data.use_fp16,
+            reservation=reservation,
+            task=model.task
+        )
+    
+    def run(progress) -> Dict[str, Any]:
+        progress("placement")
+        result = planner.apply(requested, load)
+        
+        # Yerleşemeyen veya yüklenemeyen model varsa iş başarısız sayılır
+        complete = not result.get("unplaced") and result["loaded"] == len(result["results"])
+        return dict(
+            result,
+            success=complete,
+            message=f"{result['loaded']}/{len(requested)} model yüklendi"
+        )
+    
+    job = job_queue.submit("placement", run, owner_id=current_user.id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="İş kuyruğu dolu, daha sonra tekrar deneyin"
+        )
+    
+    response.status_code = status.HTTP_202_ACCEPTED
+    return _job_accepted(job, "Yerleşim işi kuyruğa alındı")
+
+@router.get("/residency", response_model=Dict[str, Any])
+async def get_model_residency(
+    current_user: User = Depends(get_current_active_user),
+    model_optimizer: ModelOptimizer = Depends(get_model_optimizer)
+) -> Any:
+    """
+    GPU'larda yerleşik modelleri, bellek bütçelerini ve önbellek istatistiklerini döndürür
+    
+    Args:
+        current_user: Geçerli kullanıcı
+        model_optimizer: Model optimizer
+        
+    Returns:
+        Dict[str, Any]: İsabet/ıska/tahliye sayıları, GPU başına LRU sıralı modeller
+        ana bellekteki sıcak katman ("warm") ve ONNX dışa aktarım önbelleği ("onnx_cache")
+    """
+    return dict(
+        model_optimizer.residency.stats(),
+        warm=model_optimizer.warm_cache.stats(),
+        onnx_cache=model_optimizer.onnx_cache.stats()
+    )
+
+@router.get("/{model_id}/memory", response_model=Dict[str, Any])
+async def get_model_memory_estimate(
+    model_id: str = Path(...),
+    use_fp16: bool = Query(True),
+    use_onnx: bool = Query(False),
+    quantization: Optional[str] = Query(None, regex="^(int8|int4)$"),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db_session)
+) -> Any:
+    """
+    Modelin GPU bellek ihtiyacını ağırlıkları yüklemeden tahmin eder
+    
+    Args:
+        model_id: Model ID
+        use_fp16: FP16 ile yüklenecek mi
+        use_onnx: ONNX oturumu olarak yüklenecek mi
+        quantization: "int8" veya "int4"
+        current_user: Geçerli kullanıcı
+        db: Veritabanı oturumu
+        
+    Returns:
+        Dict[str, Any]: Parametre sayısı, ağırlık/aktivasyon/ek bellek ve toplam (MB)
+        
+    Raises:
+        HTTPException: Model bulunamazsa, erişim izni yoksa veya tahmin yapılamazsa
+    """
+    model = db.query(ModelMetadata).filter(ModelMetadata.model_id == model_id).first()
+    
+    if not model:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Model bulunamadı: {model_id}"
+        )
+    
+    if model.owner_id != current_user.id and not model.is_public:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Bu modele erişim izniniz yok"
+        )
+    
+    # safetensors başlıkları ve config.json okunur; olay döngüsünü bloklamasın
+    estimate = await run_in_threadpool(
+        estimate_model_memory, model.model_path, use_fp16=use_fp16, quantization=quantization, onnx=use_onnx
+    )
+    if estimate is None:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Model dizininde safetensors veya config.json bulunamadı"
+        )
+    
+    return dict(estimate, model_id=model_id)
+
 @router.get("/{model_id}", response_model=ModelResponse)
 async def get_model(
     model_id: str = Path(...),
@@ -195,7 +526,8 @@ async def get_model(
 async def delete_model(
     model_id: str = Path(...),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db_session)
+    db: Session = Depends(get_db_session),
+    hf_integration: HuggingFaceIntegration = Depends(get_hf_integration)
 ) -> None:
     """
     Belirli bir modeli siler
@@ -204,6 +536,7 @@ async def delete_model(
         model_id: Model ID
         current_user: Geçerli kullanıcı
         db: Veritabanı oturumu
+        hf_integration: HuggingFace entegrasyonu
         
     Raises:
         HTTPException: Model bulunamazsa, erişim izni yoksa veya silme başarısız olursa
@@ -239,7 +572,8 @@ async def update_model(
     model_data: ModelUpdate,
     model_id: str = Path(...),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db_session)
+    db: Session = Depends(get_db_session),
+    hf_integration: HuggingFaceIntegration = Depends(get_hf_integration)
 ) -> Any:
     """
     Belirli bir modeli günceller
@@ -249,6 +583,7 @@ async def update_model(
         model_id: Model ID
         current_user: Geçerli kullanıcı
         db: Veritabanı oturumu
+        hf_integration: HuggingFace entegrasyonu
         
     Returns:
         ModelResponse: Güncellenmiş model
@@ -342,27 +677,38 @@ async def list_model_versions(
     
     return versions
 
-@router.post("/{model_id}/optimize", response_model=Dict[str, Any])
+@router.post("/{model_id}/optimize", response_model=Dict[str, Any], status_code=status.HTTP_202_ACCEPTED)
 async def optimize_model(
     optimize_data: ModelOptimizeRequest,
     model_id: str = Path(...),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db_session)
+    db: Session = Depends(get_db_session),
+    gpu_manager: GPUManager = Depends(get_gpu_manager),
+    model_optimizer: ModelOptimizer = Depends(get_model_optimizer),
+    job_queue: JobQueue = Depends(get_job_queue)
 ) -> Any:
     """
-    Bir modeli GPU'ya yükler ve optimize eder
+    Bir modeli GPU'ya yükleme / optimize etme işini başlatır
+    
+    GPU seçimi ve bellek rezervasyonu istek sırasında yapılır; yükleme arka
+    plan işi olarak çalışır. Yanıt hemen iş ID'si ile döner, ilerleme
+    /jobs/{job_id} adresinden izlenir. sharded=true ile tek GPU'ya sığmayan
+    model katmanları GPU'lara bölünerek, sığmayanı CPU'ya taşınarak yüklenir.
     
     Args:
         optimize_data: Optimizasyon verileri
         model_id: Model ID
         current_user: Geçerli kullanıcı
         db: Veritabanı oturumu
+        gpu_manager: GPU yöneticisi
+        model_optimizer: Model optimizer
+        job_queue: İş kuyruğu
         
     Returns:
-        Dict[str, Any]: Optimizasyon sonucu
+        Dict[str, Any]: İş ID'si, durum adresi ve seçilen GPU
         
     Raises:
-        HTTPException: Model bulunamazsa, erişim izni yoksa veya optimizasyon başarısız olursa
+        HTTPException: Model bulunamazsa, erişim izni yoksa, uygun GPU yoksa veya iş kuyruğu doluysa
     """
     # Modeli bul
     model = db.query(ModelMetadata).filter(ModelMetadata.model_id == model_id).first()
@@ -381,42 +727,512 @@ async def optimize_model(
             detail="Bu modele erişim izniniz yok"
         )
     
-    # Belirli bir GPU seçilmişse kullan, yoksa otomatik seç
-    gpu_index = optimize_data.gpu_index
-    if gpu_index is None:
-        # Gereken minimum bellek miktarını belirle (varsayılan 2000 MB)
-        min_memory = optimize_data.min_memory_mb or settings.MIN_FREE_GPU_MEMORY_MB
-        gpu_index = gpu_manager.select_optimal_gpu(min_memory_mb=min_memory)
-        
-        if gpu_index is None:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"En az {min_memory} MB belleğe sahip GPU bulunamadı"
+    # Parçalı yükleme: katmanlar GPU'ların anlık boş belleğine göre bölünür
+    if optimize_data.sharded:
+        return _submit_sharded_load(optimize_data, model, current_user, gpu_manager, model_optimizer, job_queue)
+    
+    # Gereken bellek: verilmemişse ağırlık başlıklarından tahmin, o da yoksa MIN_FREE_GPU_MEMORY_MB
+    estimate = None
+    min_memory = optimize_data.min_memory_mb
+    if not min_memory:
+        estimate = await run_in_threadpool(
+            estimate_model_memory,
+            model.model_path,
+            use_fp16=optimize_data.use_fp16,
+            quantization=quantization_scheme(optimize_data.quantize),
+            onnx=optimize_data.use_onnx
+        )
+        min_memory = math.ceil(estimate["total_mb"]) if estimate else settings.MIN_FREE_GPU_MEMORY_MB
+    
+    # GPU'yu seç ve belleği aynı anda rezerve et; belirli bir GPU seçilmişse onu kullan
+    reservation = gpu_manager.reserve_gpu(
+        memory_mb=min_memory,
+        owner=model.model_id,
+        gpu_index=optimize_data.gpu_index
+    )
+    
+    # Boş bellek yoksa en az kullanılan modelleri boşaltarak yer açmayı dene; tahliye model
+    # lock'larını bekler ve ağırlıkları ana belleğe kopyalar, olay döngüsünü bloklamasın
+    if reservation is None:
+        freed_gpu = await run_in_threadpool(model_optimizer.make_room, min_memory, gpu_index=optimize_data.gpu_index)
+        if freed_gpu is not None:
+            reservation = gpu_manager.reserve_gpu(
+                memory_mb=min_memory,
+                owner=model.model_id,
+                gpu_index=freed_gpu
             )
     
-    # Modeli optimize et
+    if reservation is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"En az {min_memory} MB belleğe sahip GPU bulunamadı"
+        )
+    
+    gpu_index = reservation.gpu_index
+    model_path = model.model_path
+    task = model.task
+    
+    # Modeli optimize et (arka planda; rezervasyonu yükleme tamamlar/bırakır)
     if optimize_data.use_onnx:
+        # Dışa aktarım önbelleği indirilen sürümün commit hash'i ile anahtarlanır
+        version = db.query(ModelVersion).filter(
+            ModelVersion.model_id == model_id
+        ).order_by(ModelVersion.download_date.desc()).first()
+        revision = version.commit_hash if version else None
+        session_options = optimize_data.onnx_session.dict() if optimize_data.onnx_session else None
+        
         # ONNX ile optimize et
-        result = model_optimizer.optimize_with_onnx(
-            model_path=model.model_path,
-            model_id=model.model_id,
-            gpu_index=gpu_index
-        )
+        def run(progress) -> Dict[str, Any]:
+            return model_optimizer.optimize_with_onnx(
+                model_path=model_path,
+                model_id=model_id,
+                gpu_index=gpu_index,
+                reservation=reservation,
+                progress=progress,
+                revision=revision,
+                quantize=optimize_data.quantize,
+                use_fp16=optimize_data.use_fp16,
+                session_options=session_options
+            )
     else:
         # Normal yükleme ve optimizasyon
-        result = model_optimizer.load_model(
-            model_path=model.model_path,
-            model_id=model.model_id,
-            gpu_index=gpu_index,
-            quantize=optimize_data.quantize,
-            use_fp16=optimize_data.use_fp16
+        def run(progress) -> Dict[str, Any]:
+            return model_optimizer.load_model(
+                model_path=model_path,
+                model_id=model_id,
+                gpu_index=gpu_index,
+                quantize=optimize_data.quantize,
+                use_fp16=optimize_data.use_fp16,
+                reservation=reservation,
+                progress=progress,
+                task=task
+            )
+    
+    job = job_queue.submit(
+        "onnx" if optimize_data.use_onnx else "load",
+        run,
+        model_id=model_id,
+        owner_id=current_user.id
+    )
+    
+    # Kuyruk doluysa rezervasyonu geri ver
+    if job is None:
+        gpu_manager.reservations.release(reservation)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="İş kuyruğu dolu, daha sonra tekrar deneyin"
+        )
+    
+    return _job_accepted(
+        job,
+        "Model yükleme işi kuyruğa alındı",
+        model_id=model_id,
+        gpu_index=gpu_index,
+        min_memory_mb=min_memory,
+        memory_estimate=estimate
+    )
+
+@router.put("/{model_id}/pin", response_model=Dict[str, Any])
+async def pin_model(
+    model_id: str = Path(...),
+    pinned: bool = Query(True, description="False ise sabitleme kaldırılır"),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db_session),
+    model_optimizer: ModelOptimizer = Depends(get_model_optimizer)
+) -> Any:
+    """
+    Yüklü bir modeli otomatik tahliyeye karşı sabitler veya sabitlemeyi kaldırır
+    
+    Args:
+        model_id: Model ID
+        pinned: Sabitlensin mi
+        current_user: Geçerli kullanıcı
+        db: Veritabanı oturumu
+        model_optimizer: Model optimizer
+        
+    Returns:
+        Dict[str, Any]: Sonuç
+        
+    Raises:
+        HTTPException: Model bulunamazsa, erişim izni yoksa veya model yüklü değilse
+    """
+    model = db.query(ModelMetadata).filter(ModelMetadata.model_id == model_id).first()
+    
+    if not model:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Model bulunamadı: {model_id}"
+        )
+    
+    if model.owner_id != current_user.id and not model.is_public:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Bu modele erişim izniniz yok"
+        )
+    
+    if not model_optimizer.residency.pin(model_id, pinned):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Model bellekte bulunamadı: {model_id}"
         )
     
-    # Başarısızsa hata ver
-    if not result.get("success"):
+    return {
+        "success": True,
+        "message": f"Model {'sabitlendi' if pinned else 'sabitlemesi kaldırıldı'}: {model_id}",
+        "model_id": model_id,
+        "pinned": pinned
+    }
+
+@router.post("/{model_id}/infer", response_model=Dict[str, Any])
+async def infer_model(
+    inference_data: ModelInferenceRequest,
+    model_id: str = Path(...),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db_session),
+    inference: InferenceService = Depends(get_inference_service)
+) -> Any:
+    """
+    Yüklü bir modeli verilen metinlerle çalıştırır
+    
+    Eşzamanlı istekler model başına toplanır ve tek bir dolgulu ileri
+    geçişte çalıştırılır; her istek kendi girdilerinin çıktılarını alır.
+    Çıktının biçimi modelin görevine (ModelMetadata.task) göre değişir:
+    gömme, sınıf etiketleri, token etiketleri, maske tahminleri veya üretilen metin.
+    
+    Args:
+        inference_data: Girdi metinleri
+        model_id: Model ID
+        current_user: Geçerli kullanıcı
+        db: Veritabanı oturumu
+        inference: Çıkarım servisi
+        
+    Returns:
+        Dict[str, Any]: Girdi başına çıktılar
+        
+    Raises:
+        HTTPException: Model bulunamazsa, erişim izni yoksa, model yüklü değilse,
+            zaman aşımında veya çıkarım başarısız olursa
+    """
+    # Modeli bul
+    model = db.query(ModelMetadata).filter(ModelMetadata.model_id == model_id).first()
+    
+    if not model:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Model bulunamadı: {model_id}"
+        )
+    
+    # Erişim kontrolü
+    if model.owner_id != current_user.id and not model.is_public:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Bu modele erişim izniniz yok"
+        )
+    
+    start_time = time.time()
+    
+    try:
+        # Token uzunluğu ölçümü (tokenizer) olay döngüsü dışında yapılır
+        future = await run_in_threadpool(inference.submit, model_id, inference_data.inputs)
+    except KeyError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Model bellekte değil, önce /models/{model_id}/optimize ile yükleyin"
+        )
+    
+    # Toplayıcı thread'ini olay döngüsünü bloklamadan bekle
+    try:
+        result = await asyncio.wait_for(asyncio.wrap_future(future), timeout=settings.INFERENCE_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Çıkarım zaman aşımına uğradı"
+        )
+    except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=result.get("message", "Model optimizasyonu başarısız oldu")
+            detail=f"Çıkarım hatası: {str(e)}"
+        )
+    
+    return {
+        "success": True,
+        "model_id": model_id,
+        "replica_id": result["replica_id"],
+        "outputs": result["outputs"],
+        "batch_size": result["batch_size"],
+        "latency_ms": (time.time() - start_time) * 1000
+    }
+
+@router.get("/{model_id}/buckets", response_model=Dict[str, Any])
+async def get_inference_buckets(
+    model_id: str = Path(...),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db_session),
+    inference: InferenceService = Depends(get_inference_service)
+) -> Any:
+    """
+    Modelin çıkarım uzunluk kovalarını ve dolgu istatistiklerini döndürür
+    
+    Args:
+        model_id: Model ID
+        current_user: Geçerli kullanıcı
+        db: Veritabanı oturumu
+        inference: Çıkarım servisi
+        
+    Returns:
+        Dict[str, Any]: Kova sınırları, toplu iş sayıları ve dolgu oranı
+        
+    Raises:
+        HTTPException: Model bulunamazsa veya erişim izni yoksa
+    """
+    model = db.query(ModelMetadata).filter(ModelMetadata.model_id == model_id).first()
+    
+    if not model:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Model bulunamadı: {model_id}"
+        )
+    
+    if model.owner_id != current_user.id and not model.is_public:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Bu modele erişim izniniz yok"
+        )
+    
+    return inference.stats(model_id)
+
+@router.put("/{model_id}/buckets", response_model=Dict[str, Any])
+async def set_inference_buckets(
+    buckets_data: ModelLengthBucketsRequest,
+    model_id: str = Path(...),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db_session),
+    inference: InferenceService = Depends(get_inference_service)
+) -> Any:
+    """
+    Modelin çıkarım uzunluk kovası sınırlarını değiştirir
+    
+    Args:
+        buckets_data: Kova üst sınırları (token)
+        model_id: Model ID
+        current_user: Geçerli kullanıcı
+        db: Veritabanı oturumu
+        inference: Çıkarım servisi
+        
+    Returns:
+        Dict[str, Any]: Sonuç ve yeni sınırlar
+        
+    Raises:
+        HTTPException: Model bulunamazsa veya kullanıcı model sahibi/admin değilse
+    """
+    model = db.query(ModelMetadata).filter(ModelMetadata.model_id == model_id).first()
+    
+    if not model:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Model bulunamadı: {model_id}"
         )
     
-    return result
\ No newline at end of file
+    # Sadece model sahibi veya admin değiştirebilir
+    if model.owner_id != current_user.id and not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Bu modeli değiştirme izniniz yok"
+        )
+    
+    boundaries = inference.set_length_buckets(model_id, buckets_data.boundaries)
+    
+    return {
+        "success": True,
+        "message": "Uzunluk kovaları güncellendi",
+        "model_id": model_id,
+        "length_buckets": boundaries
+    }
+
+@router.get("/{model_id}/replicas", response_model=Dict[str, Any])
+async def get_model_replicas(
+    model_id: str = Path(...),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db_session),
+    model_optimizer: ModelOptimizer = Depends(get_model_optimizer),
+    inference: InferenceService = Depends(get_inference_service)
+) -> Any:
+    """
+    Modelin yüklü ve yüklenmekte olan replikalarını ve kuyruk derinliklerini döndürür
+    
+    Args:
+        model_id: Model ID
+        current_user: Geçerli kullanıcı
+        db: Veritabanı oturumu
+        model_optimizer: Model optimizer
+        inference: Çıkarım servisi
+        
+    Returns:
+        Dict[str, Any]: Replika listesi
+        
+    Raises:
+        HTTPException: Model bulunamazsa veya erişim izni yoksa
+    """
+    model = db.query(ModelMetadata).filter(ModelMetadata.model_id == model_id).first()
+    
+    if not model:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Model bulunamadı: {model_id}"
+        )
+    
+    if model.owner_id != current_user.id and not model.is_public:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Bu modele erişim izniniz yok"
+        )
+    
+    return _replica_status(model_id, model_optimizer, inference)
+
+@router.put("/{model_id}/replicas", response_model=Dict[str, Any])
+async def scale_model_replicas(
+    replicas_data: ModelReplicasRequest,
+    response: Response,
+    model_id: str = Path(...),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db_session),
+    gpu_manager: GPUManager = Depends(get_gpu_manager),
+    model_optimizer: ModelOptimizer = Depends(get_model_optimizer),
+    inference: InferenceService = Depends(get_inference_service),
+    job_queue: JobQueue = Depends(get_job_queue)
+) -> Any:
+    """
+    Modelin replika sayısını ayarlar
+    
+    Küçültmede önce yüklenmekte olan replikaların yüklemesi iptal edilir,
+    sonra yüklü replikalar (en yüksek numaralılar) hizmetten çekilip arka
+    plan işinde boşaltılır (202). Eksik replikalar için her biri farklı, modelin replikası olmayan bir GPU'da
+    rezervasyon alınır ve yükleme arka plan işi olarak başlatılır (202).
+    
+    Args:
+        replicas_data: Hedef replika sayısı ve yükleme ayarları
+        response: HTTP yanıtı (iş başlatılırsa durum kodu 202 yapılır)
+        model_id: Model ID
+        current_user: Geçerli kullanıcı
+        db: Veritabanı oturumu
+        gpu_manager: GPU yöneticisi
+        model_optimizer: Model optimizer
+        inference: Çıkarım servisi
+        job_queue: İş kuyruğu
+        
+    Returns:
+        Dict[str, Any]: Boşaltılan replikalar, başlatılan yükleme işleri ve güncel replikalar
+        
+    Raises:
+        HTTPException: Model bulunamazsa, kullanıcı model sahibi/admin değilse, iş
+            kuyruğu doluysa veya yeni replika için hiç uygun GPU yoksa
+    """
+    model = db.query(ModelMetadata).filter(ModelMetadata.model_id == model_id).first()
+    
+    if not model:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Model bulunamadı: {model_id}"
+        )
+    
+    # Sadece model sahibi veya admin ölçekleyebilir
+    if model.owner_id != current_user.id and not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Bu modeli ölçekleme izniniz yok"
+        )
+    
+    target = replicas_data.count
+    current = model_optimizer.replica_gpus(model_id)
+    
+    # Küçültme: önce yüklenmekte olan replikaların yüklemesi iptal edilir, sonra yüklü
+    # olanlar sondan; boşaltma (model lock'u, CPU'ya kopya, gc) arka plan işinde yapılır
+    jobs = []
+    cancelled, removing = model_optimizer.drop_replicas(model_id, len(current) - target)
+    if removing:
+        def remove(progress, removing=removing) -> Dict[str, Any]:
+            results = [model_optimizer.remove_replica(model_id, replica_id) for replica_id in removing]
+            return {
+                "success": all(result["success"] for result in results),
+                "message": f"{sum(result['success'] for result in results)}/{len(results)} replika boşaltıldı",
+                "results": results
+            }
+        
+        job = job_queue.submit("replica-remove", remove, model_id=model_id, owner_id=current_user.id)
+        
+        # Kuyruk doluysa boşaltılacak replikalar hizmette kalır
+        if job is None:
+            model_optimizer.keep_replicas(removing)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="İş kuyruğu dolu, daha sonra tekrar deneyin"
+            )
+        jobs.append(_job_accepted(job, "Replika boşaltma işi kuyruğa alındı", replica_ids=removing))
+    
+    # Büyütme: her yeni replika, replika taşımayan farklı bir GPU'ya
+    missing = target - len(current)
+    if missing > 0:
+        min_memory = replicas_data.min_memory_mb or math.ceil(
+            await run_in_threadpool(
+                model_optimizer.estimate_memory_mb,
+                model.model_path,
+                use_fp16=replicas_data.use_fp16,
+                quantization=quantization_scheme(replicas_data.quantize)
+            )
+        )
+        busy_gpus = {gpu_index for gpu_index in current.values() if gpu_index is not None}
+        model_path = model.model_path
+        task = model.task
+        
+        for _ in range(missing):
+            reservation = gpu_manager.reserve_gpu(memory_mb=min_memory, owner=model_id, exclude=busy_gpus)
+            if reservation is None:
+                break
+            
+            replica_id = model_optimizer.claim_replica(model_id, reservation.gpu_index)
+            
+            def run(progress, replica_id=replica_id, reservation=reservation) -> Dict[str, Any]:
+                return model_optimizer.add_replica(
+                    model_path,
+                    replica_id,
+                    quantize=replicas_data.quantize,
+                    use_fp16=replicas_data.use_fp16,
+                    reservation=reservation,
+                    progress=progress,
+                    task=task
+                )
+            
+            job = job_queue.submit("replica", run, model_id=model_id, owner_id=current_user.id)
+            
+            # Kuyruk doluysa rezervasyonu ve replika anahtarını geri ver
+            if job is None:
+                gpu_manager.reservations.release(reservation)
+                model_optimizer.release_replica(replica_id)
+                break
+            
+            busy_gpus.add(reservation.gpu_index)
+            jobs.append(_job_accepted(job, "Replika yükleme işi kuyruğa alındı",
+                                      replica_id=replica_id, gpu_index=reservation.gpu_index))
+        
+        if not jobs:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Yeni replika için en az {min_memory} MB belleğe sahip, replikası olmayan GPU bulunamadı"
+            )
+    
+    if jobs:
+        response.status_code = status.HTTP_202_ACCEPTED
+    
+    complete = missing <= 0 or len(jobs) == missing
+    return dict(
+        _replica_status(model_id, model_optimizer, inference),
+        success=complete,
+        message=(
+            f"Replika sayısı {target} olarak ayarlanıyor" if complete
+            else f"Sadece {len(jobs)} yeni replika başlatılabildi (uygun GPU veya kuyruk yeri yok)"
+        ),
+        target=target,
+        removed=cancelled + removing,
+        cancelled=cancelled,
+        jobs=jobs
+    )
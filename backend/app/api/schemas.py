@@ -4,7 +4,7 @@ API endpoint'leri için şemalar
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, conint
 
 # Model şemaları
 class ModelBase(BaseModel):
@@ -53,6 +53,15 @@ class ModelVersionResponse(ModelVersionBase):
     class Config:
         orm_mode = True
 
+class OnnxSessionOptions(BaseModel):
+    """ONNX oturum ayarları şeması (verilmeyenler sunucu ayarlarından)"""
+    pool_size: Optional[conint(ge=1, le=16)] = None
+    intra_op_threads: Optional[conint(ge=0)] = None
+    inter_op_threads: Optional[conint(ge=0)] = None
+    execution_mode: Optional[str] = Field(None, regex="^(sequential|parallel)$")
+    cpu_mem_arena: Optional[bool] = None
+    arena_extend_strategy: Optional[str] = Field(None, regex="^(kNextPowerOfTwo|kSameAsRequested)$")
+
 class ModelOptimizeRequest(BaseModel):
     """Model optimizasyon şeması"""
     gpu_index: Optional[int] = None
@@ -60,6 +69,36 @@ class ModelOptimizeRequest(BaseModel):
     use_fp16: bool = True
     use_onnx: bool = False
     min_memory_mb: Optional[int] = None
+    sharded: bool = False  # Katmanları GPU'lara böl, sığmayanı CPU'ya taşı
+    gpu_indices: Optional[List[int]] = None  # Parçalı yüklemede kullanılacak GPU'lar (verilmezse tümü)
+    onnx_session: Optional[OnnxSessionOptions] = None  # ONNX oturum havuzu ve iş parçacığı ayarları
+
+class ModelPlacementItem(BaseModel):
+    """Toplu yerleşimdeki model şeması"""
+    model_id: str
+    memory_mb: Optional[int] = Field(None, ge=1)
+
+class ModelPlacementRequest(BaseModel):
+    """Toplu model yerleşim şeması"""
+    models: List[ModelPlacementItem]
+    apply: bool = False
+    quantize: bool = True
+    use_fp16: bool = True
+
+class ModelInferenceRequest(BaseModel):
+    """Model çıkarım isteği şeması"""
+    inputs: List[str] = Field(..., min_items=1)
+
+class ModelLengthBucketsRequest(BaseModel):
+    """Çıkarım uzunluk kovası sınırları şeması (boş liste kovalamayı kapatır)"""
+    boundaries: List[conint(ge=1)]
+
+class ModelReplicasRequest(BaseModel):
+    """Model replika sayısı şeması (0 tüm replikaları boşaltır)"""
+    count: conint(ge=0, le=64)
+    quantize: bool = True
+    use_fp16: bool = True
+    min_memory_mb: Optional[int] = None
 
 # GPU şemaları
 class GPUInfo(BaseModel):
@@ -72,6 +111,38 @@ class GPUInfo(BaseModel):
     temperature_c: float
     utilization_percent: float
 
+class GPUHistorySeries(BaseModel):
+    """GPU metrik serisi şeması"""
+    min: List[float]
+    mean: List[float]
+    max: List[float]
+
+class GPUHistoryResponse(BaseModel):
+    """GPU geçmişi yanıt şeması"""
+    gpu_index: int
+    window: float
+    step: float
+    resolution: str
+    partial: bool = False  # Son nokta henüz kapanmamış rollup kovasını içeriyor mu
+    timestamps: List[float]
+    used_memory_mb: GPUHistorySeries
+    utilization_percent: GPUHistorySeries
+    temperature_c: GPUHistorySeries
+
+class GPUProcessModel(BaseModel):
+    """GPU sürecine atanmış model şeması"""
+    model_id: str
+    memory_mb: float
+
+class GPUProcessInfo(BaseModel):
+    """GPU süreç bilgi şeması"""
+    gpu_index: int
+    pid: int
+    process_name: Optional[str] = None
+    used_memory_mb: float
+    owner: str
+    models: List[GPUProcessModel] = []
+
 class GPUUsageCreate(BaseModel):
     """GPU kullanım oluşturma şeması"""
     gpu_index: int
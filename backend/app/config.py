@@ -46,9 +46,56 @@ class Settings(BaseSettings):
     # Model ayarları
     MODEL_STORAGE_PATH: str = os.getenv("MODEL_STORAGE_PATH", "/app/models")
     DEFAULT_HF_CACHE_DIR: str = os.getenv("HF_CACHE_DIR", "/app/cache")
+    ONNX_OPSET_VERSION: int = 12  # ONNX dışa aktarım opset'i (dışa aktarım önbellek anahtarına dahil)
+    ONNX_VARIANT_MIN_COSINE: float = 0.99  # FP16/INT8 varyantının sunulması için FP32 çıktısına en düşük kosinüs benzerliği
+    ONNX_VARIANT_BENCHMARK_RUNS: int = 5  # Varyant gecikmesi ölçülürken kalibrasyon kümesinin tekrar sayısı
+    ONNX_SESSION_POOL_SIZE: int = 2  # Model başına eşzamanlı ONNX çağrısı (CPU'da her biri ayrı oturum, GPU'da tek oturum)
+    ONNX_INTRA_OP_THREADS: int = 0  # Oturum başına operatör içi iş parçacığı (0: çekirdek sayısı / havuz boyutu)
+    ONNX_INTER_OP_THREADS: int = 1  # Operatörler arası iş parçacığı (sadece parallel kipte kullanılır)
+    ONNX_EXECUTION_MODE: str = "sequential"  # sequential veya parallel
+    ONNX_CPU_MEM_ARENA: bool = True  # CPU bellek havuzu (arena) açık mı
+    ONNX_ARENA_EXTEND_STRATEGY: str = "kSameAsRequested"  # CUDA bellek havuzu büyüme stratejisi (kNextPowerOfTwo, kSameAsRequested)
     
     # GPU ayarları
     MIN_FREE_GPU_MEMORY_MB: int = 2000  # Minimum 2GB boş GPU belleği gerekli
+    MODEL_ACTIVATION_OVERHEAD_FRACTION: float = 0.2  # Bellek tahmininde ağırlıklara eklenen aktivasyon payı
+    MODEL_MEMORY_OVERHEAD_MB: int = 512  # Bellek tahminine eklenen sabit pay (CUDA bağlamı, çalışma alanı)
+    PLACEMENT_HEADROOM_MB: int = 512  # Toplu yerleşimde her GPU'da boş bırakılan bellek
+    MODEL_RESIDENCY_BUDGET_FRACTION: float = 0.9  # GPU belleğinin yüklü modellere ayrılan oranı
+    MODEL_RESIDENCY_BUDGET_MB: int = 0  # GPU başına sabit model bütçesi (0: orana göre)
+    MODEL_FAST_LOADER: bool = True  # safetensors varsa mmap ile doğrudan cihaza yükle (quantization'da parça parça quantize eder)
+    MODEL_QUANTIZATION: str = "int8"  # quantize=True isteklerinde uygulanan şema: int8, int4 veya none
+    MODEL_QUANTIZATION_GROUP_SIZE: int = 128  # INT4 ağırlık quantization'ında ölçek grubu (giriş boyutu)
+    MODEL_SHARD_CPU_MEMORY_MB: int = 32768  # Parçalı yüklemede GPU'lara sığmayıp CPU'ya taşabilecek ağırlık (0: kapalı)
+    MODEL_WARM_CACHE_MB: int = 16384  # GPU'dan boşaltılan modeller için ana bellek bütçesi (0: kapalı)
+    MODEL_WARM_PIN_MEMORY: bool = True  # Sıcak modellerin belleği sabitlensin (pinned) mi
+    GPU_TELEMETRY_PROVIDER: str = os.getenv("GPU_TELEMETRY_PROVIDER", "auto")  # auto, nvml, cli, cli-stream, simulated
+    GPU_SAMPLE_INTERVAL_SECONDS: float = 5.0  # Arka plan GPU örnekleme aralığı
+    GPU_HISTORY_RAW_SECONDS: int = 900  # Tam çözünürlükte tutulan geçmiş (15 dakika)
+    GPU_HISTORY_ROLLUP_STEP_SECONDS: int = 60  # Rollup kova genişliği
+    GPU_HISTORY_ROLLUP_SECONDS: int = 24 * 3600  # Rollup olarak tutulan geçmiş (24 saat)
+    GPU_SCORE_LOOKBACK_SECONDS: int = 300  # GPU skorlamasında kullanılan geçmiş
+    GPU_SCORE_EWMA_ALPHA: float = 0.2  # Kullanım EWMA katsayısı (örnek başına)
+    GPU_SCORE_HORIZON_SECONDS: int = 120  # Bellek büyümesinin öngörüldüğü süre
+    
+    # Arka plan iş kuyruğu ayarları (model yükleme / ONNX dönüşümü)
+    JOB_WORKERS: int = 2  # Aynı anda çalışan iş sayısı
+    JOB_QUEUE_MAX_PENDING: int = 32  # Bekleyen + çalışan en fazla iş
+    JOB_RETENTION_SECONDS: int = 3600  # Biten işlerin sorgulanabilir kaldığı süre
+    
+    # Çıkarım (inference) toplama ayarları
+    INFERENCE_MAX_BATCH_SIZE: int = 32  # Tek ileri geçişte en fazla girdi
+    INFERENCE_MAX_WAIT_MS: float = 5.0  # İlk istekten sonra toplu iş için beklenen süre
+    INFERENCE_MAX_SEQUENCE_LENGTH: int = 512  # Girdiler bu token sayısında kesilir
+    INFERENCE_LENGTH_BUCKETS: List[int] = [16, 32, 64, 128, 256, 512]  # Uzunluk kovası üst sınırları (token)
+    INFERENCE_TIMEOUT_SECONDS: float = 30.0  # İstek başına en uzun bekleme
+    INFERENCE_TOP_K: int = 5  # Sınıflandırma ve maske doldurmada döndürülen en olası sonuç sayısı
+    INFERENCE_MAX_NEW_TOKENS: int = 64  # Metin üretiminde girdi başına en fazla yeni token
+    
+    # Simüle GPU filosu ayarları (GPU_TELEMETRY_PROVIDER=simulated)
+    SIMULATED_GPU_COUNT: int = 8
+    SIMULATED_GPU_SEED: int = 0
+    SIMULATED_GPU_TRACE_LENGTH: int = 720  # İzler bu kadar örnekten sonra başa döner
     
     # Loglama ayarları
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
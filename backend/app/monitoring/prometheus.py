@@ -2,9 +2,10 @@
 Prometheus metrik toplama modülü
 """
 import time
-from typing import Callable, Dict
+from typing import Any, Callable, Dict, Iterator, Optional
 from fastapi import FastAPI, Request, Response
 from prometheus_client import Counter, Histogram, Gauge, Summary, REGISTRY, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, Metric
 from starlette.middleware.base import BaseHTTPMiddleware
 
 # Metrikler
@@ -38,16 +39,24 @@ MODEL_LOAD_LATENCY = Summary(
     ['model_id', 'gpu_index']
 )
 
-GPU_MEMORY_USED = Gauge(
-    'gpu_memory_used_bytes',
-    'GPU memory used in bytes',
-    ['gpu_index']
+INFERENCE_BATCH_SIZE = Histogram(
+    'inference_batch_size',
+    'Number of inputs per inference forward pass',
+    ['model_id'],
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128)
 )
 
-GPU_UTILIZATION = Gauge(
-    'gpu_utilization_percent',
-    'GPU utilization percentage',
-    ['gpu_index']
+INFERENCE_LATENCY = Histogram(
+    'inference_batch_duration_seconds',
+    'Time taken by one batched inference forward pass',
+    ['model_id']
+)
+
+INFERENCE_PADDING_RATIO = Histogram(
+    'inference_padding_ratio',
+    'Fraction of pad tokens in one batched inference forward pass',
+    ['model_id'],
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
 )
 
 DATABASE_QUERY_COUNT = Counter(
@@ -62,6 +71,170 @@ DATABASE_QUERY_LATENCY = Histogram(
     ['operation', 'table']
 )
 
+MB = 1024 * 1024
+
+class GPUStateCollector:
+    """
+    GPU ve model durumunu scrape anında okuyan Prometheus collector'ı
+    
+    Değerler istek yolunda gauge'lara yazılmaz; her scrape'te GPU yöneticisinin
+    son anlık görüntüsü ve model optimizer'ın kaydı okunur. Böylece /gpus'a
+    istek gelmese de metrikler güncel kalır.
+    """
+    
+    def __init__(self, gpu_manager: Any, model_optimizer: Any):
+        """
+        Collector'ı oluştur
+        
+        Args:
+            gpu_manager: GPUManager örneği
+            model_optimizer: ModelOptimizer örneği
+        """
+        self.gpu_manager = gpu_manager
+        self.model_optimizer = model_optimizer
+    
+    def _families(self) -> Dict[str, Metric]:
+        return {
+            "used": GaugeMetricFamily('gpu_memory_used_bytes', 'GPU memory used in bytes', labels=['gpu_index']),
+            "free": GaugeMetricFamily('gpu_memory_free_bytes', 'GPU memory free in bytes', labels=['gpu_index']),
+            "total": GaugeMetricFamily('gpu_memory_total_bytes', 'GPU memory total in bytes', labels=['gpu_index']),
+            "reserved": GaugeMetricFamily(
+                'gpu_memory_reserved_bytes', 'GPU memory reserved for in-flight model loads in bytes', labels=['gpu_index']
+            ),
+            "utilization": GaugeMetricFamily(
+                'gpu_utilization_percent', 'GPU utilization percentage', labels=['gpu_index']
+            ),
+            "temperature": GaugeMetricFamily(
+                'gpu_temperature_celsius', 'GPU temperature in degrees Celsius', labels=['gpu_index']
+            ),
+            "foreign": GaugeMetricFamily(
+                'gpu_foreign_process_memory_bytes',
+                'GPU memory used by processes outside this server in bytes',
+                labels=['gpu_index']
+            ),
+            "timestamp": GaugeMetricFamily(
+                'gpu_snapshot_timestamp_seconds', 'Unix time of the GPU measurement being exported'
+            ),
+            "loaded": GaugeMetricFamily('models_loaded', 'Number of loaded models', labels=['gpu_index']),
+            "info": GaugeMetricFamily(
+                'model_loaded_info', 'Loaded model placement', labels=['model_id', 'gpu_index', 'device', 'backend']
+            ),
+            "weights": GaugeMetricFamily(
+                'model_weights_bytes', 'Size of loaded model weights in bytes', labels=['model_id', 'gpu_index']
+            ),
+            "model_memory": GaugeMetricFamily(
+                'model_gpu_memory_bytes', 'GPU memory attributed to a loaded model in bytes', labels=['model_id', 'gpu_index']
+            ),
+            "residency_hits": CounterMetricFamily(
+                'model_residency_hits', 'Model load requests served by an already resident model'
+            ),
+            "residency_misses": CounterMetricFamily(
+                'model_residency_misses', 'Model load requests that required loading the model'
+            ),
+            "residency_evictions": CounterMetricFamily(
+                'model_residency_evictions', 'Models evicted to stay within the GPU memory budget'
+            ),
+            "warm_bytes": GaugeMetricFamily(
+                'model_warm_cache_bytes', 'Host memory held by models in the warm tier in bytes'
+            ),
+            "warm_hits": CounterMetricFamily(
+                'model_warm_cache_hits', 'Model loads served from the host memory warm tier'
+            ),
+        }
+    
+    def describe(self) -> Iterator[Metric]:
+        # Kayıt sırasında collect() çağrılmasın diye yalnızca isimler bildirilir
+        return iter(self._families().values())
+    
+    def collect(self) -> Iterator[Metric]:
+        families = self._families()
+        
+        snapshot = self.gpu_manager.snapshot
+        pending = self.gpu_manager.reservations.pending_mb()
+        
+        for gpu in snapshot.gpus:
+            gpu_index = str(gpu['index'])
+            families["used"].add_metric([gpu_index], gpu['used_memory_mb'] * MB)
+            families["free"].add_metric([gpu_index], gpu['free_memory_mb'] * MB)
+            families["total"].add_metric([gpu_index], gpu['total_memory_mb'] * MB)
+            families["reserved"].add_metric([gpu_index], pending.get(gpu['index'], 0.0) * MB)
+            families["utilization"].add_metric([gpu_index], gpu['utilization_percent'])
+            families["temperature"].add_metric([gpu_index], gpu['temperature_c'])
+        
+        if snapshot.gpus:
+            families["timestamp"].add_metric([], snapshot.timestamp)
+        
+        # Kayıt yükleme/boşaltma sırasında değişebilir; models_lock altında kopyalanır
+        # (model başına yükleme lock'u beklenmez)
+        with self.model_optimizer.models_lock:
+            configs = [
+                dict(config) for config in self.model_optimizer.model_configs.values()
+                if config["model_id"] in self.model_optimizer.models
+            ]
+        
+        loaded: Dict[str, int] = {}
+        for config in configs:
+            gpu_index = str(config.get("gpu_index"))
+            loaded[gpu_index] = loaded.get(gpu_index, 0) + 1
+            families["info"].add_metric(
+                [config["model_id"], gpu_index, str(config.get("device")), "onnx" if config.get("onnx") else "torch"],
+                1
+            )
+            if config.get("weights_mb") is not None:
+                families["weights"].add_metric([config["model_id"], gpu_index], config["weights_mb"] * MB)
+        
+        for gpu_index, count in loaded.items():
+            families["loaded"].add_metric([gpu_index], count)
+        
+        model_memory, foreign_memory = self.model_optimizer.model_memory_usage(list(snapshot.processes))
+        for (model_id, gpu_index), memory_mb in model_memory.items():
+            families["model_memory"].add_metric([model_id, str(gpu_index)], memory_mb * MB)
+        for gpu_index, memory_mb in foreign_memory.items():
+            families["foreign"].add_metric([str(gpu_index)], memory_mb * MB)
+        
+        residency = self.model_optimizer.residency
+        families["residency_hits"].add_metric([], residency.hits)
+        families["residency_misses"].add_metric([], residency.misses)
+        families["residency_evictions"].add_metric([], residency.evictions)
+        
+        warm_cache = self.model_optimizer.warm_cache
+        families["warm_bytes"].add_metric([], warm_cache.used_mb() * MB)
+        families["warm_hits"].add_metric([], warm_cache.hits)
+        
+        return iter(families.values())
+
+_state_collector: Optional[GPUStateCollector] = None
+
+def register_state_collector(gpu_manager: Any, model_optimizer: Any) -> GPUStateCollector:
+    """
+    GPU/model durum collector'ını varsayılan Prometheus kaydına ekler
+    
+    Önceden eklenmiş bir collector varsa yenisiyle değiştirilir.
+    
+    Args:
+        gpu_manager: GPUManager örneği
+        model_optimizer: ModelOptimizer örneği
+        
+    Returns:
+        GPUStateCollector: Kaydedilen collector
+    """
+    global _state_collector
+    
+    unregister_state_collector()
+    _state_collector = GPUStateCollector(gpu_manager, model_optimizer)
+    REGISTRY.register(_state_collector)
+    return _state_collector
+
+def unregister_state_collector() -> None:
+    """
+    GPU/model durum collector'ını Prometheus kaydından çıkarır
+    """
+    global _state_collector
+    
+    if _state_collector is not None:
+        REGISTRY.unregister(_state_collector)
+        _state_collector = None
+
 class PrometheusMiddleware(BaseHTTPMiddleware):
     """
     FastAPI middleware that collects Prometheus metrics
@@ -163,23 +336,26 @@ def record_model_load(model_id: str, gpu_index: int, quantized: bool, fp16: bool
         gpu_index=gpu_index
     ).observe(duration)
 
-def update_gpu_metrics(gpu_metrics: Dict[int, Dict]) -> None:
+def record_inference_batch(
+    model_id: str,
+    batch_size: int,
+    duration: float,
+    padding_ratio: Optional[float] = None
+) -> None:
     """
-    GPU metriklerini güncelle
+    Toplu çıkarım metriği kaydet
     
     Args:
-        gpu_metrics: GPU metrikleri
+        model_id: Model ID
+        batch_size: İleri geçişteki girdi sayısı
+        duration: İleri geçiş süresi (saniye)
+        padding_ratio: Dolgu token'larının oranı (biliniyorsa)
     """
-    for gpu_index, metrics in gpu_metrics.items():
-        # Bellek kullanımı (byte)
-        GPU_MEMORY_USED.labels(gpu_index=gpu_index).set(
-            metrics.get('used_memory_mb', 0) * 1024 * 1024
-        )
-        
-        # Kullanım yüzdesi
-        GPU_UTILIZATION.labels(gpu_index=gpu_index).set(
-            metrics.get('utilization_percent', 0)
-        )
+    INFERENCE_BATCH_SIZE.labels(model_id=model_id).observe(batch_size)
+    INFERENCE_LATENCY.labels(model_id=model_id).observe(duration)
+    
+    if padding_ratio is not None:
+        INFERENCE_PADDING_RATIO.labels(model_id=model_id).observe(padding_ratio)
 
 def record_db_query(operation: str, table: str, duration: float) -> None:
     """
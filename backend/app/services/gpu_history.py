@@ -0,0 +1,344 @@
+"""
+GPU telemetri geçmişini sabit bellekli numpy halka tamponlarında tutan servis
+"""
+import logging
+import math
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Geçmişi tutulan GPU metrikleri (sütun sırası)
+HISTORY_METRICS = ("used_memory_mb", "utilization_percent", "temperature_c")
+
+class RingBuffer:
+    """
+    Zaman damgalı satırları tutan sabit kapasiteli numpy halka tamponu
+    """
+    
+    def __init__(self, capacity: int, width: int):
+        """
+        Halka tamponunu oluştur
+        
+        Args:
+            capacity: Maksimum satır sayısı
+            width: Satır başına sütun sayısı
+        """
+        self.capacity = max(1, int(capacity))
+        self.timestamps = np.zeros(self.capacity, dtype=np.float64)
+        self.values = np.zeros((self.capacity, width), dtype=np.float32)
+        self.size = 0
+        self._head = 0  # Bir sonraki yazma konumu
+    
+    def append(self, timestamp: float, row: np.ndarray) -> None:
+        """
+        Yeni satır ekler, tampon doluysa en eski satırın üzerine yazar
+        
+        Args:
+            timestamp: Zaman damgası (epoch saniye)
+            row: Sütun değerleri
+        """
+        self.timestamps[self._head] = timestamp
+        self.values[self._head] = row
+        self._head = (self._head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+    
+    @property
+    def latest_timestamp(self) -> Optional[float]:
+        """
+        En son eklenen satırın zaman damgası
+        """
+        if not self.size:
+            return None
+        return float(self.timestamps[(self._head - 1) % self.capacity])
+    
+    def since(self, start_time: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Belirli bir zamandan sonraki (hariç) satırları kronolojik sırada döndürür
+        
+        Args:
+            start_time: Başlangıç zamanı (epoch saniye)
+        
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (zaman damgaları, değerler)
+        """
+        if self.size < self.capacity:
+            timestamps = self.timestamps[:self.size]
+            values = self.values[:self.size]
+        else:
+            order = np.r_[self._head:self.capacity, 0:self._head]
+            timestamps = self.timestamps[order]
+            values = self.values[order]
+        
+        first = int(np.searchsorted(timestamps, start_time, side="right"))
+        return timestamps[first:], values[first:]
+
+class _GPUSeries:
+    """
+    Tek bir GPU için ham ve toplulaştırılmış (rollup) geçmiş
+    """
+    
+    def __init__(self, raw_capacity: int, rollup_capacity: int, rollup_step: float):
+        metric_count = len(HISTORY_METRICS)
+        self.raw = RingBuffer(raw_capacity, metric_count)
+        
+        # Rollup sütunları: min (3), ortalama (3), maks (3), örnek sayısı (1)
+        self.rollup = RingBuffer(rollup_capacity, metric_count * 3 + 1)
+        self.rollup_step = rollup_step
+        
+        # Açık (henüz tamamlanmamış) rollup kovası
+        self._bucket_start: Optional[float] = None
+        self._bucket_min = np.full(metric_count, np.inf, dtype=np.float64)
+        self._bucket_max = np.full(metric_count, -np.inf, dtype=np.float64)
+        self._bucket_sum = np.zeros(metric_count, dtype=np.float64)
+        self._bucket_count = 0
+    
+    def add(self, timestamp: float, row: np.ndarray) -> None:
+        self.raw.append(timestamp, row)
+        
+        bucket_start = math.floor(timestamp / self.rollup_step) * self.rollup_step
+        if self._bucket_start is not None and bucket_start != self._bucket_start:
+            self._flush_bucket()
+        
+        self._bucket_start = bucket_start
+        np.minimum(self._bucket_min, row, out=self._bucket_min)
+        np.maximum(self._bucket_max, row, out=self._bucket_max)
+        self._bucket_sum += row
+        self._bucket_count += 1
+    
+    def open_bucket(self) -> Optional[Tuple[float, np.ndarray]]:
+        """
+        Henüz kapanmamış rollup kovası (rollup satırlarıyla aynı düzende)
+        
+        Returns:
+            Optional[Tuple[float, np.ndarray]]: (kova başlangıcı, satır) veya kova boşsa None
+        """
+        if not self._bucket_count:
+            return None
+        
+        mean = self._bucket_sum / self._bucket_count
+        return self._bucket_start, np.concatenate((self._bucket_min, mean, self._bucket_max, [self._bucket_count]))
+    
+    def _flush_bucket(self) -> None:
+        current = self.open_bucket()
+        if current is None:
+            return
+        
+        self.rollup.append(*current)
+        
+        self._bucket_min.fill(np.inf)
+        self._bucket_max.fill(-np.inf)
+        self._bucket_sum.fill(0.0)
+        self._bucket_count = 0
+
+class GPUHistoryStore:
+    """
+    GPU başına sabit bellekli telemetri geçmişi
+    
+    Son birkaç dakikayı tam çözünürlükte, daha eski verileri ise min/ortalama/maks
+    rollup'ları olarak saklar. Bellek kullanımı süreç ömründen bağımsızdır.
+    """
+    
+    def __init__(
+        self,
+        sample_interval: float,
+        raw_seconds: Optional[int] = None,
+        rollup_step_seconds: Optional[int] = None,
+        rollup_seconds: Optional[int] = None
+    ):
+        """
+        Geçmiş deposunu oluştur
+        
+        Args:
+            sample_interval: Örnekleme aralığı (saniye)
+            raw_seconds: Tam çözünürlükte tutulacak süre (saniye)
+            rollup_step_seconds: Rollup kova genişliği (saniye)
+            rollup_seconds: Rollup olarak tutulacak süre (saniye)
+        """
+        self.sample_interval = sample_interval
+        self.raw_seconds = raw_seconds or settings.GPU_HISTORY_RAW_SECONDS
+        self.rollup_step = rollup_step_seconds or settings.GPU_HISTORY_ROLLUP_STEP_SECONDS
+        self.rollup_seconds = rollup_seconds or settings.GPU_HISTORY_ROLLUP_SECONDS
+        
+        self._raw_capacity = math.ceil(self.raw_seconds / sample_interval) + 1
+        self._rollup_capacity = math.ceil(self.rollup_seconds / self.rollup_step) + 1
+        
+        self._series: Dict[int, _GPUSeries] = {}
+        self._lock = threading.Lock()
+    
+    def record(self, timestamp: float, gpus: List[Dict[str, Any]]) -> None:
+        """
+        Bir GPU ölçümünü geçmişe ekler
+        
+        Args:
+            timestamp: Ölçüm zamanı (epoch saniye)
+            gpus: GPU bilgileri listesi
+        """
+        with self._lock:
+            for gpu in gpus:
+                series = self._series.get(gpu["index"])
+                if series is None:
+                    series = _GPUSeries(self._raw_capacity, self._rollup_capacity, self.rollup_step)
+                    self._series[gpu["index"]] = series
+                
+                row = np.array([gpu.get(metric, 0.0) for metric in HISTORY_METRICS], dtype=np.float64)
+                series.add(timestamp, row)
+    
+    def gpu_indices(self) -> List[int]:
+        """
+        Geçmişi bulunan GPU indekslerini döndürür
+        
+        Returns:
+            List[int]: GPU indeksleri
+        """
+        return sorted(self._series)
+    
+    def trend(
+        self,
+        gpu_index: int,
+        lookback: Optional[float] = None,
+        alpha: Optional[float] = None
+    ) -> Optional[Dict[str, float]]:
+        """
+        Son ölçümlerden kullanım/bellek EWMA'sı ve bellek büyüme eğimini hesaplar
+        
+        Args:
+            gpu_index: GPU indeksi
+            lookback: Geriye bakılacak süre (saniye)
+            alpha: EWMA yumuşatma katsayısı (örnek başına, 0-1)
+        
+        Returns:
+            Optional[Dict[str, float]]: utilization_ewma, used_memory_ewma_mb ve
+            memory_slope_mb_per_s; yeterli örnek yoksa None
+        """
+        lookback = lookback or settings.GPU_SCORE_LOOKBACK_SECONDS
+        alpha = alpha or settings.GPU_SCORE_EWMA_ALPHA
+        
+        with self._lock:
+            series = self._series.get(gpu_index)
+            if series is None or series.raw.size < 3:
+                return None
+            
+            now = series.raw.latest_timestamp
+            timestamps, values = series.raw.since(now - lookback)
+            timestamps = timestamps.copy()
+            values = values.astype(np.float64)
+        
+        if len(timestamps) < 3:
+            return None
+        
+        # Üstel ağırlıklar: en yeni örnek en ağır
+        weights = (1.0 - alpha) ** np.arange(len(timestamps) - 1, -1, -1)
+        weights /= weights.sum()
+        ewma = weights @ values
+        
+        # Bellek büyüme eğimi (MB/sn): en küçük kareler doğrusu
+        elapsed = timestamps - timestamps[0]
+        used_memory = values[:, HISTORY_METRICS.index("used_memory_mb")]
+        slope = float(np.polyfit(elapsed, used_memory, 1)[0]) if elapsed[-1] > 0 else 0.0
+        
+        return {
+            "utilization_ewma": float(ewma[HISTORY_METRICS.index("utilization_percent")]),
+            "used_memory_ewma_mb": float(ewma[HISTORY_METRICS.index("used_memory_mb")]),
+            "memory_slope_mb_per_s": slope,
+        }
+    
+    def query(
+        self,
+        gpu_index: int,
+        window: float,
+        step: Optional[float] = None,
+        now: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Bir GPU'nun geçmişini istenen pencere ve adımla döndürür
+        
+        Pencere tam çözünürlükte tutulan süreye sığıyorsa ham veri, aksi
+        halde rollup verisi kullanılır.
+        
+        Args:
+            gpu_index: GPU indeksi
+            window: Geriye dönük pencere (saniye)
+            step: Örnek aralığı (saniye); verilmezse kaynağın kendi çözünürlüğü
+            now: Pencerenin bitiş zamanı (varsayılan: son ölçüm)
+        
+        Returns:
+            Optional[Dict[str, Any]]: Kova bitiş zamanları ve metrik başına min/ortalama/maks serileri;
+                partial True ise son nokta henüz kapanmamış rollup kovasını içerir
+        """
+        with self._lock:
+            series = self._series.get(gpu_index)
+            if series is None:
+                return None
+            
+            use_raw = window <= self.raw_seconds
+            
+            if now is None:
+                now = series.raw.latest_timestamp or 0.0
+            start_time = now - window
+            
+            metric_count = len(HISTORY_METRICS)
+            partial = False
+            if use_raw:
+                timestamps, values = series.raw.since(start_time)
+                mins = means = maxs = values
+                counts = np.ones(len(timestamps), dtype=np.float64)
+                native_step = self.sample_interval
+            else:
+                timestamps, values = series.rollup.since(start_time)
+                
+                # Son rollup_step saniyelik veri açık kovada; o da dahil edilir
+                current = series.open_bucket()
+                if current is not None and start_time < current[0] <= now:
+                    timestamps = np.append(timestamps, current[0])
+                    values = np.vstack((values, current[1]))
+                    partial = True
+                
+                mins = values[:, :metric_count]
+                means = values[:, metric_count:2 * metric_count]
+                maxs = values[:, 2 * metric_count:3 * metric_count]
+                counts = values[:, 3 * metric_count].astype(np.float64)
+                native_step = self.rollup_step
+            
+            step = max(float(step or native_step), native_step)
+            
+            if len(timestamps):
+                # Örnekleri (başlangıç, bitiş] aralıklı adım kovalarına ayır;
+                # kovalar sıralı olduğu için reduceat kullanılabilir
+                bins = np.ceil((timestamps - start_time) / step).astype(np.int64) - 1
+                bin_ids, starts = np.unique(bins, return_index=True)
+                
+                weights = counts[:, None]
+                out_min = np.minimum.reduceat(mins, starts, axis=0)
+                out_max = np.maximum.reduceat(maxs, starts, axis=0)
+                out_mean = (
+                    np.add.reduceat(means * weights, starts, axis=0)
+                    / np.add.reduceat(weights, starts, axis=0)
+                )
+                out_timestamps = start_time + (bin_ids + 1) * step
+            else:
+                out_min = out_max = out_mean = np.zeros((0, metric_count))
+                out_timestamps = np.zeros(0)
+        
+        result = {
+            "gpu_index": gpu_index,
+            "window": window,
+            "step": step,
+            "resolution": "raw" if use_raw else "rollup",
+            "partial": partial,
+            "timestamps": out_timestamps.tolist(),
+        }
+        
+        for column, metric in enumerate(HISTORY_METRICS):
+            result[metric] = {
+                "min": out_min[:, column].tolist(),
+                "mean": out_mean[:, column].tolist(),
+                "max": out_max[:, column].tolist(),
+            }
+        
+        return result
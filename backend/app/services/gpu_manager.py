@@ -2,203 +2,232 @@
 GPU kaynaklarını yöneten ve izleyen servis
 """
 import logging
-import subprocess
 import json
-from typing import Dict, List, Optional, Union, Any
+from typing import Collection, Dict, List, NamedTuple, Optional, Tuple, Union, Any
 import time
 import threading
 
 import numpy as np
-try:
-    import nvidia_smi
-    NVIDIA_SMI_AVAILABLE = True
-except ImportError:
-    NVIDIA_SMI_AVAILABLE = False
-    logging.warning("nvidia-smi Python bağlantısı yüklenemedi. GPU izleme kısıtlı olabilir.")
 
 from app.config import get_settings
-from app.monitoring.prometheus import update_gpu_metrics
+from app.services.gpu_history import GPUHistoryStore
+from app.services.gpu_providers import GPUTelemetryProvider, SimulatedGPUProvider, create_provider
+from app.services.gpu_reservations import GPUReservation, GPUReservationLedger
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
+class GPUSnapshot(NamedTuple):
+    """
+    GPU ölçümlerinin değiştirilemez anlık görüntüsü
+    """
+    timestamp: float
+    gpus: Tuple[Dict[str, Any], ...]
+    processes: Tuple[Dict[str, Any], ...] = ()
+
 class GPUManager:
     """
     GPU kaynaklarını yöneten ve izleyen sınıf
     """
     
-    def __init__(self):
+    def __init__(
+        self,
+        update_interval: Optional[float] = None,
+        provider: Optional[GPUTelemetryProvider] = None
+    ):
         """
         GPU yöneticisini başlat
+        
+        Args:
+            update_interval: Örnekleme aralığı (saniye)
+            provider: Telemetri sağlayıcısı (verilmezse GPU_TELEMETRY_PROVIDER ayarına göre oluşturulur)
         """
-        self.last_update = 0
-        self.gpu_cache = []
-        self.update_interval = 5  # saniye
+        self.update_interval = update_interval or settings.GPU_SAMPLE_INTERVAL_SECONDS
+        
+        # Son ölçüm; okuyucular lock almadan referansı okur, yazıcı tek seferde değiştirir
+        self._snapshot = GPUSnapshot(timestamp=0.0, gpus=())
         
-        # GPU izleme için lock mekanizması
+        # Sabit bellekli telemetri geçmişi
+        self.history = GPUHistoryStore(sample_interval=self.update_interval)
+        
+        # Devam eden yüklemeler için bellek rezervasyonları
+        self.reservations = GPUReservationLedger()
+        
+        # Sadece ölçüm yapan (yazan) taraf için lock mekanizması
         self._lock = threading.RLock()
         
-        # NVIDIA-SMI başlat (eğer varsa)
-        if NVIDIA_SMI_AVAILABLE:
-            try:
-                nvidia_smi.nvmlInit()
-                logger.info("NVIDIA Management Library başarıyla başlatıldı")
-            except Exception as e:
-                logger.error(f"NVIDIA Management Library başlatılamadı: {e}")
+        # Arka plan örnekleyici
+        self._sampler_thread: Optional[threading.Thread] = None
+        self._sampler_stop = threading.Event()
+        
+        # Telemetri sağlayıcısı (NVML, nvidia-smi veya simülasyon)
+        self.provider = provider or create_provider()
+        logger.info(f"GPU telemetri sağlayıcısı: {self.provider.name}")
     
     def __del__(self):
         """
         Kaynak temizliği
         """
-        if NVIDIA_SMI_AVAILABLE:
+        try:
+            self.provider.close()
+        except:
+            pass
+    
+    @property
+    def snapshot(self) -> GPUSnapshot:
+        """
+        En son yayınlanan GPU anlık görüntüsü
+        """
+        return self._snapshot
+    
+    @property
+    def sampler_running(self) -> bool:
+        """
+        Arka plan örnekleyicinin çalışıp çalışmadığı
+        """
+        return self._sampler_thread is not None and self._sampler_thread.is_alive()
+    
+    def start_sampler(self) -> None:
+        """
+        GPU ölçümlerini sabit aralıklarla yenileyen arka plan thread'ini başlatır
+        """
+        if self.sampler_running:
+            return
+        
+        # İlk anlık görüntüyü hemen al, okuyucular boş liste görmesin
+        self.refresh()
+        
+        self._sampler_stop.clear()
+        self._sampler_thread = threading.Thread(
+            target=self._sampler_loop,
+            name="gpu-sampler",
+            daemon=True
+        )
+        self._sampler_thread.start()
+        logger.info(f"GPU örnekleyici başlatıldı (aralık: {self.update_interval} sn)")
+    
+    def stop_sampler(self) -> None:
+        """
+        Arka plan örnekleyiciyi durdurur
+        """
+        thread = self._sampler_thread
+        if thread is None:
+            return
+        
+        self._sampler_stop.set()
+        thread.join(timeout=self.update_interval + 5)
+        self._sampler_thread = None
+        logger.info("GPU örnekleyici durduruldu")
+    
+    def _sampler_loop(self) -> None:
+        """
+        Örnekleyici thread döngüsü
+        """
+        while not self._sampler_stop.wait(self.update_interval):
             try:
-                nvidia_smi.nvmlShutdown()
-            except:
-                pass
+                self.refresh()
+            except Exception as e:
+                logger.error(f"GPU örnekleme hatası: {e}")
     
     def detect_gpus(self) -> List[Dict[str, Any]]:
         """
         Sistemdeki GPU'ları tespit eder ve bilgilerini döndürür
         
+        Örnekleyici çalışıyorsa NVML çağrısı yapmadan ve lock almadan son
+        anlık görüntüyü döndürür.
+        
         Returns:
             List[Dict[str, Any]]: GPU bilgileri listesi
         """
-        # Cache kontrolü
-        current_time = time.time()
-        if current_time - self.last_update < self.update_interval and self.gpu_cache:
-            return self.gpu_cache
+        snapshot = self._snapshot
+        
+        # Örnekleyici çalışmıyorsa eski önbellek davranışı: süre dolduysa yeniden ölç
+        if not self.sampler_running and (
+            not snapshot.gpus or time.time() - snapshot.timestamp >= self.update_interval
+        ):
+            return self.refresh()
+        
+        return [dict(gpu) for gpu in snapshot.gpus]
+    
+    def refresh(self) -> List[Dict[str, Any]]:
+        """
+        GPU'ları ölçer ve yeni anlık görüntüyü yayınlar
         
+        Returns:
+            List[Dict[str, Any]]: GPU bilgileri listesi
+        """
         with self._lock:
+            current_time = time.time()
+            
             try:
-                gpus = []
-                
-                if NVIDIA_SMI_AVAILABLE:
-                    device_count = nvidia_smi.nvmlDeviceGetCount()
-                    
-                    for i in range(device_count):
-                        handle = nvidia_smi.nvmlDeviceGetHandleByIndex(i)
-                        
-                        # GPU bilgilerini al
-                        name = nvidia_smi.nvmlDeviceGetName(handle).decode('utf-8')
-                        
-                        # Bellek bilgilerini al
-                        memory_info = nvidia_smi.nvmlDeviceGetMemoryInfo(handle)
-                        total_memory_mb = memory_info.total / (1024 * 1024)
-                        used_memory_mb = memory_info.used / (1024 * 1024)
-                        free_memory_mb = memory_info.free / (1024 * 1024)
-                        
-                        # Kullanım bilgilerini al
-                        utilization = nvidia_smi.nvmlDeviceGetUtilizationRates(handle)
-                        gpu_util = utilization.gpu
-                        
-                        # Sıcaklık bilgisini al
-                        temperature = nvidia_smi.nvmlDeviceGetTemperature(handle, nvidia_smi.NVML_TEMPERATURE_GPU)
-                        
-                        gpus.append({
-                            'index': i,
-                            'name': name,
-                            'total_memory_mb': total_memory_mb,
-                            'used_memory_mb': used_memory_mb,
-                            'free_memory_mb': free_memory_mb,
-                            'utilization_percent': float(gpu_util),
-                            'temperature_c': float(temperature),
-                        })
-                
-                # GPU yoksa veya hata oluştuysa komut satırı aracılığıyla dene
-                if not gpus:
-                    gpus = self._detect_gpus_cli()
-                
-                # Cache güncelle
-                self.gpu_cache = gpus
-                self.last_update = current_time
-                
-                # Prometheus metriklerini güncelle
-                self._update_metrics(gpus)
-                
-                return gpus
-                
+                gpus = self._poll_gpus()
             except Exception as e:
                 logger.error(f"GPU tespiti sırasında hata: {e}")
                 
                 # Boş liste yerine en azından bir simüle GPU döndür (geliştirme/test için)
-                if not self.gpu_cache and settings.ENVIRONMENT == 'development':
-                    return [{
-                        'index': 0,
-                        'name': 'Simulated GPU',
-                        'total_memory_mb': 8192.0,
-                        'used_memory_mb': 512.0,
-                        'free_memory_mb': 7680.0,
-                        'utilization_percent': 10.0,
-                        'temperature_c': 50.0,
-                    }]
-                
-                # Cache'de bir şey varsa onu döndür, yoksa boş liste
-                return self.gpu_cache if self.gpu_cache else []
+                if not self._snapshot.gpus and settings.ENVIRONMENT == 'development':
+                    gpus = SimulatedGPUProvider(gpu_count=1).read()
+                else:
+                    # Önceki anlık görüntü varsa onu koru
+                    return [dict(gpu) for gpu in self._snapshot.gpus]
+            
+            # Süreç bilgisi olmadan da cihaz ölçümleri yayınlanabilir
+            try:
+                processes = self._poll_processes()
+            except Exception as e:
+                logger.warning(f"GPU süreç bilgisi alınamadı: {e}")
+                processes = []
+            
+            # Yeni anlık görüntüyü tek atamayla yayınla
+            self._snapshot = GPUSnapshot(
+                timestamp=current_time,
+                gpus=tuple(gpus),
+                processes=tuple(processes)
+            )
+            
+            # Geçmişe ekle
+            self.history.record(current_time, gpus)
+            
+            # Bu ölçüme yansımış tamamlanmış rezervasyonları düş
+            self.reservations.expire_committed(current_time)
+            
+            return [dict(gpu) for gpu in gpus]
     
-    def _detect_gpus_cli(self) -> List[Dict[str, Any]]:
+    def _poll_gpus(self) -> List[Dict[str, Any]]:
         """
-        Komut satırı aracılığıyla GPU'ları tespit eder
+        GPU bilgilerini telemetri sağlayıcısından okur
         
         Returns:
-            List[Dict[str, Any]]: GPU bilgileri
+            List[Dict[str, Any]]: GPU bilgileri listesi
         """
-        try:
-            # nvidia-smi komutunu JSON formatında çalıştır
-            result = subprocess.run(
-                ['nvidia-smi', '--query-gpu=index,name,memory.total,memory.used,memory.free,utilization.gpu,temperature.gpu', '--format=csv,noheader,nounits'],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                encoding='utf-8',
-                check=True
-            )
-            
-            gpus = []
-            
-            # Çıktıyı satır satır işle
-            for line in result.stdout.strip().split('\n'):
-                if line:
-                    parts = [part.strip() for part in line.split(',')]
-                    
-                    if len(parts) >= 7:
-                        gpu_index, name, total_mem, used_mem, free_mem, util, temp = parts[:7]
-                        
-                        gpus.append({
-                            'index': int(gpu_index),
-                            'name': name,
-                            'total_memory_mb': float(total_mem),
-                            'used_memory_mb': float(used_mem),
-                            'free_memory_mb': float(free_mem),
-                            'utilization_percent': float(util),
-                            'temperature_c': float(temp),
-                        })
-            
-            return gpus
-            
-        except (subprocess.SubprocessError, ValueError, IndexError) as e:
-            logger.error(f"CLI ile GPU tespiti sırasında hata: {e}")
-            return []
+        return self.provider.read()
     
-    def _update_metrics(self, gpus: List[Dict[str, Any]]) -> None:
+    def _poll_processes(self) -> List[Dict[str, Any]]:
         """
-        GPU metriklerini Prometheus'a gönderir
+        GPU süreçlerini telemetri sağlayıcısından okur
         
-        Args:
-            gpus: GPU bilgileri listesi
+        Returns:
+            List[Dict[str, Any]]: Süreç bilgileri listesi
         """
-        # GPU metriklerini güncelle
-        try:
-            # GPU verilerini GPU indekslerine göre eşleştir
-            metrics = {}
-            for gpu in gpus:
-                metrics[gpu['index']] = {
-                    'used_memory_mb': gpu['used_memory_mb'],
-                    'utilization_percent': gpu['utilization_percent']
-                }
+        return self.provider.read_processes()
+    
+    def get_gpu_processes(self, gpu_index: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        GPU'larda çalışan hesaplama süreçlerini döndürür
+        
+        Args:
+            gpu_index: Sadece bu GPU'nun süreçleri (verilmezse tümü)
             
-            # Prometheus metriklerini güncelle
-            update_gpu_metrics(metrics)
-        except Exception as e:
-            logger.error(f"GPU metrikleri güncellenirken hata: {e}")
+        Returns:
+            List[Dict[str, Any]]: Süreç bilgileri listesi
+        """
+        # Gerekirse ölçümü yenile (detect_gpus ile aynı önbellek kuralları)
+        self.detect_gpus()
+        
+        return [
+            dict(process) for process in self._snapshot.processes
+            if gpu_index is None or process['gpu_index'] == gpu_index
+        ]
     
     def get_gpu_memory_info(self, gpu_index: int) -> Optional[Dict[str, Any]]:
         """
@@ -223,22 +252,44 @@ class GPUManager:
         
         return None
     
-    def select_optimal_gpu(self, min_memory_mb: int = 2000) -> Optional[int]:
+    def select_optimal_gpu(
+        self,
+        min_memory_mb: int = 2000,
+        exclude: Optional[Collection[int]] = None
+    ) -> Optional[int]:
         """
         En uygun GPU'yu seçer
         
+        Boş bellekten devam eden yüklemelerin rezervasyonları düşülür; böylece
+        aynı anda gelen yüklemeler aynı GPU'ya yığılmaz. Geçmiş varsa anlık
+        kullanım yerine kullanım EWMA'sı (anlık değerden düşük değilse) ve
+        bellek büyüme eğiminden öngörülen boş bellek kullanılır.
+        
         Args:
             min_memory_mb: Gereken minimum bellek miktarı (MB)
+            exclude: Seçilmeyecek GPU'lar (ör. modelin replikalarını taşıyanlar)
             
         Returns:
             Optional[int]: GPU indeksi veya hiçbiri
         """
-        gpus = self.detect_gpus()
+        gpus = [gpu for gpu in self.detect_gpus() if not exclude or gpu['index'] not in exclude]
         
         # GPU yoksa None döndür
         if not gpus:
             return None
         
+        # Rezerve edilmiş belleği boş bellekten düş
+        pending = self.reservations.pending_mb()
+        for gpu in gpus:
+            gpu['free_memory_mb'] = gpu['free_memory_mb'] - pending.get(gpu['index'], 0.0)
+            
+            # Eğilim: sık sık tepe yapan veya belleği büyüyen GPU'lar cezalandırılır
+            trend = self.history.trend(gpu['index'])
+            if trend:
+                gpu['utilization_percent'] = max(gpu['utilization_percent'], trend['utilization_ewma'])
+                growth_mb = max(0.0, trend['memory_slope_mb_per_s']) * settings.GPU_SCORE_HORIZON_SECONDS
+                gpu['free_memory_mb'] = gpu['free_memory_mb'] - growth_mb
+        
         # Yeterli belleğe sahip GPU'ları filtrele
         available_gpus = [
             gpu for gpu in gpus 
@@ -267,4 +318,39 @@ class GPUManager:
             scored_gpus.append((gpu['index'], total_score))
         
         # En yüksek skorlu GPU'yu döndür
-        return max(scored_gpus, key=lambda x: x[1])[0] if scored_gpus else None
\ No newline at end of file
+        return max(scored_gpus, key=lambda x: x[1])[0] if scored_gpus else None
+    
+    def reserve_gpu(
+        self,
+        memory_mb: float,
+        owner: Optional[str] = None,
+        gpu_index: Optional[int] = None,
+        exclude: Optional[Collection[int]] = None
+    ) -> Optional[GPUReservation]:
+        """
+        GPU seçer ve seçimle aynı anda bellek rezervasyonu yapar
+        
+        Args:
+            memory_mb: Ayrılacak bellek (MB)
+            owner: Rezervasyon sahibi (ör. model ID)
+            gpu_index: Belirli bir GPU isteniyorsa indeksi; verilmezse en uygun GPU seçilir
+            exclude: En uygun GPU seçilirken dışarıda bırakılacak GPU'lar
+            
+        Returns:
+            Optional[GPUReservation]: Rezervasyon veya uygun GPU yoksa (istenen GPU'da
+                rezervasyonlar düşüldükten sonra yeterli boş bellek yoksa) None
+        """
+        with self.reservations.lock:
+            if gpu_index is None:
+                gpu_index = self.select_optimal_gpu(min_memory_mb=memory_mb, exclude=exclude)
+                
+                if gpu_index is None:
+                    return None
+            else:
+                # Belirli GPU da defterden geçer: devam eden yüklemelerin rezervasyonları düşülür
+                gpu = next((gpu for gpu in self.detect_gpus() if gpu['index'] == gpu_index), None)
+                pending = self.reservations.pending_mb().get(gpu_index, 0.0)
+                if gpu is None or gpu['free_memory_mb'] - pending < memory_mb:
+                    return None
+            
+            return self.reservations.reserve(gpu_index, memory_mb, owner)
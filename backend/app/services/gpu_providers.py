@@ -0,0 +1,639 @@
+"""
+GPU telemetri sağlayıcıları (NVML, nvidia-smi CLI ve simüle GPU filosu)
+"""
+import logging
+import math
+import subprocess
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+try:
+    import nvidia_smi
+    NVIDIA_SMI_AVAILABLE = True
+except ImportError:
+    NVIDIA_SMI_AVAILABLE = False
+    logging.warning("nvidia-smi Python bağlantısı yüklenemedi. GPU izleme kısıtlı olabilir.")
+
+from app.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# nvidia-smi sorgu alanları (sıra CSV sütun sırasıdır)
+NVIDIA_SMI_QUERY_FIELDS = [
+    "index", "name", "memory.total", "memory.used", "memory.free", "utilization.gpu", "temperature.gpu"
+]
+
+def parse_nvidia_smi_csv_line(line: str) -> Optional[Dict[str, Any]]:
+    """
+    nvidia-smi CSV çıktısının tek satırını GPU bilgisine dönüştürür
+    
+    Args:
+        line: "index, name, total, used, free, util, temp" biçiminde satır
+    
+    Returns:
+        Optional[Dict[str, Any]]: GPU bilgisi veya satır geçersizse None
+    """
+    parts = [part.strip() for part in line.split(',')]
+    
+    if len(parts) < 7:
+        return None
+    
+    gpu_index, name, total_mem, used_mem, free_mem, util, temp = parts[:7]
+    
+    return {
+        'index': int(gpu_index),
+        'name': name,
+        'total_memory_mb': float(total_mem),
+        'used_memory_mb': float(used_mem),
+        'free_memory_mb': float(free_mem),
+        'utilization_percent': float(util),
+        'temperature_c': float(temp),
+    }
+
+class GPUTelemetryProvider:
+    """
+    GPU telemetri sağlayıcıları için temel sınıf
+    """
+    
+    name = "base"
+    
+    def read(self) -> List[Dict[str, Any]]:
+        """
+        Tüm GPU'ların güncel ölçümlerini döndürür
+        
+        Returns:
+            List[Dict[str, Any]]: GPU bilgileri listesi
+        """
+        raise NotImplementedError
+    
+    def read_processes(self) -> List[Dict[str, Any]]:
+        """
+        GPU'larda çalışan hesaplama süreçlerini ve bellek kullanımlarını döndürür
+        
+        Returns:
+            List[Dict[str, Any]]: {"gpu_index", "pid", "process_name", "used_memory_mb"} listesi
+        """
+        return []
+    
+    def close(self) -> None:
+        """
+        Sağlayıcının kaynaklarını serbest bırakır
+        """
+        pass
+
+class NVMLProvider(GPUTelemetryProvider):
+    """
+    NVIDIA Management Library üzerinden ölçüm yapan sağlayıcı
+    """
+    
+    name = "nvml"
+    
+    def __init__(self):
+        """
+        NVML'i başlat
+        """
+        self.initialized = False
+        
+        if NVIDIA_SMI_AVAILABLE:
+            try:
+                nvidia_smi.nvmlInit()
+                self.initialized = True
+                logger.info("NVIDIA Management Library başarıyla başlatıldı")
+            except Exception as e:
+                logger.error(f"NVIDIA Management Library başlatılamadı: {e}")
+    
+    def read(self) -> List[Dict[str, Any]]:
+        gpus = []
+        
+        # nvmlInit başarısız olduysa NVML çağrıları NVMLError_Uninitialized fırlatır
+        if not NVIDIA_SMI_AVAILABLE or not self.initialized:
+            return gpus
+        
+        device_count = nvidia_smi.nvmlDeviceGetCount()
+        
+        for i in range(device_count):
+            handle = nvidia_smi.nvmlDeviceGetHandleByIndex(i)
+            
+            # GPU bilgilerini al
+            name = nvidia_smi.nvmlDeviceGetName(handle).decode('utf-8')
+            
+            # Bellek bilgilerini al
+            memory_info = nvidia_smi.nvmlDeviceGetMemoryInfo(handle)
+            total_memory_mb = memory_info.total / (1024 * 1024)
+            used_memory_mb = memory_info.used / (1024 * 1024)
+            free_memory_mb = memory_info.free / (1024 * 1024)
+            
+            # Kullanım bilgilerini al
+            utilization = nvidia_smi.nvmlDeviceGetUtilizationRates(handle)
+            gpu_util = utilization.gpu
+            
+            # Sıcaklık bilgisini al
+            temperature = nvidia_smi.nvmlDeviceGetTemperature(handle, nvidia_smi.NVML_TEMPERATURE_GPU)
+            
+            gpus.append({
+                'index': i,
+                'name': name,
+                'total_memory_mb': total_memory_mb,
+                'used_memory_mb': used_memory_mb,
+                'free_memory_mb': free_memory_mb,
+                'utilization_percent': float(gpu_util),
+                'temperature_c': float(temperature),
+            })
+        
+        return gpus
+    
+    def read_processes(self) -> List[Dict[str, Any]]:
+        processes = []
+        
+        if not NVIDIA_SMI_AVAILABLE or not self.initialized:
+            return processes
+        
+        for i in range(nvidia_smi.nvmlDeviceGetCount()):
+            handle = nvidia_smi.nvmlDeviceGetHandleByIndex(i)
+            
+            for process in nvidia_smi.nvmlDeviceGetComputeRunningProcesses(handle):
+                # Bazı sürücülerde (ör. MIG, konteyner) kullanılan bellek raporlanmaz
+                used_bytes = process.usedGpuMemory or 0
+                
+                try:
+                    process_name = nvidia_smi.nvmlSystemGetProcessName(process.pid)
+                    if isinstance(process_name, bytes):
+                        process_name = process_name.decode('utf-8')
+                except Exception:
+                    process_name = None
+                
+                processes.append({
+                    'gpu_index': i,
+                    'pid': int(process.pid),
+                    'process_name': process_name,
+                    'used_memory_mb': used_bytes / (1024 * 1024),
+                })
+        
+        return processes
+    
+    def close(self) -> None:
+        if self.initialized:
+            try:
+                nvidia_smi.nvmlShutdown()
+            except:
+                pass
+            self.initialized = False
+
+class NvidiaSmiCLIProvider(GPUTelemetryProvider):
+    """
+    nvidia-smi komut satırı aracı üzerinden ölçüm yapan sağlayıcı
+    """
+    
+    name = "cli"
+    
+    def read(self) -> List[Dict[str, Any]]:
+        try:
+            # nvidia-smi komutunu CSV formatında çalıştır
+            result = subprocess.run(
+                ['nvidia-smi', f'--query-gpu={",".join(NVIDIA_SMI_QUERY_FIELDS)}', '--format=csv,noheader,nounits'],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                encoding='utf-8',
+                check=True
+            )
+            
+            gpus = []
+            
+            # Çıktıyı satır satır işle
+            for line in result.stdout.strip().split('\n'):
+                if line:
+                    gpu = parse_nvidia_smi_csv_line(line)
+                    if gpu is not None:
+                        gpus.append(gpu)
+            
+            return gpus
+        
+        except (subprocess.SubprocessError, ValueError, IndexError) as e:
+            logger.error(f"CLI ile GPU tespiti sırasında hata: {e}")
+            return []
+
+class NvidiaSmiStreamParser:
+    """
+    nvidia-smi -lms CSV akışını satır satır ölçüm karelerine (frame) ayıran ayrıştırıcı
+    
+    Akışta kare ayracı yoktur; GPU indeksinin başa dönmesi yeni bir karenin
+    başladığını gösterir. İlk kare bu şekilde tespit edildikten sonra GPU
+    sayısı bilinir ve sonraki kareler son satırları gelir gelmez yayınlanır.
+    """
+    
+    def __init__(self, gpu_count: Optional[int] = None):
+        """
+        Ayrıştırıcıyı oluştur
+        
+        Args:
+            gpu_count: Kare başına GPU sayısı (verilmezse akıştan öğrenilir)
+        """
+        self.gpu_count = gpu_count
+        self._frame: List[Dict[str, Any]] = []
+    
+    def feed(self, line: str) -> List[List[Dict[str, Any]]]:
+        """
+        Bir satırı işler ve tamamlanan kareleri döndürür
+        
+        Args:
+            line: nvidia-smi CSV satırı
+        
+        Returns:
+            List[List[Dict[str, Any]]]: Tamamlanan kareler (çoğunlukla boş veya tek kare)
+        """
+        line = line.strip()
+        if not line:
+            return []
+        
+        try:
+            gpu = parse_nvidia_smi_csv_line(line)
+        except (ValueError, IndexError):
+            gpu = None
+        
+        if gpu is None:
+            logger.debug(f"Geçersiz nvidia-smi satırı atlandı: {line!r}")
+            return []
+        
+        completed = []
+        
+        # İndeks başa döndü: önceki kare bitti
+        if self._frame and gpu['index'] <= self._frame[-1]['index']:
+            if self.gpu_count is None:
+                self.gpu_count = len(self._frame)
+                completed.append(self._frame)
+            else:
+                # Satır kaybı olan eksik kareyi yayınlama
+                logger.debug(f"Eksik nvidia-smi karesi atlandı ({len(self._frame)}/{self.gpu_count} GPU)")
+            self._frame = []
+        
+        self._frame.append(gpu)
+        
+        if self.gpu_count is not None and len(self._frame) >= self.gpu_count:
+            completed.append(self._frame)
+            self._frame = []
+        
+        return completed
+
+class NvidiaSmiStreamProvider(GPUTelemetryProvider):
+    """
+    Sürekli çalışan tek bir nvidia-smi -lms sürecinin çıktısını okuyan sağlayıcı
+    
+    Her ölçümde yeni süreç başlatmak yerine nvidia-smi kendi döngüsünde CSV
+    üretir; arka plan thread'i akışı ayrıştırır ve son kareyi yayınlar.
+    Süreç ölürse artan bekleme süreleriyle yeniden başlatılır; son kare
+    STALE_AFTER_INTERVALS ölçüm aralığından eskiyse okuma hata verir.
+    """
+    
+    name = "cli-stream"
+    
+    # Yeniden başlatma bekleme süreleri (saniye)
+    RESTART_BACKOFF_INITIAL = 1.0
+    RESTART_BACKOFF_MAX = 30.0
+    
+    # İlk okumada ilk karenin beklenme süresi (saniye)
+    FIRST_FRAME_TIMEOUT = 5.0
+    
+    # Son kare bu kadar ölçüm aralığı (en az STALE_AFTER_MIN saniye) eskiyse bayat sayılır
+    STALE_AFTER_INTERVALS = 3
+    STALE_AFTER_MIN = 5.0
+    
+    def __init__(self, interval_ms: Optional[int] = None, command: Optional[List[str]] = None):
+        """
+        Akış sağlayıcısını oluştur (süreç ilk okumada başlatılır)
+        
+        Args:
+            interval_ms: nvidia-smi ölçüm aralığı (milisaniye)
+            command: Çalıştırılacak komut (test için; verilmezse nvidia-smi)
+        """
+        self.interval_ms = interval_ms or int(settings.GPU_SAMPLE_INTERVAL_SECONDS * 1000)
+        self.command = command or [
+            'nvidia-smi',
+            f'--query-gpu={",".join(NVIDIA_SMI_QUERY_FIELDS)}',
+            '--format=csv,noheader,nounits',
+            f'--loop-ms={self.interval_ms}',
+        ]
+        
+        self._latest: List[Dict[str, Any]] = []
+        self._latest_at = 0.0
+        self._first_frame = threading.Event()
+        self._stop = threading.Event()
+        self._process: Optional[subprocess.Popen] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.restart_count = 0
+    
+    def _ensure_started(self) -> bool:
+        """
+        Okuyucu thread çalışmıyorsa başlatır
+        
+        Returns:
+            bool: Thread bu çağrıda başlatıldıysa True
+        """
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="nvidia-smi-stream", daemon=True)
+            self._thread.start()
+            return True
+    
+    def _run(self) -> None:
+        """
+        Okuyucu thread döngüsü: süreci başlatır, akışı okur, ölürse yeniden başlatır
+        """
+        backoff = self.RESTART_BACKOFF_INITIAL
+        
+        while not self._stop.is_set():
+            parser = NvidiaSmiStreamParser()
+            received = False
+            process = None
+            
+            try:
+                process = subprocess.Popen(
+                    self.command,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                    encoding='utf-8',
+                    bufsize=1
+                )
+                self._process = process
+                
+                for line in process.stdout:
+                    for frame in parser.feed(line):
+                        # Yeni listeyi tek atamayla yayınla
+                        self._latest = frame
+                        self._latest_at = time.monotonic()
+                        self._first_frame.set()
+                        received = True
+                    
+                    if self._stop.is_set():
+                        break
+            
+            except (OSError, subprocess.SubprocessError) as e:
+                logger.error(f"nvidia-smi akışı başlatılamadı: {e}")
+            
+            finally:
+                self._process = None
+                if process is not None:
+                    self._terminate(process)
+            
+            if self._stop.is_set():
+                break
+            
+            # Kare üretebilen süreç öldüyse hızlı, hiç üretemiyorsa giderek yavaş dene
+            if received:
+                backoff = self.RESTART_BACKOFF_INITIAL
+            
+            self.restart_count += 1
+            logger.warning(f"nvidia-smi akışı sonlandı, {backoff:.0f} sn sonra yeniden başlatılacak")
+            
+            if self._stop.wait(backoff):
+                break
+            backoff = min(backoff * 2, self.RESTART_BACKOFF_MAX)
+    
+    @staticmethod
+    def _terminate(process: subprocess.Popen) -> None:
+        if process.poll() is None:
+            process.terminate()
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        
+        if process.stdout is not None:
+            process.stdout.close()
+    
+    def read(self) -> List[Dict[str, Any]]:
+        """
+        Akıştan yayınlanan son kareyi döndürür
+        
+        Returns:
+            List[Dict[str, Any]]: GPU bilgileri listesi (ilk kare gelmediyse boş)
+        
+        Raises:
+            RuntimeError: Son kare bayatsa (süreç öldü veya kare üretmeden asılı kaldı)
+        """
+        # Sadece başlatan okuma ilk kareyi bekler; sonrakiler son kareyi hemen döndürür
+        if self._ensure_started():
+            self._first_frame.wait(self.FIRST_FRAME_TIMEOUT)
+        
+        latest, latest_at = self._latest, self._latest_at
+        if not latest:
+            return []
+        
+        age = time.monotonic() - latest_at
+        stale_after = max(self.STALE_AFTER_INTERVALS * self.interval_ms / 1000.0, self.STALE_AFTER_MIN)
+        if age > stale_after:
+            # Kare üretmeden asılı kalan süreci sonlandır; okuyucu thread yeniden başlatır
+            process = self._process
+            if process is not None and process.poll() is None:
+                process.terminate()
+            raise RuntimeError(f"nvidia-smi akışı {age:.1f} sn'dir yeni kare üretmedi")
+        
+        return [dict(gpu) for gpu in latest]
+    
+    def close(self) -> None:
+        self._stop.set()
+        
+        # Okuyucu thread'i bloklu okumadan çıkar
+        process = self._process
+        if process is not None and process.poll() is None:
+            process.terminate()
+        
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=5)
+        self._thread = None
+
+class ChainedProvider(GPUTelemetryProvider):
+    """
+    Sırayla sağlayıcıları deneyen ve ilk boş olmayan sonucu döndüren sağlayıcı
+    
+    Hata veren veya boş dönen sağlayıcı atlanır; hiçbiri ölçüm üretemezse son
+    hata yeniden fırlatılır (hata yoksa boş liste döner).
+    """
+    
+    def __init__(self, providers: Sequence[GPUTelemetryProvider]):
+        self.providers = list(providers)
+        self.name = "+".join(provider.name for provider in self.providers)
+        
+        # Son başarılı ölçümü yapan sağlayıcı; süreç bilgisi de ondan okunur
+        self._active: Optional[GPUTelemetryProvider] = None
+    
+    def read(self) -> List[Dict[str, Any]]:
+        error: Optional[Exception] = None
+        
+        for provider in self.providers:
+            try:
+                gpus = provider.read()
+            except Exception as e:
+                logger.warning(f"GPU sağlayıcısı '{provider.name}' okunamadı, sıradaki deneniyor: {e}")
+                error = e
+                continue
+            
+            if gpus:
+                self._active = provider
+                return gpus
+        
+        self._active = None
+        if error is not None:
+            raise error
+        return []
+    
+    def read_processes(self) -> List[Dict[str, Any]]:
+        if self._active is None:
+            return []
+        return self._active.read_processes()
+    
+    def close(self) -> None:
+        for provider in self.providers:
+            provider.close()
+
+class SimulatedGPUProvider(GPUTelemetryProvider):
+    """
+    Deterministik, senaryolu bellek ve kullanım izleriyle GPU filosu simüle eden sağlayıcı
+    
+    Her read() çağrısı izlerde bir adım ilerler; aynı tohum ve GPU sayısı
+    her zaman aynı ölçüm dizisini üretir. CPU-only makinelerde yüzlerce
+    GPU ile yerleştirme ve telemetri yük testleri için kullanılır.
+    """
+    
+    name = "simulated"
+    
+    # (model adı, toplam bellek MB) - GPU'lara sırayla atanır
+    GPU_MODELS = [
+        ("Simulated A100 80GB", 81920.0),
+        ("Simulated A10 24GB", 24576.0),
+        ("Simulated V100 32GB", 32768.0),
+        ("Simulated T4 16GB", 16384.0),
+    ]
+    
+    def __init__(
+        self,
+        gpu_count: Optional[int] = None,
+        seed: Optional[int] = None,
+        trace_length: Optional[int] = None,
+        memory_traces: Optional[np.ndarray] = None,
+        utilization_traces: Optional[np.ndarray] = None
+    ):
+        """
+        Simüle GPU filosunu oluştur
+        
+        Args:
+            gpu_count: GPU sayısı
+            seed: Rastgele sayı üreteci tohumu
+            trace_length: Üretilen izlerin adım sayısı (sonra başa döner)
+            memory_traces: Senaryolu kullanılan bellek izleri (MB), şekil (gpu_count, adım)
+            utilization_traces: Senaryolu kullanım izleri (%), şekil (gpu_count, adım)
+        """
+        self.gpu_count = gpu_count if gpu_count is not None else settings.SIMULATED_GPU_COUNT
+        self.seed = seed if seed is not None else settings.SIMULATED_GPU_SEED
+        trace_length = trace_length or settings.SIMULATED_GPU_TRACE_LENGTH
+        
+        self.names = [self.GPU_MODELS[i % len(self.GPU_MODELS)][0] for i in range(self.gpu_count)]
+        self.total_memory_mb = np.array(
+            [self.GPU_MODELS[i % len(self.GPU_MODELS)][1] for i in range(self.gpu_count)]
+        )
+        
+        rng = np.random.default_rng(self.seed)
+        steps = np.arange(trace_length)
+        
+        if utilization_traces is None:
+            # Periyodik yük + gürültü: her GPU'nun taban yükü, genliği ve periyodu farklı
+            base = rng.uniform(5, 60, size=(self.gpu_count, 1))
+            amplitude = rng.uniform(0, 35, size=(self.gpu_count, 1))
+            period = rng.integers(6, 120, size=(self.gpu_count, 1))
+            phase = rng.uniform(0, 2 * math.pi, size=(self.gpu_count, 1))
+            noise = rng.normal(0, 3, size=(self.gpu_count, trace_length))
+            utilization_traces = base + amplitude * np.sin(2 * math.pi * steps / period + phase) + noise
+        self.utilization_traces = np.clip(np.asarray(utilization_traces, dtype=np.float64), 0, 100)
+        
+        if memory_traces is None:
+            # Yavaş rastgele yürüyüş: toplam belleğin %5-%70'i arasında
+            start = rng.uniform(0.05, 0.6, size=(self.gpu_count, 1))
+            drift = np.cumsum(rng.normal(0, 0.005, size=(self.gpu_count, trace_length)), axis=1)
+            memory_traces = np.clip(start + drift, 0.05, 0.7) * self.total_memory_mb[:, None]
+        self.memory_traces = np.minimum(np.asarray(memory_traces, dtype=np.float64), self.total_memory_mb[:, None])
+        
+        self.temperature_traces = 30 + self.utilization_traces * 0.5
+        
+        # Her GPU'daki kullanılan bellek iki yabancı süreç arasında paylaştırılır
+        self.process_shares = rng.uniform(0.2, 0.8, size=self.gpu_count)
+        
+        self.step = 0
+        self._last_used: Optional[np.ndarray] = None
+    
+    def read(self) -> List[Dict[str, Any]]:
+        column = self.step % self.utilization_traces.shape[1]
+        self.step += 1
+        
+        used = self.memory_traces[:, column % self.memory_traces.shape[1]]
+        self._last_used = used
+        free = self.total_memory_mb - used
+        utilization = self.utilization_traces[:, column]
+        temperature = self.temperature_traces[:, column]
+        
+        return [
+            {
+                'index': i,
+                'name': self.names[i],
+                'total_memory_mb': float(self.total_memory_mb[i]),
+                'used_memory_mb': float(used[i]),
+                'free_memory_mb': float(free[i]),
+                'utilization_percent': float(utilization[i]),
+                'temperature_c': float(temperature[i]),
+            }
+            for i in range(self.gpu_count)
+        ]
+    
+    def read_processes(self) -> List[Dict[str, Any]]:
+        if self._last_used is None:
+            return []
+        
+        processes = []
+        for i in range(self.gpu_count):
+            share = float(self.process_shares[i])
+            for slot, fraction in enumerate((share, 1.0 - share)):
+                processes.append({
+                    'gpu_index': i,
+                    'pid': 100000 + i * 2 + slot,
+                    'process_name': f"simulated-worker-{i}-{slot}",
+                    'used_memory_mb': float(self._last_used[i]) * fraction,
+                })
+        
+        return processes
+
+def create_provider(name: Optional[str] = None) -> GPUTelemetryProvider:
+    """
+    Ayarlara göre GPU telemetri sağlayıcısını oluşturur
+    
+    Args:
+        name: Sağlayıcı adı ("auto", "nvml", "cli", "cli-stream", "simulated"); verilmezse ayarlardan okunur
+    
+    Returns:
+        GPUTelemetryProvider: Telemetri sağlayıcısı
+    
+    Raises:
+        ValueError: Sağlayıcı adı bilinmiyorsa
+    """
+    name = (name or settings.GPU_TELEMETRY_PROVIDER).lower()
+    
+    if name == "simulated":
+        return SimulatedGPUProvider()
+    if name == "nvml":
+        return NVMLProvider()
+    if name == "cli":
+        return NvidiaSmiCLIProvider()
+    if name == "cli-stream":
+        return NvidiaSmiStreamProvider()
+    if name == "auto":
+        # NVML yoksa veya GPU bulamazsa sürekli çalışan nvidia-smi akışını kullan
+        if NVIDIA_SMI_AVAILABLE:
+            return ChainedProvider([NVMLProvider(), NvidiaSmiStreamProvider()])
+        return NvidiaSmiStreamProvider()
+    
+    raise ValueError(f"Bilinmeyen GPU telemetri sağlayıcısı: {name}")
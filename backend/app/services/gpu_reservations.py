@@ -0,0 +1,130 @@
+"""
+Eşzamanlı model yüklemeleri için GPU bellek rezervasyon defteri
+"""
+import logging
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class GPUReservation:
+    """
+    Bir GPU üzerinde yükleme süresince ayrılmış bellek
+    """
+    
+    def __init__(self, gpu_index: int, memory_mb: float, owner: Optional[str] = None):
+        self.reservation_id = uuid.uuid4().hex
+        self.gpu_index = gpu_index
+        self.memory_mb = float(memory_mb)
+        self.owner = owner
+        self.created_at = time.time()
+        self.committed_at: Optional[float] = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "reservation_id": self.reservation_id,
+            "gpu_index": self.gpu_index,
+            "memory_mb": self.memory_mb,
+            "owner": self.owner,
+            "created_at": self.created_at,
+            "committed": self.committed_at is not None,
+        }
+
+class GPUReservationLedger:
+    """
+    Süreç içi GPU rezervasyon defteri
+    
+    Yükleme başlamadan önce bellek ayrılır; yükleme başarısız olursa rezervasyon
+    hemen bırakılır. Başarılı yüklemelerde rezervasyon, modelin belleğini
+    yansıtan ilk GPU ölçümüne kadar tutulur, böylece ölçüm ile yükleme
+    arasındaki aralıkta aynı bellek iki kez dağıtılmaz.
+    """
+    
+    def __init__(self):
+        self._reservations: Dict[str, GPUReservation] = {}
+        # Seçim + rezervasyonun atomik yapılabilmesi için yeniden girilebilir lock
+        self.lock = threading.RLock()
+    
+    def reserve(self, gpu_index: int, memory_mb: float, owner: Optional[str] = None) -> GPUReservation:
+        """
+        GPU üzerinde bellek ayırır
+        
+        Args:
+            gpu_index: GPU indeksi
+            memory_mb: Ayrılacak bellek (MB)
+            owner: Rezervasyon sahibi (ör. model ID)
+        
+        Returns:
+            GPUReservation: Oluşturulan rezervasyon
+        """
+        reservation = GPUReservation(gpu_index, memory_mb, owner)
+        
+        with self.lock:
+            self._reservations[reservation.reservation_id] = reservation
+        
+        logger.debug(f"GPU {gpu_index} üzerinde {memory_mb:.0f} MB ayrıldı ({owner})")
+        return reservation
+    
+    def release(self, reservation: GPUReservation) -> None:
+        """
+        Rezervasyonu hemen bırakır (ör. yükleme başarısız olduğunda)
+        
+        Args:
+            reservation: Rezervasyon
+        """
+        with self.lock:
+            self._reservations.pop(reservation.reservation_id, None)
+    
+    def commit(self, reservation: GPUReservation) -> None:
+        """
+        Rezervasyonu tamamlanmış olarak işaretler; sonraki ölçümde düşülür
+        
+        Args:
+            reservation: Rezervasyon
+        """
+        with self.lock:
+            if reservation.reservation_id in self._reservations:
+                reservation.committed_at = time.time()
+    
+    def expire_committed(self, measured_at: float) -> None:
+        """
+        Belirtilen zamanda başlayan ölçümün zaten yansıttığı rezervasyonları siler
+        
+        Args:
+            measured_at: Ölçümün başladığı zaman (epoch saniye)
+        """
+        with self.lock:
+            expired = [
+                reservation_id
+                for reservation_id, reservation in self._reservations.items()
+                if reservation.committed_at is not None and reservation.committed_at < measured_at
+            ]
+            for reservation_id in expired:
+                del self._reservations[reservation_id]
+    
+    def pending_mb(self) -> Dict[int, float]:
+        """
+        GPU başına ayrılmış toplam bellek
+        
+        Returns:
+            Dict[int, float]: GPU indeksi -> ayrılmış bellek (MB)
+        """
+        pending: Dict[int, float] = {}
+        
+        with self.lock:
+            for reservation in self._reservations.values():
+                pending[reservation.gpu_index] = pending.get(reservation.gpu_index, 0.0) + reservation.memory_mb
+        
+        return pending
+    
+    def list_reservations(self) -> List[Dict[str, Any]]:
+        """
+        Aktif rezervasyonları döndürür
+        
+        Returns:
+            List[Dict[str, Any]]: Rezervasyon listesi
+        """
+        with self.lock:
+            return [reservation.to_dict() for reservation in self._reservations.values()]
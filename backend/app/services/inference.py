@@ -0,0 +1,472 @@
+"""
+Yüklü modeller için dinamik mikro-toplama (micro-batching) ile çıkarım servisi
+"""
+import bisect
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from app.config import get_settings
+from app.monitoring.prometheus import record_inference_batch
+from app.services.model_optimizer import replica_base, replica_index
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+class InferenceRequest:
+    """
+    Toplanmayı bekleyen tek bir çıkarım isteği
+    """
+    
+    def __init__(self, texts: List[str], lengths: Optional[List[int]] = None):
+        self.texts = list(texts)
+        self.lengths = lengths  # Metin başına token sayısı (biliniyorsa)
+        self.future: Future = Future()
+        self.enqueued_at = time.monotonic()
+
+class MicroBatcher:
+    """
+    Tek bir model için eşzamanlı istekleri toplayıp tek ileri geçişte çalıştıran kuyruk
+    
+    İstekler token uzunluklarına göre kovalara (bucket) ayrılır; bir toplu iş
+    sadece aynı kovadaki isteklerden oluşur, böylece kısa girdiler uzun bir
+    girdinin uzunluğuna kadar dolgulanmaz. Bir kova max_batch_size girdiye
+    ulaştığında veya en eski isteği max_wait_ms kadar beklediğinde çalıştırılır.
+    Sonuçlar isteklere girdi sırasıyla dağıtılır. Model eşzamanlı çağrıları
+    destekliyorsa (ONNX oturum havuzu) concurrency kadar toplu iş aynı anda
+    çalışır.
+    """
+    
+    _STOP = object()
+    
+    def __init__(
+        self,
+        model_id: str,
+        run_batch: Callable[[List[str]], List[Dict[str, Any]]],
+        max_batch_size: Optional[int] = None,
+        max_wait_ms: Optional[float] = None,
+        measure: Optional[Callable[[List[str]], List[int]]] = None,
+        boundaries: Optional[List[int]] = None,
+        concurrency: int = 1
+    ):
+        """
+        Toplayıcıyı oluştur
+        
+        Args:
+            model_id: Model ID
+            run_batch: Metin listesini alıp metin başına çıktı döndüren fonksiyon
+            max_batch_size: Tek ileri geçişte en fazla girdi
+            max_wait_ms: İlk istekten sonra beklenen en uzun süre (ms)
+            measure: Metin başına token sayısı döndüren fonksiyon (verilmezse kovalama yapılmaz)
+            boundaries: Kova üst sınırları (token); boşsa tüm istekler tek kovada toplanır
+            concurrency: Aynı anda çalışabilecek toplu iş sayısı
+        """
+        self.model_id = model_id
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size or settings.INFERENCE_MAX_BATCH_SIZE
+        self.max_wait = (max_wait_ms if max_wait_ms is not None else settings.INFERENCE_MAX_WAIT_MS) / 1000.0
+        self.measure = measure
+        self.boundaries = sorted(boundaries or [])
+        
+        # Dolgu verimliliği (token sayıları sadece measure verildiğinde bilinir)
+        self.stats = {"batches": 0, "inputs": 0, "tokens": 0, "padded_tokens": 0}
+        self._stats_lock = threading.Lock()
+        
+        # Eşzamanlı toplu işler; tüm yuvalar doluyken yeni istekler sonraki toplu işte birikir
+        self.concurrency = max(1, concurrency)
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+        self._executor = None
+        if self.concurrency > 1:
+            self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix=f"infer-{model_id}")
+        
+        # Gönderilmiş ama sonucu henüz dönmemiş girdi sayısı (replika yönlendirmesi için)
+        self._outstanding = 0
+        self._outstanding_lock = threading.Lock()
+        
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, name=f"infer-{model_id}", daemon=True)
+        self._thread.start()
+    
+    def submit(self, texts: List[str]) -> Future:
+        """
+        Metinleri kuyruğa ekler
+        
+        Token uzunlukları çağıran thread'de ölçülür; toplayıcı thread'i
+        sadece kovalama ve çalıştırma yapar.
+        
+        Args:
+            texts: Girdi metinleri
+            
+        Returns:
+            Future: {"outputs": [...], "batch_size": int, "replica_id": str} sonucunu taşıyan future
+        """
+        lengths = self.measure(texts) if self.measure else None
+        request = InferenceRequest(texts, lengths)
+        
+        with self._outstanding_lock:
+            self._outstanding += len(texts)
+        request.future.add_done_callback(lambda _: self._finish(len(texts)))
+        
+        self._queue.put(request)
+        return request.future
+    
+    def queue_depth(self) -> int:
+        """
+        Kuyrukta bekleyen ve çalışmakta olan girdi sayısı
+        
+        Returns:
+            int: Girdi sayısı
+        """
+        return self._outstanding
+    
+    def _finish(self, count: int) -> None:
+        with self._outstanding_lock:
+            self._outstanding -= count
+    
+    def close(self) -> None:
+        """
+        Toplayıcı thread'ini durdurur; kuyruktaki istekler önce çalıştırılır
+        """
+        self._queue.put(self._STOP)
+        self._thread.join(timeout=5)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+    
+    def padding_ratio(self) -> Optional[float]:
+        """
+        Şimdiye kadarki ileri geçişlerde dolgu token'larının oranı
+        
+        Returns:
+            Optional[float]: 0-1 arası oran veya token sayıları bilinmiyorsa None
+        """
+        padded = self.stats["padded_tokens"]
+        if not padded:
+            return None
+        return 1.0 - self.stats["tokens"] / padded
+    
+    def _bucket(self, request: InferenceRequest) -> float:
+        if not request.lengths or not self.boundaries:
+            return 0.0
+        
+        # En uzun metnin sığdığı ilk kova; son sınırı aşanlar ayrı bir kovada
+        boundaries = self.boundaries
+        position = bisect.bisect_left(boundaries, max(request.lengths))
+        return float(boundaries[position]) if position < len(boundaries) else float("inf")
+    
+    def _loop(self) -> None:
+        pending: Dict[float, Deque[InferenceRequest]] = {}
+        stopping = False
+        
+        while True:
+            if not stopping:
+                # Bekleyen yoksa süresiz, varsa en eski isteğin süresi dolana kadar bekle
+                timeout = None
+                if pending:
+                    oldest = min(requests[0].enqueued_at for requests in pending.values())
+                    timeout = max(0.0, oldest + self.max_wait - time.monotonic())
+                
+                try:
+                    items = [self._queue.get(timeout=timeout)]
+                except queue.Empty:
+                    items = []
+                
+                # Kuyrukta biriken diğer istekleri de al
+                while True:
+                    try:
+                        items.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                
+                for item in items:
+                    if item is self._STOP:
+                        stopping = True
+                    else:
+                        pending.setdefault(self._bucket(item), deque()).append(item)
+            elif not pending:
+                break
+            
+            self._run_ready(pending, flush=stopping)
+    
+    def _run_ready(self, pending: Dict[float, Deque[InferenceRequest]], flush: bool = False) -> None:
+        while pending:
+            now = time.monotonic()
+            ready = [
+                bucket for bucket, requests in pending.items()
+                if flush
+                or sum(len(request.texts) for request in requests) >= self.max_batch_size
+                or requests[0].enqueued_at + self.max_wait <= now
+            ]
+            if not ready:
+                return
+            
+            # En uzun süredir bekleyen kova önce
+            bucket = min(ready, key=lambda key: pending[key][0].enqueued_at)
+            requests = pending[bucket]
+            
+            batch: List[InferenceRequest] = []
+            count = 0
+            while requests and count < self.max_batch_size:
+                request = requests.popleft()
+                batch.append(request)
+                count += len(request.texts)
+            
+            if not requests:
+                del pending[bucket]
+            
+            self._dispatch(batch)
+    
+    def _dispatch(self, batch: List[InferenceRequest]) -> None:
+        if self._executor is None:
+            self._execute(batch)
+            return
+        
+        self._slots.acquire()
+        future = self._executor.submit(self._execute, batch)
+        future.add_done_callback(lambda _: self._slots.release())
+    
+    def _execute(self, batch: List[InferenceRequest]) -> None:
+        # Beklerken zaman aşımına uğrayıp iptal edilen istekleri çıkar
+        batch = [request for request in batch if request.future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        
+        texts = [text for request in batch for text in request.texts]
+        lengths = None
+        if all(request.lengths for request in batch):
+            lengths = [length for request in batch for length in request.lengths]
+        
+        try:
+            outputs: List[Dict[str, Any]] = []
+            
+            # Tek istek sınırdan büyükse birden fazla ileri geçişe bölünür
+            for offset in range(0, len(texts), self.max_batch_size):
+                chunk = texts[offset:offset + self.max_batch_size]
+                
+                start_time = time.time()
+                outputs.extend(self.run_batch(chunk))
+                duration = time.time() - start_time
+                
+                padding_ratio = None
+                with self._stats_lock:
+                    if lengths:
+                        chunk_lengths = lengths[offset:offset + self.max_batch_size]
+                        padded = len(chunk_lengths) * max(chunk_lengths)
+                        self.stats["tokens"] += sum(chunk_lengths)
+                        self.stats["padded_tokens"] += padded
+                        padding_ratio = 1.0 - sum(chunk_lengths) / padded if padded else 0.0
+                    
+                    self.stats["batches"] += 1
+                    self.stats["inputs"] += len(chunk)
+                record_inference_batch(self.model_id, len(chunk), duration, padding_ratio)
+        except Exception as e:
+            logger.error(f"Toplu çıkarım hatası ({self.model_id}): {e}")
+            for request in batch:
+                request.future.set_exception(e)
+            return
+        
+        # Sonuçları isteklere dağıt
+        offset = 0
+        for request in batch:
+            request.future.set_result({
+                "outputs": outputs[offset:offset + len(request.texts)],
+                "batch_size": min(len(texts), self.max_batch_size),
+                "replica_id": self.model_id,
+            })
+            offset += len(request.texts)
+
+class InferenceService:
+    """
+    Model replikası başına mikro-toplayıcıları yöneten çıkarım servisi
+    
+    Bir modelin birden çok replikası yüklüyse her istek kuyruğu en kısa olan
+    replikaya yönlendirilir; her replikanın kendi toplayıcısı vardır.
+    """
+    
+    def __init__(
+        self,
+        model_optimizer: Any,
+        max_batch_size: Optional[int] = None,
+        max_wait_ms: Optional[float] = None
+    ):
+        """
+        Çıkarım servisini oluştur
+        
+        Args:
+            model_optimizer: Modelleri tutan ModelOptimizer
+            max_batch_size: Tek ileri geçişte en fazla girdi
+            max_wait_ms: İlk istekten sonra beklenen en uzun süre (ms)
+        """
+        self.model_optimizer = model_optimizer
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        
+        # Model başına uzunluk kovası sınırları (verilmeyenler INFERENCE_LENGTH_BUCKETS kullanır)
+        self.length_buckets: Dict[str, List[int]] = {}
+        
+        # Replika anahtarı -> toplayıcı
+        self._batchers: Dict[str, MicroBatcher] = {}
+        self._lock = threading.Lock()
+    
+    def submit(self, model_id: str, texts: List[str]) -> Future:
+        """
+        Metinleri modelin en az yüklü replikasının toplama kuyruğuna ekler
+        
+        Args:
+            model_id: Model ID
+            texts: Girdi metinleri
+            
+        Returns:
+            Future: {"outputs": [...], "batch_size": int, "replica_id": str} sonucunu taşıyan future
+            
+        Raises:
+            KeyError: Modelin bellekte replikası yoksa
+        """
+        residency = self.model_optimizer.residency
+        
+        replicas = self.model_optimizer.replica_ids(model_id)
+        if not replicas:
+            residency.record_miss()
+            raise KeyError(f"Model bellekte bulunamadı: {model_id}")
+        
+        # Kuyruğu en kısa replika; eşitlikte şimdiye kadar en az girdi işleyen
+        batcher = min(
+            (self._batcher(replica_id) for replica_id in replicas),
+            key=lambda candidate: (candidate.queue_depth(), candidate.stats["inputs"])
+        )
+        
+        # Kullanılan replika LRU sırasında öne alınır
+        residency.touch(batcher.model_id)
+        
+        return batcher.submit(texts)
+    
+    def _batcher(self, replica_id: str) -> MicroBatcher:
+        concurrency = self.model_optimizer.inference_concurrency(replica_id)
+        
+        with self._lock:
+            batcher = self._batchers.get(replica_id)
+            if batcher is not None and batcher.concurrency == concurrency:
+                return batcher
+            
+            # Boşaltılmış replikaların toplayıcılarını çıkar; kapatma kilit dışında yapılır
+            stale = [
+                self._batchers.pop(other) for other in list(self._batchers)
+                if other not in self.model_optimizer.models
+            ]
+            
+            # Yeniden yüklenen modelin eşzamanlılığı (ONNX havuz boyutu) değiştiyse toplayıcı yeniden kurulur
+            if replica_id in self._batchers:
+                stale.append(self._batchers.pop(replica_id))
+            
+            batcher = MicroBatcher(
+                replica_id,
+                lambda texts: self.model_optimizer.run_batch(replica_id, texts),
+                max_batch_size=self.max_batch_size,
+                max_wait_ms=self.max_wait_ms,
+                measure=lambda texts: self._measure(replica_id, texts),
+                boundaries=self.get_length_buckets(replica_base(replica_id)),
+                concurrency=concurrency
+            )
+            self._batchers[replica_id] = batcher
+        
+        if stale:
+            # close() toplayıcı thread'ini ve havuzunu bekler; istek yolunu bloklamaması için ayrı thread'de
+            threading.Thread(target=self._close_all, args=(stale,), name="infer-close", daemon=True).start()
+        return batcher
+    
+    @staticmethod
+    def _close_all(batchers: List[MicroBatcher]) -> None:
+        for batcher in batchers:
+            try:
+                batcher.close()
+            except Exception as e:
+                logger.error(f"Toplayıcı kapatılamadı ({batcher.model_id}): {e}")
+    
+    def _measure(self, model_id: str, texts: List[str]) -> List[int]:
+        # Modelin kendi tokenizer'ı ile, ileri geçişteki kesme kuralıyla aynı uzunluklar
+        tokenizer = self.model_optimizer.tokenizers.get(model_id)
+        if tokenizer is None:
+            return [0] * len(texts)
+        
+        encoded = tokenizer(texts, truncation=True, max_length=settings.INFERENCE_MAX_SEQUENCE_LENGTH)
+        return [len(ids) for ids in encoded["input_ids"]]
+    
+    def get_length_buckets(self, model_id: str) -> List[int]:
+        """
+        Modelin uzunluk kovası sınırlarını döndürür
+        
+        Args:
+            model_id: Model ID
+            
+        Returns:
+            List[int]: Artan sırada kova üst sınırları (token)
+        """
+        return list(self.length_buckets.get(model_id, settings.INFERENCE_LENGTH_BUCKETS))
+    
+    def set_length_buckets(self, model_id: str, boundaries: List[int]) -> List[int]:
+        """
+        Modelin uzunluk kovası sınırlarını değiştirir (boş liste kovalamayı kapatır)
+        
+        Args:
+            model_id: Model ID
+            boundaries: Kova üst sınırları (token)
+            
+        Returns:
+            List[int]: Sıralanmış ve tekilleştirilmiş sınırlar
+        """
+        boundaries = sorted(set(int(boundary) for boundary in boundaries))
+        
+        with self._lock:
+            self.length_buckets[model_id] = boundaries
+            for replica_id, batcher in self._batchers.items():
+                if replica_base(replica_id) == model_id:
+                    # Yeni gelen istekler yeni sınırlarla kovalanır
+                    batcher.boundaries = boundaries
+        
+        return list(boundaries)
+    
+    def stats(self, model_id: str) -> Dict[str, Any]:
+        """
+        Modelin toplama ve dolgu istatistikleri (tüm replikalar toplamı)
+        
+        Args:
+            model_id: Model ID
+            
+        Returns:
+            Dict[str, Any]: Kova sınırları, toplu iş sayıları, dolgu oranı ve replika başına kuyruklar
+        """
+        with self._lock:
+            batchers = sorted(
+                ((replica_id, batcher) for replica_id, batcher in self._batchers.items()
+                 if replica_base(replica_id) == model_id),
+                key=lambda item: replica_index(item[0])
+            )
+        
+        result: Dict[str, Any] = {"model_id": model_id, "length_buckets": self.get_length_buckets(model_id)}
+        if batchers:
+            for key in ("batches", "inputs", "tokens", "padded_tokens"):
+                result[key] = sum(batcher.stats[key] for _, batcher in batchers)
+            result["padding_ratio"] = 1.0 - result["tokens"] / result["padded_tokens"] if result["padded_tokens"] else None
+            result["replicas"] = [
+                {
+                    "replica_id": replica_id,
+                    "queue_depth": batcher.queue_depth(),
+                    "batches": batcher.stats["batches"],
+                    "inputs": batcher.stats["inputs"],
+                }
+                for replica_id, batcher in batchers
+            ]
+        return result
+    
+    def shutdown(self) -> None:
+        """
+        Tüm toplayıcıları durdurur
+        """
+        with self._lock:
+            batchers = list(self._batchers.values())
+            self._batchers.clear()
+        
+        self._close_all(batchers)
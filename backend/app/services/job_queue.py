@@ -0,0 +1,211 @@
+"""
+Model yükleme ve ONNX dönüşümü gibi uzun işleri arka planda çalıştıran iş kuyruğu
+"""
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from app.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# İş durumları
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+class Job:
+    """
+    Kuyruktaki tek bir iş ve ilerleme durumu
+    """
+    
+    def __init__(self, kind: str, model_id: Optional[str] = None, owner_id: Optional[int] = None):
+        self.job_id = uuid.uuid4().hex
+        self.kind = kind
+        self.model_id = model_id
+        self.owner_id = owner_id
+        self.status = JOB_QUEUED
+        self.stage: Optional[str] = None
+        self.stages: List[Dict[str, Any]] = []
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+    
+    def set_stage(self, stage: str) -> None:
+        """
+        İşin bulunduğu aşamayı günceller
+        
+        Args:
+            stage: Aşama adı (ör. "tokenizer", "weights", "to-device", "warmup")
+        """
+        self.stage = stage
+        self.stages.append({"stage": stage, "started_at": time.time()})
+        logger.debug(f"İş {self.job_id} ({self.model_id}): {stage}")
+    
+    @property
+    def finished(self) -> bool:
+        return self.status in (JOB_SUCCEEDED, JOB_FAILED)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "model_id": self.model_id,
+            "status": self.status,
+            "stage": self.stage,
+            "stages": list(self.stages),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "queued_seconds": (self.started_at or now) - self.created_at,
+            "elapsed_seconds": (self.finished_at or now) - self.started_at if self.started_at else 0.0,
+            "result": self.result,
+            "error": self.error,
+        }
+
+class JobQueue:
+    """
+    Sınırlı sayıda worker thread ile çalışan iş kuyruğu
+    
+    API isteği işi kuyruğa ekleyip hemen döner; istemci ilerlemeyi iş ID'si
+    ile sorgular. Bekleyen + çalışan iş sayısı sınırlıdır, dolu kuyruğa yeni
+    iş eklenmez.
+    """
+    
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        retention_seconds: Optional[int] = None
+    ):
+        """
+        İş kuyruğunu oluştur
+        
+        Args:
+            max_workers: Aynı anda çalışan iş sayısı
+            max_pending: Bekleyen + çalışan en fazla iş sayısı
+            retention_seconds: Biten işlerin sorgulanabilir kaldığı süre (saniye)
+        """
+        self.max_workers = max_workers or settings.JOB_WORKERS
+        self.max_pending = max_pending or settings.JOB_QUEUE_MAX_PENDING
+        self.retention_seconds = retention_seconds or settings.JOB_RETENTION_SECONDS
+        
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="model-job")
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+    
+    def submit(
+        self,
+        kind: str,
+        func: Callable[[Callable[[str], None]], Dict[str, Any]],
+        model_id: Optional[str] = None,
+        owner_id: Optional[int] = None
+    ) -> Optional[Job]:
+        """
+        İşi kuyruğa ekler
+        
+        Args:
+            kind: İş türü (ör. "load", "onnx", "placement")
+            func: İlerleme fonksiyonunu alıp {"success", "message", ...} sonucu döndüren fonksiyon
+            model_id: İlgili model ID
+            owner_id: İşi başlatan kullanıcı ID
+        
+        Returns:
+            Optional[Job]: Oluşturulan iş veya kuyruk doluysa None
+        """
+        job = Job(kind, model_id=model_id, owner_id=owner_id)
+        
+        with self._lock:
+            self._prune()
+            
+            if self.pending_count() >= self.max_pending:
+                return None
+            
+            self._jobs[job.job_id] = job
+        
+        self._executor.submit(self._run, job, func)
+        return job
+    
+    def _run(self, job: Job, func: Callable[[Callable[[str], None]], Dict[str, Any]]) -> None:
+        job.status = JOB_RUNNING
+        job.started_at = time.time()
+        
+        try:
+            result = func(job.set_stage)
+            job.result = result
+            if result.get("success"):
+                job.status = JOB_SUCCEEDED
+            else:
+                job.status = JOB_FAILED
+                job.error = result.get("message")
+        except Exception as e:
+            logger.error(f"İş {job.job_id} başarısız: {e}")
+            job.status = JOB_FAILED
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+    
+    def pending_count(self) -> int:
+        """
+        Bekleyen ve çalışan iş sayısı
+        
+        Returns:
+            int: İş sayısı
+        """
+        return sum(1 for job in list(self._jobs.values()) if not job.finished)
+    
+    def _prune(self) -> None:
+        # Saklama süresi dolan biten işleri sil
+        cutoff = time.time() - self.retention_seconds
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+    
+    def get(self, job_id: str) -> Optional[Job]:
+        """
+        İşi ID ile döndürür
+        
+        Args:
+            job_id: İş ID
+        
+        Returns:
+            Optional[Job]: İş veya bulunamazsa None
+        """
+        with self._lock:
+            return self._jobs.get(job_id)
+    
+    def list_jobs(self, owner_id: Optional[int] = None) -> List[Job]:
+        """
+        İşleri en yeniden eskiye listeler
+        
+        Args:
+            owner_id: Sadece bu kullanıcının işleri (verilmezse tümü)
+        
+        Returns:
+            List[Job]: İş listesi
+        """
+        with self._lock:
+            self._prune()
+            jobs = [job for job in self._jobs.values() if owner_id is None or job.owner_id == owner_id]
+        
+        return sorted(jobs, key=lambda job: job.created_at, reverse=True)
+    
+    def shutdown(self, wait: bool = False) -> None:
+        """
+        Worker thread'lerini durdurur; bekleyen işler iptal edilir
+        
+        Args:
+            wait: Çalışan işlerin bitmesi beklensin mi
+        """
+        self._executor.shutdown(wait=wait, cancel_futures=True)
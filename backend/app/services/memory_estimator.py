@@ -0,0 +1,260 @@
+"""
+Ağırlıkları yüklemeden model bellek ihtiyacını tahmin eden servis
+"""
+import json
+import logging
+import os
+import struct
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from app.config import get_settings
+from app.services.model_loader import find_safetensors_shards
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+# safetensors veri tipi -> eleman başına byte
+SAFETENSORS_DTYPE_BYTES = {
+    "F64": 8, "F32": 4, "F16": 2, "BF16": 2, "F8_E4M3": 1, "F8_E5M2": 1,
+    "I64": 8, "I32": 4, "I16": 2, "I8": 1, "U8": 1, "BOOL": 1,
+}
+FLOAT_DTYPES = {"F64", "F32", "F16", "BF16", "F8_E4M3", "F8_E5M2"}
+
+# Kapılı (gated) ileri beslemeli ağ ve döner (rotary) konum kodlaması kullanan mimariler
+GATED_MLP_MODEL_TYPES = {"llama", "mistral", "qwen2", "gemma", "phi3"}
+
+# Quantization sonrası doğrusal katman ağırlığında parametre başına byte
+QUANTIZATION_BYTES = {"int8": 1.0, "int4": 0.5}
+
+# Gömme tablolarının tensör adlarında geçen parçalar (2 boyutlu ama nn.Linear değil)
+EMBEDDING_NAME_MARKERS = ("embed", "wte", "wpe", "shared")
+
+# Projeksiyonları nn.Linear yerine transformers Conv1D olan mimariler (quantize edilmez)
+CONV1D_MODEL_TYPES = {"gpt2", "openai-gpt"}
+
+class ParameterCounts(NamedTuple):
+    """
+    Veri tipine göre parametre sayıları ve quantize edilebilir doğrusal katmanlar
+    """
+    dtypes: Dict[str, int]
+    linears: List[Tuple[int, int]]  # Doğrusal katman ağırlıkları: (çıkış, giriş) boyutu
+    source: str
+
+def read_safetensors_header(path: str) -> Dict[str, Any]:
+    """
+    safetensors dosyasının JSON başlığını okur (tensör verisi okunmaz)
+    
+    Args:
+        path: .safetensors dosyası
+    
+    Returns:
+        Dict[str, Any]: Tensör adı -> {"dtype", "shape", "data_offsets"}
+    """
+    with open(path, "rb") as f:
+        # İlk 8 byte: little-endian başlık uzunluğu
+        (header_size,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(header_size))
+    
+    header.pop("__metadata__", None)
+    return header
+
+def _read_config(model_path: str) -> Optional[Dict[str, Any]]:
+    config_path = os.path.join(model_path, "config.json")
+    if not os.path.exists(config_path):
+        return None
+    
+    with open(config_path) as f:
+        return json.load(f)
+
+def _is_linear_weight(name: str, tensor: Dict[str, Any]) -> bool:
+    # Başlıkta modül tipi yok: 2 boyutlu kayan noktalı ".weight" tensörleri gömme tabloları hariç
+    # doğrusal katman sayılır (norm ağırlıkları ve bias'lar tek boyutlu)
+    return (
+        tensor["dtype"] in FLOAT_DTYPES
+        and len(tensor["shape"]) == 2
+        and name.endswith(".weight")
+        and not any(marker in name for marker in EMBEDDING_NAME_MARKERS)
+    )
+
+def _count_from_safetensors(model_path: str) -> Optional[Tuple[Dict[str, int], List[Tuple[int, int]]]]:
+    shards = find_safetensors_shards(model_path)
+    if not shards:
+        return None
+    
+    config = _read_config(model_path) or {}
+    conv1d = config.get("model_type") in CONV1D_MODEL_TYPES
+    
+    counts: Dict[str, int] = {}
+    linears: List[Tuple[int, int]] = []
+    for shard in shards:
+        for name, tensor in read_safetensors_header(shard).items():
+            elements = 1
+            for dim in tensor["shape"]:
+                elements *= dim
+            counts[tensor["dtype"]] = counts.get(tensor["dtype"], 0) + elements
+            
+            if not conv1d and _is_linear_weight(name, tensor):
+                linears.append((tensor["shape"][0], tensor["shape"][1]))
+    
+    return counts, linears
+
+def _config_value(config: Dict[str, Any], *names: str, default: Any = None) -> Any:
+    # Mimariler aynı değeri farklı adlarla tutar (ör. hidden_size / n_embd / d_model)
+    for name in names:
+        if config.get(name) is not None:
+            return config[name]
+    return default
+
+def _count_from_config(model_path: str) -> Optional[Tuple[Dict[str, int], List[Tuple[int, int]]]]:
+    config = _read_config(model_path)
+    if config is None:
+        return None
+    
+    hidden = _config_value(config, "hidden_size", "n_embd", "d_model")
+    layers = _config_value(config, "num_hidden_layers", "n_layer", "num_layers")
+    vocab = _config_value(config, "vocab_size")
+    if not hidden or not layers or not vocab:
+        return None
+    
+    intermediate = _config_value(config, "intermediate_size", "n_inner", "d_ff", "ffn_dim", default=4 * hidden)
+    positions = _config_value(config, "max_position_embeddings", "n_positions", default=0)
+    type_vocab = _config_value(config, "type_vocab_size", default=0)
+    
+    gated = config.get("model_type") in GATED_MLP_MODEL_TYPES
+    if gated:
+        # Konum gömme tablosu yok; bias'sız gate/up/down projeksiyonları
+        positions = 0
+    
+    # Gruplanmış sorgu dikkati (GQA): key/value projeksiyonları daha küçük
+    heads = _config_value(config, "num_attention_heads", "n_head", default=1)
+    kv_heads = _config_value(config, "num_key_value_heads", default=heads)
+    kv_hidden = hidden * kv_heads // heads
+    
+    # Gömme tabloları + katman başına dikkat (q, k, v, o), ileri beslemeli ağ ve layer norm'lar
+    embeddings = (vocab + positions + type_vocab) * hidden
+    attention = 2 * hidden * hidden + 2 * hidden * kv_hidden + 2 * hidden + 2 * kv_hidden
+    if gated:
+        attention = 2 * hidden * hidden + 2 * hidden * kv_hidden
+        feed_forward = 3 * hidden * intermediate
+        layer_norms = 2 * hidden
+        feed_forward_linears = [(intermediate, hidden), (intermediate, hidden), (hidden, intermediate)]
+    else:
+        feed_forward = 2 * hidden * intermediate + intermediate + hidden
+        layer_norms = 4 * hidden
+        feed_forward_linears = [(intermediate, hidden), (hidden, intermediate)]
+    
+    linears: List[Tuple[int, int]] = []
+    if config.get("model_type") not in CONV1D_MODEL_TYPES:
+        attention_linears = [(hidden, hidden), (kv_hidden, hidden), (kv_hidden, hidden), (hidden, hidden)]
+        linears = (attention_linears + feed_forward_linears) * layers
+    
+    return {"F32": embeddings + layers * (attention + feed_forward + layer_norms)}, linears
+
+def count_parameters(model_path: str) -> Optional[ParameterCounts]:
+    """
+    Model parametre sayısını veri tipine göre ve doğrusal katman boyutlarını bulur
+    
+    Önce safetensors başlıkları (kesin), yoksa config.json'dan mimari
+    formülü (yaklaşık) kullanılır.
+    
+    Args:
+        model_path: Model dizini
+    
+    Returns:
+        Optional[ParameterCounts]: Sayılar ve kaynak veya bilinmiyorsa None
+    """
+    try:
+        counted = _count_from_safetensors(model_path)
+        if counted and counted[0]:
+            return ParameterCounts(*counted, "safetensors")
+        
+        counted = _count_from_config(model_path)
+        if counted:
+            return ParameterCounts(*counted, "config")
+    except Exception as e:
+        logger.warning(f"Model parametreleri okunamadı ({model_path}): {e}")
+    
+    return None
+
+def _quantized_linear_bytes(out_features: int, in_features: int, scheme: str, dtype_bytes: int) -> Optional[float]:
+    # WeightOnlyLinear düzeni: INT8'de çıkış kanalı, INT4'te giriş grubu başına ölçek (model veri tipinde)
+    if scheme == "int4":
+        if in_features % 2:
+            return None  # Paketlenemez, quantize edilmez
+        group_size = settings.MODEL_QUANTIZATION_GROUP_SIZE
+        if in_features % group_size:
+            group_size = in_features
+        scales = out_features * (in_features // group_size)
+    else:
+        scales = out_features
+    
+    return out_features * in_features * QUANTIZATION_BYTES[scheme] + scales * dtype_bytes
+
+def estimate_model_memory(
+    model_path: str,
+    use_fp16: bool = True,
+    quantization: Optional[str] = None,
+    onnx: bool = False,
+    activation_fraction: Optional[float] = None,
+    overhead_mb: Optional[float] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Modelin GPU bellek ihtiyacını ağırlıkları yüklemeden tahmin eder
+    
+    Kayan noktalı ağırlıklar hedef veri tipine göre, tam sayı tensörler kendi
+    boyutlarıyla sayılır. Quantization'da sadece doğrusal katman ağırlıkları
+    quantize genişlikte (ölçekleriyle) sayılır; gömmeler, norm'lar, bias'lar
+    ve bağlı (tied) başlıklar veri tipinde kalır. Üzerine ağırlıkların bir
+    oranı kadar aktivasyon payı ve sabit bir CUDA bağlamı/çalışma alanı payı
+    eklenir.
+    
+    Args:
+        model_path: Model dizini
+        use_fp16: FP16 ile yüklenecek mi (ONNX dışa aktarımı her zaman FP32'dir)
+        quantization: "int8" veya "int4" (verilmezse quantization yok)
+        onnx: ONNX oturumu olarak yüklenecek mi
+        activation_fraction: Ağırlıklara oranla aktivasyon payı
+        overhead_mb: Sabit ek bellek (MB)
+    
+    Returns:
+        Optional[Dict[str, Any]]: parameters, weights_mb, activation_mb, overhead_mb,
+        total_mb ve source; parametreler bulunamazsa None
+    """
+    counted = count_parameters(model_path)
+    if counted is None:
+        return None
+    
+    counts, linears, source = counted
+    activation_fraction = (
+        activation_fraction if activation_fraction is not None else settings.MODEL_ACTIVATION_OVERHEAD_FRACTION
+    )
+    overhead_mb = overhead_mb if overhead_mb is not None else settings.MODEL_MEMORY_OVERHEAD_MB
+    
+    float_bytes = 2 if use_fp16 and not onnx else 4
+    
+    weight_bytes = 0.0
+    for dtype, elements in counts.items():
+        if dtype in FLOAT_DTYPES:
+            weight_bytes += elements * float_bytes
+        else:
+            weight_bytes += elements * SAFETENSORS_DTYPE_BYTES.get(dtype, 4)
+    
+    if quantization and not onnx:
+        for out_features, in_features in linears:
+            quantized = _quantized_linear_bytes(out_features, in_features, quantization, float_bytes)
+            if quantized is not None:
+                weight_bytes += quantized - out_features * in_features * float_bytes
+    
+    weights_mb = weight_bytes / MB
+    activation_mb = weights_mb * activation_fraction
+    
+    return {
+        "parameters": sum(counts.values()),
+        "weights_mb": weights_mb,
+        "activation_mb": activation_mb,
+        "overhead_mb": overhead_mb,
+        "total_mb": weights_mb + activation_mb + overhead_mb,
+        "source": source,
+    }
@@ -0,0 +1,299 @@
+"""
+safetensors dosyalarını bellek eşlemeli (mmap) okuyarak modeli doğrudan hedef cihazda oluşturan yükleyici
+"""
+import glob
+import itertools
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+import torch
+from accelerate import init_empty_weights
+from accelerate.utils import compute_module_sizes, find_tied_parameters
+from safetensors import safe_open
+from transformers import AutoConfig, AutoModel
+from transformers.modeling_utils import no_init_weights
+
+from app.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+SAFETENSORS_INDEX = "model.safetensors.index.json"
+
+def find_safetensors_shards(model_path: str) -> List[str]:
+    """
+    Model dizinindeki safetensors parçalarını (shard) bulur
+    
+    Args:
+        model_path: Model dizini
+    
+    Returns:
+        List[str]: Parça dosyaları (sıralı); safetensors yoksa boş liste
+    """
+    index_path = os.path.join(model_path, SAFETENSORS_INDEX)
+    if os.path.exists(index_path):
+        with open(index_path) as f:
+            weight_map = json.load(f)["weight_map"]
+        return [os.path.join(model_path, name) for name in sorted(set(weight_map.values()))]
+    
+    return sorted(glob.glob(os.path.join(model_path, "*.safetensors")))
+
+def load_safetensors_model(
+    model_path: str,
+    device: str,
+    dtype: torch.dtype,
+    model_class: Any = AutoModel,
+    quantizer: Optional[Any] = None
+) -> Optional[Any]:
+    """
+    Modeli hedef cihazda oluşturur ve ağırlıkları parça parça mmap ile kopyalar
+    
+    from_pretrained önce tüm modeli ana bellekte rastgele ağırlıklarla oluşturup
+    sonra checkpoint'i de ana belleğe okur; tepe RSS model boyutunun birkaç
+    katına çıkar. Burada modül ağırlık başlatma kapalıyken doğrudan hedef
+    cihazda oluşturulur, her tensör mmap edilmiş dosyadan (sayfa önbelleği)
+    doğrudan cihazdaki parametreye kopyalanır. Ana bellekte ayrıca model
+    kopyası oluşmaz; hedef CPU ise dosya sayfaları kopyalanmadan kullanılır.
+    
+    Not: Saf meta cihazında oluşturma, kalıcı olmayan buffer'ları (ör. BERT
+    position_ids) değersiz bırakır; bunları yeniden hesaplamak accelerate
+    gerektirdiği için modül hedef cihazda, başlatma kapalı oluşturulur.
+    
+    quantizer verilirse her parçadan sonra ağırlıkları tamamlanan doğrusal
+    katmanlar quantize edilir; tam hassasiyetli ağırlıklar ana bellekte tüm
+    model yerine en fazla bir parça boyunca tutulur. Bu durumda cihaz "cpu"
+    olmalıdır (GPU'da oluşturma tüm ağırlıklara baştan yer ayırır).
+    
+    Args:
+        model_path: Model dizini
+        device: Hedef cihaz (ör. "cuda:0")
+        dtype: Ağırlık veri tipi
+        model_class: Auto model sınıfı
+        quantizer: StreamingQuantizer (verilmezse quantization yapılmaz)
+    
+    Returns:
+        Optional[Any]: Değerlendirme modundaki model veya dizinde safetensors yoksa None
+    
+    Raises:
+        ValueError: Checkpoint'te olmayan ağırlıklar modelin kendi başlatıcısıyla başlatılamıyorsa
+    """
+    shards = find_safetensors_shards(model_path)
+    if not shards:
+        return None
+    
+    config = AutoConfig.from_pretrained(model_path)
+    
+    with no_init_weights(), torch.device(device):
+        model = model_class.from_config(config, torch_dtype=dtype)
+    
+    # Başlatma kapalıyken ağırlıklar bağlanmamış olabilir; paylaşılan ağırlıklar (ve
+    # quantize edilmeyecek bağlı çıkış katmanları) ancak bağlıyken görünür
+    model.tie_weights()
+    
+    state = model.state_dict(keep_vars=True)
+    prefix = f"{model.base_model_prefix}." if getattr(model, "base_model_prefix", None) else None
+    
+    # Önce sadece başlıklar okunur: hangi checkpoint anahtarı hangi parametreye gidiyor
+    plan: Dict[str, Dict[str, str]] = {}
+    for shard in shards:
+        with safe_open(shard, framework="pt", device="cpu") as f:
+            plan[shard] = {}
+            for key in f.keys():
+                name = key
+                if name not in state and prefix:
+                    # Görev başlıklı checkpoint'ten taban model (ör. "bert.") veya taban
+                    # checkpoint'ten görev başlıklı model yükleniyor
+                    name = name[len(prefix):] if name.startswith(prefix) else f"{prefix}{name}"
+                if name in state:
+                    plan[shard][key] = name
+    
+    # Aynı tensörü paylaşan ağırlıklardan biri checkpoint'te varsa grup yüklenecek sayılır;
+    # eksikler kopyalamadan önce başlatılır ki aynı modüldeki yüklenen ağırlıkları ezmesin
+    loaded = {name for names in plan.values() for name in names.values()}
+    missing = [name for names in _weight_groups(model) if not loaded.intersection(names) for name in names]
+    if missing:
+        _initialize_missing(model, missing)
+    
+    # Quantize edilecek katmanlar bağlı (tied) ağırlıklar kopmadan önce belirlenir;
+    # katman, ağırlığı ve bias'ı yüklenince (veya başlatılınca) quantize edilir
+    pending: Dict[str, List[str]] = {}
+    if quantizer is not None:
+        for name in quantizer.candidates(model):
+            pending[name] = [f"{name}.{param}" for param in ("weight", "bias") if f"{name}.{param}" in state]
+    available = set(missing)
+    
+    # Hedef CPU ise ve veri tipi aynıysa mmap tensörleri kopyalanmadan parametre yapılır
+    zero_copy = torch.device(device).type == "cpu"
+    
+    with torch.no_grad():
+        for shard, names in plan.items():
+            assigned = {}
+            
+            # Parça mmap ile açılır; get_tensor dosya sayfalarına bakan CPU tensörü döndürür
+            with safe_open(shard, framework="pt", device="cpu") as f:
+                for key, name in names.items():
+                    tensor = f.get_tensor(key)
+                    if zero_copy and tensor.dtype == state[name].dtype:
+                        assigned[name] = tensor
+                    else:
+                        state[name].copy_(tensor)
+            
+            if assigned:
+                model.load_state_dict(assigned, strict=False, assign=True)
+            
+            if pending:
+                available.update(names.values())
+                ready = [name for name, params in pending.items() if available.issuperset(params)]
+                quantizer.apply(model, ready)
+                
+                # Tam hassasiyetli ağırlığa kalan son referans da bırakılır
+                for name in ready:
+                    state.pop(f"{name}.weight", None)
+                    del pending[name]
+        
+        # Checkpoint'te karşılığı bulunmayan katmanlar (beklenmez) yine de quantize edilir
+        if pending:
+            quantizer.apply(model, list(pending))
+    
+    # Paylaşılan ağırlıkları (ör. giriş/çıkış gömmeleri) bağla
+    model.tie_weights()
+    
+    model.eval()
+    return model
+
+def _initialize_missing(model: Any, missing: List[str]) -> None:
+    # from_pretrained ile aynı davranış: checkpoint'te olmayan ağırlıklar (ör. görev
+    # başlıklı checkpoint'ten taban model yüklerken pooler) modelin başlatıcısıyla doldurulur
+    init_weights = getattr(model, "_init_weights", None)
+    if init_weights is None:
+        raise ValueError(f"Checkpoint'te bulunmayan ağırlıklar: {', '.join(missing[:5])}")
+    
+    logger.warning(f"Checkpoint'te bulunmayan ağırlıklar yeni başlatıldı: {', '.join(missing[:5])}")
+    
+    for module_name in sorted({name.rpartition(".")[0] for name in missing}):
+        init_weights(model.get_submodule(module_name))
+
+def _weight_groups(model: Any) -> List[List[str]]:
+    # Kalıcı state_dict anahtarlarını paylaştıkları depolamaya göre grupla
+    groups: Dict[Any, List[str]] = {}
+    for name, tensor in model.state_dict(keep_vars=True).items():
+        key = (tensor.data_ptr(), tuple(tensor.shape)) if tensor.numel() else name
+        groups.setdefault(key, []).append(name)
+    
+    return list(groups.values())
+
+def build_empty_model(model_path: str, dtype: torch.dtype, model_class: Any = AutoModel) -> Any:
+    """
+    Modeli bellek ayırmadan (meta cihazında) oluşturur; yerleşim planı için kullanılır
+    
+    Args:
+        model_path: Model dizini
+        dtype: Ağırlık veri tipi
+        model_class: Auto model sınıfı
+    
+    Returns:
+        Any: Ağırlıkları meta cihazında olan model
+    """
+    config = AutoConfig.from_pretrained(model_path)
+    
+    with init_empty_weights():
+        model = model_class.from_config(config, torch_dtype=dtype)
+    
+    # Paylaşılan ağırlıklar planda görünsün diye bağlanır (from_pretrained de bağlar)
+    model.tie_weights()
+    return model
+
+def plan_device_map(
+    model: Any,
+    max_memory: Dict[Union[int, str], int],
+    no_split_module_classes: Optional[List[str]] = None
+) -> Tuple[Dict[str, Union[int, str]], Dict[Union[int, str], int]]:
+    """
+    Model bloklarını ileri geçiş sırasıyla cihaz bütçelerine yerleştirir
+    
+    Bölünemeyen bloklar (transformer katmanları, gömmeler, başlıklar ve
+    modelin _no_split_modules listesi) sırayla önce ilk cihaza, o dolunca sonrakine yerleştirilir;
+    cihaz sırası max_memory sırasıdır (GPU'lar, en sonda "cpu"). Aynı ağırlığı
+    paylaşan bloklar aynı cihaza konur. accelerate'in infer_auto_device_map'i
+    sistemde görünmeyen cihazları bütçeden çıkardığı için plan burada yapılır;
+    bütçeler GPUManager'dan gelir ve plan GPU'suz makinede de hesaplanabilir.
+    
+    Args:
+        model: Boş (meta) model
+        max_memory: Cihaz -> kullanılabilir bellek (byte); GPU'lar indeks, CPU "cpu"
+        no_split_module_classes: Bölünmeyecek modül sınıfları (verilmezse modelinki)
+    
+    Returns:
+        Tuple: (modül adı -> cihaz, cihaz -> yerleştirilen byte)
+    
+    Raises:
+        ValueError: Model bütçelerin toplamına sığmıyorsa
+    """
+    if no_split_module_classes is None:
+        no_split_module_classes = getattr(model, "_no_split_modules", None) or []
+    
+    sizes = compute_module_sizes(model)
+    devices = list(max_memory)
+    placed = {device: 0 for device in devices}
+    tied_groups = find_tied_parameters(model)
+    tied_device: Dict[str, Union[int, str]] = {}
+    
+    device_map: Dict[str, Union[int, str]] = {}
+    current = 0
+    for block in _placement_blocks(model, set(no_split_module_classes)):
+        size = sizes.get(block, 0)
+        groups = [group for group in tied_groups if any(_in_block(name, block) for name in group)]
+        linked = [tied_device[name] for group in groups for name in group if name in tied_device]
+        
+        if linked:
+            # Paylaşılan ağırlık başka cihazda kopyalanmasın diye ilk bloğun cihazına;
+            # orada zaten sayılmış olan paylaşılan ağırlıklar tekrar sayılmaz
+            device = linked[0]
+            size -= sum(
+                sizes.get(name, 0)
+                for group in groups for name in group
+                if name in tied_device and _in_block(name, block)
+            )
+        else:
+            while current < len(devices) and placed[devices[current]] + size > max_memory[devices[current]]:
+                current += 1
+            if current == len(devices):
+                raise ValueError(
+                    f"Model cihaz bütçelerine sığmıyor: {block} ({size / (1024 * 1024):.1f} MB) yerleştirilemedi"
+                )
+            device = devices[current]
+        
+        device_map[block] = device
+        placed[device] += size
+        for group in groups:
+            for name in group:
+                tied_device.setdefault(name, device)
+    
+    # Tek cihaza sığan model tek kayıtla gösterilir
+    if len(set(device_map.values())) == 1:
+        device_map = {"": next(iter(device_map.values()))}
+    
+    return device_map, {device: size for device, size in placed.items() if size}
+
+def _placement_blocks(module: Any, no_split: Set[str], prefix: str = "") -> List[str]:
+    # Sadece katman listesi (ModuleList) içeren modüllere inilir; katmanlar, gömmeler
+    # ve başlıklar bölünmez (artık bağlantılar tek cihazda kalır). Sıra tanım sırasıdır.
+    blocks = [
+        prefix + name
+        for name, _ in itertools.chain(module.named_parameters(recurse=False), module.named_buffers(recurse=False))
+    ]
+    for name, child in module.named_children():
+        if type(child).__name__ in no_split or not _has_layer_list(child):
+            blocks.append(prefix + name)
+        else:
+            blocks.extend(_placement_blocks(child, no_split, f"{prefix}{name}."))
+    
+    return blocks
+
+def _has_layer_list(module: Any) -> bool:
+    return any(isinstance(submodule, torch.nn.ModuleList) for submodule in module.modules())
+
+def _in_block(name: str, block: str) -> bool:
+    return name == block or name.startswith(f"{block}.")
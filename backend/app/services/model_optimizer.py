@@ -5,10 +5,11 @@ import logging
 import os
 import time
 import gc
-from typing import Dict, List, Optional, Any, Union
+from typing import Callable, Dict, List, Optional, Any, Set, Tuple, Union
+import itertools
 import json
 import threading
-import tempfile
+from concurrent.futures import Future
 
 import torch
 import transformers
@@ -24,27 +25,124 @@ except ImportError:
 
 from app.config import get_settings
 from app.services.gpu_manager import GPUManager
+from app.services.gpu_reservations import GPUReservation
+from app.services.memory_estimator import estimate_model_memory
+from app.services.model_loader import build_empty_model, load_safetensors_model, plan_device_map
+from app.services.model_residency import ModelResidencyManager, WarmModelCache
+from app.services.model_tasks import prepare_tokenizer, run_head, task_head
+from app.services.onnx_cache import OnnxExportCache, export_cache_key, weights_fingerprint
+from app.services.onnx_sessions import OnnxSessionPool, resolve_session_tuning
+from app.services.quantization import (
+    StreamingQuantizer, quantization_scheme, quantize_model, select_backend, weight_bytes
+)
+from app.services.onnx_variants import (
+    build_variant,
+    calibration_feeds,
+    graph_size_mb,
+    measure_variant,
+    select_variant,
+    variant_candidates,
+    variant_path
+)
 from app.monitoring.prometheus import record_model_load
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
+MB = 1024 * 1024
+
+# ONNX dışa aktarımının girdi/çıktı imzası (önbellek anahtarına dahil)
+ONNX_EXPORT_SIGNATURE = {
+    "inputs": {"input_ids": "int64", "attention_mask": "int64"},
+    "outputs": ["last_hidden_state", "pooler_output"],
+    "dynamic_axes": {
+        "input_ids": {0: "batch_size", 1: "sequence_length"},
+        "attention_mask": {0: "batch_size", 1: "sequence_length"},
+        "last_hidden_state": {0: "batch_size", 1: "sequence_length"},
+        "pooler_output": {0: "batch_size"}
+    }
+}
+
+# Replika anahtarları: ilk kopya model ID'sinin kendisi, diğerleri "<model_id>#<n>"
+REPLICA_SEPARATOR = "#"
+
+def replica_key(model_id: str, index: int) -> str:
+    """
+    Modelin index numaralı replikasının anahtarı
+    
+    Args:
+        model_id: Model ID
+        index: Replika numarası (0: modelin kendisi)
+        
+    Returns:
+        str: Replika anahtarı
+    """
+    return model_id if index == 0 else f"{model_id}{REPLICA_SEPARATOR}{index}"
+
+def replica_base(replica_id: str) -> str:
+    """
+    Replika anahtarının ait olduğu model ID
+    
+    Args:
+        replica_id: Replika anahtarı
+        
+    Returns:
+        str: Model ID
+    """
+    return replica_id.rpartition(REPLICA_SEPARATOR)[0] if REPLICA_SEPARATOR in replica_id else replica_id
+
+def replica_index(replica_id: str) -> int:
+    """
+    Replika anahtarındaki replika numarası
+    
+    Args:
+        replica_id: Replika anahtarı
+        
+    Returns:
+        int: Replika numarası (0: modelin kendisi)
+    """
+    return int(replica_id.rpartition(REPLICA_SEPARATOR)[2]) if REPLICA_SEPARATOR in replica_id else 0
+
 class ModelOptimizer:
     """
     GPU modelleri optimize eden ve yükleyen sınıf
     """
     
-    def __init__(self):
+    def __init__(self, gpu_manager: Optional[GPUManager] = None):
         """
         Model optimizer'ı başlat
+        
+        Args:
+            gpu_manager: Paylaşılan GPU yöneticisi (verilmezse yenisi oluşturulur)
         """
         self.models = {}  # model_id -> model örneği
         self.tokenizers = {}  # model_id -> tokenizer örneği
         self.model_configs = {}  # model_id -> model yapılandırması
+        
+        # Kısa süreli kayıt lock'u: sözlüklere yazma ve model lock'larının oluşturulması
         self.models_lock = threading.RLock()
         
+        # Model başına uzun süreli lock'lar ve devam eden yüklemeler (aynı model_id için tek yükleme)
+        self._model_locks: Dict[str, threading.RLock] = {}
+        self._inflight: Dict[Tuple[str, Tuple[Any, ...]], Future] = {}
+        
+        # Yüklemesi devam eden replikalar: replika anahtarı -> GPU indeksi
+        self._replica_claims: Dict[str, int] = {}
+        
+        # Küçültmede seçilen replikalar: yüklemesi iptal edilenler ve boşaltılmayı bekleyenler
+        self._replica_drops: Set[str] = set()
+        
         # GPU yöneticisi
-        self.gpu_manager = GPUManager()
+        self.gpu_manager = gpu_manager or GPUManager()
+        
+        # GPU bellek bütçesine göre LRU model önbelleği
+        self.residency = ModelResidencyManager(self.gpu_manager)
+        
+        # GPU'dan boşaltılan modeller için ana bellek katmanı
+        self.warm_cache = WarmModelCache()
+        
+        # Dışa aktarılmış ve optimize edilmiş ONNX grafikleri (yeniden başlatmalarda korunur)
+        self.onnx_cache = OnnxExportCache()
     
     def load_model(
         self, 
@@ -52,24 +150,117 @@ class ModelOptimizer:
         model_id: str, 
         gpu_index: int,
         quantize: bool = True, 
-        use_fp16: bool = True
+        use_fp16: bool = True,
+        reservation: Optional[GPUReservation] = None,
+        progress: Optional[Callable[[str], None]] = None,
+        task: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Modeli yükler ve optimize eder
         
+        Yükleme süresince GPU belleği rezerve edilir; rezervasyon başarıda
+        tamamlanır, hatada bırakılır. Aynı model için devam eden bir yükleme
+        varsa yeni yükleme başlatılmaz, onun sonucu beklenir.
+        
+        Args:
+            model_path: Model dizini
+            model_id: Model ID
+            gpu_index: GPU indeksi
+            quantize: Quantization uygulanacak mı (şema MODEL_QUANTIZATION; GPU'da sadece ağırlık INT8/INT4)
+            use_fp16: FP16 kullanılacak mı
+            reservation: Önceden alınmış GPU rezervasyonu (verilmezse burada alınır)
+            progress: Yükleme aşamasıyla çağrılan fonksiyon (tokenizer, weights, quantize, to-device, warmup)
+            task: ModelMetadata.task; görev başlıklı Auto sınıfını ve son işlemeyi seçer
+            
+        Returns:
+            Dict[str, Any]: Sonuç
+        """
+        return self._run_shared(
+            model_id,
+            ("torch", gpu_index, quantize, use_fp16, task),
+            reservation,
+            lambda: self._load_model_reserved(
+                model_path, model_id, gpu_index, quantize, use_fp16, reservation, progress, task
+            )
+        )
+    
+    def _load_model_reserved(
+        self,
+        model_path: str,
+        model_id: str,
+        gpu_index: int,
+        quantize: bool,
+        use_fp16: bool,
+        reservation: Optional[GPUReservation],
+        progress: Optional[Callable[[str], None]] = None,
+        task: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Önbellek kontrolü, rezervasyon ve tahliye ile birlikte model yükleme
+        """
+        # Aynı ayarlarla zaten yüklüyse yeniden yükleme
+        cached = self._resident_result(
+            model_id, gpu_index, onnx=False, quantize=quantize, use_fp16=use_fp16, task=task
+        )
+        if cached is not None:
+            if reservation is not None:
+                self.gpu_manager.reservations.release(reservation)
+            return cached
+        
+        if reservation is None:
+            reservation = self.gpu_manager.reservations.reserve(
+                gpu_index,
+                self.estimate_memory_mb(model_path, use_fp16=use_fp16, quantization=quantization_scheme(quantize)),
+                owner=model_id
+            )
+        
+        result: Dict[str, Any] = {"success": False}
+        try:
+            error = self._make_resident_room(model_id, gpu_index, reservation.memory_mb)
+            if error:
+                result = {"success": False, "message": error}
+                return result
+            
+            # Ana bellekte sıcak kopya varsa diskten okumadan GPU'ya taşı
+            result = self._promote_warm(model_id, gpu_index, quantize, use_fp16, progress, task)
+            if result is None:
+                result = self._load_model(model_path, model_id, gpu_index, quantize, use_fp16, progress, task)
+            if result.get("success"):
+                self._register_resident(model_id, gpu_index, reservation.memory_mb)
+            return result
+        finally:
+            self._settle_reservation(reservation, result)
+    
+    def _load_model(
+        self, 
+        model_path: str, 
+        model_id: str, 
+        gpu_index: int,
+        quantize: bool, 
+        use_fp16: bool,
+        progress: Optional[Callable[[str], None]] = None,
+        task: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Modeli yükler ve optimize eder (rezervasyon yönetimi olmadan)
+        
         Args:
             model_path: Model dizini
             model_id: Model ID
             gpu_index: GPU indeksi
             quantize: Quantization uygulanacak mı
             use_fp16: FP16 kullanılacak mı
+            progress: Yükleme aşamasıyla çağrılan fonksiyon
+            task: ModelMetadata.task
             
         Returns:
             Dict[str, Any]: Sonuç
         """
         start_time = time.time()
+        progress = progress or (lambda stage: None)
+        head = task_head(task)
         
-        with self.models_lock:
+        with self._model_lock(model_id):
             try:
                 # Gerekli dizinleri kontrol et
                 if not os.path.exists(model_path):
@@ -97,23 +288,20 @@ class ModelOptimizer:
                 device = f"cuda:{gpu_index}"
                 
                 # Önce tokenizer'ı yükle
+                progress("tokenizer")
                 try:
                     tokenizer = AutoTokenizer.from_pretrained(model_path)
                     
-                    # Tokenizer'ı kaydet
-                    self.tokenizers[model_id] = tokenizer
-                    
                     model_config = {
                         "model_id": model_id,
                         "gpu_index": gpu_index,
                         "device": device,
                         "quantized": quantize,
-                        "fp16": use_fp16
+                        "fp16": use_fp16,
+                        "task": task,
+                        "task_kind": head.kind
                     }
                     
-                    # Model konfigürasyonunu kaydet
-                    self.model_configs[model_id] = model_config
-                    
                 except Exception as e:
                     return {
                         "success": False,
@@ -127,25 +315,63 @@ class ModelOptimizer:
                     
                     # Model parametreleri
                     model_kwargs = {
-                        "torch_dtype": torch.float16 if use_fp16 else torch.float32,
-                        "device_map": device
+                        "torch_dtype": torch.float16 if use_fp16 else torch.float32
                     }
                     
-                    # Modeli yükle
-                    model = AutoModel.from_pretrained(
-                        model_path,
-                        **model_kwargs
-                    )
+                    # Quantize edilecek model CPU'da yüklenip quantize edilir; GPU'ya sadece
+                    # quantize ağırlıklar taşınır (tam hassasiyetli kopya GPU'da yer kaplamaz).
+                    # mmap yolunda katmanlar parça parça yüklenirken quantize edilir; ana bellekte
+                    # tüm model tam hassasiyette tutulmaz. from_pretrained yolunda tutulur.
+                    backend = select_backend(quantization_scheme(quantize), device)
+                    load_device = "cpu" if backend is not None else device
+                    streaming = StreamingQuantizer(backend) if backend is not None else None
+                    
+                    # Ağırlıkları yükle: önce safetensors mmap yolu, olmazsa from_pretrained
+                    progress("weights")
+                    model = None
+                    if settings.MODEL_FAST_LOADER:
+                        try:
+                            model = load_safetensors_model(
+                                model_path, load_device, model_kwargs["torch_dtype"], head.model_class,
+                                quantizer=streaming
+                            )
+                        except Exception as e:
+                            logger.warning(f"mmap yükleyici başarısız, from_pretrained kullanılacak: {e}")
+                            torch.cuda.empty_cache()
                     
-                    # Quantization işlemi (eğer isteniyorsa)
-                    if quantize and hasattr(model, "quantize"):
-                        model = model.quantize(8)  # 8-bit quantization
+                    model_config["loader"] = "safetensors-mmap" if model is not None else "from_pretrained"
+                    if model is not None and streaming is not None:
+                        quantization = streaming.report(model)
+                    else:
+                        if model is None:
+                            model = head.model_class.from_pretrained(
+                                model_path,
+                                **model_kwargs
+                            )
+                        if backend is not None:
+                            progress("quantize")
+                        model, quantization = quantize_model(model, backend)
+                    prepare_tokenizer(tokenizer, head, model.config)
+                    model_config["quantization"] = quantization
+                    
+                    # GPU'ya taşı (mmap yükleyicide model zaten hedef cihazda)
+                    progress("to-device")
+                    model = model.to(device)
                     
                     # Modeli değerlendir (eval) moduna al
                     model.eval()
                     
-                    # Modeli kaydet
-                    self.models[model_id] = model
+                    # İlk isteğin CUDA başlatma maliyetini yüklemede öde
+                    progress("warmup")
+                    self._warmup(model, tokenizer, device)
+                    
+                    model_config["weights_mb"] = self._model_weight_mb(model)
+                    
+                    # Model, tokenizer ve konfigürasyonu birlikte yayınla
+                    with self.models_lock:
+                        self.models[model_id] = model
+                        self.tokenizers[model_id] = tokenizer
+                        self.model_configs[model_id] = model_config
                     
                 except Exception as e:
                     return {
@@ -156,8 +382,8 @@ class ModelOptimizer:
                 # Model yükleme süresini ölç
                 duration = time.time() - start_time
                 
-                # Prometheus metriğini kaydet
-                record_model_load(model_id, gpu_index, quantize, use_fp16, duration)
+                # Prometheus metriğini kaydet (uygulanan quantization ile)
+                record_model_load(model_id, gpu_index, quantization["layers"] > 0, use_fp16, duration)
                 
                 return {
                     "success": True,
@@ -166,8 +392,13 @@ class ModelOptimizer:
                     "gpu_index": gpu_index,
                     "model_id": model_id,
                     "quantized": quantize,
+                    "quantization": quantization,
                     "fp16": use_fp16,
-                    "device": device
+                    "task": task,
+                    "task_kind": head.kind,
+                    "device": device,
+                    "loader": model_config["loader"],
+                    "weights_mb": model_config["weights_mb"]
                 }
                 
             except Exception as e:
@@ -176,183 +407,1589 @@ class ModelOptimizer:
                     "message": f"Model yükleme hatası: {str(e)}"
                 }
     
-    def optimize_with_onnx(
-        self, 
-        model_path: str, 
-        model_id: str, 
-        gpu_index: int
+    def shard_budgets(self, gpu_indices: Optional[List[int]] = None) -> Dict[Union[int, str], int]:
+        """
+        Parçalı yükleme için cihaz başına ağırlık bütçesi
+        
+        GPU bütçesi anlık boş bellekten bekleyen rezervasyonlar ve
+        PLACEMENT_HEADROOM_MB düşülerek, aktivasyon payı
+        (MODEL_ACTIVATION_OVERHEAD_FRACTION) için küçültülerek bulunur. GPU'lar
+        bütçeye göre büyükten küçüğe sıralanır (model en az GPU'ya yayılır);
+        CPU bütçesi MODEL_SHARD_CPU_MEMORY_MB'dir ve en sona eklenir.
+        
+        Args:
+            gpu_indices: Kullanılacak GPU'lar (verilmezse tümü)
+            
+        Returns:
+            Dict[Union[int, str], int]: Cihaz (GPU indeksi veya "cpu") -> bütçe (byte)
+        """
+        pending = self.gpu_manager.reservations.pending_mb()
+        scale = 1.0 + settings.MODEL_ACTIVATION_OVERHEAD_FRACTION
+        
+        gpu_budgets = {}
+        for gpu in self.gpu_manager.detect_gpus():
+            if gpu_indices is not None and gpu["index"] not in gpu_indices:
+                continue
+            free_mb = gpu["free_memory_mb"] - pending.get(gpu["index"], 0.0) - settings.PLACEMENT_HEADROOM_MB
+            gpu_budgets[gpu["index"]] = int(max(free_mb, 0.0) / scale * MB)
+        
+        budgets: Dict[Union[int, str], int] = dict(
+            sorted(gpu_budgets.items(), key=lambda item: item[1], reverse=True)
+        )
+        if settings.MODEL_SHARD_CPU_MEMORY_MB > 0:
+            budgets["cpu"] = settings.MODEL_SHARD_CPU_MEMORY_MB * MB
+        
+        return budgets
+    
+    def plan_sharded(
+        self,
+        model_path: str,
+        use_fp16: bool = True,
+        gpu_indices: Optional[List[int]] = None,
+        task: Optional[str] = None
     ) -> Dict[str, Any]:
         """
-        Modeli ONNX formatına dönüştürür ve optimize eder
+        Modelin katmanlarını GPU'lara bölen, sığmayanı CPU'ya taşıyan yerleşim planı
         
         Args:
             model_path: Model dizini
-            model_id: Model ID
-            gpu_index: GPU indeksi
+            use_fp16: FP16 ile yüklenecek mi
+            gpu_indices: Kullanılacak GPU'lar (verilmezse tümü)
+            task: ModelMetadata.task (plan görev başlığının modül adlarıyla yapılır)
             
         Returns:
-            Dict[str, Any]: Sonuç
+            Dict[str, Any]: Sonuç; başarıda device_map, giriş GPU'su (gpu_index),
+                cihaz başına ağırlık (device_weights_mb) ve bütçeler (max_memory_mb)
         """
-        if not ONNX_AVAILABLE:
+        budgets = self.shard_budgets(gpu_indices)
+        gpus = [device for device in budgets if device != "cpu"]
+        if not gpus:
             return {
                 "success": False,
-                "message": "ONNX Runtime yüklü değil"
+                "message": "Sistemde GPU bulunamadı"
+            }
+        
+        try:
+            model = build_empty_model(
+                model_path, torch.float16 if use_fp16 else torch.float32, task_head(task).model_class
+            )
+            device_map, placed = plan_device_map(model, budgets)
+        except Exception as e:
+            return {
+                "success": False,
+                "message": f"Parçalı yerleşim planlanamadı: {str(e)}"
             }
         
+        # Girdiler ilk GPU'ya verilir (accelerate CPU'daki blokları da orada çalıştırır);
+        # model tamamen CPU'ya taştıysa en geniş bütçeli GPU kaydedilir
+        gpu_index = next((device for device in device_map.values() if device != "cpu"), gpus[0])
+        
+        return {
+            "success": True,
+            "message": "Parçalı yerleşim planlandı",
+            "gpu_index": gpu_index,
+            "device_map": device_map,
+            "device_weights_mb": {device: size / MB for device, size in placed.items()},
+            "max_memory_mb": {device: size / MB for device, size in budgets.items()}
+        }
+    
+    def reserve_sharded(self, plan: Dict[str, Any], owner: Optional[str] = None) -> List[GPUReservation]:
+        """
+        Plandaki her GPU için ağırlık + aktivasyon payı kadar bellek rezerve eder
+        
+        Args:
+            plan: plan_sharded sonucu
+            owner: Rezervasyon sahibi (model ID)
+            
+        Returns:
+            List[GPUReservation]: Rezervasyonlar
+        """
+        scale = 1.0 + settings.MODEL_ACTIVATION_OVERHEAD_FRACTION
+        return [
+            self.gpu_manager.reservations.reserve(device, weights_mb * scale, owner=owner)
+            for device, weights_mb in plan["device_weights_mb"].items()
+            if device != "cpu"
+        ]
+    
+    def load_model_sharded(
+        self,
+        model_path: str,
+        model_id: str,
+        plan: Dict[str, Any],
+        use_fp16: bool = True,
+        reservations: Optional[List[GPUReservation]] = None,
+        progress: Optional[Callable[[str], None]] = None,
+        quantize: bool = False,
+        task: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Modeli plan_sharded planına göre birden çok GPU'ya (ve CPU'ya) bölerek yükler
+        
+        CPU'ya düşen bloklar ana bellekte tutulur ve ileri geçişte giriş GPU'suna
+        taşınarak çalıştırılır (accelerate offload). Rezervasyonlar başarıda
+        tamamlanır, hatada bırakılır.
+        
+        Args:
+            model_path: Model dizini
+            model_id: Model ID
+            plan: plan_sharded sonucu
+            use_fp16: FP16 kullanılacak mı
+            reservations: reserve_sharded ile alınmış rezervasyonlar
+            progress: Yükleme aşamasıyla çağrılan fonksiyon (tokenizer, weights, quantize, warmup)
+            quantize: Model tamamen CPU'ya düşerse dinamik INT8 uygulansın mı
+            task: ModelMetadata.task (plan_sharded'a verilenle aynı olmalı)
+            
+        Returns:
+            Dict[str, Any]: Sonuç
+        """
+        reservations = reservations or []
+        result = self._run_shared(
+            model_id,
+            ("sharded", tuple(sorted(plan["device_map"].items())), quantize, use_fp16, task),
+            None,
+            lambda: self._load_model_sharded_reserved(
+                model_path, model_id, plan, use_fp16, reservations, progress, quantize, task
+            )
+        )
+        
+        # Devam eden yüklemeye katılan istek kendi rezervasyonlarını kullanmaz
+        if result.get("shared"):
+            for reservation in reservations:
+                self.gpu_manager.reservations.release(reservation)
+        
+        return result
+    
+    def _load_model_sharded_reserved(
+        self,
+        model_path: str,
+        model_id: str,
+        plan: Dict[str, Any],
+        use_fp16: bool,
+        reservations: List[GPUReservation],
+        progress: Optional[Callable[[str], None]] = None,
+        quantize: bool = False,
+        task: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Önbellek kontrolü ve GPU başına yer açma ile birlikte parçalı yükleme
+        """
+        config = self.model_configs.get(model_id) or {}
+        cached = self._resident_result(
+            model_id, config.get("gpu_index"), onnx=False, quantize=quantize, use_fp16=use_fp16, sharded=True,
+            task=task
+        )
+        if cached is not None:
+            for reservation in reservations:
+                self.gpu_manager.reservations.release(reservation)
+            return cached
+        
+        scale = 1.0 + settings.MODEL_ACTIVATION_OVERHEAD_FRACTION
+        gpu_index = plan["gpu_index"]
+        
+        result: Dict[str, Any] = {"success": False}
+        try:
+            for device, weights_mb in plan["device_weights_mb"].items():
+                if device == "cpu":
+                    continue
+                error = self._make_resident_room(model_id, device, weights_mb * scale)
+                if error:
+                    result = {"success": False, "message": error}
+                    return result
+            
+            result = self._load_model_sharded(model_path, model_id, plan, use_fp16, progress, quantize, task)
+            if result.get("success"):
+                # Yerleşim kaydı giriş GPU'sundaki pay ile tutulur; diğer GPU'lardaki
+                # paylar tamamlanan rezervasyonlarla telemetriye yansıyana kadar korunur
+                self.residency.add(model_id, gpu_index, plan["device_weights_mb"].get(gpu_index, 0.0) * scale)
+            return result
+        finally:
+            for reservation in reservations:
+                self._settle_reservation(reservation, result)
+    
+    def _load_model_sharded(
+        self,
+        model_path: str,
+        model_id: str,
+        plan: Dict[str, Any],
+        use_fp16: bool,
+        progress: Optional[Callable[[str], None]] = None,
+        quantize: bool = False,
+        task: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Modeli cihaz haritasıyla yükler (rezervasyon yönetimi olmadan)
+        
+        Args:
+            model_path: Model dizini
+            model_id: Model ID
+            plan: plan_sharded sonucu
+            use_fp16: FP16 kullanılacak mı
+            progress: Yükleme aşamasıyla çağrılan fonksiyon
+            quantize: Model tamamen CPU'ya düşerse dinamik INT8 uygulansın mı
+            task: ModelMetadata.task
+            
+        Returns:
+            Dict[str, Any]: Sonuç
+        """
         start_time = time.time()
+        progress = progress or (lambda stage: None)
+        gpu_index = plan["gpu_index"]
+        head = task_head(task)
         
-        with self.models_lock:
+        with self._model_lock(model_id):
+            if not os.path.exists(model_path):
+                return {
+                    "success": False,
+                    "message": f"Model dizini bulunamadı: {model_path}"
+                }
+            
+            progress("tokenizer")
             try:
-                # Gerekli dizinleri kontrol et
-                if not os.path.exists(model_path):
-                    return {
-                        "success": False,
-                        "message": f"Model dizini bulunamadı: {model_path}"
-                    }
-                
-                # GPU kontrolü
-                gpus = self.gpu_manager.detect_gpus()
-                if not gpus:
-                    return {
-                        "success": False,
-                        "message": "Sistemde GPU bulunamadı"
-                    }
-                
-                gpu_indices = [gpu["index"] for gpu in gpus]
-                if gpu_index not in gpu_indices:
-                    return {
-                        "success": False,
-                        "message": f"GPU indeksi geçersiz: {gpu_index}. Mevcut GPU'lar: {gpu_indices}"
-                    }
-                
-                # ONNX dizini oluştur
-                onnx_dir = os.path.join(tempfile.gettempdir(), f"onnx_{model_id.replace('/', '_')}")
-                os.makedirs(onnx_dir, exist_ok=True)
-                
-                onnx_path = os.path.join(onnx_dir, "model.onnx")
-                
-                # Önce PyTorch modelini yükle
-                model = AutoModel.from_pretrained(model_path)
                 tokenizer = AutoTokenizer.from_pretrained(model_path)
-                
-                # PyTorch modelini ONNX'e dönüştür
-                dummy_input = tokenizer("Hello, world!", return_tensors="pt")
-                
-                with torch.no_grad():
-                    torch.onnx.export(
-                        model,
-                        (dummy_input.input_ids,),
-                        onnx_path,
-                        input_names=["input_ids"],
-                        output_names=["last_hidden_state", "pooler_output"],
-                        dynamic_axes={
-                            "input_ids": {0: "batch_size", 1: "sequence_length"},
-                            "last_hidden_state": {0: "batch_size", 1: "sequence_length"},
-                            "pooler_output": {0: "batch_size"}
-                        },
-                        opset_version=12
-                    )
-                
-                # PyTorch modelini temizle
-                del model
-                gc.collect()
+            except Exception as e:
+                return {
+                    "success": False,
+                    "message": f"Tokenizer yüklenemedi: {str(e)}"
+                }
+            
+            # Tamamen CPU'ya taşan model CPU'da çalışır
+            on_gpu = any(device != "cpu" for device in plan["device_map"].values())
+            device = f"cuda:{gpu_index}" if on_gpu else "cpu"
+            
+            try:
                 torch.cuda.empty_cache()
                 
-                # ONNX modelini yükle
-                onnx_session_options = ort.SessionOptions()
-                onnx_session_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
-                
-                # GPU sağlayıcısını belirle
-                providers = [
-                    ("CUDAExecutionProvider", {"device_id": gpu_index}),
-                    "CPUExecutionProvider"
-                ]
-                
-                onnx_session = ort.InferenceSession(
-                    onnx_path,
-                    sess_options=onnx_session_options,
-                    providers=providers
+                # Ağırlıklar parça parça doğrudan planlanan cihazlara yüklenir
+                progress("weights")
+                model = head.model_class.from_pretrained(
+                    model_path,
+                    torch_dtype=torch.float16 if use_fp16 else torch.float32,
+                    device_map=plan["device_map"]
                 )
+                prepare_tokenizer(tokenizer, head, model.config)
                 
-                # Modelleri kaydet
-                self.models[model_id] = onnx_session
-                self.tokenizers[model_id] = tokenizer
+                # Quantization sadece tamamen CPU'da çalışan modele uygulanır; cihazlara
+                # dağıtılmış modüllerin yerine yenisi konursa offload kancaları kaybolur
+                backend = select_backend(quantization_scheme(quantize), device) if not on_gpu else None
+                if backend is not None:
+                    progress("quantize")
+                model, quantization = quantize_model(model, backend)
+                model.eval()
+                
+                progress("warmup")
+                self._warmup(model, tokenizer, device)
                 
                 model_config = {
                     "model_id": model_id,
                     "gpu_index": gpu_index,
-                    "device": f"cuda:{gpu_index}",
-                    "onnx": True,
-                    "onnx_path": onnx_path
+                    "device": device,
+                    "quantized": quantize,
+                    "quantization": quantization,
+                    "fp16": use_fp16,
+                    "task": task,
+                    "task_kind": head.kind,
+                    "loader": "from_pretrained-device-map",
+                    "sharded": True,
+                    "device_map": dict(getattr(model, "hf_device_map", plan["device_map"])),
+                    "device_weights_mb": plan["device_weights_mb"],
+                    "weights_mb": plan["device_weights_mb"].get(gpu_index, 0.0)
                 }
                 
-                self.model_configs[model_id] = model_config
-                
-                # Model dönüşüm süresini ölç
-                duration = time.time() - start_time
-                
-                # Prometheus metriğini kaydet
-                record_model_load(model_id, gpu_index, True, True, duration)
-                
-                return {
-                    "success": True,
-                    "message": "Model başarıyla ONNX'e dönüştürüldü ve optimize edildi",
-                    "loading_time": duration,
-                    "gpu_index": gpu_index,
-                    "model_id": model_id,
-                    "onnx": True,
-                    "onnx_path": onnx_path
-                }
+                with self.models_lock:
+                    self.models[model_id] = model
+                    self.tokenizers[model_id] = tokenizer
+                    self.model_configs[model_id] = model_config
                 
             except Exception as e:
                 return {
                     "success": False,
-                    "message": f"ONNX optimizasyonu hatası: {str(e)}"
+                    "message": f"Model parçalı yüklenemedi: {str(e)}"
                 }
+        
+        duration = time.time() - start_time
+        record_model_load(model_id, gpu_index, quantization["layers"] > 0, use_fp16, duration)
+        
+        return {
+            "success": True,
+            "message": "Model cihazlara bölünerek yüklendi",
+            "loading_time": duration,
+            "gpu_index": gpu_index,
+            "model_id": model_id,
+            "quantized": quantize,
+            "quantization": quantization,
+            "fp16": use_fp16,
+            "task": task,
+            "task_kind": head.kind,
+            "device": device,
+            "loader": model_config["loader"],
+            "device_map": model_config["device_map"],
+            "device_weights_mb": plan["device_weights_mb"]
+        }
     
-    def unload_model(self, model_id: str) -> Dict[str, Any]:
+    def replica_ids(self, model_id: str) -> List[str]:
         """
-        Modeli bellekten boşaltır
+        Modelin bellekteki replikaları (replika numarasına göre sıralı)
+        
+        Her replika models/model_configs/residency içinde kendi anahtarıyla
+        tutulur; tahliye, sıcak önbellek ve lock'lar replika başına çalışır.
         
         Args:
             model_id: Model ID
             
         Returns:
-            Dict[str, Any]: Sonuç
+            List[str]: Replika anahtarları
         """
         with self.models_lock:
-            try:
-                if model_id in self.models:
-                    # Modeli kaldır
-                    if hasattr(self.models[model_id], "to"):
-                        self.models[model_id].to("cpu")
-                    
-                    del self.models[model_id]
-                    
-                    # Tokenizer'ı kaldır
-                    if model_id in self.tokenizers:
-                        del self.tokenizers[model_id]
-                    
-                    # Config'i kaldır
-                    if model_id in self.model_configs:
-                        del self.model_configs[model_id]
-                    
-                    # Belleği temizle
-                    gc.collect()
-                    torch.cuda.empty_cache()
-                    
-                    return {
-                        "success": True,
-                        "message": f"Model bellekten kaldırıldı: {model_id}"
-                    }
-                else:
-                    return {
-                        "success": False,
-                        "message": f"Model bellekte bulunamadı: {model_id}"
-                    }
-                
-            except Exception as e:
-                return {
-                    "success": False,
-                    "message": f"Model kaldırma hatası: {str(e)}"
-                }
\ No newline at end of file
+            keys = [key for key in self.models if replica_base(key) == model_id]
+        return sorted(keys, key=replica_index)
+    
+    def replica_gpus(self, model_id: str) -> Dict[str, Optional[int]]:
+        """
+        Modelin yüklü ve yüklenmekte olan replikalarının GPU'ları
+        
+        Küçültmede seçilmiş (iptal edilen veya boşaltılacak) replikalar sayılmaz.
+        
+        Args:
+            model_id: Model ID
+            
+        Returns:
+            Dict[str, Optional[int]]: Replika anahtarı -> GPU indeksi
+        """
+        with self.models_lock:
+            gpus = {
+                key: config.get("gpu_index")
+                for key, config in self.model_configs.items()
+                if replica_base(key) == model_id and key in self.models
+            }
+            gpus.update(
+                (key, gpu_index) for key, gpu_index in self._replica_claims.items() if replica_base(key) == model_id
+            )
+            for key in self._replica_drops:
+                gpus.pop(key, None)
+        return gpus
+    
+    def claim_replica(self, model_id: str, gpu_index: int) -> str:
+        """
+        Yeni replika için boş ilk replika numarasını ayırır
+        
+        Ayrılan anahtar add_replica bitene (veya release_replica çağrılana)
+        kadar yüklenmekte sayılır; eşzamanlı ölçeklemeler aynı anahtarı almaz.
+        
+        Args:
+            model_id: Model ID
+            gpu_index: Replikanın yükleneceği GPU
+            
+        Returns:
+            str: Replika anahtarı
+        """
+        with self.models_lock:
+            taken = set(self.models) | set(self._replica_claims)
+            key = next(
+                replica_key(model_id, index) for index in itertools.count()
+                if replica_key(model_id, index) not in taken
+            )
+            self._replica_claims[key] = gpu_index
+            self._replica_drops.discard(key)
+        return key
+    
+    def release_replica(self, replica_id: str) -> None:
+        """
+        Yüklenmeyecek replikanın ayrılmış anahtarını bırakır
+        
+        Args:
+            replica_id: claim_replica ile alınan anahtar
+        """
+        with self.models_lock:
+            self._replica_claims.pop(replica_id, None)
+    
+    def add_replica(
+        self,
+        model_path: str,
+        replica_id: str,
+        quantize: bool = True,
+        use_fp16: bool = True,
+        reservation: Optional[GPUReservation] = None,
+        progress: Optional[Callable[[str], None]] = None,
+        task: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        claim_replica ile ayrılan replikayı ayrıldığı GPU'ya yükler
+        
+        Args:
+            model_path: Model dizini
+            replica_id: Replika anahtarı
+            quantize: Quantization uygulanacak mı
+            use_fp16: FP16 kullanılacak mı
+            reservation: Önceden alınmış GPU rezervasyonu
+            progress: Yükleme aşamasıyla çağrılan fonksiyon
+            task: ModelMetadata.task
+            
+        Returns:
+            Dict[str, Any]: Yükleme sonucu ve replika anahtarı
+        """
+        with self.models_lock:
+            gpu_index = self._replica_claims[replica_id]
+            started = replica_id not in self._replica_drops
+        
+        result: Dict[str, Any] = {"success": False}
+        try:
+            # Küçültme yüklemeyi başlamadan iptal ettiyse GPU'ya hiç yüklenmez
+            if started:
+                result = self.load_model(
+                    model_path, replica_id, gpu_index,
+                    quantize=quantize, use_fp16=use_fp16, reservation=reservation, progress=progress, task=task
+                )
+        finally:
+            with self.models_lock:
+                self._replica_claims.pop(replica_id, None)
+                cancelled = replica_id in self._replica_drops
+        
+        if cancelled:
+            # Yükleme sürerken iptal edildiyse yüklenen replika hemen boşaltılır
+            if not started and reservation is not None:
+                self.gpu_manager.reservations.release(reservation)
+            elif result.get("success"):
+                self.unload_model(replica_id, keep_warm=False)
+            
+            with self.models_lock:
+                self._replica_drops.discard(replica_id)
+            result = {
+                "success": False,
+                "cancelled": True,
+                "message": f"Replika yüklemesi küçültme ile iptal edildi: {replica_id}"
+            }
+        
+        return dict(result, replica_id=replica_id, replica_of=replica_base(replica_id))
+    
+    def drop_replicas(self, model_id: str, count: int) -> Tuple[List[str], List[str]]:
+        """
+        Küçültmede bırakılacak replikaları seçer ve işaretler
+        
+        Önce yüklenmekte olan replikalar seçilir (yüklemeleri iptal edilir;
+        add_replica yüklemeyi atlar veya biter bitmez boşaltır), sonra yüklü
+        replikalar en yüksek numaradan. İşaretli replikalar replica_gpus'ta
+        sayılmaz; eşzamanlı ölçeklemeler aynı replikayı iki kez seçmez.
+        
+        Args:
+            model_id: Model ID
+            count: Bırakılacak replika sayısı
+            
+        Returns:
+            Tuple[List[str], List[str]]: (yüklemesi iptal edilenler, remove_replica ile boşaltılacaklar)
+        """
+        with self.models_lock:
+            pending = sorted(
+                (key for key in self._replica_claims
+                 if replica_base(key) == model_id and key not in self._replica_drops),
+                key=replica_index,
+                reverse=True
+            )
+            loaded = sorted(
+                (key for key in self.models
+                 if replica_base(key) == model_id and key not in self._replica_drops and key not in self._replica_claims),
+                key=replica_index,
+                reverse=True
+            )
+            
+            cancelled = pending[:max(count, 0)]
+            removing = loaded[:max(count - len(cancelled), 0)]
+            self._replica_drops.update(cancelled + removing)
+        
+        return cancelled, removing
+    
+    def keep_replicas(self, replica_ids: List[str]) -> None:
+        """
+        drop_replicas ile boşaltılmak üzere işaretlenen yüklü replikaların işaretini kaldırır
+        
+        Args:
+            replica_ids: Replika anahtarları
+        """
+        with self.models_lock:
+            self._replica_drops.difference_update(replica_ids)
+    
+    def remove_replica(self, model_id: str, replica_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Replikayı boşaltır (verilmezse modelin en yüksek numaralı replikasını)
+        
+        Args:
+            model_id: Model ID
+            replica_id: Boşaltılacak replika (drop_replicas sonucu)
+            
+        Returns:
+            Dict[str, Any]: Sonuç
+        """
+        if replica_id is None:
+            replicas = self.replica_ids(model_id)
+            if not replicas:
+                return {
+                    "success": False,
+                    "message": f"Model bellekte bulunamadı: {model_id}"
+                }
+            replica_id = replicas[-1]
+        
+        try:
+            return dict(self.unload_model(replica_id), replica_id=replica_id)
+        finally:
+            self.keep_replicas([replica_id])
+    
+    def optimize_with_onnx(
+        self, 
+        model_path: str, 
+        model_id: str, 
+        gpu_index: int,
+        reservation: Optional[GPUReservation] = None,
+        progress: Optional[Callable[[str], None]] = None,
+        revision: Optional[str] = None,
+        quantize: bool = False,
+        use_fp16: bool = False,
+        session_options: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Modeli ONNX formatına dönüştürür ve optimize eder
+        
+        Aynı model için devam eden bir yükleme varsa onun sonucu beklenir.
+        Dışa aktarılan ve ORT ile optimize edilen grafikler sürüm, opset ve
+        girdi imzasına göre MODEL_STORAGE_PATH altında saklanır; aynı ayarlarla
+        tekrar istendiğinde PyTorch modeli yüklenmeden oturum oluşturulur.
+        
+        quantize / use_fp16 verilirse FP32 grafiğin INT8 (dinamik ve statik) /
+        FP16 varyantları üretilip ölçülür ve ONNX_VARIANT_MIN_COSINE doğruluk
+        eşiğini geçenlerden en hızlısı sunulur. Seçilen grafik, eşzamanlı
+        çağrılar için session_options ayarlarıyla oluşturulan bir oturum
+        havuzunda tutulur.
+        
+        Args:
+            model_path: Model dizini
+            model_id: Model ID
+            gpu_index: GPU indeksi
+            reservation: Önceden alınmış GPU rezervasyonu (verilmezse burada alınır)
+            progress: Dönüşüm aşamasıyla çağrılan fonksiyon
+            revision: Model sürümü (ModelVersion.commit_hash); verilmezse ağırlık dosyalarından parmak izi
+            quantize: INT8 varyantları denensin mi
+            use_fp16: FP16 varyantı denensin mi
+            session_options: Oturum ayarları (pool_size, intra_op_threads, inter_op_threads,
+                execution_mode, cpu_mem_arena, arena_extend_strategy; verilmeyenler ayarlardan)
+            
+        Returns:
+            Dict[str, Any]: Sonuç
+        """
+        return self._run_shared(
+            model_id,
+            ("onnx", gpu_index, revision, quantize, use_fp16, tuple(sorted((session_options or {}).items()))),
+            reservation,
+            lambda: self._optimize_with_onnx_reserved(
+                model_path, model_id, gpu_index, reservation, progress, revision, quantize, use_fp16,
+                session_options
+            )
+        )
+    
+    def _optimize_with_onnx_reserved(
+        self,
+        model_path: str,
+        model_id: str,
+        gpu_index: int,
+        reservation: Optional[GPUReservation],
+        progress: Optional[Callable[[str], None]] = None,
+        revision: Optional[str] = None,
+        quantize: bool = False,
+        use_fp16: bool = False,
+        session_options: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Önbellek kontrolü, rezervasyon ve tahliye ile birlikte ONNX optimizasyonu
+        """
+        if not ONNX_AVAILABLE:
+            if reservation is not None:
+                self.gpu_manager.reservations.release(reservation)
+            return {
+                "success": False,
+                "message": "ONNX Runtime yüklü değil"
+            }
+        
+        cached = self._resident_result(
+            model_id, gpu_index, onnx=True, quantize=quantize, use_fp16=use_fp16, session_options=session_options
+        )
+        if cached is not None:
+            if reservation is not None:
+                self.gpu_manager.reservations.release(reservation)
+            return cached
+        
+        if reservation is None:
+            reservation = self.gpu_manager.reservations.reserve(
+                gpu_index, self.estimate_memory_mb(model_path, onnx=True), owner=model_id
+            )
+        
+        result: Dict[str, Any] = {"success": False}
+        try:
+            error = self._make_resident_room(model_id, gpu_index, reservation.memory_mb)
+            if error:
+                result = {"success": False, "message": error}
+                return result
+            
+            result = self._optimize_with_onnx(
+                model_path, model_id, gpu_index, progress, revision, quantize, use_fp16, session_options
+            )
+            if result.get("success"):
+                self._register_resident(model_id, gpu_index, reservation.memory_mb)
+            return result
+        finally:
+            self._settle_reservation(reservation, result)
+    
+    def _optimize_with_onnx(
+        self, 
+        model_path: str, 
+        model_id: str, 
+        gpu_index: int,
+        progress: Optional[Callable[[str], None]] = None,
+        revision: Optional[str] = None,
+        quantize: bool = False,
+        use_fp16: bool = False,
+        session_options: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Modeli ONNX formatına dönüştürür ve optimize eder (rezervasyon yönetimi olmadan)
+        
+        Args:
+            model_path: Model dizini
+            model_id: Model ID
+            gpu_index: GPU indeksi
+            progress: Dönüşüm aşamasıyla çağrılan fonksiyon
+            revision: Model sürümü (önbellek anahtarı için)
+            quantize: INT8 varyantları denensin mi
+            use_fp16: FP16 varyantı denensin mi
+            session_options: Oturum ayarları (verilmeyenler ayarlardan)
+            
+        Returns:
+            Dict[str, Any]: Sonuç
+        """
+        start_time = time.time()
+        progress = progress or (lambda stage: None)
+        
+        with self._model_lock(model_id):
+            try:
+                # Gerekli dizinleri kontrol et
+                if not os.path.exists(model_path):
+                    return {
+                        "success": False,
+                        "message": f"Model dizini bulunamadı: {model_path}"
+                    }
+                
+                # GPU kontrolü
+                gpus = self.gpu_manager.detect_gpus()
+                if not gpus:
+                    return {
+                        "success": False,
+                        "message": "Sistemde GPU bulunamadı"
+                    }
+                
+                gpu_indices = [gpu["index"] for gpu in gpus]
+                if gpu_index not in gpu_indices:
+                    return {
+                        "success": False,
+                        "message": f"GPU indeksi geçersiz: {gpu_index}. Mevcut GPU'lar: {gpu_indices}"
+                    }
+                
+                # Önce tokenizer'ı yükle (ısınma girdisi ve çıkarım için her durumda gerekli)
+                progress("tokenizer")
+                tokenizer = AutoTokenizer.from_pretrained(model_path)
+                dummy_input = tokenizer("Hello, world!", return_tensors="pt")
+                
+                # Aynı sürüm, opset ve imzayla dışa aktarılmış grafik varsa PyTorch modeli yüklenmez
+                revision = revision or weights_fingerprint(model_path)
+                cache_key = export_cache_key(revision, settings.ONNX_OPSET_VERSION, ONNX_EXPORT_SIGNATURE)
+                entry = self.onnx_cache.lookup(model_id, cache_key)
+                cache_hit = entry is not None
+                
+                if entry is None:
+                    progress("weights")
+                    model = AutoModel.from_pretrained(model_path)
+                    
+                    progress("export")
+                    
+                    # attention_mask da girdi olmalı; aksi halde dolgulu (padded) toplu çalıştırmada
+                    # dolgu token'ları diğer token'ların çıktısını değiştirir
+                    def export(onnx_path: str) -> None:
+                        with torch.no_grad():
+                            torch.onnx.export(
+                                model,
+                                (dummy_input.input_ids, dummy_input.attention_mask),
+                                onnx_path,
+                                input_names=list(ONNX_EXPORT_SIGNATURE["inputs"]),
+                                output_names=ONNX_EXPORT_SIGNATURE["outputs"],
+                                dynamic_axes=ONNX_EXPORT_SIGNATURE["dynamic_axes"],
+                                opset_version=settings.ONNX_OPSET_VERSION
+                            )
+                    
+                    entry = self.onnx_cache.store(
+                        model_id,
+                        cache_key,
+                        export,
+                        meta={"revision": revision, "opset": settings.ONNX_OPSET_VERSION}
+                    )
+                    
+                    # PyTorch modelini temizle
+                    del model
+                    gc.collect()
+                    torch.cuda.empty_cache()
+                
+                # GPU'da havuzdaki yuvalar tek oturumu paylaşır (ağırlıklar bir kez yüklenir)
+                shared = self._onnx_provider_tag() == "cuda"
+                tuning = resolve_session_tuning(session_options, shared=shared)
+                
+                # GPU sağlayıcısını belirle
+                providers = [
+                    (
+                        "CUDAExecutionProvider",
+                        {"device_id": gpu_index, "arena_extend_strategy": tuning["arena_extend_strategy"]}
+                    ),
+                    "CPUExecutionProvider"
+                ]
+                
+                # İstenen FP16/INT8 varyantlarını üret, ölç ve doğruluğu yeten en hızlısını seç
+                variants = None
+                variant = "fp32"
+                candidates = variant_candidates(quantize, use_fp16)
+                if len(candidates) > 1:
+                    progress("variants")
+                    variants = self._prepare_onnx_variants(entry, tokenizer, providers, candidates, tuning)
+                    variant = select_variant(variants)
+                
+                onnx_path = variant_path(entry, variant)
+                
+                # ONNX modelini oturum havuzu olarak yükle
+                progress("to-device")
+                session_paths = []
+                
+                def create_session() -> Any:
+                    session, path = self._create_onnx_session(entry, providers, variant, tuning)
+                    session_paths.append(path)
+                    return session
+                
+                session_pool = OnnxSessionPool(create_session, tuning["pool_size"], shared=shared)
+                session_path = session_paths[0]
+                
+                # İlk çalıştırmada oluşan CUDA/ONNX başlatma ve tampon ayırma maliyetini yüklemede öde
+                progress("warmup")
+                session_pool.warmup({
+                    "input_ids": dummy_input.input_ids.numpy(),
+                    "attention_mask": dummy_input.attention_mask.numpy()
+                })
+                
+                model_config = {
+                    "model_id": model_id,
+                    "gpu_index": gpu_index,
+                    "device": f"cuda:{gpu_index}",
+                    "onnx": True,
+                    "onnx_path": onnx_path,
+                    "onnx_session_path": session_path,
+                    "onnx_cache_key": cache_key,
+                    "onnx_variant": variant,
+                    "onnx_variants": variants,
+                    "onnx_session": tuning,
+                    "quantized": quantize,
+                    "fp16": use_fp16,
+                    "revision": revision,
+                    "weights_mb": graph_size_mb(onnx_path)
+                }
+                
+                # Oturum, tokenizer ve konfigürasyonu birlikte yayınla
+                with self.models_lock:
+                    self.models[model_id] = session_pool
+                    self.tokenizers[model_id] = tokenizer
+                    self.model_configs[model_id] = model_config
+                
+                # Model dönüşüm süresini ölç
+                duration = time.time() - start_time
+                
+                # Prometheus metriğini kaydet
+                record_model_load(model_id, gpu_index, variant.startswith("int8"), variant == "fp16", duration)
+                
+                return {
+                    "success": True,
+                    "message": "Model başarıyla ONNX'e dönüştürüldü ve optimize edildi",
+                    "loading_time": duration,
+                    "gpu_index": gpu_index,
+                    "model_id": model_id,
+                    "onnx": True,
+                    "onnx_path": onnx_path,
+                    "onnx_cache_hit": cache_hit,
+                    "onnx_variant": variant,
+                    "onnx_variants": variants,
+                    "onnx_session": tuning,
+                    "revision": revision,
+                    "weights_mb": graph_size_mb(onnx_path)
+                }
+                
+            except Exception as e:
+                return {
+                    "success": False,
+                    "message": f"ONNX optimizasyonu hatası: {str(e)}"
+                }
+    
+    def _prepare_onnx_variants(
+        self,
+        entry: Dict[str, Any],
+        tokenizer: Any,
+        providers: List[Any],
+        candidates: List[str],
+        tuning: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Eksik varyantları üretir ve bu sağlayıcıda ölçülmemiş olanları ölçer
+        
+        Ölçümler kayıtta sağlayıcı başına saklanır; sonraki yüklemelerde
+        yeniden ölçülmez. Üretilemeyen veya çalışmayan varyant hata ile
+        raporlanır ve seçilmez.
+        
+        Args:
+            entry: OnnxExportCache kaydı
+            tokenizer: Kalibrasyon girdileri için tokenizer
+            providers: ORT yürütme sağlayıcıları
+            candidates: Varyant adları
+            tuning: Oturum ayarları (ölçüm sunulacak oturumla aynı ayarlarla yapılır)
+            
+        Returns:
+            Dict[str, Dict[str, Any]]: Aday başına ölçüm (size_mb, latency_ms, cosine veya error)
+        """
+        tag = self._onnx_provider_tag()
+        report = self.onnx_cache.read_variant_report(entry, tag)
+        missing = [variant for variant in candidates if variant not in report]
+        
+        if missing:
+            feeds = calibration_feeds(tokenizer, list(ONNX_EXPORT_SIGNATURE["inputs"]))
+            reference = None
+            
+            # Doğruluk FP32 çıktısına göre ölçüldüğü için FP32 her seferinde önce çalışır
+            for variant in ["fp32"] + [variant for variant in missing if variant != "fp32"]:
+                try:
+                    path = variant_path(entry, variant)
+                    if not os.path.exists(path):
+                        build_variant(entry["path"], variant, path, feeds)
+                    
+                    session, _ = self._create_onnx_session(entry, providers, variant, tuning)
+                    measured = measure_variant(session, feeds, reference)
+                    del session
+                except Exception as e:
+                    logger.warning(f"ONNX varyantı hazırlanamadı ({variant}): {e}")
+                    report[variant] = {"error": str(e)}
+                    continue
+                
+                if variant == "fp32":
+                    reference = measured["pooled"]
+                report[variant] = {
+                    "size_mb": graph_size_mb(path),
+                    "latency_ms": measured["latency_ms"],
+                    "cosine": measured["cosine"]
+                }
+            
+            self.onnx_cache.write_variant_report(entry, tag, report)
+        
+        return {variant: report[variant] for variant in candidates if variant in report}
+    
+    @staticmethod
+    def _onnx_provider_tag() -> str:
+        """
+        Optimize edilmiş grafiklerin ve ölçümlerin anahtarlandığı sağlayıcı etiketi
+        """
+        return "cuda" if "CUDAExecutionProvider" in ort.get_available_providers() else "cpu"
+    
+    def _create_onnx_session(
+        self,
+        entry: Dict[str, Any],
+        providers: List[Any],
+        variant: str = "fp32",
+        tuning: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Any, str]:
+        """
+        Önbellek kaydından ONNX oturumu oluşturur
+        
+        Sağlayıcıya özel optimize edilmiş grafik varsa grafik optimizasyonları
+        kapalı olarak doğrudan yüklenir. Yoksa dışa aktarılan grafik
+        ORT_ENABLE_EXTENDED ile optimize edilir ve sonuç sonraki yüklemeler için
+        kaydedilir (kaydedilebilir en yüksek seviye; ALL seviyesinin ek yerleşim
+        dönüşümleri sadece CPU evrişimlerini etkiler).
+        
+        Args:
+            entry: OnnxExportCache kaydı
+            providers: ORT yürütme sağlayıcıları
+            variant: Grafik varyantı ("fp32", "fp16", "int8-dynamic", "int8-static")
+            tuning: resolve_session_tuning sonucu (verilmezse ORT varsayılanları)
+            
+        Returns:
+            Tuple[Any, str]: (oturum, oturumun yüklendiği grafik yolu)
+        """
+        tag = self._onnx_provider_tag()
+        source_path = variant_path(entry, variant)
+        optimized_path = self.onnx_cache.optimized_path(entry, tag, variant)
+        
+        if os.path.exists(optimized_path):
+            options = self._session_options(tuning)
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+            return ort.InferenceSession(optimized_path, sess_options=options, providers=providers), optimized_path
+        
+        # Yarım yazılmış dosya önbellekte görünmesin diye geçici adla yazılıp taşınır;
+        # büyük ağırlıklar (2 GB protobuf sınırı) ayrı dosyaya yazılır
+        staging_path = f"{optimized_path}.tmp"
+        options = self._session_options(tuning)
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+        options.optimized_model_filepath = staging_path
+        options.add_session_config_entry(
+            "session.optimized_model_external_initializers_file_name",
+            f"{os.path.splitext(os.path.basename(optimized_path))[0]}.data"
+        )
+        
+        try:
+            session = ort.InferenceSession(source_path, sess_options=options, providers=providers)
+        except Exception as e:
+            logger.warning(f"Optimize edilmiş ONNX grafiği kaydedilemedi, kaydetmeden yükleniyor: {e}")
+            options = self._session_options(tuning)
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            return ort.InferenceSession(source_path, sess_options=options, providers=providers), source_path
+        
+        if os.path.exists(staging_path):
+            os.replace(staging_path, optimized_path)
+        
+        return session, source_path
+    
+    @staticmethod
+    def _session_options(tuning: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        İş parçacığı, yürütme kipi ve bellek havuzu ayarları uygulanmış ORT oturum seçenekleri
+        
+        Args:
+            tuning: resolve_session_tuning sonucu
+            
+        Returns:
+            Any: ort.SessionOptions
+        """
+        options = ort.SessionOptions()
+        if tuning:
+            options.intra_op_num_threads = tuning["intra_op_threads"]
+            options.inter_op_num_threads = tuning["inter_op_threads"]
+            options.execution_mode = (
+                ort.ExecutionMode.ORT_PARALLEL if tuning["execution_mode"] == "parallel"
+                else ort.ExecutionMode.ORT_SEQUENTIAL
+            )
+            options.enable_cpu_mem_arena = tuning["cpu_mem_arena"]
+        return options
+    
+    def _promote_warm(
+        self,
+        model_id: str,
+        gpu_index: int,
+        quantize: bool,
+        use_fp16: bool,
+        progress: Optional[Callable[[str], None]] = None,
+        task: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Sıcak önbellekteki modeli GPU'ya geri taşır
+        
+        Args:
+            model_id: Model ID
+            gpu_index: GPU indeksi
+            quantize: Quantization uygulanacak mı
+            use_fp16: FP16 kullanılacak mı
+            progress: Yükleme aşamasıyla çağrılan fonksiyon
+            task: ModelMetadata.task (sıcak kopyanın başlığı farklıysa kullanılmaz)
+            
+        Returns:
+            Optional[Dict[str, Any]]: Sonuç veya uygun sıcak kopya yoksa (ya da GPU'ya
+                taşınamadıysa) None; çağıran diskten yükler
+        """
+        warm = self.warm_cache.take(model_id)
+        if warm is None:
+            return None
+        
+        # Farklı ayarlarla istenirse sıcak kopya kullanılmaz (ve atılır)
+        if (
+            warm.config.get("quantized") != quantize
+            or warm.config.get("fp16") != use_fp16
+            or warm.config.get("task_kind", "embedding") != task_head(task).kind
+        ):
+            logger.info(f"Sıcak kopya ayarları uyuşmuyor, model diskten yüklenecek: {model_id}")
+            self.warm_cache.record_miss()
+            return None
+        
+        start_time = time.time()
+        progress = progress or (lambda stage: None)
+        device = f"cuda:{gpu_index}"
+        failed = False
+        
+        with self._model_lock(model_id):
+            try:
+                # Sabitlenmiş (pinned) bellekten kopya asenkron yapılabilir
+                progress("to-device")
+                model = warm.model.to(device, non_blocking=True)
+                if torch.cuda.is_available():
+                    torch.cuda.synchronize(device)
+                model.eval()
+                
+                model_config = dict(warm.config, gpu_index=gpu_index, device=device)
+                
+                with self.models_lock:
+                    self.models[model_id] = model
+                    self.tokenizers[model_id] = warm.tokenizer
+                    self.model_configs[model_id] = model_config
+            except Exception as e:
+                # Yarım kalan kopyanın bir kısmı GPU'da olabilir; sıcak katmana geri konmaz
+                logger.warning(f"Model sıcak önbellekten GPU'ya taşınamadı, diskten yüklenecek ({model_id}): {e}")
+                failed = True
+        
+        if failed:
+            # Kısmen kopyalanmış ağırlıkları bırak; rezervasyon disk yüklemesinde kullanılır
+            warm = model = None
+            gc.collect()
+            torch.cuda.empty_cache()
+            self.warm_cache.record_miss()
+            return None
+        
+        self.warm_cache.record_hit()
+        duration = time.time() - start_time
+        applied = bool((warm.config.get("quantization") or {}).get("layers"))
+        record_model_load(model_id, gpu_index, applied, use_fp16, duration)
+        
+        return {
+            "success": True,
+            "message": "Model ana bellekteki sıcak kopyadan GPU'ya taşındı",
+            "loading_time": duration,
+            "gpu_index": gpu_index,
+            "model_id": model_id,
+            "quantized": quantize,
+            "quantization": warm.config.get("quantization"),
+            "fp16": use_fp16,
+            "task": warm.config.get("task"),
+            "task_kind": warm.config.get("task_kind", "embedding"),
+            "device": device,
+            "warm": True
+        }
+    
+    def _demote_to_host(self, model_id: str, model: Any, tokenizer: Any, config: Dict[str, Any]) -> bool:
+        """
+        CPU'ya taşınmış modeli sıcak önbelleğe alır; mümkünse belleği sabitler
+        
+        Args:
+            model_id: Model ID
+            model: CPU'daki PyTorch modeli
+            tokenizer: Tokenizer
+            config: Modelin yükleme yapılandırması
+            
+        Returns:
+            bool: Model önbelleğe alındıysa True
+        """
+        size_mb = config.get("weights_mb") or self._model_weight_mb(model)
+        if not self.warm_cache.fits(size_mb):
+            return False
+        
+        # Sabitlenmiş sayfalar GPU'ya DMA ile, ara kopya olmadan aktarılır
+        if settings.MODEL_WARM_PIN_MEMORY and torch.cuda.is_available():
+            try:
+                for tensor in itertools.chain(model.parameters(), model.buffers()):
+                    if not tensor.data.is_pinned():
+                        tensor.data = tensor.data.pin_memory()
+            except Exception as e:
+                logger.warning(f"Model belleği sabitlenemedi, sabitlenmemiş tutulacak: {e}")
+        
+        return self.warm_cache.put(model_id, model, tokenizer, config, size_mb)
+    
+    def run_batch(self, model_id: str, texts: List[str]) -> List[Dict[str, Any]]:
+        """
+        Metinleri tek bir dolgulu (padded) ileri geçişte çalıştırır
+        
+        PyTorch modülleri ve ONNX oturum havuzları için çalışır. PyTorch
+        modellerinde model lock'u tutulduğu için çalıştırma sırasında model
+        boşaltılamaz; ONNX havuzu eşzamanlı çağrılara havuz boyutu kadar izin
+        verir ve boşaltma çalışan çağrıların bitmesini bekler. Görev başlıklı
+        PyTorch modellerinde son işleme (model_tasks.run_head) aynı toplu işte
+        yapılır; ONNX grafikleri taban modelden dışa aktarıldığı için gömme döndürür.
+        
+        Args:
+            model_id: Model ID
+            texts: Girdi metinleri
+            
+        Returns:
+            List[Dict[str, Any]]: Metin başına çıktı (gömme modellerinde {"embedding": [...]},
+                diğerlerinde görevin sonucu)
+            
+        Raises:
+            KeyError: Model bellekte değilse
+        """
+        with self.models_lock:
+            model = self.models.get(model_id)
+            tokenizer = self.tokenizers.get(model_id)
+        
+        if isinstance(model, OnnxSessionPool) and tokenizer is not None:
+            encoded = tokenizer(
+                texts,
+                padding=True,
+                truncation=True,
+                max_length=settings.INFERENCE_MAX_SEQUENCE_LENGTH,
+                return_tensors="np"
+            )
+            feeds = {name: value.astype(np.int64) for name, value in encoded.items()}
+            
+            # Çıktı yuvanın tamponunda; havuzlama yuva geri verilmeden yapılır
+            with model.acquire() as session:
+                embeddings = self._mean_pool(session.run(feeds), encoded["attention_mask"])
+            
+            return [{"embedding": embedding.tolist()} for embedding in embeddings]
+        
+        with self._model_lock(model_id):
+            with self.models_lock:
+                model = self.models.get(model_id)
+                tokenizer = self.tokenizers.get(model_id)
+                config = self.model_configs.get(model_id, {})
+            
+            if model is None or tokenizer is None:
+                raise KeyError(f"Model bellekte bulunamadı: {model_id}")
+            
+            encoded = tokenizer(
+                texts,
+                padding=True,
+                truncation=True,
+                max_length=settings.INFERENCE_MAX_SEQUENCE_LENGTH,
+                return_tensors="pt"
+            )
+            encoded = {name: tensor.to(config.get("device", "cpu")) for name, tensor in encoded.items()}
+            
+            kind = config.get("task_kind", "embedding")
+            if kind != "embedding":
+                return run_head(kind, model, tokenizer, encoded)
+            
+            with torch.no_grad():
+                outputs = model(**encoded)
+            
+            hidden = outputs[0].float().cpu().numpy()
+            mask = encoded["attention_mask"].cpu().numpy()
+        
+        embeddings = self._mean_pool(hidden, mask)
+        return [{"embedding": embedding.tolist()} for embedding in embeddings]
+    
+    @staticmethod
+    def _mean_pool(hidden: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        """
+        Dolgu token'larını hariç tutarak ortalama havuzlama (mean pooling)
+        
+        Args:
+            hidden: (batch, sequence, hidden) çıktılar
+            mask: (batch, sequence) attention mask
+            
+        Returns:
+            np.ndarray: (batch, hidden) gömmeler
+        """
+        mask = mask[:, :, None].astype(np.float32)
+        return (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1.0)
+    
+    def inference_concurrency(self, model_id: str) -> int:
+        """
+        Model için aynı anda çalıştırılabilecek toplu iş sayısı
+        
+        Args:
+            model_id: Model ID
+            
+        Returns:
+            int: ONNX oturum havuzunun boyutu; PyTorch modelleri için 1
+        """
+        with self.models_lock:
+            model = self.models.get(model_id)
+        return model.size if isinstance(model, OnnxSessionPool) else 1
+    
+    @staticmethod
+    def _warmup(model: Any, tokenizer: Any, device: str) -> None:
+        """
+        Modeli kısa bir girdiyle bir kez çalıştırır (hata yüklemeyi başarısız yapmaz)
+        
+        Args:
+            model: PyTorch modeli
+            tokenizer: Tokenizer
+            device: Hedef cihaz
+        """
+        try:
+            inputs = tokenizer("warmup", return_tensors="pt")
+            inputs = {name: tensor.to(device) for name, tensor in inputs.items()}
+            
+            with torch.no_grad():
+                model(**inputs)
+        except Exception as e:
+            logger.warning(f"Model ısınma çalıştırması başarısız: {e}")
+    
+    @staticmethod
+    def estimate_memory_mb(
+        model_path: str,
+        use_fp16: bool = True,
+        onnx: bool = False,
+        quantization: Optional[str] = None
+    ) -> float:
+        """
+        Modelin GPU bellek ihtiyacı; tahmin edilemezse MIN_FREE_GPU_MEMORY_MB
+        
+        Args:
+            model_path: Model dizini
+            use_fp16: FP16 ile yüklenecek mi
+            onnx: ONNX oturumu olarak yüklenecek mi
+            quantization: "int8" veya "int4" (quantization_scheme sonucu)
+            
+        Returns:
+            float: Bellek (MB)
+        """
+        estimate = estimate_model_memory(model_path, use_fp16=use_fp16, quantization=quantization, onnx=onnx)
+        return estimate["total_mb"] if estimate else float(settings.MIN_FREE_GPU_MEMORY_MB)
+    
+    def _model_lock(self, model_id: str) -> threading.RLock:
+        """
+        Modele ait yükleme/boşaltma lock'unu döndürür, yoksa oluşturur
+        
+        Args:
+            model_id: Model ID
+            
+        Returns:
+            threading.RLock: Model lock'u
+        """
+        with self.models_lock:
+            lock = self._model_locks.get(model_id)
+            if lock is None:
+                lock = threading.RLock()
+                self._model_locks[model_id] = lock
+            return lock
+    
+    def _run_shared(
+        self,
+        model_id: str,
+        signature: Tuple[Any, ...],
+        reservation: Optional[GPUReservation],
+        load: Callable[[], Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Aynı model için aynı ayarlarla eşzamanlı yüklemeleri tek yüklemede birleştirir
+        
+        İlk gelen istek yüklemeyi yapar; devam ederken aynı ayarlarla gelen
+        istekler kendi rezervasyonlarını bırakır ve aynı sonucu bekler. Farklı
+        ayarlı (GPU, ONNX/PyTorch, FP16, quantization, görev, parçalı) istek
+        katılmaz; kendi yüklemesini yapar (model lock'u ile sıralanır).
+        
+        Args:
+            model_id: Model ID
+            signature: Yükleme ayarları (hashlenebilir)
+            reservation: Çağıranın rezervasyonu
+            load: Yüklemeyi yapan fonksiyon
+            
+        Returns:
+            Dict[str, Any]: Yükleme sonucu
+        """
+        key = (model_id, signature)
+        with self.models_lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+        
+        if not leader:
+            if reservation is not None:
+                self.gpu_manager.reservations.release(reservation)
+            return dict(future.result(), shared=True)
+        
+        try:
+            result = load()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self.models_lock:
+                self._inflight.pop(key, None)
+    
+    def _resident_result(
+        self,
+        model_id: str,
+        gpu_index: int,
+        onnx: bool,
+        quantize: Optional[bool] = None,
+        use_fp16: Optional[bool] = None,
+        sharded: bool = False,
+        session_options: Optional[Dict[str, Any]] = None,
+        task: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Model aynı GPU'da aynı ayarlarla yüklüyse isabet sayar ve sonucu döndürür
+        
+        Args:
+            model_id: Model ID
+            gpu_index: GPU indeksi (parçalı modellerde giriş GPU'su)
+            onnx: ONNX oturumu mu isteniyor
+            quantize: Quantization (ONNX'te INT8 varyantlarının denenmesi)
+            use_fp16: FP16 (ONNX'te FP16 varyantının denenmesi)
+            sharded: Parçalı (birden çok cihaza bölünmüş) yükleme mi isteniyor
+            session_options: İstenen ONNX oturum ayarları (sadece verilenler karşılaştırılır)
+            task: ModelMetadata.task (PyTorch modellerinde görev başlığı karşılaştırılır)
+            
+        Returns:
+            Optional[Dict[str, Any]]: Önbellek sonucu veya model yüklenmeliyse None
+        """
+        config = self.model_configs.get(model_id)
+        
+        matches = (
+            config is not None
+            and model_id in self.models
+            and self.residency.get(model_id) is not None
+            and config.get("gpu_index") == gpu_index
+            and bool(config.get("onnx")) == onnx
+            and bool(config.get("sharded")) == sharded
+            and config.get("quantized") == quantize
+            and config.get("fp16") == use_fp16
+            and (onnx or config.get("task_kind", "embedding") == task_head(task).kind)
+            and all(
+                config.get("onnx_session", {}).get(name) == value
+                for name, value in (session_options or {}).items() if value is not None
+            )
+        )
+        
+        if not matches:
+            self.residency.record_miss()
+            return None
+        
+        self.residency.touch(model_id)
+        return {
+            "success": True,
+            "message": "Model zaten bellekte",
+            "cached": True,
+            "loading_time": 0.0,
+            "gpu_index": gpu_index,
+            "model_id": model_id,
+            "device": config.get("device"),
+        }
+    
+    def _make_resident_room(self, model_id: str, gpu_index: int, memory_mb: float) -> Optional[str]:
+        """
+        Yeni model için GPU bütçesinde yer açar (gerekirse LRU modelleri boşaltır)
+        
+        Args:
+            model_id: Yüklenecek model ID
+            gpu_index: GPU indeksi
+            memory_mb: Tahmini model belleği (MB)
+            
+        Returns:
+            Optional[str]: Yer açılamazsa hata mesajı
+        """
+        # Farklı GPU/ayarla yeniden yüklenen modelin eski kopyasını bırak
+        if model_id in self.models:
+            self.unload_model(model_id)
+        
+        if self.residency.evict(gpu_index, memory_mb, self.unload_model, exclude=model_id) is None:
+            return (
+                f"GPU {gpu_index} model bellek bütçesi yetersiz: {memory_mb:.0f} MB gerekli "
+                f"(sabitlenmiş modeller boşaltılamaz)"
+            )
+        
+        return None
+    
+    def _register_resident(self, model_id: str, gpu_index: int, estimated_mb: float) -> None:
+        """
+        Yüklenen modeli yerleşim yöneticisine kaydeder
+        
+        Args:
+            model_id: Model ID
+            gpu_index: GPU indeksi
+            estimated_mb: Ağırlık boyutu bilinmiyorsa kullanılacak tahmin (MB)
+        """
+        weights_mb = self.model_configs.get(model_id, {}).get("weights_mb")
+        self.residency.add(model_id, gpu_index, weights_mb or estimated_mb)
+    
+    def make_room(self, memory_mb: float, gpu_index: Optional[int] = None) -> Optional[int]:
+        """
+        Hiçbir GPU'da yeterli boş bellek yoksa LRU modelleri boşaltarak yer açar
+        
+        Args:
+            memory_mb: Gereken bellek (MB)
+            gpu_index: Sadece bu GPU düşünülsün (verilmezse en az boşaltma gerektiren GPU seçilir)
+            
+        Returns:
+            Optional[int]: Yer açılan GPU indeksi veya yer açılamıyorsa None
+        """
+        pending = self.gpu_manager.reservations.pending_mb()
+        free_mb = {
+            gpu["index"]: gpu["free_memory_mb"] - pending.get(gpu["index"], 0.0)
+            for gpu in self.gpu_manager.detect_gpus()
+            if gpu_index is None or gpu["index"] == gpu_index
+        }
+        
+        target = self.residency.choose_gpu(memory_mb, free_mb)
+        if target is None:
+            return None
+        
+        if self.residency.evict(target, memory_mb, self.unload_model, free_mb=free_mb[target]) is None:
+            return None
+        
+        return target
+    
+    def _settle_reservation(self, reservation: GPUReservation, result: Dict[str, Any]) -> None:
+        """
+        Yükleme sonucuna göre rezervasyonu tamamlar veya bırakır
+        
+        Args:
+            reservation: GPU rezervasyonu
+            result: Yükleme sonucu
+        """
+        if result.get("success"):
+            self.gpu_manager.reservations.commit(reservation)
+        else:
+            self.gpu_manager.reservations.release(reservation)
+    
+    @staticmethod
+    def _model_weight_mb(model: Any) -> float:
+        """
+        Model parametre ve buffer'larının (quantize ağırlıklar dahil) kapladığı bellek (MB)
+        
+        Args:
+            model: PyTorch modeli
+            
+        Returns:
+            float: Bellek (MB)
+        """
+        return weight_bytes(model) / MB
+    
+    def attribute_gpu_processes(self, processes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        GPU süreçlerini yüklü modellerle eşleştirir
+        
+        Bu sunucunun süreci (aynı PID) bir GPU'da tek CUDA bağlamı kullandığından,
+        o süreçte ölçülen bellek GPU'daki modellere ağırlık boyutları oranında
+        paylaştırılır. Diğer süreçler "foreign" olarak işaretlenir.
+        
+        Args:
+            processes: GPUManager.get_gpu_processes çıktısı
+            
+        Returns:
+            List[Dict[str, Any]]: "owner" ve "models" alanları eklenmiş süreç listesi
+        """
+        own_pid = os.getpid()
+        
+        # Yüklü modellerin yapılandırmaları models_lock altında kopyalanır (model başına
+        # yükleme lock'u beklenmez)
+        with self.models_lock:
+            configs = [dict(config) for config in self.model_configs.values() if config["model_id"] in self.models]
+        
+        attributed = []
+        for process in processes:
+            process = dict(process)
+            
+            if process["pid"] != own_pid:
+                process["owner"] = "foreign"
+                process["models"] = []
+                attributed.append(process)
+                continue
+            
+            gpu_models = [
+                (config["model_id"], config.get("weights_mb") or 0.0)
+                for config in configs
+                if config.get("gpu_index") == process["gpu_index"]
+            ]
+            total_weight = sum(weight for _, weight in gpu_models)
+            
+            process["owner"] = "self"
+            process["models"] = [
+                {
+                    "model_id": model_id,
+                    "memory_mb": process["used_memory_mb"] * (
+                        weight / total_weight if total_weight else 1.0 / len(gpu_models)
+                    ),
+                }
+                for model_id, weight in gpu_models
+            ]
+            attributed.append(process)
+        
+        return attributed
+    
+    def model_memory_usage(
+        self,
+        processes: List[Dict[str, Any]]
+    ) -> Tuple[Dict[Tuple[str, int], float], Dict[int, float]]:
+        """
+        Model ve yabancı süreç başına GPU bellek kullanımını hesaplar
+        
+        Args:
+            processes: GPU süreç bilgileri listesi
+            
+        Returns:
+            Tuple: ((model ID, GPU indeksi) -> MB, GPU indeksi -> yabancı süreçlerin MB'ı)
+        """
+        model_memory: Dict[Tuple[str, int], float] = {}
+        foreign_memory: Dict[int, float] = {}
+        
+        for process in self.attribute_gpu_processes(processes):
+            gpu_index = process["gpu_index"]
+            
+            if process["owner"] == "foreign":
+                foreign_memory[gpu_index] = foreign_memory.get(gpu_index, 0.0) + process["used_memory_mb"]
+            
+            for model in process["models"]:
+                key = (model["model_id"], gpu_index)
+                model_memory[key] = model_memory.get(key, 0.0) + model["memory_mb"]
+        
+        return model_memory, foreign_memory
+    
+    def unload_model(self, model_id: str, keep_warm: bool = True) -> Dict[str, Any]:
+        """
+        Modeli GPU belleğinden boşaltır
+        
+        Sadece bu modelin lock'unu bekler; diğer modellerin yüklemeleri engellenmez.
+        PyTorch modelleri bütçe izin verirse ana bellekteki sıcak önbellekte tutulur.
+        
+        Args:
+            model_id: Model ID
+            keep_warm: Model sıcak önbelleğe alınsın mı
+            
+        Returns:
+            Dict[str, Any]: Sonuç
+        """
+        warm = False
+        
+        with self._model_lock(model_id):
+            try:
+                with self.models_lock:
+                    model = self.models.pop(model_id, None)
+                    if model is None:
+                        return {
+                            "success": False,
+                            "message": f"Model bellekte bulunamadı: {model_id}"
+                        }
+                    
+                    # Tokenizer'ı ve config'i kaldır
+                    tokenizer = self.tokenizers.pop(model_id, None)
+                    config = self.model_configs.pop(model_id, None) or {}
+                
+                # Çalışan ONNX çağrılarının bitmesini bekle (havuz model lock'u tutmadan çalışır)
+                if isinstance(model, OnnxSessionPool):
+                    model.close()
+                
+                # Modeli kaldır (ONNX oturumları taşınamaz, sıcak önbelleğe alınmaz; parçalı
+                # modeller accelerate kancalarıyla dağıtıldığından taşınmaz, bırakılınca boşalır)
+                if hasattr(model, "to") and not config.get("sharded"):
+                    model.to("cpu")
+                    if keep_warm and not config.get("onnx"):
+                        warm = self._demote_to_host(model_id, model, tokenizer, config)
+                del model
+                
+            except Exception as e:
+                return {
+                    "success": False,
+                    "message": f"Model kaldırma hatası: {str(e)}"
+                }
+        
+        # Yerleşim kaydı model lock'u dışında silinir (tahliye sırasında kilitlenmeyi önler)
+        self.residency.remove(model_id)
+        
+        # Belleği temizle
+        gc.collect()
+        torch.cuda.empty_cache()
+        
+        if not keep_warm:
+            self.warm_cache.discard(model_id)
+        
+        return {
+            "success": True,
+            "message": f"Model bellekten kaldırıldı: {model_id}",
+            "warm": warm
+        }
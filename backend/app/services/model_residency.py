@@ -0,0 +1,515 @@
+"""
+GPU bellek bütçesine göre yüklü modelleri LRU sırasıyla tutan yerleşim (residency) yöneticisi
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from app.config import get_settings
+from app.services.gpu_manager import GPUManager
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+class ResidentModel:
+    """
+    GPU'da yüklü bir modelin yerleşim kaydı
+    """
+    
+    def __init__(self, model_id: str, gpu_index: int, memory_mb: float):
+        self.model_id = model_id
+        self.gpu_index = gpu_index
+        self.memory_mb = float(memory_mb)
+        self.pinned = False
+        self.evicting = False
+        self.loaded_at = time.time()
+        self.last_used = self.loaded_at
+        self.hits = 0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "model_id": self.model_id,
+            "gpu_index": self.gpu_index,
+            "memory_mb": self.memory_mb,
+            "pinned": self.pinned,
+            "evicting": self.evicting,
+            "loaded_at": self.loaded_at,
+            "last_used": self.last_used,
+            "hits": self.hits,
+        }
+
+class ModelResidencyManager:
+    """
+    GPU başına bellek bütçesi olan LRU model önbelleği
+    
+    Yeni bir yükleme bütçeyi aşacaksa en uzun süredir kullanılmayan,
+    sabitlenmemiş (pinned olmayan) modeller boşaltılır. Sınıf modelleri
+    kendisi yüklemez/boşaltmaz; boşaltma fonksiyonu çağıran tarafından verilir.
+    """
+    
+    def __init__(
+        self,
+        gpu_manager: GPUManager,
+        budget_mb: Optional[float] = None,
+        budget_fraction: Optional[float] = None
+    ):
+        """
+        Yerleşim yöneticisini oluştur
+        
+        Args:
+            gpu_manager: GPU yöneticisi (toplam bellek için)
+            budget_mb: GPU başına sabit bütçe (MB); 0 veya verilmezse oran kullanılır
+            budget_fraction: GPU toplam belleğinin modellere ayrılan oranı
+        """
+        self.gpu_manager = gpu_manager
+        self.budget_override_mb = budget_mb if budget_mb is not None else settings.MODEL_RESIDENCY_BUDGET_MB
+        self.budget_fraction = budget_fraction if budget_fraction is not None else settings.MODEL_RESIDENCY_BUDGET_FRACTION
+        
+        # GPU indeksi -> model ID -> kayıt (en eski kullanılan başta)
+        self._resident: Dict[int, "OrderedDict[str, ResidentModel]"] = {}
+        self._lock = threading.RLock()
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def budget_mb(self, gpu_index: int) -> float:
+        """
+        Bir GPU'da modellere ayrılan bellek bütçesi
+        
+        Args:
+            gpu_index: GPU indeksi
+        
+        Returns:
+            float: Bütçe (MB); GPU bilinmiyorsa sınırsız
+        """
+        if self.budget_override_mb:
+            return float(self.budget_override_mb)
+        
+        for gpu in self.gpu_manager.detect_gpus():
+            if gpu["index"] == gpu_index:
+                return gpu["total_memory_mb"] * self.budget_fraction
+        
+        return float("inf")
+    
+    def used_mb(self, gpu_index: int) -> float:
+        """
+        Bir GPU'daki yerleşik modellerin toplam belleği
+        
+        Args:
+            gpu_index: GPU indeksi
+        
+        Returns:
+            float: Bellek (MB)
+        """
+        with self._lock:
+            return sum(entry.memory_mb for entry in self._resident.get(gpu_index, {}).values())
+    
+    def _find(self, model_id: str) -> Optional[ResidentModel]:
+        for entries in self._resident.values():
+            if model_id in entries:
+                return entries[model_id]
+        return None
+    
+    def get(self, model_id: str) -> Optional[ResidentModel]:
+        """
+        Modelin yerleşim kaydını döndürür (LRU sırasını değiştirmez)
+        
+        Args:
+            model_id: Model ID
+        
+        Returns:
+            Optional[ResidentModel]: Kayıt veya model yerleşik değilse None
+        """
+        with self._lock:
+            return self._find(model_id)
+    
+    def touch(self, model_id: str) -> bool:
+        """
+        Modeli en son kullanılan olarak işaretler ve isabet sayar
+        
+        Args:
+            model_id: Model ID
+        
+        Returns:
+            bool: Model yerleşikse True
+        """
+        with self._lock:
+            entry = self._find(model_id)
+            if entry is None:
+                return False
+            
+            self._resident[entry.gpu_index].move_to_end(model_id)
+            entry.last_used = time.time()
+            entry.hits += 1
+            self.hits += 1
+            return True
+    
+    def record_miss(self) -> None:
+        """
+        Yerleşik olmayan bir model istendiğini sayar
+        """
+        with self._lock:
+            self.misses += 1
+    
+    def add(self, model_id: str, gpu_index: int, memory_mb: float) -> None:
+        """
+        Yüklenen modeli en son kullanılan olarak kaydeder
+        
+        Args:
+            model_id: Model ID
+            gpu_index: GPU indeksi
+            memory_mb: Modelin kapladığı bellek (MB)
+        """
+        with self._lock:
+            previous = self._find(model_id)
+            pinned = previous.pinned if previous is not None else False
+            if previous is not None:
+                del self._resident[previous.gpu_index][model_id]
+            
+            entry = ResidentModel(model_id, gpu_index, memory_mb)
+            entry.pinned = pinned
+            self._resident.setdefault(gpu_index, OrderedDict())[model_id] = entry
+    
+    def remove(self, model_id: str) -> None:
+        """
+        Modelin yerleşim kaydını siler
+        
+        Args:
+            model_id: Model ID
+        """
+        with self._lock:
+            entry = self._find(model_id)
+            if entry is not None:
+                del self._resident[entry.gpu_index][model_id]
+    
+    def pin(self, model_id: str, pinned: bool = True) -> bool:
+        """
+        Modeli tahliyeye karşı sabitler veya sabitlemeyi kaldırır
+        
+        Args:
+            model_id: Model ID
+            pinned: Sabitlensin mi
+        
+        Returns:
+            bool: Model yerleşikse True
+        """
+        with self._lock:
+            entry = self._find(model_id)
+            if entry is None:
+                return False
+            
+            entry.pinned = pinned
+            return True
+    
+    def plan_eviction(
+        self,
+        gpu_index: int,
+        memory_mb: float,
+        free_mb: Optional[float] = None,
+        exclude: Optional[str] = None
+    ) -> Optional[List[str]]:
+        """
+        Yeni bir model için boşaltılması gereken modelleri LRU sırasıyla belirler
+        
+        Args:
+            gpu_index: GPU indeksi
+            memory_mb: Yeni modelin belleği (MB)
+            free_mb: GPU'daki fiziksel boş bellek (MB); verilirse o da sağlanmalı
+            exclude: Boşaltılmayacak model (ör. yeniden yüklenen model)
+        
+        Returns:
+            Optional[List[str]]: Boşaltılacak model ID'leri (boş olabilir) veya sığmıyorsa None
+        """
+        with self._lock:
+            budget = self.budget_mb(gpu_index)
+            used = self.used_mb(gpu_index)
+            
+            def fits(evicted_mb: float) -> bool:
+                within_budget = used - evicted_mb + memory_mb <= budget
+                within_free = free_mb is None or free_mb + evicted_mb >= memory_mb
+                return within_budget and within_free
+            
+            victims: List[str] = []
+            evicted_mb = 0.0
+            
+            for model_id, entry in self._resident.get(gpu_index, {}).items():
+                if fits(evicted_mb):
+                    break
+                # Boşaltılmakta olan modellerin belleği kaldırılana kadar kullanımda sayılır
+                if entry.pinned or entry.evicting or model_id == exclude:
+                    continue
+                victims.append(model_id)
+                evicted_mb += entry.memory_mb
+            
+            return victims if fits(evicted_mb) else None
+    
+    def evict(
+        self,
+        gpu_index: int,
+        memory_mb: float,
+        unload: Callable[[str], Any],
+        free_mb: Optional[float] = None,
+        exclude: Optional[str] = None
+    ) -> Optional[List[str]]:
+        """
+        Yeni model sığacak kadar LRU modeli boşaltır
+        
+        Kurbanlar lock altında seçilip işaretlenir; boşaltma (model lock'u,
+        ana belleğe kopya) lock dışında yapılır, böylece touch ve stats
+        tahliye süresince beklemez ve eşzamanlı tahliyeler aynı modeli seçmez.
+        
+        Args:
+            gpu_index: GPU indeksi
+            memory_mb: Yeni modelin belleği (MB)
+            unload: Model ID alıp modeli bellekten boşaltan fonksiyon
+            free_mb: GPU'daki fiziksel boş bellek (MB)
+            exclude: Boşaltılmayacak model
+        
+        Returns:
+            Optional[List[str]]: Boşaltılan model ID'leri veya sığmıyorsa None (hiçbir şey boşaltılmaz)
+        """
+        with self._lock:
+            victims = self.plan_eviction(gpu_index, memory_mb, free_mb=free_mb, exclude=exclude)
+            if victims is None:
+                return None
+            
+            for model_id in victims:
+                self._find(model_id).evicting = True
+        
+        evicted = 0
+        try:
+            for model_id in victims:
+                logger.info(f"GPU {gpu_index} bütçesi için model boşaltılıyor: {model_id}")
+                unload(model_id)
+                
+                with self._lock:
+                    self.remove(model_id)
+                    self.evictions += 1
+                evicted += 1
+        finally:
+            # Boşaltma hata verdiyse kalan kurbanlar yeniden tahliye edilebilir
+            with self._lock:
+                for model_id in victims[evicted:]:
+                    entry = self._find(model_id)
+                    if entry is not None:
+                        entry.evicting = False
+        
+        return victims
+    
+    def choose_gpu(self, memory_mb: float, free_mb: Dict[int, float]) -> Optional[int]:
+        """
+        Tahliye ile yeni modeli alabilecek, en az bellek boşaltılması gereken GPU'yu seçer
+        
+        Args:
+            memory_mb: Yeni modelin belleği (MB)
+            free_mb: GPU indeksi -> fiziksel boş bellek (MB)
+        
+        Returns:
+            Optional[int]: GPU indeksi veya uygun GPU yoksa None
+        """
+        candidates = []
+        
+        with self._lock:
+            for gpu_index, free in free_mb.items():
+                victims = self.plan_eviction(gpu_index, memory_mb, free_mb=free)
+                if victims is None:
+                    continue
+                
+                entries = self._resident.get(gpu_index, {})
+                candidates.append((sum(entries[model_id].memory_mb for model_id in victims), gpu_index))
+        
+        return min(candidates)[1] if candidates else None
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        İsabet/ıska/tahliye sayıları ve GPU başına yerleşik modeller
+        
+        Returns:
+            Dict[str, Any]: İstatistikler
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "gpus": [
+                    {
+                        "index": gpu_index,
+                        "budget_mb": self.budget_mb(gpu_index),
+                        "used_mb": self.used_mb(gpu_index),
+                        # En son kullanılan başta
+                        "models": [entry.to_dict() for entry in reversed(entries.values())],
+                    }
+                    for gpu_index, entries in sorted(self._resident.items())
+                ],
+            }
+
+class WarmModel:
+    """
+    GPU'dan boşaltılıp ana bellekte (host RAM) tutulan bir model
+    """
+    
+    def __init__(self, model_id: str, model: Any, tokenizer: Any, config: Dict[str, Any], size_mb: float):
+        self.model_id = model_id
+        self.model = model
+        self.tokenizer = tokenizer
+        self.config = config
+        self.size_mb = float(size_mb)
+        self.demoted_at = time.time()
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "model_id": self.model_id,
+            "size_mb": self.size_mb,
+            "quantized": self.config.get("quantized"),
+            "fp16": self.config.get("fp16"),
+            "demoted_at": self.demoted_at,
+        }
+
+class WarmModelCache:
+    """
+    GPU'dan boşaltılan modellerin ana bellekteki ikinci yerleşim katmanı
+    
+    Modeller byte bütçesi aşılana kadar LRU sırasıyla tutulur. Aynı model
+    tekrar yüklendiğinde diskten okumak yerine ağırlıklar doğrudan GPU'ya
+    kopyalanır. Sınıf tensörlere dokunmaz; bellek sabitleme (pinning) çağıran
+    tarafın işidir.
+    """
+    
+    def __init__(self, budget_mb: Optional[float] = None):
+        """
+        Sıcak önbelleği oluştur
+        
+        Args:
+            budget_mb: Ana bellek bütçesi (MB); 0 önbelleği kapatır
+        """
+        self.budget_mb = float(budget_mb if budget_mb is not None else settings.MODEL_WARM_CACHE_MB)
+        
+        # Model ID -> kayıt (en eski boşaltılan başta)
+        self._entries: "OrderedDict[str, WarmModel]" = OrderedDict()
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        self.drops = 0
+    
+    @property
+    def enabled(self) -> bool:
+        return self.budget_mb > 0
+    
+    def used_mb(self) -> float:
+        """
+        Sıcak önbellekteki modellerin toplam boyutu
+        
+        Returns:
+            float: Bellek (MB)
+        """
+        with self._lock:
+            return sum(entry.size_mb for entry in self._entries.values())
+    
+    def fits(self, size_mb: float) -> bool:
+        """
+        Bu boyuttaki bir model tek başına bütçeye sığar mı
+        
+        Args:
+            size_mb: Model boyutu (MB)
+        
+        Returns:
+            bool: Sığıyorsa True
+        """
+        return self.enabled and size_mb <= self.budget_mb
+    
+    def put(self, model_id: str, model: Any, tokenizer: Any, config: Dict[str, Any], size_mb: float) -> bool:
+        """
+        Modeli en son boşaltılan olarak ekler, bütçe aşılırsa en eskileri atar
+        
+        Args:
+            model_id: Model ID
+            model: CPU'daki model
+            tokenizer: Tokenizer
+            config: Modelin yükleme yapılandırması
+            size_mb: Model boyutu (MB)
+        
+        Returns:
+            bool: Model önbelleğe alındıysa True
+        """
+        if not self.fits(size_mb):
+            return False
+        
+        with self._lock:
+            self._entries.pop(model_id, None)
+            self._entries[model_id] = WarmModel(model_id, model, tokenizer, config, size_mb)
+            
+            used = sum(entry.size_mb for entry in self._entries.values())
+            while used > self.budget_mb:
+                _, dropped = self._entries.popitem(last=False)
+                used -= dropped.size_mb
+                self.drops += 1
+                logger.info(f"Sıcak önbellek bütçesi için model atıldı: {dropped.model_id}")
+        
+        return True
+    
+    def take(self, model_id: str) -> Optional[WarmModel]:
+        """
+        Modeli önbellekten çıkarıp döndürür
+        
+        Kayıt yoksa ıska sayılır; bulunan kaydın isabet mi ıska mı olduğu
+        kullanılıp kullanılamadığına bağlıdır, çağıran record_hit/record_miss ile bildirir.
+        
+        Args:
+            model_id: Model ID
+        
+        Returns:
+            Optional[WarmModel]: Kayıt veya model önbellekte yoksa None
+        """
+        with self._lock:
+            entry = self._entries.pop(model_id, None)
+            if entry is None:
+                self.misses += 1
+            return entry
+    
+    def record_hit(self) -> None:
+        """
+        Alınan kaydın GPU'ya taşındığını sayar
+        """
+        with self._lock:
+            self.hits += 1
+    
+    def record_miss(self) -> None:
+        """
+        Alınan kaydın kullanılamadığını (ayarlar uyuşmadı, GPU'ya taşınamadı) sayar
+        """
+        with self._lock:
+            self.misses += 1
+    
+    def discard(self, model_id: str) -> None:
+        """
+        Modeli önbellekten siler
+        
+        Args:
+            model_id: Model ID
+        """
+        with self._lock:
+            self._entries.pop(model_id, None)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Sıcak önbellek bütçesi, isabetleri ve içindeki modeller
+        
+        Returns:
+            Dict[str, Any]: İstatistikler
+        """
+        with self._lock:
+            entries = list(self._entries.values())
+            return {
+                "budget_mb": self.budget_mb,
+                "used_mb": sum(entry.size_mb for entry in entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "drops": self.drops,
+                # En son boşaltılan başta
+                "models": [entry.to_dict() for entry in reversed(entries)],
+            }
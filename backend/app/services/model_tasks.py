@@ -0,0 +1,197 @@
+"""
+ModelMetadata.task (Hugging Face pipeline_tag) değerine göre model başlığı ve
+sunucu tarafı son işleme
+
+AutoModel görev başlığını (sınıflandırıcı, dil modeli başlığı) yüklemez;
+yükleme görevin Auto sınıfıyla yapılır. Son işleme (softmax/top-k,
+token etiketleme, maske tahmini, metin üretimi) toplu iş halinde sunucuda
+yapılır; istemciye ham logit yerine sadece sonuç döner.
+"""
+import logging
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import torch
+from transformers import (
+    AutoModel,
+    AutoModelForCausalLM,
+    AutoModelForMaskedLM,
+    AutoModelForSeq2SeqLM,
+    AutoModelForSequenceClassification,
+    AutoModelForTokenClassification
+)
+
+from app.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+class TaskHead(NamedTuple):
+    """
+    Görevin yükleme sınıfı ve son işleme türü
+    """
+    kind: str
+    model_class: Any
+
+EMBEDDING_HEAD = TaskHead("embedding", AutoModel)
+
+# Bilinmeyen görevler (feature-extraction, sentence-similarity, ...) gömme olarak sunulur
+TASK_HEADS: Dict[str, TaskHead] = {
+    "text-classification": TaskHead("classification", AutoModelForSequenceClassification),
+    "sentiment-analysis": TaskHead("classification", AutoModelForSequenceClassification),
+    "token-classification": TaskHead("token-classification", AutoModelForTokenClassification),
+    "ner": TaskHead("token-classification", AutoModelForTokenClassification),
+    "fill-mask": TaskHead("fill-mask", AutoModelForMaskedLM),
+    "text-generation": TaskHead("generation", AutoModelForCausalLM),
+    "text2text-generation": TaskHead("generation", AutoModelForSeq2SeqLM),
+    "summarization": TaskHead("generation", AutoModelForSeq2SeqLM),
+    "translation": TaskHead("generation", AutoModelForSeq2SeqLM),
+}
+
+def task_head(task: Optional[str]) -> TaskHead:
+    """
+    Görev için model başlığı
+    
+    Args:
+        task: ModelMetadata.task (pipeline_tag) veya None
+    
+    Returns:
+        TaskHead: Görev başlığı (bilinmeyen görevlerde gömme)
+    """
+    return TASK_HEADS.get((task or "").lower(), EMBEDDING_HEAD)
+
+def prepare_tokenizer(tokenizer: Any, head: TaskHead, config: Any) -> None:
+    """
+    Tokenizer'ı toplu üretime hazırlar
+    
+    Sadece kod çözücü (decoder-only) modellerde dolgu sola alınır; sağa
+    dolgulu toplu işte yeni token'lar dolgu token'larının arkasına eklenir.
+    
+    Args:
+        tokenizer: Model tokenizer'ı
+        head: Görev başlığı
+        config: Model yapılandırması
+    """
+    if head.kind != "generation":
+        return
+    
+    if tokenizer.pad_token is None and tokenizer.eos_token is not None:
+        tokenizer.pad_token = tokenizer.eos_token
+    if not getattr(config, "is_encoder_decoder", False):
+        tokenizer.padding_side = "left"
+
+def _label(config: Any, index: int) -> str:
+    return (getattr(config, "id2label", None) or {}).get(index, f"LABEL_{index}")
+
+def run_head(
+    kind: str,
+    model: Any,
+    tokenizer: Any,
+    encoded: Dict[str, torch.Tensor],
+    top_k: Optional[int] = None,
+    max_new_tokens: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Görev başlığını toplu işte çalıştırır ve sonuçları metin başına döndürür
+    
+    Args:
+        kind: TaskHead.kind ("embedding" dışında)
+        model: Görev başlıklı PyTorch modeli
+        tokenizer: Model tokenizer'ı
+        encoded: Dolgulu girdiler (modelin giriş cihazında)
+        top_k: Sınıf/token tahmini sayısı (verilmezse INFERENCE_TOP_K)
+        max_new_tokens: Üretilecek en fazla token (verilmezse INFERENCE_MAX_NEW_TOKENS)
+    
+    Returns:
+        List[Dict[str, Any]]: Metin başına sonuç; classification {"labels"},
+            token-classification {"tokens"}, fill-mask {"masks"}, generation {"generated_text"}
+    
+    Raises:
+        ValueError: Bilinmeyen tür veya maske token'ı olmayan tokenizer
+    """
+    top_k = max(1, top_k or settings.INFERENCE_TOP_K)
+    
+    with torch.no_grad():
+        if kind == "generation":
+            return _generate(model, tokenizer, encoded, max_new_tokens or settings.INFERENCE_MAX_NEW_TOKENS)
+        
+        logits = model(**encoded).logits.float()
+    
+    if kind == "classification":
+        return _classify(logits, model.config, top_k)
+    if kind == "token-classification":
+        return _tag_tokens(logits, model.config, tokenizer, encoded)
+    if kind == "fill-mask":
+        return _fill_masks(logits, tokenizer, encoded, top_k)
+    raise ValueError(f"Bilinmeyen görev başlığı: {kind}")
+
+def _classify(logits: torch.Tensor, config: Any, top_k: int) -> List[Dict[str, Any]]:
+    # (batch, labels): olasılıklar ve top-k tek seferde
+    scores, indices = logits.softmax(dim=-1).topk(min(top_k, logits.shape[-1]), dim=-1)
+    return [
+        {"labels": [{"label": _label(config, index), "score": score} for score, index in zip(row_scores, row_indices)]}
+        for row_scores, row_indices in zip(scores.cpu().tolist(), indices.cpu().tolist())
+    ]
+
+def _tag_tokens(
+    logits: torch.Tensor,
+    config: Any,
+    tokenizer: Any,
+    encoded: Dict[str, torch.Tensor]
+) -> List[Dict[str, Any]]:
+    # (batch, sequence, labels): token başına en olası etiket; dolgu ve özel token'lar atlanır
+    scores, indices = logits.softmax(dim=-1).max(dim=-1)
+    input_ids = encoded["input_ids"].cpu().tolist()
+    mask = encoded.get("attention_mask", torch.ones_like(encoded["input_ids"])).cpu().tolist()
+    special = set(tokenizer.all_special_ids)
+    
+    results = []
+    for ids, row_mask, row_scores, row_indices in zip(input_ids, mask, scores.cpu().tolist(), indices.cpu().tolist()):
+        tokens = tokenizer.convert_ids_to_tokens(ids)
+        results.append({"tokens": [
+            {"token": token, "label": _label(config, index), "score": score}
+            for token, token_id, keep, score, index in zip(tokens, ids, row_mask, row_scores, row_indices)
+            if keep and token_id not in special
+        ]})
+    return results
+
+def _fill_masks(
+    logits: torch.Tensor,
+    tokenizer: Any,
+    encoded: Dict[str, torch.Tensor],
+    top_k: int
+) -> List[Dict[str, Any]]:
+    if tokenizer.mask_token_id is None:
+        raise ValueError("Tokenizer'da maske token'ı yok")
+    
+    # Softmax sadece maske konumlarındaki satırlara uygulanır (sözlük boyutu büyük)
+    rows, positions = (encoded["input_ids"] == tokenizer.mask_token_id).nonzero(as_tuple=True)
+    scores, indices = logits[rows, positions].softmax(dim=-1).topk(min(top_k, logits.shape[-1]), dim=-1)
+    
+    results: List[Dict[str, Any]] = [{"masks": []} for _ in range(encoded["input_ids"].shape[0])]
+    for row, row_scores, row_indices in zip(rows.tolist(), scores.cpu().tolist(), indices.cpu().tolist()):
+        results[row]["masks"].append([
+            {"token": tokenizer.decode([index]).strip(), "token_id": index, "score": score}
+            for score, index in zip(row_scores, row_indices)
+        ])
+    return results
+
+def _generate(
+    model: Any,
+    tokenizer: Any,
+    encoded: Dict[str, torch.Tensor],
+    max_new_tokens: int
+) -> List[Dict[str, Any]]:
+    # Açgözlü (greedy) çözme: aynı girdi toplu işte de tek başına da aynı çıktıyı verir
+    inputs = {name: tensor for name, tensor in encoded.items() if name != "token_type_ids"}
+    output = model.generate(
+        **inputs,
+        max_new_tokens=max_new_tokens,
+        do_sample=False,
+        pad_token_id=tokenizer.pad_token_id
+    )
+    
+    # Kod çözücü modeller girdiyi de döndürür; sadece yeni token'lar çözülür
+    if not getattr(model.config, "is_encoder_decoder", False):
+        output = output[:, encoded["input_ids"].shape[1]:]
+    
+    return [{"generated_text": text} for text in tokenizer.batch_decode(output, skip_special_tokens=True)]
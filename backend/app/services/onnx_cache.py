@@ -0,0 +1,230 @@
+"""
+ONNX dışa aktarımlarını ve ORT ile optimize edilmiş grafikleri diskte saklayan önbellek
+"""
+import glob
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, Callable, Dict, Optional
+
+from app.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Kayıt düzeni değişirse eski kayıtlar geçersiz sayılsın diye anahtara eklenir
+CACHE_FORMAT_VERSION = 1
+
+MODEL_FILE = "model.onnx"
+META_FILE = "meta.json"
+
+def weights_fingerprint(model_path: str) -> str:
+    """
+    Commit hash'i bilinmeyen yerel modeller için ağırlık dosyalarından sürüm parmak izi
+    
+    Dosya içeriği okunmaz; ad, boyut ve değişiklik zamanı kullanılır.
+    
+    Args:
+        model_path: Model dizini
+    
+    Returns:
+        str: "local-" önekli kısa parmak izi
+    """
+    digest = hashlib.sha256()
+    patterns = ("*.safetensors", "*.bin", "*.json")
+    for path in sorted(path for pattern in patterns for path in glob.glob(os.path.join(model_path, pattern))):
+        stat = os.stat(path)
+        digest.update(f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    
+    return f"local-{digest.hexdigest()[:16]}"
+
+def export_cache_key(revision: str, opset: int, signature: Dict[str, Any]) -> str:
+    """
+    Dışa aktarım ayarlarından önbellek anahtarı üretir
+    
+    Args:
+        revision: Model sürümü (ModelVersion.commit_hash veya yerel parmak izi)
+        opset: ONNX opset sürümü
+        signature: Girdi/çıktı adları, tipleri ve dinamik eksenler
+    
+    Returns:
+        str: Anahtar (hex)
+    """
+    payload = json.dumps(
+        {"format": CACHE_FORMAT_VERSION, "revision": revision, "opset": opset, "signature": signature},
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()[:24]
+
+class OnnxExportCache:
+    """
+    MODEL_STORAGE_PATH altında model ve anahtar başına ONNX kayıtları
+    
+    Her kayıt kendi dizinindedir: dışa aktarılan grafik (model.onnx ve varsa
+    harici ağırlık dosyaları), sağlayıcı başına ORT ile optimize edilmiş grafik
+    ve meta.json. FP16/INT8 varyantları ve ölçümleri sonradan aynı dizine
+    eklenir. Kayıt geçici dizinde oluşturulup tek adımda yerine taşındığı
+    için yarım kalan dışa aktarımlar önbellekte görünmez.
+    """
+    
+    def __init__(self, root: Optional[str] = None):
+        """
+        Önbelleği oluştur
+        
+        Args:
+            root: Önbellek dizini (verilmezse MODEL_STORAGE_PATH/.onnx_cache)
+        """
+        self.root = root or os.path.join(settings.MODEL_STORAGE_PATH, ".onnx_cache")
+        self.hits = 0
+        self.misses = 0
+    
+    def _model_dir(self, model_id: str) -> str:
+        return os.path.join(self.root, model_id.replace("/", "_"))
+    
+    def entry_dir(self, model_id: str, key: str) -> str:
+        """
+        Kaydın dizini
+        
+        Args:
+            model_id: Model ID
+            key: export_cache_key anahtarı
+        
+        Returns:
+            str: Dizin yolu
+        """
+        return os.path.join(self._model_dir(model_id), key)
+    
+    def lookup(self, model_id: str, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Tamamlanmış kaydı döndürür
+        
+        Args:
+            model_id: Model ID
+            key: export_cache_key anahtarı
+        
+        Returns:
+            Optional[Dict[str, Any]]: Kayıt meta verisi ("path" dahil) veya kayıt yoksa None
+        """
+        entry = self._read(model_id, key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+    
+    def _read(self, model_id: str, key: str) -> Optional[Dict[str, Any]]:
+        # meta.json kayıt tamamlandıktan sonra var olur
+        entry = self.entry_dir(model_id, key)
+        try:
+            with open(os.path.join(entry, META_FILE)) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        return dict(meta, path=os.path.join(entry, MODEL_FILE), entry_dir=entry)
+    
+    def store(
+        self,
+        model_id: str,
+        key: str,
+        export: Callable[[str], None],
+        meta: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Dışa aktarımı geçici dizinde çalıştırır ve kaydı yerine taşır
+        
+        Aynı kayıt bu sırada başka bir süreç tarafından yazıldıysa o kullanılır.
+        
+        Args:
+            model_id: Model ID
+            key: export_cache_key anahtarı
+            export: Grafiği verilen yola yazan fonksiyon
+            meta: Kayda eklenecek meta veri (revizyon, opset, imza)
+        
+        Returns:
+            Dict[str, Any]: Kayıt meta verisi ("path" dahil)
+        """
+        model_dir = self._model_dir(model_id)
+        os.makedirs(model_dir, exist_ok=True)
+        
+        # Aynı dosya sisteminde geçici dizin: taşıma tek adımda (rename) olur
+        staging = tempfile.mkdtemp(prefix=f".{key}-", dir=model_dir)
+        try:
+            export(os.path.join(staging, MODEL_FILE))
+            
+            meta = dict(meta or {}, key=key, created_at=time.time())
+            with open(os.path.join(staging, META_FILE), "w") as f:
+                json.dump(meta, f)
+            
+            try:
+                os.rename(staging, self.entry_dir(model_id, key))
+            except OSError:
+                # Başka bir yükleme aynı kaydı önce tamamladı
+                logger.info(f"ONNX kaydı zaten mevcut, yeni dışa aktarım atlanıyor: {model_id}/{key}")
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        
+        entry = self._read(model_id, key)
+        if entry is None:
+            raise RuntimeError(f"ONNX kaydı yazılamadı: {model_id}/{key}")
+        return entry
+    
+    def optimized_path(self, entry: Dict[str, Any], provider: str, variant: str = "fp32") -> str:
+        """
+        Kaydın sağlayıcıya özel ORT ile optimize edilmiş grafik yolu
+        
+        Args:
+            entry: lookup/store sonucu
+            provider: Sağlayıcı etiketi (ör. "cuda", "cpu")
+            variant: Grafik varyantı (ör. "fp32", "fp16", "int8-dynamic")
+        
+        Returns:
+            str: Dosya yolu (dosya henüz olmayabilir)
+        """
+        if variant == "fp32":
+            return os.path.join(entry["entry_dir"], f"model.optimized.{provider}.onnx")
+        return os.path.join(entry["entry_dir"], f"model.{variant}.optimized.{provider}.onnx")
+    
+    def read_variant_report(self, entry: Dict[str, Any], provider: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Kayıttaki varyantların sağlayıcıya özel ölçümleri
+        
+        Args:
+            entry: lookup/store sonucu
+            provider: Sağlayıcı etiketi
+        
+        Returns:
+            Dict[str, Dict[str, Any]]: Varyant başına ölçüm (ölçüm yoksa boş)
+        """
+        try:
+            with open(os.path.join(entry["entry_dir"], f"variants.{provider}.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def write_variant_report(self, entry: Dict[str, Any], provider: str, report: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Varyant ölçümlerini kayda yazar (geçici dosya üzerinden tek adımda)
+        
+        Args:
+            entry: lookup/store sonucu
+            provider: Sağlayıcı etiketi
+            report: Varyant başına ölçüm
+        """
+        path = os.path.join(entry["entry_dir"], f"variants.{provider}.json")
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(report, f)
+        os.replace(f"{path}.tmp", path)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Önbellek isabet istatistikleri
+        
+        Returns:
+            Dict[str, Any]: Dizin, isabet ve kaçırma sayıları
+        """
+        return {"root": self.root, "hits": self.hits, "misses": self.misses}
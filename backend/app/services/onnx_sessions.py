@@ -0,0 +1,190 @@
+"""
+ONNX oturum havuzu: model başına iş parçacığı ayarları, eşzamanlı çağrılar için
+oturum havuzu ve önceden ayrılmış çıktı tamponlarına IO binding
+"""
+import logging
+import os
+import queue
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import numpy as np
+
+from app.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+def resolve_session_tuning(overrides: Optional[Dict[str, Any]] = None, shared: bool = False) -> Dict[str, Any]:
+    """
+    İstekteki oturum ayarlarını varsayılanlarla birleştirir
+    
+    Args:
+        overrides: İstekte verilen ayarlar (None olanlar varsayılanı kullanır)
+        shared: Havuzdaki yuvalar tek oturumu paylaşıyor mu (GPU)
+    
+    Returns:
+        Dict[str, Any]: pool_size, intra_op_threads, inter_op_threads, execution_mode,
+            cpu_mem_arena, arena_extend_strategy
+    """
+    tuning = {
+        "pool_size": settings.ONNX_SESSION_POOL_SIZE,
+        "intra_op_threads": settings.ONNX_INTRA_OP_THREADS,
+        "inter_op_threads": settings.ONNX_INTER_OP_THREADS,
+        "execution_mode": settings.ONNX_EXECUTION_MODE,
+        "cpu_mem_arena": settings.ONNX_CPU_MEM_ARENA,
+        "arena_extend_strategy": settings.ONNX_ARENA_EXTEND_STRATEGY,
+    }
+    tuning.update({name: value for name, value in (overrides or {}).items() if value is not None})
+    tuning["pool_size"] = max(1, tuning["pool_size"])
+    
+    # Ayrı oturumlar çekirdekleri paylaşır; toplam iş parçacığı çekirdek sayısını aşmasın
+    if not tuning["intra_op_threads"]:
+        sessions = 1 if shared else tuning["pool_size"]
+        tuning["intra_op_threads"] = max(1, (os.cpu_count() or 1) // sessions)
+    
+    return tuning
+
+class PooledSession:
+    """
+    Havuzdaki bir yuva: oturum, kendi IO binding'i ve çıktı tamponu
+    
+    Çıktı (batch, sequence, hidden) biçiminde FP32 ise ilk çıktı önceden
+    ayrılmış tek bir tampona bağlanır; tampon sadece daha büyük bir toplu iş
+    geldiğinde büyür. Döndürülen dizi bu tamponun görünümüdür ve yuva havuza
+    geri verilene kadar geçerlidir.
+    """
+    
+    def __init__(self, session: Any):
+        self.session = session
+        self.input_names = [item.name for item in session.get_inputs()]
+        
+        output = session.get_outputs()[0]
+        self.output_name = output.name
+        self.hidden_size = None
+        if len(output.shape) == 3 and isinstance(output.shape[-1], int) and output.type == "tensor(float)":
+            self.hidden_size = output.shape[-1]
+        
+        self.binding = session.io_binding() if self.hidden_size else None
+        self._buffer = np.empty(0, dtype=np.float32)
+    
+    def run(self, feeds: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Girdileri çalıştırır ve ilk çıktıyı döndürür
+        
+        Args:
+            feeds: Girdi adı -> int64 dizi (grafikte olmayan girdiler atlanır)
+        
+        Returns:
+            np.ndarray: İlk çıktı (IO binding kullanılıyorsa tamponun görünümü)
+        """
+        feeds = {name: value for name, value in feeds.items() if name in self.input_names}
+        if self.binding is None:
+            return self.session.run([self.output_name], feeds)[0]
+        
+        batch_size, length = feeds["input_ids"].shape
+        shape = (batch_size, length, self.hidden_size)
+        size = batch_size * length * self.hidden_size
+        
+        # Büyürken iki katına çıkar; sabit durumda çağrı başına dizi ayrılmaz
+        if self._buffer.size < size:
+            self._buffer = np.empty(max(size, 2 * self._buffer.size), dtype=np.float32)
+        output = self._buffer[:size].reshape(shape)
+        
+        self.binding.clear_binding_inputs()
+        self.binding.clear_binding_outputs()
+        for name, value in feeds.items():
+            self.binding.bind_cpu_input(name, np.ascontiguousarray(value))
+        self.binding.bind_output(self.output_name, "cpu", 0, np.float32, list(shape), output.ctypes.data)
+        
+        self.session.run_with_iobinding(self.binding)
+        return output
+
+class OnnxSessionPool:
+    """
+    Bir ONNX modeli için eşzamanlı çağıranlara yuva dağıtan havuz
+    
+    CPU'da her yuvanın kendi oturumu (ve iş parçacığı havuzu) vardır. GPU'da
+    ağırlıklar bir kez yüklensin diye yuvalar tek oturumu paylaşır (ORT
+    oturumları eşzamanlı çalıştırmaya izin verir); her yuvanın yine kendi IO
+    binding'i ve tamponu olur.
+    """
+    
+    def __init__(self, create: Callable[[], Any], size: int = 1, shared: bool = False):
+        """
+        Havuzu oluştur (oturumlar hemen oluşturulur)
+        
+        Args:
+            create: Yeni ORT oturumu döndüren fonksiyon
+            size: Yuva sayısı
+            shared: Yuvalar tek oturumu paylaşsın mı
+        """
+        self.size = max(1, size)
+        self.shared = shared
+        
+        first = create()
+        sessions = [first] + [first if shared else create() for _ in range(self.size - 1)]
+        self._slots = [PooledSession(session) for session in sessions]
+        
+        # LIFO: son kullanılan (önbelleği sıcak) yuva önce verilir
+        self._idle: "queue.LifoQueue[PooledSession]" = queue.LifoQueue()
+        for slot in self._slots:
+            self._idle.put(slot)
+        self._closed = False
+    
+    @contextmanager
+    def acquire(self, timeout: Optional[float] = None) -> Iterator[PooledSession]:
+        """
+        Boş bir yuvayı ödünç verir
+        
+        Args:
+            timeout: En uzun bekleme (verilmezse INFERENCE_TIMEOUT_SECONDS)
+        
+        Yields:
+            PooledSession: Yuva
+        
+        Raises:
+            RuntimeError: Havuz kapatıldıysa
+            TimeoutError: Süre içinde yuva boşalmazsa
+        """
+        if self._closed:
+            raise RuntimeError("ONNX oturum havuzu kapatıldı")
+        
+        try:
+            slot = self._idle.get(timeout=timeout or settings.INFERENCE_TIMEOUT_SECONDS)
+        except queue.Empty:
+            raise TimeoutError("ONNX oturum havuzunda boş yuva yok")
+        
+        try:
+            yield slot
+        finally:
+            self._idle.put(slot)
+    
+    def warmup(self, feeds: Dict[str, np.ndarray]) -> None:
+        """
+        Her yuvayı bir kez çalıştırır (başlatma maliyeti ve ilk tampon yüklemede ödenir)
+        
+        Args:
+            feeds: Örnek girdiler
+        """
+        for slot in self._slots:
+            try:
+                slot.run(feeds)
+            except Exception as e:
+                logger.warning(f"ONNX ısınma çalıştırması başarısız: {e}")
+    
+    def close(self, timeout: Optional[float] = None) -> None:
+        """
+        Yeni çağrıları durdurur ve çalışan çağrıların bitmesini bekler
+        
+        Args:
+            timeout: Yuva başına en uzun bekleme (verilmezse INFERENCE_TIMEOUT_SECONDS)
+        """
+        self._closed = True
+        for _ in self._slots:
+            try:
+                self._idle.get(timeout=timeout or settings.INFERENCE_TIMEOUT_SECONDS)
+            except queue.Empty:
+                logger.warning("ONNX oturum havuzu kapatılırken çalışan çağrı bitmedi")
+                break
+        self._slots = []
@@ -0,0 +1,262 @@
+"""
+ONNX grafiklerinin FP16 ve INT8 (dinamik / statik) varyantları
+
+Varyantlar dışa aktarılan FP32 grafikten üretilir ve aynı önbellek kaydının
+dizinine yazılır. Her varyant küçük bir kalibrasyon kümesinde ölçülür (boyut,
+gecikme, FP32 çıktısına kosinüs benzerliği); doğruluk eşiğini geçenlerden en
+hızlısı sunulur.
+"""
+import logging
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.config import get_settings
+
+# ONNX Runtime quantization araçları onnx paketine ihtiyaç duyar
+try:
+    import onnx
+    from onnxruntime.quantization import (
+        CalibrationDataReader,
+        QuantFormat,
+        QuantType,
+        quantize_dynamic,
+        quantize_static
+    )
+    from onnxruntime.transformers.float16 import convert_float_to_float16
+    QUANTIZATION_AVAILABLE = True
+except ImportError:
+    CalibrationDataReader = object
+    QUANTIZATION_AVAILABLE = False
+    logging.warning("onnx / ONNX Runtime quantization yüklenemedi. FP16 ve INT8 ONNX varyantları kullanılamaz.")
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Statik quantization aralıkları ve doğruluk kontrolü için kısa, farklı uzunlukta örnekler
+CALIBRATION_TEXTS = [
+    "Hello, world!",
+    "The quick brown fox jumps over the lazy dog.",
+    "Model sunucusu gelen istekleri toplu olarak işler.",
+    "GPU memory is reserved before the model weights are loaded onto the device.",
+    "What is the capital of France?",
+    "Bu model metinleri vektörlere dönüştürmek için kullanılır ve sonuçlar benzerlik aramasında kullanılır.",
+    "Quantization trades a small amount of accuracy for lower latency and a smaller memory footprint.",
+    "ok",
+]
+
+def variant_candidates(quantize: bool, use_fp16: bool) -> List[str]:
+    """
+    İstek bayraklarına göre denenecek varyantlar
+    
+    Args:
+        quantize: INT8 varyantları denensin mi
+        use_fp16: FP16 varyantı denensin mi
+    
+    Returns:
+        List[str]: Varyant adları ("fp32" her zaman dahil)
+    """
+    candidates = ["fp32"]
+    if use_fp16:
+        candidates.append("fp16")
+    if quantize:
+        candidates.extend(["int8-dynamic", "int8-static"])
+    return candidates
+
+def variant_path(entry: Dict[str, Any], variant: str) -> str:
+    """
+    Önbellek kaydında varyant grafiğinin yolu
+    
+    Args:
+        entry: OnnxExportCache kaydı
+        variant: Varyant adı
+    
+    Returns:
+        str: Dosya yolu (dosya henüz olmayabilir)
+    """
+    if variant == "fp32":
+        return entry["path"]
+    return os.path.join(entry["entry_dir"], f"model.{variant}.onnx")
+
+def graph_size_mb(path: str) -> float:
+    """
+    Grafik dosyası ve varsa yanındaki harici ağırlık dosyasının boyutu
+    
+    Args:
+        path: .onnx dosya yolu
+    
+    Returns:
+        float: Boyut (MB)
+    """
+    # onnx.save_model "model.fp16.data", quantization araçları "model.int8-dynamic.onnx.data" yazar
+    size = os.path.getsize(path)
+    for data_path in (f"{os.path.splitext(path)[0]}.data", f"{path}.data"):
+        if os.path.exists(data_path):
+            size += os.path.getsize(data_path)
+    return size / (1024 * 1024)
+
+def calibration_feeds(tokenizer: Any, input_names: List[str]) -> List[Dict[str, np.ndarray]]:
+    """
+    Kalibrasyon metinlerini ORT girdilerine dönüştürür (örnek başına tek satır)
+    
+    Args:
+        tokenizer: Model tokenizer'ı
+        input_names: Grafiğin girdi adları
+    
+    Returns:
+        List[Dict[str, np.ndarray]]: Girdi sözlükleri
+    """
+    feeds = []
+    for text in CALIBRATION_TEXTS:
+        encoded = tokenizer(
+            text,
+            truncation=True,
+            max_length=settings.INFERENCE_MAX_SEQUENCE_LENGTH,
+            return_tensors="np"
+        )
+        feeds.append({name: encoded[name].astype(np.int64) for name in input_names if name in encoded})
+    return feeds
+
+class FeedCalibrationReader(CalibrationDataReader):
+    """
+    Hazır girdi sözlüklerini quantize_static'e sırayla veren okuyucu
+    """
+    
+    def __init__(self, feeds: List[Dict[str, np.ndarray]]):
+        self._feeds = iter(feeds)
+    
+    def get_next(self) -> Optional[Dict[str, np.ndarray]]:
+        return next(self._feeds, None)
+
+def build_variant(source_path: str, variant: str, target_path: str, feeds: List[Dict[str, np.ndarray]]) -> None:
+    """
+    FP32 grafikten varyant üretir
+    
+    Varyant geçici dizinde yazılır; önce harici ağırlık dosyası, en son .onnx
+    dosyası yerine taşınır, böylece yarım kalan üretim kayıtta görünmez.
+    
+    Args:
+        source_path: FP32 grafik yolu
+        variant: "fp16", "int8-dynamic" veya "int8-static"
+        target_path: Varyantın yazılacağı yol
+        feeds: Statik quantization için kalibrasyon girdileri
+    
+    Raises:
+        RuntimeError: onnx / quantization araçları yüklü değilse
+        ValueError: Bilinmeyen varyant
+    """
+    if not QUANTIZATION_AVAILABLE:
+        raise RuntimeError("onnx / ONNX Runtime quantization yüklü değil")
+    
+    name = os.path.basename(target_path)
+    staging = tempfile.mkdtemp(prefix=f".{name}-", dir=os.path.dirname(target_path))
+    staged_path = os.path.join(staging, name)
+    
+    try:
+        if variant == "fp16":
+            # Girdi/çıktı tipleri korunur; çıkarım kodu FP32 çıktı bekler
+            model = convert_float_to_float16(onnx.load(source_path), keep_io_types=True)
+            onnx.save_model(
+                model,
+                staged_path,
+                save_as_external_data=True,
+                all_tensors_to_one_file=True,
+                location=f"{os.path.splitext(name)[0]}.data"
+            )
+        elif variant == "int8-dynamic":
+            # Ağırlıklar INT8, aktivasyon aralıkları çalışma anında hesaplanır
+            quantize_dynamic(
+                source_path,
+                staged_path,
+                weight_type=QuantType.QInt8,
+                use_external_data_format=True
+            )
+        elif variant == "int8-static":
+            # Aktivasyon aralıkları kalibrasyon kümesinden; QDQ biçimi CPU ve CUDA sağlayıcılarında çalışır
+            quantize_static(
+                source_path,
+                staged_path,
+                FeedCalibrationReader(feeds),
+                quant_format=QuantFormat.QDQ,
+                activation_type=QuantType.QInt8,
+                weight_type=QuantType.QInt8,
+                use_external_data_format=True
+            )
+        else:
+            raise ValueError(f"Bilinmeyen ONNX varyantı: {variant}")
+        
+        for item in sorted(os.listdir(staging), key=lambda item: item == name):
+            os.replace(os.path.join(staging, item), os.path.join(os.path.dirname(target_path), item))
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+def _pooled(hidden: np.ndarray, feed: Dict[str, np.ndarray]) -> np.ndarray:
+    # run_batch ile aynı ortalama havuzlama
+    mask = feed.get("attention_mask", np.ones(hidden.shape[:2]))[:, :, None].astype(np.float32)
+    return (hidden.astype(np.float32) * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1.0)
+
+def measure_variant(
+    session: Any,
+    feeds: List[Dict[str, np.ndarray]],
+    reference: Optional[List[np.ndarray]] = None,
+    runs: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Oturumun kalibrasyon kümesindeki gecikmesini ve doğruluğunu ölçer
+    
+    Args:
+        session: ORT oturumu
+        feeds: Kalibrasyon girdileri
+        reference: FP32 oturumunun havuzlanmış çıktıları (verilmezse doğruluk 1.0 sayılır)
+        runs: Ölçüm tekrarı (verilmezse ONNX_VARIANT_BENCHMARK_RUNS)
+    
+    Returns:
+        Dict[str, Any]: latency_ms (küme başına medyan), cosine (en kötü örnek) ve pooled çıktılar
+    """
+    runs = max(1, runs or settings.ONNX_VARIANT_BENCHMARK_RUNS)
+    
+    # İlk geçiş ısınma; çıktılar doğruluk için kullanılır
+    pooled = [_pooled(session.run(None, feed)[0], feed) for feed in feeds]
+    
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        for feed in feeds:
+            session.run(None, feed)
+        timings.append((time.perf_counter() - start) * 1000)
+    
+    cosine = 1.0
+    if reference is not None:
+        for output, expected in zip(pooled, reference):
+            denominator = float(np.linalg.norm(output) * np.linalg.norm(expected)) or 1.0
+            cosine = min(cosine, float((output * expected).sum()) / denominator)
+    
+    return {"latency_ms": float(np.median(timings)), "cosine": cosine, "pooled": pooled}
+
+def select_variant(report: Dict[str, Dict[str, Any]], min_cosine: Optional[float] = None) -> str:
+    """
+    Doğruluk eşiğini geçen en hızlı varyantı seçer
+    
+    Eşit gecikmede küçük olan tercih edilir; hiçbiri geçemezse "fp32".
+    
+    Args:
+        report: Varyant başına ölçüm ({"latency_ms", "size_mb", "cosine"} veya {"error"})
+        min_cosine: En düşük kosinüs benzerliği (verilmezse ONNX_VARIANT_MIN_COSINE)
+    
+    Returns:
+        str: Varyant adı
+    """
+    min_cosine = settings.ONNX_VARIANT_MIN_COSINE if min_cosine is None else min_cosine
+    
+    eligible = [
+        (measured["latency_ms"], measured["size_mb"], variant)
+        for variant, measured in report.items()
+        if "error" not in measured and (variant == "fp32" or measured["cosine"] >= min_cosine)
+    ]
+    if not eligible:
+        return "fp32"
+    return min(eligible)[2]
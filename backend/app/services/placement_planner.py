@@ -0,0 +1,178 @@
+"""
+Birden fazla modeli GPU'lara birlikte yerleştiren (bin-packing) planlayıcı
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.config import get_settings
+from app.services.gpu_manager import GPUManager
+from app.services.gpu_reservations import GPUReservation
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+def best_fit_decreasing(
+    items: List[Tuple[str, float]],
+    capacities: Dict[int, float]
+) -> Tuple[List[Tuple[str, int, float]], List[Tuple[str, float]], Dict[int, float]]:
+    """
+    Best-fit-decreasing yerleştirme sezgiseli
+    
+    Öğeler büyükten küçüğe sıralanır ve her biri sığdığı GPU'lar arasında en az
+    boş alan bırakan GPU'ya yerleştirilir. Böylece büyük boşluklar bir sonraki
+    büyük model için korunur ve parçalanma azalır.
+    
+    Args:
+        items: (model ID, bellek MB) listesi
+        capacities: GPU indeksi -> kullanılabilir bellek (MB)
+    
+    Returns:
+        Tuple: (yerleşimler [(model ID, GPU indeksi, MB)], yerleşemeyenler [(model ID, MB)], kalan kapasite)
+    """
+    remaining = dict(capacities)
+    placements: List[Tuple[str, int, float]] = []
+    unplaced: List[Tuple[str, float]] = []
+    
+    for model_id, memory_mb in sorted(items, key=lambda item: item[1], reverse=True):
+        candidates = [
+            (free_mb - memory_mb, gpu_index)
+            for gpu_index, free_mb in remaining.items()
+            if free_mb >= memory_mb
+        ]
+        
+        if not candidates:
+            unplaced.append((model_id, memory_mb))
+            continue
+        
+        _, gpu_index = min(candidates)
+        remaining[gpu_index] -= memory_mb
+        placements.append((model_id, gpu_index, memory_mb))
+    
+    return placements, unplaced, remaining
+
+class PlacementPlanner:
+    """
+    Model kümesi için GPU yerleşim planı oluşturan ve uygulayan sınıf
+    """
+    
+    def __init__(self, gpu_manager: GPUManager, headroom_mb: Optional[float] = None):
+        """
+        Planlayıcıyı oluştur
+        
+        Args:
+            gpu_manager: GPU yöneticisi
+            headroom_mb: Her GPU'da boş bırakılacak bellek (MB)
+        """
+        self.gpu_manager = gpu_manager
+        self.headroom_mb = headroom_mb if headroom_mb is not None else settings.PLACEMENT_HEADROOM_MB
+    
+    def _capacities(self) -> Dict[int, float]:
+        """
+        GPU başına kullanılabilir bellek: boş bellek - rezervasyonlar - pay
+        """
+        pending = self.gpu_manager.reservations.pending_mb()
+        
+        return {
+            gpu["index"]: max(0.0, gpu["free_memory_mb"] - pending.get(gpu["index"], 0.0) - self.headroom_mb)
+            for gpu in self.gpu_manager.detect_gpus()
+        }
+    
+    def plan(self, models: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Modeller için yerleşim planı oluşturur (hiçbir şey rezerve etmez)
+        
+        Args:
+            models: {"model_id", "memory_mb"} sözlükleri
+        
+        Returns:
+            Dict[str, Any]: Yerleşimler, yerleşemeyen modeller ve GPU başına kalan bellek
+        """
+        capacities = self._capacities()
+        placements, unplaced, remaining = best_fit_decreasing(
+            [(model["model_id"], float(model["memory_mb"])) for model in models],
+            capacities
+        )
+        
+        return {
+            "placements": [
+                {"model_id": model_id, "gpu_index": gpu_index, "memory_mb": memory_mb}
+                for model_id, gpu_index, memory_mb in placements
+            ],
+            "unplaced": [
+                {"model_id": model_id, "memory_mb": memory_mb}
+                for model_id, memory_mb in unplaced
+            ],
+            "gpus": [
+                {"index": gpu_index, "available_mb": capacities[gpu_index], "remaining_mb": remaining[gpu_index]}
+                for gpu_index in sorted(capacities)
+            ],
+        }
+    
+    def reserve(self, models: List[Dict[str, Any]]) -> Tuple[Dict[str, Any], List[GPUReservation]]:
+        """
+        Planı oluşturur ve tüm yerleşimleri tek seferde rezerve eder
+        
+        Args:
+            models: {"model_id", "memory_mb"} sözlükleri
+        
+        Returns:
+            Tuple[Dict[str, Any], List[GPUReservation]]: (plan, yerleşim sırasıyla rezervasyonlar)
+        """
+        ledger = self.gpu_manager.reservations
+        
+        # Plan ile rezervasyon arasında başka bir yükleme araya girmesin
+        with ledger.lock:
+            plan = self.plan(models)
+            reservations = [
+                ledger.reserve(placement["gpu_index"], placement["memory_mb"], owner=placement["model_id"])
+                for placement in plan["placements"]
+            ]
+        
+        return plan, reservations
+    
+    def apply(
+        self,
+        models: List[Dict[str, Any]],
+        loader: Callable[[Dict[str, Any], GPUReservation], Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Planı uygular: rezervasyonları alır ve modelleri yükler
+        
+        Farklı GPU'lardaki yüklemeler paralel, aynı GPU'dakiler sırayla çalışır.
+        
+        Args:
+            models: {"model_id", "memory_mb"} sözlükleri
+            loader: (yerleşim, rezervasyon) alıp yükleme sonucu döndüren fonksiyon;
+                    rezervasyonu tamamlamak/bırakmak bu fonksiyonun sorumluluğundadır
+        
+        Returns:
+            Dict[str, Any]: Plan ve yerleşim başına yükleme sonuçları
+        """
+        plan, reservations = self.reserve(models)
+        
+        # Yerleşimleri GPU'ya göre grupla
+        per_gpu: Dict[int, List[Tuple[Dict[str, Any], GPUReservation]]] = {}
+        for placement, reservation in zip(plan["placements"], reservations):
+            per_gpu.setdefault(placement["gpu_index"], []).append((placement, reservation))
+        
+        def load_gpu_queue(queue: List[Tuple[Dict[str, Any], GPUReservation]]) -> List[Dict[str, Any]]:
+            results = []
+            for placement, reservation in queue:
+                try:
+                    result = loader(placement, reservation)
+                except Exception as e:
+                    self.gpu_manager.reservations.release(reservation)
+                    result = {"success": False, "message": f"Model yükleme hatası: {str(e)}"}
+                results.append(dict(result, model_id=placement["model_id"], gpu_index=placement["gpu_index"]))
+            return results
+        
+        results: List[Dict[str, Any]] = []
+        if per_gpu:
+            with ThreadPoolExecutor(max_workers=len(per_gpu), thread_name_prefix="placement") as executor:
+                for gpu_results in executor.map(load_gpu_queue, per_gpu.values()):
+                    results.extend(gpu_results)
+        
+        plan["results"] = results
+        plan["loaded"] = sum(1 for result in results if result.get("success"))
+        return plan
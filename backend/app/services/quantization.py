@@ -0,0 +1,320 @@
+"""
+PyTorch modelleri için ağırlık quantization arka uçları
+
+CPU'da çalışan modeller için torch dinamik INT8 (ağırlıklar INT8, aktivasyonlar
+çalışma anında quantize edilir), GPU'da çalışan modeller için sadece ağırlık
+(weight-only) INT8 / INT4: ağırlıklar tam sayı olarak saklanır ve ileri geçişte
+katman katman çözülür (dequantize), böylece bellekte sadece quantize ağırlıklar
+kalır.
+"""
+import logging
+from collections import Counter
+from typing import Any, Collection, Dict, List, Optional, Set, Tuple
+
+import torch
+import torch.nn.functional as F
+from torch import nn
+
+from app.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+QUANTIZATION_BITS = {"int8": 8, "int4": 4}
+
+try:
+    from torch.ao.nn.quantized.dynamic import Linear as DynamicQuantizedLinear
+except ImportError:
+    DynamicQuantizedLinear = None
+
+def quantization_scheme(quantize: bool) -> Optional[str]:
+    """
+    İstek bayrağına göre uygulanacak quantization şeması
+    
+    Args:
+        quantize: Quantization isteniyor mu
+    
+    Returns:
+        Optional[str]: "int8", "int4" veya quantization yoksa None
+    """
+    scheme = (settings.MODEL_QUANTIZATION or "").lower()
+    if not quantize or scheme in ("", "none"):
+        return None
+    if scheme not in QUANTIZATION_BITS:
+        raise ValueError(f"Bilinmeyen quantization şeması: {scheme}")
+    return scheme
+
+def weight_bytes(model: nn.Module) -> int:
+    """
+    Model ağırlıklarının kapladığı bellek (paketlenmiş dinamik INT8 ağırlıklar dahil)
+    
+    Args:
+        model: PyTorch modeli
+    
+    Returns:
+        int: Bayt
+    """
+    tensors = list(model.parameters()) + list(model.buffers())
+    total = sum(tensor.numel() * tensor.element_size() for tensor in tensors)
+    
+    # Dinamik quantize katmanların ağırlıkları parametre/buffer olarak görünmez
+    if DynamicQuantizedLinear is not None:
+        for module in model.modules():
+            if isinstance(module, DynamicQuantizedLinear):
+                weight, bias = module.weight(), module.bias()
+                total += weight.numel() * weight.element_size()
+                if bias is not None:
+                    total += bias.numel() * bias.element_size()
+    
+    return total
+
+def _quantizable_linears(model: nn.Module) -> List[Tuple[str, nn.Linear]]:
+    # Ağırlığı başka bir modülle paylaşılan (ör. gömmeye bağlı çıkış katmanı) katmanlar
+    # atlanır; quantize edilirse paylaşım kopar ve bellek artar
+    owners = Counter(id(param) for _, param in model.named_parameters(remove_duplicate=False))
+    return [
+        (name, module) for name, module in model.named_modules()
+        if type(module) is nn.Linear and owners[id(module.weight)] == 1
+    ]
+
+class WeightOnlyLinear(nn.Module):
+    """
+    Ağırlıkları INT8 veya paketlenmiş INT4 olarak saklayan doğrusal katman
+    
+    INT8'de çıkış kanalı başına, INT4'te giriş boyunca group_size'lık gruplar
+    başına simetrik ölçek kullanılır. İleri geçişte ağırlık girdinin veri
+    tipine çözülür.
+    """
+    
+    def __init__(self, linear: nn.Linear, bits: int = 8, group_size: int = 128):
+        super().__init__()
+        self.in_features = linear.in_features
+        self.out_features = linear.out_features
+        self.bits = bits
+        
+        weight = linear.weight.detach().float()
+        dtype = linear.weight.dtype
+        
+        if bits == 8:
+            self.group_size = self.in_features
+            scale = weight.abs().amax(dim=1, keepdim=True).clamp(min=1e-8) / 127
+            qweight = torch.round(weight / scale).clamp(-127, 127).to(torch.int8)
+        else:
+            if self.in_features % group_size:
+                group_size = self.in_features
+            self.group_size = group_size
+            
+            grouped = weight.reshape(self.out_features, -1, group_size)
+            scale = grouped.abs().amax(dim=2, keepdim=True).clamp(min=1e-8) / 7
+            values = (torch.round(grouped / scale).clamp(-8, 7) + 8).to(torch.uint8).reshape(self.out_features, -1)
+            
+            # İki 4 bitlik değer bir bayta
+            qweight = values[:, 0::2] | (values[:, 1::2] << 4)
+        
+        self.register_buffer("qweight", qweight)
+        self.register_buffer("scale", scale.to(dtype))
+        self.bias = linear.bias
+    
+    def dequantize(self) -> torch.Tensor:
+        """
+        Ağırlığı ölçeğin veri tipinde çözer
+        
+        Returns:
+            torch.Tensor: (out_features, in_features) ağırlık
+        """
+        if self.bits == 8:
+            return self.qweight.to(self.scale.dtype) * self.scale
+        
+        values = torch.stack((self.qweight & 0x0F, self.qweight >> 4), dim=-1).reshape(self.out_features, -1)
+        grouped = values.to(self.scale.dtype).reshape(self.out_features, -1, self.group_size) - 8
+        return (grouped * self.scale).reshape(self.out_features, self.in_features)
+    
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        return F.linear(x, self.dequantize().to(x.dtype), self.bias)
+    
+    def extra_repr(self) -> str:
+        return f"in_features={self.in_features}, out_features={self.out_features}, bits={self.bits}"
+
+class QuantizationBackend:
+    """
+    Quantization arka ucu temel sınıfı
+    """
+    
+    name = "none"
+    bits: Optional[int] = None
+    
+    def apply(self, model: nn.Module, names: Optional[Collection[str]] = None) -> Tuple[nn.Module, int]:
+        """
+        Modeli quantize eder
+        
+        Args:
+            model: PyTorch modeli (CPU'da)
+            names: Sadece bu doğrusal katmanlar (verilmezse tümü)
+        
+        Returns:
+            Tuple[nn.Module, int]: (quantize model, quantize edilen katman sayısı)
+        """
+        raise NotImplementedError
+
+class TorchDynamicInt8Backend(QuantizationBackend):
+    """
+    torch dinamik INT8 quantization (sadece CPU; FP32 model gerektirir)
+    """
+    
+    name = "torch-dynamic-int8"
+    bits = 8
+    
+    def apply(self, model: nn.Module, names: Optional[Collection[str]] = None) -> Tuple[nn.Module, int]:
+        names = [name for name, _ in _quantizable_linears(model) if names is None or name in names]
+        if not names:
+            return model, 0
+        
+        qconfig_spec = {name: torch.ao.quantization.default_dynamic_qconfig for name in names}
+        model = torch.ao.quantization.quantize_dynamic(
+            model.float(), qconfig_spec=qconfig_spec, dtype=torch.qint8, inplace=True
+        )
+        return model, len(names)
+
+class WeightOnlyBackend(QuantizationBackend):
+    """
+    Sadece ağırlık INT8 / INT4 quantization (her cihazda çalışır; GPU için)
+    """
+    
+    def __init__(self, bits: int = 8, group_size: Optional[int] = None):
+        self.bits = bits
+        self.group_size = group_size or settings.MODEL_QUANTIZATION_GROUP_SIZE
+        self.name = f"weight-only-int{bits}"
+    
+    def apply(self, model: nn.Module, names: Optional[Collection[str]] = None) -> Tuple[nn.Module, int]:
+        count = 0
+        for name, linear in _quantizable_linears(model):
+            if names is not None and name not in names:
+                continue
+            
+            # INT4 paketleme çift giriş boyutu gerektirir
+            if self.bits == 4 and linear.in_features % 2:
+                continue
+            
+            parent_name, _, child_name = name.rpartition(".")
+            parent = model.get_submodule(parent_name) if parent_name else model
+            setattr(parent, child_name, WeightOnlyLinear(linear, self.bits, self.group_size))
+            count += 1
+        
+        return model, count
+
+def select_backend(scheme: Optional[str], device: str) -> Optional[QuantizationBackend]:
+    """
+    Şema ve modelin çalışacağı cihaza göre arka uç seçer
+    
+    Args:
+        scheme: "int8", "int4" veya None
+        device: Modelin çalışacağı cihaz ("cpu", "cuda:0", ...)
+    
+    Returns:
+        Optional[QuantizationBackend]: Arka uç veya quantization yoksa None
+    
+    Raises:
+        ValueError: Bilinmeyen şema
+    """
+    if scheme is None:
+        return None
+    if scheme not in QUANTIZATION_BITS:
+        raise ValueError(f"Bilinmeyen quantization şeması: {scheme}")
+    
+    # CPU'da INT8 için quantize çekirdekleri (fbgemm/qnnpack) ağırlık çözmekten hızlı
+    if scheme == "int8" and torch.device(device).type == "cpu":
+        return TorchDynamicInt8Backend()
+    return WeightOnlyBackend(bits=QUANTIZATION_BITS[scheme])
+
+def quantize_model(model: nn.Module, backend: Optional[QuantizationBackend]) -> Tuple[nn.Module, Dict[str, Any]]:
+    """
+    Arka ucu uygular ve kazanılan belleği ölçer
+    
+    Args:
+        model: PyTorch modeli (CPU'da)
+        backend: select_backend sonucu (None ise model değişmez)
+    
+    Returns:
+        Tuple[nn.Module, Dict[str, Any]]: (model, rapor: backend, bits, layers,
+            weights_mb_before, weights_mb_after, saved_mb)
+    """
+    before = weight_bytes(model) / MB
+    layers = 0
+    if backend is not None:
+        model, layers = backend.apply(model)
+    after = weight_bytes(model) / MB
+    
+    return model, _report(backend, layers, before, after)
+
+def _report(backend: Optional[QuantizationBackend], layers: int, before: float, after: float) -> Dict[str, Any]:
+    if layers:
+        logger.info(f"{backend.name}: {layers} katman quantize edildi, {before - after:.1f} MB kazanıldı")
+    
+    return {
+        "backend": backend.name if layers else "none",
+        "bits": backend.bits if layers else None,
+        "layers": layers,
+        "weights_mb_before": before,
+        "weights_mb_after": after,
+        "saved_mb": before - after,
+    }
+
+class StreamingQuantizer:
+    """
+    Ağırlıklar parça (shard) parça yüklenirken ağırlıkları tamamlanan doğrusal
+    katmanları hemen quantize eden yardımcı
+    
+    quantize_model tüm modelin önce tam hassasiyette ana belleğe yüklenmesini
+    gerektirir; burada tam hassasiyetli ağırlıklar en fazla bir parça boyunca
+    yaşar. Rapor quantize_model ile aynı biçimdedir.
+    """
+    
+    def __init__(self, backend: QuantizationBackend):
+        self.backend = backend
+        self.layers = 0
+        self.saved_bytes = 0
+    
+    def candidates(self, model: nn.Module) -> Set[str]:
+        """
+        Quantize edilecek doğrusal katmanlar (ağırlıklar bağlanmış modelde hesaplanmalı)
+        
+        Args:
+            model: Henüz ağırlıkları yüklenmemiş model
+        
+        Returns:
+            Set[str]: Modül adları
+        """
+        return {name for name, _ in _quantizable_linears(model)}
+    
+    def apply(self, model: nn.Module, names: Collection[str]) -> None:
+        """
+        Verilen doğrusal katmanları quantize eder ve kazanılan belleği biriktirir
+        
+        Args:
+            model: PyTorch modeli (CPU'da)
+            names: Ağırlıkları yüklenmiş doğrusal katmanlar
+        """
+        if not names:
+            return
+        
+        before = sum(weight_bytes(model.get_submodule(name)) for name in names)
+        model, count = self.backend.apply(model, names)
+        after = sum(weight_bytes(model.get_submodule(name)) for name in names)
+        
+        self.layers += count
+        self.saved_bytes += before - after
+    
+    def report(self, model: nn.Module) -> Dict[str, Any]:
+        """
+        Yükleme sonunda quantize_model ile aynı biçimde rapor
+        
+        Args:
+            model: Yüklenmiş model
+        
+        Returns:
+            Dict[str, Any]: backend, bits, layers, weights_mb_before, weights_mb_after, saved_mb
+        """
+        after = weight_bytes(model) / MB
+        return _report(self.backend, self.layers, after + self.saved_bytes / MB, after)
@@ -0,0 +1,139 @@
+"""
+Süreç genelinde paylaşılan servisleri tutan kayıt (service container)
+"""
+import logging
+import threading
+from typing import Optional
+
+from app.config import get_settings
+from app.monitoring.prometheus import register_state_collector, unregister_state_collector
+from app.services.gpu_manager import GPUManager
+from app.services.inference import InferenceService
+from app.services.job_queue import JobQueue
+from app.services.model_optimizer import ModelOptimizer
+from app.services.hf_integration import HuggingFaceIntegration
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+class ServiceRegistry:
+    """
+    Tek bir GPUManager, ModelOptimizer, HuggingFaceIntegration, JobQueue ve InferenceService örneğine sahip olan sınıf
+    """
+    
+    def __init__(self):
+        """
+        Servisleri oluştur
+        """
+        # Tüm router'lar ve optimizer aynı GPU yöneticisini kullanır
+        self.gpu_manager = GPUManager()
+        self.model_optimizer = ModelOptimizer(gpu_manager=self.gpu_manager)
+        self.hf_integration = HuggingFaceIntegration(settings.MODEL_STORAGE_PATH)
+        
+        # Uzun süren yükleme/dönüşüm işleri istek thread'inde değil burada çalışır
+        self.job_queue = JobQueue()
+        
+        # Yüklü modeller için mikro-toplamalı çıkarım
+        self.inference = InferenceService(self.model_optimizer)
+    
+    def start(self) -> None:
+        """
+        Arka plan işlerini başlatır
+        """
+        self.gpu_manager.start_sampler()
+        
+        # GPU ve model metrikleri scrape anında okunur
+        register_state_collector(self.gpu_manager, self.model_optimizer)
+    
+    def shutdown(self) -> None:
+        """
+        Arka plan işlerini durdurur
+        """
+        unregister_state_collector()
+        self.job_queue.shutdown()
+        self.inference.shutdown()
+        self.gpu_manager.stop_sampler()
+
+_registry: Optional[ServiceRegistry] = None
+_registry_lock = threading.Lock()
+
+def get_services() -> ServiceRegistry:
+    """
+    Paylaşılan servis kaydını döndürür, yoksa oluşturur
+    
+    Returns:
+        ServiceRegistry: Servis kaydı
+    """
+    global _registry
+    
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ServiceRegistry()
+    
+    return _registry
+
+def init_services() -> ServiceRegistry:
+    """
+    Servisleri oluşturur ve arka plan işlerini başlatır (uygulama başlangıcında)
+    
+    Returns:
+        ServiceRegistry: Servis kaydı
+    """
+    registry = get_services()
+    registry.start()
+    logger.info("Servis kaydı başlatıldı")
+    return registry
+
+def shutdown_services() -> None:
+    """
+    Servislerin arka plan işlerini durdurur (uygulama kapanışında)
+    """
+    if _registry is not None:
+        _registry.shutdown()
+        logger.info("Servis kaydı durduruldu")
+
+def get_gpu_manager() -> GPUManager:
+    """
+    FastAPI bağımlılığı: paylaşılan GPU yöneticisi
+    
+    Returns:
+        GPUManager: GPU yöneticisi
+    """
+    return get_services().gpu_manager
+
+def get_model_optimizer() -> ModelOptimizer:
+    """
+    FastAPI bağımlılığı: paylaşılan model optimizer
+    
+    Returns:
+        ModelOptimizer: Model optimizer
+    """
+    return get_services().model_optimizer
+
+def get_hf_integration() -> HuggingFaceIntegration:
+    """
+    FastAPI bağımlılığı: paylaşılan HuggingFace entegrasyonu
+    
+    Returns:
+        HuggingFaceIntegration: HuggingFace entegrasyonu
+    """
+    return get_services().hf_integration
+
+def get_job_queue() -> JobQueue:
+    """
+    FastAPI bağımlılığı: paylaşılan iş kuyruğu
+    
+    Returns:
+        JobQueue: İş kuyruğu
+    """
+    return get_services().job_queue
+
+def get_inference_service() -> InferenceService:
+    """
+    FastAPI bağımlılığı: paylaşılan çıkarım servisi
+    
+    Returns:
+        InferenceService: Çıkarım servisi
+    """
+    return get_services().inference
@@ -3,15 +3,46 @@ Model yöneticisi için test dosyası
 """
 import unittest
 import tempfile
+import sys
+import threading
+import time
 import os
 import shutil
+import ctypes
+import copy
+from types import SimpleNamespace
 from unittest.mock import patch, MagicMock
 
+import numpy as np
 import torch
+from prometheus_client import CollectorRegistry
 
 from app.services.hf_integration import HuggingFaceIntegration
-from app.services.model_optimizer import ModelOptimizer
+from app.services.model_optimizer import ModelOptimizer, ONNX_EXPORT_SIGNATURE, replica_base
 from app.services.gpu_manager import GPUManager
+from app.services.gpu_history import GPUHistoryStore
+from app.services.gpu_providers import (
+    ChainedProvider, NVMLProvider, NvidiaSmiCLIProvider, NvidiaSmiStreamParser, NvidiaSmiStreamProvider, SimulatedGPUProvider,
+    create_provider
+)
+from app.services.service_registry import ServiceRegistry
+from app.services.job_queue import JobQueue, JOB_FAILED, JOB_SUCCEEDED
+from app.services.inference import InferenceService, MicroBatcher
+from app.services.memory_estimator import estimate_model_memory
+from app.services.model_loader import (
+    build_empty_model, find_safetensors_shards, load_safetensors_model, plan_device_map
+)
+from app.services.model_residency import WarmModelCache
+from app.services.model_tasks import prepare_tokenizer, run_head, task_head
+from app.services.onnx_cache import OnnxExportCache, export_cache_key
+from app.services.onnx_sessions import OnnxSessionPool
+from app.services.onnx_variants import select_variant, variant_candidates
+from app.services.placement_planner import PlacementPlanner, best_fit_decreasing
+from app.services.quantization import (
+    StreamingQuantizer, TorchDynamicInt8Backend, WeightOnlyBackend, quantization_scheme, quantize_model, select_backend,
+    weight_bytes
+)
+from app.monitoring.prometheus import GPUStateCollector
 
 class TestHuggingFaceIntegration(unittest.TestCase):
     """HuggingFace entegrasyonu testleri"""
@@ -161,23 +192,44 @@ class TestModelOptimizer(unittest.TestCase):
         
         # Bellek temizleme çağrılarını kontrol et
         self.mock_torch.cuda.empty_cache.assert_called_once()
+    
+    def test_attribute_gpu_processes(self):
+        # GPU 0'da iki model (1:3 ağırlık), GPU 1'de bir model
+        for model_id, gpu_index, weights_mb in [("a", 0, 1000.0), ("b", 0, 3000.0), ("c", 1, 500.0)]:
+            self.model_optimizer.models[model_id] = MagicMock()
+            self.model_optimizer.model_configs[model_id] = {
+                "model_id": model_id, "gpu_index": gpu_index, "weights_mb": weights_mb
+            }
+        
+        processes = [
+            {"gpu_index": 0, "pid": os.getpid(), "process_name": "python", "used_memory_mb": 6000.0},
+            {"gpu_index": 0, "pid": -1, "process_name": "other", "used_memory_mb": 2000.0},
+        ]
+        
+        # Test
+        attributed = self.model_optimizer.attribute_gpu_processes(processes)
+        
+        # Assert
+        own, foreign = attributed
+        self.assertEqual(own["owner"], "self")
+        self.assertEqual(
+            {model["model_id"]: model["memory_mb"] for model in own["models"]},
+            {"a": 1500.0, "b": 4500.0}
+        )
+        self.assertEqual(foreign["owner"], "foreign")
+        self.assertEqual(foreign["models"], [])
 
 
 class TestGPUManager(unittest.TestCase):
     """GPU yöneticisi testleri"""
     
     def setUp(self):
-        # NVIDIA SMI mock'unu oluştur
-        nvidia_smi_patch = patch('app.services.gpu_manager.nvidia_smi', NVIDIA_SMI_AVAILABLE=False)
-        self.mock_nvidia_smi = nvidia_smi_patch.start()
-        self.addCleanup(nvidia_smi_patch.stop)
-        
         # Subprocess mock'unu oluştur
-        subprocess_patch = patch('app.services.gpu_manager.subprocess')
+        subprocess_patch = patch('app.services.gpu_providers.subprocess')
         self.mock_subprocess = subprocess_patch.start()
         self.addCleanup(subprocess_patch.stop)
         
-        self.gpu_manager = GPUManager()
+        self.gpu_manager = GPUManager(provider=NvidiaSmiCLIProvider())
     
     def test_detect_gpus_cli(self):
         # Subprocess mock'unu ayarla
@@ -186,7 +238,7 @@ class TestGPUManager(unittest.TestCase):
         self.mock_subprocess.run.return_value = mock_process
         
         # Test
-        gpus = self.gpu_manager._detect_gpus_cli()
+        gpus = self.gpu_manager.provider.read()
         
         # Assert
         self.assertEqual(len(gpus), 2)
@@ -235,6 +287,1586 @@ class TestGPUManager(unittest.TestCase):
         # Minimum bellek çok yüksek olduğunda
         optimal_gpu = self.gpu_manager.select_optimal_gpu(min_memory_mb=10000)
         self.assertIsNone(optimal_gpu)
+    
+    def test_sampler_serves_snapshot_without_polling(self):
+        # Ölçüm fonksiyonunu mock'la
+        self.gpu_manager._poll_gpus = MagicMock(return_value=[
+            {"index": 0, "name": "Tesla T4", "total_memory_mb": 8192.0, "used_memory_mb": 1024.0,
+             "free_memory_mb": 7168.0, "utilization_percent": 10.0, "temperature_c": 40.0}
+        ])
+        self.gpu_manager.update_interval = 60
+        
+        # Test: örnekleyici başlarken bir kez ölçer, okumalar ölçüm yapmaz
+        self.gpu_manager.start_sampler()
+        self.addCleanup(self.gpu_manager.stop_sampler)
+        
+        for _ in range(10):
+            gpus = self.gpu_manager.detect_gpus()
+        
+        # Assert
+        self.assertTrue(self.gpu_manager.sampler_running)
+        self.assertEqual(gpus[0]["name"], "Tesla T4")
+        self.gpu_manager._poll_gpus.assert_called_once()
+        
+        # Döndürülen liste değiştirilse de anlık görüntü etkilenmemeli
+        gpus[0]["free_memory_mb"] = 0.0
+        self.assertEqual(self.gpu_manager.snapshot.gpus[0]["free_memory_mb"], 7168.0)
+
+
+
+class TestSimulatedGPUProvider(unittest.TestCase):
+    """Simüle GPU filosu testleri"""
+    
+    def test_fleet_is_deterministic(self):
+        # Test: aynı tohumla iki filo aynı ölçüm dizisini üretmeli
+        fleet_a = SimulatedGPUProvider(gpu_count=256, seed=7)
+        fleet_b = SimulatedGPUProvider(gpu_count=256, seed=7)
+        
+        for _ in range(5):
+            gpus_a = fleet_a.read()
+            gpus_b = fleet_b.read()
+        
+        # Assert
+        self.assertEqual(len(gpus_a), 256)
+        self.assertEqual(gpus_a, gpus_b)
+        for gpu in gpus_a:
+            self.assertAlmostEqual(gpu["used_memory_mb"] + gpu["free_memory_mb"], gpu["total_memory_mb"])
+            self.assertTrue(0 <= gpu["utilization_percent"] <= 100)
+    
+    def test_scripted_traces_drive_placement(self):
+        # GPU 0 dolu, GPU 1 boş başlar; ikinci adımda durum tersine döner
+        provider = SimulatedGPUProvider(
+            gpu_count=2,
+            memory_traces=[[16000.0, 1000.0], [1000.0, 16000.0]],
+            utilization_traces=[[90.0, 5.0], [5.0, 90.0]]
+        )
+        gpu_manager = GPUManager(provider=provider)
+        
+        # Test
+        self.assertEqual(gpu_manager.select_optimal_gpu(min_memory_mb=4000), 1)
+        gpu_manager.refresh()
+        self.assertEqual(gpu_manager.select_optimal_gpu(min_memory_mb=4000), 0)
+    
+    def test_trend_penalizes_spiky_and_growing_gpus(self):
+        # Son ölçümde GPU 0 daha boş görünür ama her iki saniyede bir %100'e çıkar;
+        # GPU 1 sürekli %30'dadır (iki GPU'da da belleğin ~%95'i boş)
+        provider = SimulatedGPUProvider(
+            gpu_count=2,
+            memory_traces=[[4000.0], [1200.0]],
+            utilization_traces=[[10.0], [30.0]]
+        )
+        gpu_manager = GPUManager(provider=provider)
+        
+        now = time.time()
+        for t in range(60):
+            gpu_manager.history.record(now - 60 + t, [
+                {"index": 0, "used_memory_mb": 4000.0, "utilization_percent": 100.0 if t % 2 else 10.0},
+                {"index": 1, "used_memory_mb": 1200.0, "utilization_percent": 30.0},
+            ])
+        gpu_manager.refresh()
+        
+        # Test
+        self.assertGreater(gpu_manager.history.trend(0)["utilization_ewma"], 30.0)
+        self.assertEqual(gpu_manager.select_optimal_gpu(min_memory_mb=4000), 1)
+        
+        # Belleği 200 MB/sn büyüyen 80 GB GPU: anlık ~68 GB boş, ama ufukta ~45 GB kalacak
+        provider = SimulatedGPUProvider(gpu_count=1, memory_traces=[[12000.0]], utilization_traces=[[10.0]])
+        gpu_manager = GPUManager(provider=provider)
+        for t in range(60):
+            gpu_manager.history.record(now - 60 + t, [
+                {"index": 0, "used_memory_mb": 200.0 + t * 200.0, "utilization_percent": 10.0},
+            ])
+        gpu_manager.refresh()
+        
+        self.assertAlmostEqual(gpu_manager.history.trend(0)["memory_slope_mb_per_s"], 200.0, delta=20.0)
+        self.assertIsNone(gpu_manager.select_optimal_gpu(min_memory_mb=50000))
+    
+    def test_provider_selected_from_settings(self):
+        self.assertIsInstance(create_provider("simulated"), SimulatedGPUProvider)
+        self.assertIsInstance(create_provider("cli"), NvidiaSmiCLIProvider)
+        with self.assertRaises(ValueError):
+            create_provider("unknown")
+    
+    def test_nvml_provider_without_init_reads_nothing(self):
+        fake_nvml = MagicMock()
+        fake_nvml.nvmlInit.side_effect = RuntimeError("NVML Shared Library Not Found")
+        
+        with patch('app.services.gpu_providers.nvidia_smi', fake_nvml, create=True), \
+                patch('app.services.gpu_providers.NVIDIA_SMI_AVAILABLE', True):
+            provider = NVMLProvider()
+            
+            # Test
+            gpus = provider.read()
+            processes = provider.read_processes()
+        
+        # Assert: başlatılmamış NVML'e hiç çağrı yapılmamalı
+        self.assertFalse(provider.initialized)
+        self.assertEqual(gpus, [])
+        self.assertEqual(processes, [])
+        fake_nvml.nvmlDeviceGetCount.assert_not_called()
+    
+    def test_chained_provider_falls_back_on_error(self):
+        failing = MagicMock()
+        failing.name = "failing"
+        failing.read.side_effect = RuntimeError("NVML_ERROR_GPU_IS_LOST")
+        fallback = SimulatedGPUProvider(gpu_count=2)
+        provider = ChainedProvider([failing, fallback])
+        
+        # Test
+        gpus = provider.read()
+        
+        # Assert: hata veren sağlayıcı atlanıp sıradakinin ölçümü dönmeli
+        self.assertEqual(len(gpus), 2)
+        self.assertEqual(provider.read_processes(), fallback.read_processes())
+        
+        # Hiçbiri ölçüm üretemezse son hata yukarı iletilmeli
+        empty = MagicMock()
+        empty.name = "empty"
+        empty.read.return_value = []
+        with self.assertRaises(RuntimeError):
+            ChainedProvider([failing, empty]).read()
+
+
+class TestNvidiaSmiStream(unittest.TestCase):
+    """nvidia-smi akış okuyucu testleri"""
+    
+    FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "nvidia_smi_stream_2gpu.csv")
+    
+    def test_parser_splits_frames_and_drops_incomplete(self):
+        parser = NvidiaSmiStreamParser()
+        
+        # Test
+        frames = []
+        with open(self.FIXTURE) as fixture:
+            for line in fixture:
+                frames.extend(parser.feed(line))
+        
+        # Assert: 4 kareden [N/A] satırı içeren ikincisi atlanmalı
+        self.assertEqual(parser.gpu_count, 2)
+        self.assertEqual(len(frames), 3)
+        self.assertEqual([gpu["index"] for gpu in frames[-1]], [0, 1])
+        self.assertEqual(frames[1][0]["utilization_percent"], 91.0)
+        self.assertEqual(frames[-1][1]["used_memory_mb"], 4608.0)
+    
+    def test_provider_reads_stream_and_restarts(self):
+        # nvidia-smi yerine fixture'ı yazdırıp çıkan bir alt süreç
+        provider = NvidiaSmiStreamProvider(command=[
+            sys.executable, "-c", "import sys; sys.stdout.write(open(sys.argv[1]).read())", self.FIXTURE
+        ])
+        provider.RESTART_BACKOFF_INITIAL = 0.05
+        self.addCleanup(provider.close)
+        
+        # Test
+        self.assertEqual(len(provider.read()), 2)
+        
+        deadline = time.time() + 10
+        while provider.restart_count < 2 and time.time() < deadline:
+            time.sleep(0.05)
+        
+        # Assert: süreç her çıktığında yeniden başlatılmalı, son kare yayınlanmalı
+        self.assertGreaterEqual(provider.restart_count, 2)
+        self.assertEqual(provider.read()[0]["used_memory_mb"], 21504.0)
+    
+    def test_provider_raises_on_stale_frame_and_restarts_hung_process(self):
+        # Kareleri yazdırıp çıkmadan asılı kalan bir alt süreç
+        provider = NvidiaSmiStreamProvider(interval_ms=50, command=[
+            sys.executable, "-c",
+            "import sys, time; sys.stdout.write(open(sys.argv[1]).read()); sys.stdout.flush(); time.sleep(60)",
+            self.FIXTURE
+        ])
+        provider.RESTART_BACKOFF_INITIAL = 0.05
+        provider.STALE_AFTER_MIN = 0.3
+        self.addCleanup(provider.close)
+        
+        # Test
+        self.assertEqual(len(provider.read()), 2)
+        time.sleep(0.5)
+        
+        # Assert: bayat kare döndürülmemeli, asılı süreç sonlandırılıp yeniden başlatılmalı
+        with self.assertRaises(RuntimeError):
+            provider.read()
+        
+        deadline = time.time() + 10
+        while provider.restart_count < 1 and time.time() < deadline:
+            time.sleep(0.05)
+        time.sleep(0.2)
+        
+        self.assertGreaterEqual(provider.restart_count, 1)
+        self.assertEqual(len(provider.read()), 2)
+
+
+class TestGPUReservations(unittest.TestCase):
+    """GPU rezervasyon defteri testleri"""
+    
+    def setUp(self):
+        # Aynı durumda iki adet 24 GB GPU
+        provider = SimulatedGPUProvider(
+            gpu_count=2,
+            memory_traces=[[4096.0], [4096.0]],
+            utilization_traces=[[10.0], [10.0]]
+        )
+        provider.total_memory_mb[:] = 24576.0
+        self.gpu_manager = GPUManager(provider=provider)
+    
+    def test_burst_spreads_across_gpus(self):
+        # Test: aynı anda gelen üç yükleme
+        reservations = [
+            self.gpu_manager.reserve_gpu(memory_mb=8000, owner=f"model-{i}")
+            for i in range(3)
+        ]
+        
+        # Assert: ilk iki yükleme farklı GPU'lara gitmeli, üçüncüsü kalan belleğe sığmalı
+        self.assertNotEqual(reservations[0].gpu_index, reservations[1].gpu_index)
+        self.assertIsNotNone(reservations[2])
+        
+        # Kalan bellek yetersiz olduğunda rezervasyon yapılmamalı
+        self.assertIsNone(self.gpu_manager.reserve_gpu(memory_mb=13000))
+    
+    def test_explicit_gpu_checks_pending_reservations(self):
+        # Test: aynı GPU'yu açıkça isteyen ardışık yüklemeler (20 GB boş)
+        first = self.gpu_manager.reserve_gpu(memory_mb=12000, owner="a", gpu_index=0)
+        second = self.gpu_manager.reserve_gpu(memory_mb=12000, owner="b", gpu_index=0)
+        
+        # Assert: ikincisi ilkinin rezervasyonu düşülünce sığmamalı; bilinmeyen GPU reddedilmeli
+        self.assertEqual(first.gpu_index, 0)
+        self.assertIsNone(second)
+        self.assertEqual(self.gpu_manager.reservations.pending_mb(), {0: 12000.0})
+        self.assertIsNotNone(self.gpu_manager.reserve_gpu(memory_mb=12000, owner="b", gpu_index=1))
+        self.assertIsNone(self.gpu_manager.reserve_gpu(memory_mb=100, gpu_index=5))
+    
+    def test_release_and_commit(self):
+        reservation = self.gpu_manager.reserve_gpu(memory_mb=8000)
+        self.assertEqual(self.gpu_manager.reservations.pending_mb(), {reservation.gpu_index: 8000.0})
+        
+        # Başarısız yükleme: rezervasyon hemen bırakılır
+        self.gpu_manager.reservations.release(reservation)
+        self.assertEqual(self.gpu_manager.reservations.pending_mb(), {})
+        self.assertEqual(self.gpu_manager.reservations.list_reservations(), [])
+        
+        # Başarılı yükleme: bir sonraki ölçüme kadar tutulur
+        reservation = self.gpu_manager.reserve_gpu(memory_mb=8000)
+        self.gpu_manager.reservations.commit(reservation)
+        self.assertIn(reservation.gpu_index, self.gpu_manager.reservations.pending_mb())
+        
+        self.gpu_manager.reservations.expire_committed(reservation.committed_at + 1)
+        self.assertEqual(self.gpu_manager.reservations.pending_mb(), {})
+        self.assertNotIn(
+            reservation.reservation_id,
+            [r["reservation_id"] for r in self.gpu_manager.reservations.list_reservations()]
+        )
+
+
+class TestPlacementPlanner(unittest.TestCase):
+    """Toplu yerleşim planlayıcısı testleri"""
+    
+    def test_best_fit_decreasing_packs_all(self):
+        # Sırayla en boş GPU'ya yerleştirme "c" modelini dışarıda bırakırdı
+        items = [("b", 4000.0), ("a", 6000.0), ("d", 1000.0), ("c", 5000.0)]
+        
+        # Test
+        placements, unplaced, remaining = best_fit_decreasing(items, {0: 10000.0, 1: 6000.0})
+        
+        # Assert
+        self.assertEqual(unplaced, [])
+        self.assertEqual(dict((model_id, gpu) for model_id, gpu, _ in placements)["a"], 1)
+        self.assertEqual(remaining, {0: 0.0, 1: 0.0})
+    
+    def test_apply_reserves_and_loads(self):
+        provider = SimulatedGPUProvider(
+            gpu_count=2,
+            memory_traces=[[0.0], [0.0]],
+            utilization_traces=[[0.0], [0.0]]
+        )
+        gpu_manager = GPUManager(provider=provider)
+        planner = PlacementPlanner(gpu_manager, headroom_mb=0)
+        
+        loaded = []
+        def loader(placement, reservation):
+            # Yükleme sırasında rezervasyon aktif olmalı
+            self.assertIn(reservation.gpu_index, gpu_manager.reservations.pending_mb())
+            loaded.append(placement["model_id"])
+            gpu_manager.reservations.release(reservation)
+            return {"success": True}
+        
+        # Test
+        models = [{"model_id": f"model-{i}", "memory_mb": 10000} for i in range(5)]
+        models.append({"model_id": "huge", "memory_mb": 10 ** 6})
+        result = planner.apply(models, loader)
+        
+        # Assert
+        self.assertEqual(result["loaded"], 5)
+        self.assertEqual(sorted(loaded), [f"model-{i}" for i in range(5)])
+        self.assertEqual(result["unplaced"], [{"model_id": "huge", "memory_mb": 10.0 ** 6}])
+
+
+class TestModelResidency(unittest.TestCase):
+    """GPU bellek bütçeli LRU model önbelleği testleri"""
+    
+    def setUp(self):
+        # Tek GPU (80 GB) ve 9 GB model bütçesi; yükleme tahmini MIN_FREE_GPU_MEMORY_MB (2 GB)
+        self.gpu_manager = GPUManager(provider=SimulatedGPUProvider(
+            gpu_count=1, memory_traces=[[1000.0]], utilization_traces=[[10.0]]
+        ))
+        self.model_optimizer = ModelOptimizer(gpu_manager=self.gpu_manager)
+        self.model_optimizer.residency.budget_override_mb = 9000
+        
+        # Gerçek yükleme yerine modeli kaydeden sahte yükleyici
+        def fake_load(model_path, model_id, gpu_index, quantize, use_fp16, progress=None, task=None):
+            self.model_optimizer.models[model_id] = MagicMock()
+            self.model_optimizer.model_configs[model_id] = {
+                "model_id": model_id, "gpu_index": gpu_index, "device": f"cuda:{gpu_index}",
+                "quantized": quantize, "fp16": use_fp16, "weights_mb": 4000.0
+            }
+            return {"success": True, "model_id": model_id, "gpu_index": gpu_index}
+        
+        load_patch = patch.object(self.model_optimizer, "_load_model", side_effect=fake_load)
+        self.mock_load = load_patch.start()
+        self.addCleanup(load_patch.stop)
+        
+        torch_patch = patch('app.services.model_optimizer.torch')
+        torch_patch.start()
+        self.addCleanup(torch_patch.stop)
+    
+    def load(self, model_id):
+        return self.model_optimizer.load_model("/models/" + model_id, model_id, 0)
+    
+    def test_lru_eviction_and_hits(self):
+        self.load("a")
+        self.load("b")
+        
+        # Test: "a" tekrar istenir (isabet), "c" bütçeyi aşar ve LRU olan "b" boşaltılır
+        self.assertTrue(self.load("a")["cached"])
+        self.assertTrue(self.load("c")["success"])
+        
+        # Assert
+        self.assertEqual(set(self.model_optimizer.models), {"a", "c"})
+        self.assertEqual(self.mock_load.call_count, 3)
+        stats = self.model_optimizer.residency.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["evictions"]), (1, 3, 1))
+        self.assertEqual([model["model_id"] for model in stats["gpus"][0]["models"]], ["c", "a"])
+    
+    def test_unload_runs_outside_residency_lock(self):
+        residency = self.model_optimizer.residency
+        residency.add("a", 0, 4000)
+        residency.add("b", 0, 4000)
+        unloading = threading.Event()
+        release = threading.Event()
+        
+        def unload(model_id):
+            unloading.set()
+            release.wait(5)
+        
+        evictor = threading.Thread(target=lambda: residency.evict(0, 4000, unload))
+        evictor.start()
+        self.addCleanup(evictor.join, 5)
+        self.addCleanup(release.set)
+        self.assertTrue(unloading.wait(5))
+        
+        # Test: boşaltma sürerken isabet kaydı ve yeni tahliye planı
+        start = time.monotonic()
+        self.assertTrue(residency.touch("b"))
+        elapsed = time.monotonic() - start
+        victims = residency.plan_eviction(0, 4000)
+        
+        # Assert: lock beklenmemeli, boşaltılmakta olan model tekrar seçilmemeli
+        self.assertLess(elapsed, 1.0)
+        self.assertEqual(victims, ["b"])
+        
+        release.set()
+        evictor.join(5)
+        stats = residency.stats()
+        self.assertEqual(stats["evictions"], 1)
+        self.assertEqual([model["model_id"] for model in stats["gpus"][0]["models"]], ["b"])
+    
+    def test_pinned_models_are_not_evicted(self):
+        self.load("a")
+        self.load("b")
+        self.model_optimizer.residency.pin("a")
+        self.model_optimizer.residency.pin("b")
+        
+        # Test
+        result = self.load("c")
+        
+        # Assert: bütçe dolu ve tüm modeller sabit; rezervasyon bırakılmalı
+        self.assertFalse(result["success"])
+        self.assertIn("bütçesi yetersiz", result["message"])
+        self.assertEqual(set(self.model_optimizer.models), {"a", "b"})
+        self.assertNotIn("c", [r["owner"] for r in self.gpu_manager.reservations.list_reservations()])
+        
+        # Sabitleme kaldırılınca LRU boşaltılmalı
+        self.model_optimizer.residency.pin("a", False)
+        self.assertTrue(self.load("c")["success"])
+        self.assertEqual(set(self.model_optimizer.models), {"b", "c"})
+    
+    def test_evicted_model_reloads_from_warm_tier(self):
+        self.load("a")
+        self.load("b")
+        self.load("c")  # LRU olan "a" boşaltılır ve ana belleğe alınır
+        
+        # Test
+        result = self.load("a")
+        
+        # Assert: diskten yükleme yapılmadan GPU'ya taşınmalı; yer açmak için "b" sıcak katmana iner
+        self.assertTrue(result["success"])
+        self.assertTrue(result["warm"])
+        self.assertEqual(self.mock_load.call_count, 3)
+        self.assertEqual(set(self.model_optimizer.models), {"a", "c"})
+        warm = self.model_optimizer.warm_cache.stats()
+        self.assertEqual([model["model_id"] for model in warm["models"]], ["b"])
+        self.assertEqual(warm["hits"], 1)
+    
+    def test_failed_warm_promotion_falls_back_to_disk(self):
+        self.load("a")
+        self.load("b")
+        self.load("c")  # "a" sıcak katmana iner
+        
+        # GPU'ya kopyalama yarıda kalır
+        self.model_optimizer.warm_cache._entries["a"].model.to.side_effect = RuntimeError("CUDA out of memory")
+        misses = self.model_optimizer.warm_cache.misses
+        
+        # Test
+        result = self.load("a")
+        
+        # Assert: hata döndürmek yerine diskten yüklenmeli; yarım kopya sıcak katmana dönmemeli
+        self.assertTrue(result["success"])
+        self.assertNotIn("warm", result)
+        self.assertEqual(self.mock_load.call_count, 4)
+        warm = self.model_optimizer.warm_cache.stats()
+        self.assertNotIn("a", [model["model_id"] for model in warm["models"]])
+        self.assertEqual((warm["hits"], warm["misses"]), (0, misses + 1))
+    
+    def test_warm_tier_budget_drops_oldest(self):
+        warm_cache = WarmModelCache(budget_mb=10)
+        
+        # Test
+        for model_id in ("a", "b", "c"):
+            self.assertTrue(warm_cache.put(model_id, MagicMock(), None, {}, 4))
+        
+        # Assert: bütçeye sığmayan tek model ve en eski model tutulmaz
+        self.assertFalse(warm_cache.put("huge", MagicMock(), None, {}, 11))
+        self.assertEqual([model["model_id"] for model in warm_cache.stats()["models"]], ["c", "b"])
+        self.assertEqual(warm_cache.drops, 1)
+        self.assertIsNone(warm_cache.take("a"))
+
+
+class TestSafetensorsLoader(unittest.TestCase):
+    """mmap safetensors yükleyici testleri"""
+    
+    def setUp(self):
+        from transformers import BertConfig, BertForMaskedLM
+        
+        self.model_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.model_dir)
+        
+        # Görev başlıklı küçük bir checkpoint (anahtarlar "bert." önekli)
+        config = BertConfig(
+            vocab_size=100, hidden_size=32, num_hidden_layers=2, num_attention_heads=2, intermediate_size=64
+        )
+        torch.manual_seed(0)
+        BertForMaskedLM(config).save_pretrained(self.model_dir, safe_serialization=True)
+    
+    def test_matches_from_pretrained(self):
+        from transformers import AutoModel, AutoModelForSequenceClassification
+        
+        # Test
+        model = load_safetensors_model(self.model_dir, "cpu", torch.float32)
+        reference = AutoModel.from_pretrained(self.model_dir).eval()
+        
+        # Assert: aynı çıktı; kalıcı olmayan buffer'lar da doğru oluşturulmalı
+        input_ids = torch.tensor([[1, 5, 7, 2]])
+        with torch.no_grad():
+            self.assertTrue(torch.allclose(model(input_ids)[0], reference(input_ids)[0], atol=1e-6))
+        self.assertEqual(model.embeddings.position_ids[0, :4].tolist(), [0, 1, 2, 3])
+        
+        # Taban checkpoint'ten görev başlıklı model: taban ağırlıklar "bert." altına yüklenmeli
+        base_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, base_dir)
+        reference.save_pretrained(base_dir, safe_serialization=True)
+        head = load_safetensors_model(base_dir, "cpu", torch.float32, AutoModelForSequenceClassification)
+        self.assertTrue(torch.equal(head.bert.embeddings.word_embeddings.weight, model.embeddings.word_embeddings.weight))
+    
+    def test_missing_weights_and_other_formats(self):
+        from safetensors.torch import load_file, save_file
+        
+        path = os.path.join(self.model_dir, "model.safetensors")
+        tensors = load_file(path)
+        tensors["bert.encoder.layer.0.output.LayerNorm.bias"] = torch.full((32,), 3.0)
+        del tensors["bert.encoder.layer.0.output.LayerNorm.weight"]
+        save_file(tensors, path, metadata={"format": "pt"})
+        
+        # Test
+        model = load_safetensors_model(self.model_dir, "cpu", torch.float32)
+        
+        # Assert: eksik ağırlık modelin başlatıcısıyla doldurulmalı, aynı modülde yüklenen ezilmemeli
+        layer_norm = model.encoder.layer[0].output.LayerNorm
+        self.assertTrue(torch.all(layer_norm.weight == 1.0))
+        self.assertTrue(torch.all(layer_norm.bias == 3.0))
+        
+        # safetensors olmayan dizinde yükleyici devre dışı
+        os.remove(path)
+        self.assertIsNone(load_safetensors_model(self.model_dir, "cpu", torch.float32))
+    
+    def test_quantizes_layers_while_streaming_shards(self):
+        from transformers import AutoModelForMaskedLM
+        
+        # Birden çok parçaya bölünmüş checkpoint
+        sharded_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, sharded_dir)
+        reference = AutoModelForMaskedLM.from_pretrained(self.model_dir).eval()
+        reference.save_pretrained(sharded_dir, safe_serialization=True, max_shard_size="40KB")
+        self.assertGreater(len(find_safetensors_shards(sharded_dir)), 1)
+        
+        # Test
+        streaming = StreamingQuantizer(WeightOnlyBackend(bits=8))
+        model = load_safetensors_model(sharded_dir, "cpu", torch.float32, AutoModelForMaskedLM, quantizer=streaming)
+        expected, report = quantize_model(reference, WeightOnlyBackend(bits=8))
+        
+        # Assert: tüm model yüklendikten sonra quantize etmekle aynı sonuç; bağlı çıkış katmanı atlanmalı
+        input_ids = torch.tensor([[1, 5, 7, 2]])
+        with torch.no_grad():
+            self.assertTrue(torch.allclose(model(input_ids).logits, expected(input_ids).logits, atol=1e-5))
+        self.assertIs(model.cls.predictions.decoder.weight, model.bert.embeddings.word_embeddings.weight)
+        self.assertEqual(streaming.report(model)["layers"], report["layers"])
+        self.assertAlmostEqual(streaming.report(model)["saved_mb"], report["saved_mb"], places=4)
+
+
+class TestMemoryEstimator(unittest.TestCase):
+    """Ağırlık başlıklarından bellek tahmini testleri"""
+    
+    def setUp(self):
+        from transformers import BertConfig, BertModel
+        
+        self.model_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.model_dir)
+        
+        config = BertConfig(
+            vocab_size=1000, hidden_size=64, num_hidden_layers=2, num_attention_heads=2, intermediate_size=256
+        )
+        model = BertModel(config)
+        self.parameters = model.num_parameters()
+        model.save_pretrained(self.model_dir, safe_serialization=True)
+        self.model = model
+    
+    def test_safetensors_header_estimate(self):
+        # Test
+        estimate = estimate_model_memory(self.model_dir, use_fp16=True, activation_fraction=0.5, overhead_mb=100)
+        
+        # Assert: kayan noktalı ağırlıklar FP16 (2 byte) sayılır
+        self.assertEqual(estimate["source"], "safetensors")
+        self.assertGreaterEqual(estimate["parameters"], self.parameters)
+        self.assertAlmostEqual(estimate["weights_mb"], self.parameters * 2 / (1024 * 1024), delta=0.01)
+        self.assertAlmostEqual(estimate["total_mb"], estimate["weights_mb"] * 1.5 + 100)
+        
+    
+    def test_quantized_estimate_matches_quantized_model(self):
+        for scheme, bits in (("int8", 8), ("int4", 4)):
+            # Gerçek quantize modelin ağırlıkları (FP16; gömmeler ve norm'lar quantize edilmez)
+            model = copy.deepcopy(self.model).half()
+            model, _ = WeightOnlyBackend(bits=bits).apply(model)
+            actual_mb = weight_bytes(model) / (1024 * 1024)
+            
+            # Test
+            estimate = estimate_model_memory(
+                self.model_dir, use_fp16=True, quantization=scheme, activation_fraction=0, overhead_mb=0
+            )
+            
+            # Assert: sadece doğrusal katmanlar quantize genişlikte sayılmalı
+            self.assertAlmostEqual(estimate["weights_mb"], actual_mb, delta=0.01)
+    
+    def test_config_fallback_and_unknown(self):
+        os.remove(os.path.join(self.model_dir, "model.safetensors"))
+        
+        # Test
+        estimate = estimate_model_memory(self.model_dir, use_fp16=False)
+        
+        # Assert: mimari formülü gerçek parametre sayısına yakın olmalı (pooler sayılmaz)
+        self.assertEqual(estimate["source"], "config")
+        self.assertLess(abs(estimate["parameters"] - self.parameters) / self.parameters, 0.05)
+        
+        os.remove(os.path.join(self.model_dir, "config.json"))
+        self.assertIsNone(estimate_model_memory(self.model_dir))
+
+
+
+class TestQuantization(unittest.TestCase):
+    """Ağırlık quantization arka ucu testleri"""
+    
+    def setUp(self):
+        from transformers import BertConfig, BertForMaskedLM
+        
+        torch.manual_seed(0)
+        self.config = BertConfig(
+            vocab_size=1000, hidden_size=64, num_hidden_layers=2, num_attention_heads=2, intermediate_size=256
+        )
+        self.model_class = BertForMaskedLM
+        self.input_ids = torch.randint(0, 1000, (2, 7))
+    
+    def test_weight_only_backends_keep_outputs(self):
+        for scheme, bits in (("int8", 8), ("int4", 4)):
+            model = self.model_class(self.config).eval()
+            with torch.no_grad():
+                expected = model.bert(input_ids=self.input_ids)[0]
+            
+            # Test: GPU için sadece ağırlık quantization seçilmeli
+            backend = select_backend(scheme, "cuda:0")
+            quantized, report = quantize_model(model, backend)
+            with torch.no_grad():
+                output = quantized.bert(input_ids=self.input_ids)[0]
+            
+            # Assert: çıktı korunmalı, bellek azalmalı, gömmeye bağlı çıkış katmanı atlanmalı
+            similarity = torch.nn.functional.cosine_similarity(expected.flatten(), output.flatten(), dim=0)
+            self.assertGreater(similarity.item(), 0.99)
+            self.assertEqual((report["backend"], report["bits"]), (f"weight-only-int{bits}", bits))
+            self.assertGreater(report["saved_mb"], 0)
+            self.assertIsInstance(quantized.cls.predictions.decoder, torch.nn.Linear)
+            self.assertIs(quantized.cls.predictions.decoder.weight, quantized.bert.embeddings.word_embeddings.weight)
+    
+    def test_scheme_and_backend_selection(self):
+        # Assert: CPU'da INT8 dinamik quantization, quantize=False veya "none" ise hiçbiri
+        self.assertIsInstance(select_backend("int8", "cpu"), TorchDynamicInt8Backend)
+        self.assertEqual(select_backend("int4", "cpu").name, "weight-only-int4")
+        self.assertIsNone(quantization_scheme(False))
+        with patch('app.services.quantization.settings.MODEL_QUANTIZATION', "none"):
+            self.assertIsNone(quantization_scheme(True))
+        with patch('app.services.quantization.settings.MODEL_QUANTIZATION', "int4"):
+            self.assertEqual(quantization_scheme(True), "int4")
+        with self.assertRaises(ValueError):
+            select_backend("int2", "cpu")
+
+class TestOnnxExportCache(unittest.TestCase):
+    """Kalıcı ONNX dışa aktarım önbelleği testleri"""
+    
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.cache = OnnxExportCache(self.root)
+    
+    def test_key_and_atomic_store(self):
+        key = export_cache_key("abc123", 12, ONNX_EXPORT_SIGNATURE)
+        
+        # Anahtar sürüm, opset ve imzaya bağlı olmalı
+        self.assertEqual(key, export_cache_key("abc123", 12, ONNX_EXPORT_SIGNATURE))
+        self.assertNotEqual(key, export_cache_key("def456", 12, ONNX_EXPORT_SIGNATURE))
+        self.assertNotEqual(key, export_cache_key("abc123", 14, ONNX_EXPORT_SIGNATURE))
+        self.assertNotEqual(key, export_cache_key("abc123", 12, dict(ONNX_EXPORT_SIGNATURE, outputs=[])))
+        
+        def failing_export(path):
+            with open(path, "w") as f:
+                f.write("yarım")
+            raise RuntimeError("dışa aktarım hatası")
+        
+        # Test: yarıda kalan dışa aktarım önbellekte görünmemeli
+        with self.assertRaises(RuntimeError):
+            self.cache.store("org/model", key, failing_export)
+        self.assertIsNone(self.cache.lookup("org/model", key))
+        self.assertEqual(os.listdir(os.path.join(self.root, "org_model")), [])
+        
+        def export(path):
+            with open(path, "wb") as f:
+                f.write(b"graph")
+        
+        self.cache.store("org/model", key, export, meta={"revision": "abc123"})
+        entry = self.cache.lookup("org/model", key)
+        
+        # Assert
+        with open(entry["path"], "rb") as f:
+            self.assertEqual(f.read(), b"graph")
+        self.assertEqual(entry["revision"], "abc123")
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+    
+    @patch('torch.onnx.export')
+    @patch('app.services.model_optimizer.AutoModel')
+    @patch('app.services.model_optimizer.AutoTokenizer')
+    @patch('app.services.model_optimizer.ort', create=True)
+    @patch('app.services.model_optimizer.ONNX_AVAILABLE', True)
+    def test_repeat_optimize_skips_export(self, mock_ort, mock_tokenizer, mock_model, mock_export):
+        model_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, model_dir)
+        with open(os.path.join(model_dir, "config.json"), "w") as f:
+            f.write("{}")
+        
+        mock_ort.get_available_providers.return_value = ["CPUExecutionProvider"]
+        mock_tokenizer.from_pretrained.return_value = MagicMock(return_value=MagicMock(
+            input_ids=torch.tensor([[1, 2]]), attention_mask=torch.tensor([[1, 1]])
+        ))
+        
+        def write_graph(model, args, path, **kwargs):
+            with open(path, "wb") as f:
+                f.write(b"graph")
+        mock_export.side_effect = write_graph
+        
+        model_optimizer = ModelOptimizer(gpu_manager=GPUManager(provider=SimulatedGPUProvider(gpu_count=1)))
+        model_optimizer.onnx_cache = self.cache
+        
+        # Test: ilk istek dışa aktarır, boşaltılıp tekrar istenen model önbellekten yüklenir
+        first = model_optimizer.optimize_with_onnx(model_dir, "m", 0, revision="abc123")
+        model_optimizer.unload_model("m")
+        second = model_optimizer.optimize_with_onnx(model_dir, "m", 0, revision="abc123")
+        
+        # Assert
+        self.assertTrue(first["success"], first.get("message"))
+        self.assertFalse(first["onnx_cache_hit"])
+        self.assertTrue(second["onnx_cache_hit"])
+        self.assertEqual(second["onnx_path"], first["onnx_path"])
+        self.assertTrue(first["onnx_path"].startswith(self.root))
+        self.assertEqual(mock_model.from_pretrained.call_count, 1)
+        self.assertEqual(mock_export.call_count, 1)
+        
+        # CPU'da her yükleme havuz boyutu kadar oturum açar
+        pool_size = first["onnx_session"]["pool_size"]
+        self.assertEqual(mock_ort.InferenceSession.call_count, 2 * pool_size)
+    
+    def test_variant_selection(self):
+        report = {
+            "fp32": {"size_mb": 400.0, "latency_ms": 10.0, "cosine": 1.0},
+            "fp16": {"size_mb": 200.0, "latency_ms": 6.0, "cosine": 0.999},
+            "int8-dynamic": {"size_mb": 100.0, "latency_ms": 4.0, "cosine": 0.95},
+            "int8-static": {"error": "desteklenmeyen operatör"}
+        }
+        
+        # Assert: doğruluğu yetmeyen ve hatalı varyantlar seçilmemeli
+        self.assertEqual(variant_candidates(False, False), ["fp32"])
+        self.assertEqual(variant_candidates(True, True), ["fp32", "fp16", "int8-dynamic", "int8-static"])
+        self.assertEqual(select_variant(report, 0.99), "fp16")
+        self.assertEqual(select_variant(report, 0.9), "int8-dynamic")
+        self.assertEqual(select_variant(report, 0.9999), "fp32")
+    
+    @patch('app.services.model_optimizer.measure_variant')
+    @patch('app.services.model_optimizer.build_variant')
+    @patch('torch.onnx.export')
+    @patch('app.services.model_optimizer.AutoModel')
+    @patch('app.services.model_optimizer.AutoTokenizer')
+    @patch('app.services.model_optimizer.ort', create=True)
+    @patch('app.services.model_optimizer.ONNX_AVAILABLE', True)
+    def test_quantized_variants_measured_once(
+        self, mock_ort, mock_tokenizer, mock_model, mock_export, mock_build, mock_measure
+    ):
+        model_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, model_dir)
+        with open(os.path.join(model_dir, "config.json"), "w") as f:
+            f.write("{}")
+        
+        mock_ort.get_available_providers.return_value = ["CPUExecutionProvider"]
+        mock_tokenizer.from_pretrained.return_value = MagicMock(return_value=MagicMock(
+            input_ids=torch.tensor([[1, 2]]), attention_mask=torch.tensor([[1, 1]])
+        ))
+        
+        def write_graph(*args, **kwargs):
+            with open(args[2], "wb") as f:
+                f.write(b"graph")
+        mock_export.side_effect = write_graph
+        mock_build.side_effect = lambda source, variant, target, feeds: write_graph(None, None, target)
+        
+        # Ölçüm sırası: fp32 (referans), fp16, int8-dynamic, int8-static
+        mock_measure.side_effect = [
+            {"latency_ms": 10.0, "cosine": 1.0, "pooled": []},
+            {"latency_ms": 7.0, "cosine": 0.999, "pooled": []},
+            {"latency_ms": 4.0, "cosine": 0.95, "pooled": []},
+            {"latency_ms": 5.0, "cosine": 0.995, "pooled": []},
+        ]
+        
+        model_optimizer = ModelOptimizer(gpu_manager=GPUManager(provider=SimulatedGPUProvider(gpu_count=1)))
+        model_optimizer.onnx_cache = self.cache
+        
+        # Test: ilk yükleme varyantları üretip ölçer, ikinci yükleme kayıttaki ölçümleri kullanır
+        first = model_optimizer.optimize_with_onnx(model_dir, "m", 0, revision="abc123", quantize=True, use_fp16=True)
+        model_optimizer.unload_model("m")
+        second = model_optimizer.optimize_with_onnx(model_dir, "m", 0, revision="abc123", quantize=True, use_fp16=True)
+        
+        # Assert: doğruluk eşiğini geçen en hızlı varyant sunulmalı
+        self.assertTrue(first["success"], first.get("message"))
+        self.assertEqual(first["onnx_variant"], "int8-static")
+        self.assertTrue(first["onnx_path"].endswith("model.int8-static.onnx"))
+        self.assertEqual(set(first["onnx_variants"]), {"fp32", "fp16", "int8-dynamic", "int8-static"})
+        self.assertEqual(second["onnx_variant"], "int8-static")
+        self.assertEqual(second["onnx_variants"], first["onnx_variants"])
+        self.assertEqual(mock_build.call_count, 3)
+        self.assertEqual(mock_measure.call_count, 4)
+
+
+class TestOnnxSessionPool(unittest.TestCase):
+    """ONNX oturum havuzu ve IO binding testleri"""
+    
+    @staticmethod
+    def _session():
+        # Bağlanan çıktı tamponuna input_ids değerlerini yazan sahte ORT oturumu
+        session = MagicMock()
+        session.get_inputs.return_value = [SimpleNamespace(name="input_ids"), SimpleNamespace(name="attention_mask")]
+        session.get_outputs.return_value = [
+            SimpleNamespace(name="last_hidden_state", shape=["batch_size", "sequence_length", 2], type="tensor(float)")
+        ]
+        binding = session.io_binding.return_value
+        
+        def run_with_iobinding(bound):
+            inputs = {call[0][0]: call[0][1] for call in bound.bind_cpu_input.call_args_list}
+            name, device, device_id, dtype, shape, pointer = bound.bind_output.call_args[0]
+            output = np.ctypeslib.as_array(ctypes.cast(pointer, ctypes.POINTER(ctypes.c_float)), shape=tuple(shape))
+            output[...] = inputs["input_ids"][:, :, None]
+        
+        session.run_with_iobinding.side_effect = run_with_iobinding
+        return session, binding
+    
+    def test_outputs_land_in_reused_buffer(self):
+        session, binding = self._session()
+        pool = OnnxSessionPool(lambda: session, size=1)
+        long_feeds = {
+            "input_ids": np.array([[1, 2, 3], [4, 5, 6]], dtype=np.int64),
+            "attention_mask": np.ones((2, 3), dtype=np.int64),
+            "token_type_ids": np.zeros((2, 3), dtype=np.int64),
+        }
+        short_feeds = {"input_ids": np.array([[7, 8]], dtype=np.int64), "attention_mask": np.ones((1, 2), dtype=np.int64)}
+        
+        # Test: uzun toplu işten sonra gelen kısa toplu iş aynı tamponu kullanmalı
+        with pool.acquire() as slot:
+            first = slot.run(long_feeds)
+            first_pointer = first.ctypes.data
+            np.testing.assert_array_equal(first[:, :, 0], long_feeds["input_ids"])
+            second = slot.run(short_feeds)
+        
+        # Assert
+        self.assertEqual(second.shape, (1, 2, 2))
+        np.testing.assert_array_equal(second[0, :, 1], [7.0, 8.0])
+        self.assertEqual(second.ctypes.data, first_pointer)
+        bound_inputs = {call[0][0] for call in binding.bind_cpu_input.call_args_list}
+        self.assertNotIn("token_type_ids", bound_inputs)
+        session.run.assert_not_called()
+    
+    def test_pool_bounds_concurrent_callers(self):
+        created = []
+        
+        def create():
+            session, _ = self._session()
+            created.append(session)
+            return session
+        
+        pool = OnnxSessionPool(create, size=2)
+        shared = OnnxSessionPool(create, size=3, shared=True)
+        
+        # Test: iki yuva doluyken üçüncü çağıran beklemeli
+        with pool.acquire() as first, pool.acquire() as second:
+            self.assertIsNot(first.session, second.session)
+            with self.assertRaises(TimeoutError):
+                with pool.acquire(timeout=0.05):
+                    pass
+        pool.close(timeout=1)
+        
+        # Assert: paylaşılan havuz tek oturum açmalı; kapanan havuz yuva vermemeli
+        self.assertEqual(len(created), 3)
+        self.assertEqual(shared.size, 3)
+        with self.assertRaises(RuntimeError):
+            with pool.acquire():
+                pass
+
+
+class TestShardedLoading(unittest.TestCase):
+    """Katmanları GPU'lara bölen / CPU'ya taşan yükleme testleri"""
+    
+    def setUp(self):
+        from transformers import BertConfig, BertForMaskedLM, BertTokenizerFast
+        
+        self.model_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.model_dir)
+        
+        config = BertConfig(
+            vocab_size=1000, hidden_size=64, num_hidden_layers=4, num_attention_heads=2, intermediate_size=256
+        )
+        BertForMaskedLM(config).save_pretrained(self.model_dir, safe_serialization=True)
+        
+        vocab_path = os.path.join(self.model_dir, "vocab.txt")
+        with open(vocab_path, "w") as f:
+            f.write("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + [f"w{i}" for i in range(995)]))
+        BertTokenizerFast(vocab_file=vocab_path).save_pretrained(self.model_dir)
+    
+    def test_plan_splits_layers_and_spills_to_cpu(self):
+        from transformers import AutoModelForMaskedLM
+        
+        model = build_empty_model(self.model_dir, torch.float32, AutoModelForMaskedLM)
+        
+        # Test: GPU 0'a gömmeler, GPU 1'e bir katman sığar; kalanı CPU'ya
+        device_map, placed = plan_device_map(model, {0: 400_000, 1: 250_000, "cpu": 10 ** 9})
+        
+        # Assert: katmanlar sırayla yerleşmeli, paylaşılan çıkış gömmesi girişle aynı GPU'da olmalı
+        self.assertEqual(device_map["bert.embeddings"], 0)
+        self.assertEqual(device_map["bert.encoder.layer.0"], 1)
+        self.assertEqual([device_map[f"bert.encoder.layer.{i}"] for i in (1, 2, 3)], ["cpu"] * 3)
+        self.assertEqual(device_map["cls"], 0)
+        self.assertLessEqual(placed[1], 250_000)
+        
+        with self.assertRaises(ValueError):
+            plan_device_map(model, {0: 400_000, "cpu": 1000})
+    
+    def test_cpu_spill_load_runs_without_gpu(self):
+        # GPU'da başlık payından az boş bellek var: model tamamen CPU'ya taşmalı
+        total_mb = SimulatedGPUProvider.GPU_MODELS[0][1]
+        gpu_manager = GPUManager(provider=SimulatedGPUProvider(
+            gpu_count=1, memory_traces=[[total_mb - 100.0]], utilization_traces=[[10.0]]
+        ))
+        model_optimizer = ModelOptimizer(gpu_manager=gpu_manager)
+        
+        # Test
+        plan = model_optimizer.plan_sharded(self.model_dir, use_fp16=False)
+        reservations = model_optimizer.reserve_sharded(plan, owner="m")
+        result = model_optimizer.load_model_sharded(self.model_dir, "m", plan, use_fp16=False, reservations=reservations)
+        
+        # Assert: cihaz haritası kaydedilmeli, model çalışmalı ve yeniden istekte önbellekten dönmeli
+        self.assertTrue(result["success"], result.get("message"))
+        self.assertEqual(reservations, [])
+        self.assertEqual(model_optimizer.model_configs["m"]["device_map"], {"": "cpu"})
+        self.assertEqual(model_optimizer.model_configs["m"]["device"], "cpu")
+        self.assertEqual(len(model_optimizer.run_batch("m", ["w1 w2", "w3"])[0]["embedding"]), 64)
+        self.assertTrue(model_optimizer.load_model_sharded(self.model_dir, "m", plan, use_fp16=False)["cached"])
+        
+        # Parçalı modeller sıcak önbelleğe alınmadan boşaltılır
+        unloaded = model_optimizer.unload_model("m")
+        self.assertTrue(unloaded["success"])
+        self.assertFalse(unloaded["warm"])
+
+    
+    def test_cpu_spill_load_applies_dynamic_int8(self):
+        total_mb = SimulatedGPUProvider.GPU_MODELS[0][1]
+        gpu_manager = GPUManager(provider=SimulatedGPUProvider(
+            gpu_count=1, memory_traces=[[total_mb - 100.0]], utilization_traces=[[10.0]]
+        ))
+        model_optimizer = ModelOptimizer(gpu_manager=gpu_manager)
+        
+        # Test: tamamen CPU'da çalışacak model torch dinamik INT8 ile quantize edilmeli
+        plan = model_optimizer.plan_sharded(self.model_dir, use_fp16=False)
+        result = model_optimizer.load_model_sharded(self.model_dir, "m", plan, use_fp16=False, quantize=True)
+        
+        # Assert: uygulanan quantization ve kazanılan bellek kaydedilmeli
+        self.assertTrue(result["success"], result.get("message"))
+        quantization = result["quantization"]
+        self.assertEqual(quantization["backend"], "torch-dynamic-int8")
+        self.assertGreater(quantization["layers"], 0)
+        self.assertGreater(quantization["saved_mb"], 0)
+        self.assertEqual(model_optimizer.model_configs["m"]["quantization"], quantization)
+        self.assertEqual(len(model_optimizer.run_batch("m", ["w1 w2", "w3"])[0]["embedding"]), 64)
+        self.assertIsNone(model_optimizer.load_model_sharded(self.model_dir, "m", plan, use_fp16=False).get("cached"))
+    
+    def test_task_head_post_processes_batch(self):
+        total_mb = SimulatedGPUProvider.GPU_MODELS[0][1]
+        gpu_manager = GPUManager(provider=SimulatedGPUProvider(
+            gpu_count=1, memory_traces=[[total_mb - 100.0]], utilization_traces=[[10.0]]
+        ))
+        model_optimizer = ModelOptimizer(gpu_manager=gpu_manager)
+        
+        # Test: fill-mask görevi maskeli dil modeli başlığıyla yüklenmeli
+        plan = model_optimizer.plan_sharded(self.model_dir, use_fp16=False, task="fill-mask")
+        result = model_optimizer.load_model_sharded(self.model_dir, "m", plan, use_fp16=False, task="fill-mask")
+        outputs = model_optimizer.run_batch("m", ["w1 [MASK] w2 [MASK]", "w3"])
+        
+        # Assert: maske başına top-k tahmin, olasılığa göre sıralı; maskesiz girdide boş
+        self.assertTrue(result["success"], result.get("message"))
+        self.assertEqual(result["task_kind"], "fill-mask")
+        self.assertEqual(len(outputs[0]["masks"]), 2)
+        scores = [prediction["score"] for prediction in outputs[0]["masks"][0]]
+        self.assertEqual(len(scores), 5)
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        self.assertEqual(outputs[1], {"masks": []})
+        
+        # Farklı görevle istek önbellekten dönmemeli
+        self.assertIsNone(model_optimizer.load_model_sharded(self.model_dir, "m", plan, use_fp16=False).get("cached"))
+        model_optimizer.unload_model("m")
+        
+        plan = model_optimizer.plan_sharded(self.model_dir, use_fp16=False, task="text-classification")
+        model_optimizer.load_model_sharded(self.model_dir, "m", plan, use_fp16=False, task="text-classification")
+        labels = model_optimizer.run_batch("m", ["w1 w2", "w3"])[1]["labels"]
+        self.assertEqual({label["label"] for label in labels}, {"LABEL_0", "LABEL_1"})
+        self.assertAlmostEqual(sum(label["score"] for label in labels), 1.0, places=5)
+
+class TestModelTasks(unittest.TestCase):
+    """Görev başlığı seçimi ve toplu son işleme testleri"""
+    
+    def setUp(self):
+        from transformers import BertTokenizerFast, GPT2Config, GPT2LMHeadModel
+        
+        self.model_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.model_dir)
+        
+        vocab_path = os.path.join(self.model_dir, "vocab.txt")
+        with open(vocab_path, "w") as f:
+            f.write("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + [f"w{i}" for i in range(95)]))
+        self.tokenizer = BertTokenizerFast(vocab_file=vocab_path)
+        
+        torch.manual_seed(0)
+        config = GPT2Config(vocab_size=100, n_positions=64, n_embd=32, n_layer=2, n_head=2)
+        self.model = GPT2LMHeadModel(config).eval()
+    
+    def test_task_head_selection(self):
+        from transformers import AutoModel, AutoModelForCausalLM, AutoModelForSequenceClassification
+        
+        # Assert: bilinmeyen veya boş görev gömme olarak sunulmalı
+        self.assertEqual(task_head("text-classification").model_class, AutoModelForSequenceClassification)
+        self.assertEqual(task_head("text-generation"), ("generation", AutoModelForCausalLM))
+        self.assertEqual(task_head("sentence-similarity"), ("embedding", AutoModel))
+        self.assertEqual(task_head(None).kind, "embedding")
+    
+    def test_batched_generation_matches_single(self):
+        prepare_tokenizer(self.tokenizer, task_head("text-generation"), self.model.config)
+        texts = ["w1 w2 w3 w4 w5", "w6"]
+        
+        def generate(batch):
+            encoded = self.tokenizer(batch, padding=True, add_special_tokens=False, return_tensors="pt")
+            return run_head("generation", self.model, self.tokenizer, encoded, max_new_tokens=4)
+        
+        # Test
+        batched = generate(texts)
+        
+        # Assert: sola dolgu ile toplu üretim tek tek üretimle aynı olmalı
+        self.assertEqual(self.tokenizer.padding_side, "left")
+        self.assertEqual(batched, [generate([text])[0] for text in texts])
+        self.assertTrue(all(output["generated_text"] for output in batched))
+
+class TestModelLoadConcurrency(unittest.TestCase):
+    """Model başına lock ve ortak yükleme testleri"""
+    
+    def setUp(self):
+        self.gpu_manager = GPUManager(provider=SimulatedGPUProvider(
+            gpu_count=2, memory_traces=[[1000.0], [1000.0]], utilization_traces=[[10.0], [10.0]]
+        ))
+        self.model_optimizer = ModelOptimizer(gpu_manager=self.gpu_manager)
+        self.release_load = threading.Event()
+        self.load_started = threading.Event()
+        
+        # "slow" modeli serbest bırakılana kadar yüklenmeye devam eder
+        def fake_load(model_path, model_id, gpu_index, quantize, use_fp16, progress=None, task=None):
+            with self.model_optimizer._model_lock(model_id):
+                if replica_base(model_id) == "slow":
+                    self.load_started.set()
+                    self.release_load.wait(10)
+                self.model_optimizer.models[model_id] = MagicMock()
+                self.model_optimizer.model_configs[model_id] = {
+                    "model_id": model_id, "gpu_index": gpu_index, "device": f"cuda:{gpu_index}",
+                    "quantized": quantize, "fp16": use_fp16, "weights_mb": 100.0
+                }
+            return {"success": True, "model_id": model_id, "gpu_index": gpu_index}
+        
+        load_patch = patch.object(self.model_optimizer, "_load_model", side_effect=fake_load)
+        self.mock_load = load_patch.start()
+        self.addCleanup(load_patch.stop)
+        
+        torch_patch = patch('app.services.model_optimizer.torch')
+        torch_patch.start()
+        self.addCleanup(torch_patch.stop)
+    
+    def test_same_model_shares_inflight_load(self):
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.model_optimizer.load_model("/m", "slow", 0)))
+            for _ in range(3)
+        ]
+        
+        # Test
+        for thread in threads:
+            thread.start()
+        self.load_started.wait(5)
+        time.sleep(0.1)
+        self.release_load.set()
+        for thread in threads:
+            thread.join(5)
+        
+        # Assert: tek yükleme, üç başarılı sonuç; bekleyenlerin rezervasyonları bırakılmış olmalı
+        self.assertEqual(self.mock_load.call_count, 1)
+        self.assertEqual(len(results), 3)
+        self.assertTrue(all(result["success"] for result in results))
+        self.assertEqual(sum(1 for result in results if result.get("shared")), 2)
+        self.assertEqual(len(self.gpu_manager.reservations.list_reservations()), 1)
+    
+    def test_different_settings_do_not_join_inflight_load(self):
+        results = {}
+        threads = [
+            threading.Thread(target=lambda: results.__setitem__(0, self.model_optimizer.load_model("/m", "slow", 0))),
+            threading.Thread(
+                target=lambda: results.__setitem__(1, self.model_optimizer.load_model("/m", "slow", 0, use_fp16=False))
+            ),
+        ]
+        
+        # Test: ikinci istek ilk yükleme sürerken farklı veri tipiyle gelir
+        threads[0].start()
+        self.load_started.wait(5)
+        threads[1].start()
+        time.sleep(0.1)
+        self.release_load.set()
+        for thread in threads:
+            thread.join(5)
+        
+        # Assert: ortak sonuç yerine kendi ayarlarıyla ayrı yükleme yapılmalı
+        self.assertEqual(self.mock_load.call_count, 2)
+        self.assertFalse(any(result.get("shared") for result in results.values()))
+        self.assertFalse(self.model_optimizer.model_configs["slow"]["fp16"])
+    
+    def test_other_models_not_blocked_by_slow_load(self):
+        self.model_optimizer.load_model("/m", "small", 1)
+        
+        loader = threading.Thread(target=lambda: self.model_optimizer.load_model("/m", "slow", 0))
+        loader.start()
+        self.addCleanup(loader.join, 5)
+        self.addCleanup(self.release_load.set)
+        self.assertTrue(self.load_started.wait(5))
+        
+        # Test: yavaş yükleme sürerken başka GPU'daki yükleme ve boşaltma tamamlanmalı
+        other = self.model_optimizer.load_model("/m", "other", 1)
+        unloaded = self.model_optimizer.unload_model("small")
+        
+        # Assert
+        self.assertTrue(loader.is_alive())
+        self.assertTrue(other["success"])
+        self.assertTrue(unloaded["success"])
+        self.assertNotIn("small", self.model_optimizer.models)
+    
+    def test_replicas_load_on_distinct_gpus(self):
+        self.model_optimizer.load_model("/m", "hot", 0)
+        
+        # Test: yeni replika, replika taşımayan GPU'ya ve sıradaki numaraya
+        busy = set(self.model_optimizer.replica_gpus("hot").values())
+        reservation = self.gpu_manager.reserve_gpu(memory_mb=100, owner="hot", exclude=busy)
+        replica_id = self.model_optimizer.claim_replica("hot", reservation.gpu_index)
+        self.assertEqual(self.model_optimizer.replica_gpus("hot"), {"hot": 0, "hot#1": 1})
+        result = self.model_optimizer.add_replica("/m", replica_id, reservation=reservation)
+        
+        # Assert
+        self.assertTrue(result["success"])
+        self.assertEqual(result["replica_of"], "hot")
+        self.assertEqual(self.model_optimizer.replica_ids("hot"), ["hot", "hot#1"])
+        self.assertIsNone(self.gpu_manager.reserve_gpu(memory_mb=100, exclude={0, 1}))
+        
+        # Küçültmede en yüksek numaralı replika boşaltılır
+        self.assertEqual(self.model_optimizer.remove_replica("hot")["replica_id"], "hot#1")
+        self.assertEqual(self.model_optimizer.replica_ids("hot"), ["hot"])
+    
+    def test_scale_down_cancels_loading_replicas_first(self):
+        self.release_load.set()
+        self.model_optimizer.load_model("/m", "slow", 0)
+        self.release_load.clear()
+        self.load_started.clear()
+        
+        # Büyütme: replika GPU 1'de yüklenmeye başlar, ikincisi henüz başlamadı
+        loading_id = self.model_optimizer.claim_replica("slow", 1)
+        results = []
+        loader = threading.Thread(target=lambda: results.append(self.model_optimizer.add_replica(
+            "/m", loading_id, reservation=self.gpu_manager.reservations.reserve(1, 100, owner="slow")
+        )))
+        loader.start()
+        self.addCleanup(loader.join, 5)
+        self.addCleanup(self.release_load.set)
+        self.assertTrue(self.load_started.wait(5))
+        queued_id = self.model_optimizer.claim_replica("slow", 1)
+        queued_reservation = self.gpu_manager.reservations.reserve(1, 100, owner="slow")
+        
+        # Test: yükleme bitmeden ikiye küçült
+        cancelled, removing = self.model_optimizer.drop_replicas("slow", 2)
+        
+        # Assert: yüklenen replikalar seçilmeli, hizmetteki model boşaltılmamalı
+        self.assertEqual(cancelled, [queued_id, loading_id])
+        self.assertEqual(removing, [])
+        self.assertEqual(self.model_optimizer.replica_gpus("slow"), {"slow": 0})
+        
+        # Başlamamış yükleme hiç çalışmamalı, rezervasyonu bırakılmalı
+        skipped = self.model_optimizer.add_replica("/m", queued_id, reservation=queued_reservation)
+        self.assertTrue(skipped["cancelled"])
+        self.assertNotIn(
+            queued_reservation.reservation_id,
+            [reservation["reservation_id"] for reservation in self.gpu_manager.reservations.list_reservations()]
+        )
+        
+        # Süren yükleme bitince replika hemen boşaltılmalı
+        self.release_load.set()
+        loader.join(5)
+        self.assertTrue(results[0]["cancelled"])
+        self.assertEqual(self.model_optimizer.replica_ids("slow"), ["slow"])
+        self.assertEqual(self.mock_load.call_count, 2)
+
+
+class TestGPUHistoryStore(unittest.TestCase):
+    """GPU geçmişi testleri"""
+    
+    def setUp(self):
+        self.history = GPUHistoryStore(
+            sample_interval=1, raw_seconds=60, rollup_step_seconds=10, rollup_seconds=300
+        )
+        
+        # 10 dakikalık saniyelik örnek: kullanım 0..599 arası artar
+        for t in range(600):
+            self.history.record(1000.0 + t, [{
+                "index": 0,
+                "used_memory_mb": 100.0,
+                "utilization_percent": float(t),
+                "temperature_c": 50.0
+            }])
+    
+    def test_raw_window_downsampled(self):
+        # Test
+        result = self.history.query(0, window=60, step=20)
+        
+        # Assert: son 60 saniye 20 saniyelik 3 kovaya ayrılmalı
+        self.assertEqual(result["resolution"], "raw")
+        self.assertEqual(len(result["timestamps"]), 3)
+        self.assertEqual(result["timestamps"][-1], 1599.0)
+        self.assertEqual(result["utilization_percent"]["min"][0], 540.0)
+        self.assertEqual(result["utilization_percent"]["max"][-1], 599.0)
+        self.assertAlmostEqual(result["utilization_percent"]["mean"][0], 549.5)
+    
+    def test_long_window_uses_rollup(self):
+        # Test
+        result = self.history.query(0, window=300, step=60)
+        
+        # Assert
+        self.assertEqual(result["resolution"], "rollup")
+        self.assertEqual(result["step"], 60)
+        self.assertEqual(result["used_memory_mb"]["mean"], [100.0] * len(result["timestamps"]))
+    
+    def test_rollup_includes_open_bucket(self):
+        # Test: son 10 saniyelik örnekler (1590-1599) henüz kapanmamış kovada
+        result = self.history.query(0, window=300)
+        
+        # Assert: açık kova son nokta olarak, kısmi işaretiyle dönmeli
+        self.assertTrue(result["partial"])
+        self.assertEqual(result["utilization_percent"]["max"][-1], 599.0)
+        self.assertAlmostEqual(result["utilization_percent"]["mean"][-1], 594.5)
+        self.assertFalse(self.history.query(0, window=60)["partial"])
+    
+    def test_memory_is_bounded(self):
+        # Ham tampon kapasitesi kayıt sayısından bağımsız olmalı
+        series = self.history._series[0]
+        self.assertEqual(series.raw.size, series.raw.capacity)
+        self.assertLessEqual(series.raw.capacity, 61)
+        self.assertLessEqual(series.rollup.capacity, 31)
+        
+        # Bilinmeyen GPU
+        self.assertIsNone(self.history.query(5, window=60))
+
+
+class TestJobQueue(unittest.TestCase):
+    """Arka plan iş kuyruğu testleri"""
+    
+    def setUp(self):
+        self.job_queue = JobQueue(max_workers=1, max_pending=2, retention_seconds=60)
+        self.addCleanup(self.job_queue.shutdown, True)
+    
+    def wait_for(self, job):
+        deadline = time.time() + 5
+        while not job.finished and time.time() < deadline:
+            time.sleep(0.01)
+        return job.to_dict()
+    
+    def test_job_reports_stages_and_result(self):
+        def work(progress):
+            for stage in ("tokenizer", "weights", "to-device", "warmup"):
+                progress(stage)
+            return {"success": True, "message": "ok"}
+        
+        # Test
+        job = self.job_queue.submit("load", work, model_id="m", owner_id=1)
+        status = self.wait_for(job)
+        
+        # Assert
+        self.assertEqual(status["status"], JOB_SUCCEEDED)
+        self.assertEqual(status["stage"], "warmup")
+        self.assertEqual([stage["stage"] for stage in status["stages"]], ["tokenizer", "weights", "to-device", "warmup"])
+        self.assertEqual(status["result"]["message"], "ok")
+        self.assertGreaterEqual(status["elapsed_seconds"], 0.0)
+        self.assertEqual([job.job_id for job in self.job_queue.list_jobs(owner_id=1)], [job.job_id])
+        self.assertEqual(self.job_queue.list_jobs(owner_id=2), [])
+    
+    def test_failures_and_full_queue(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        
+        # Test: başarısız sonuç ve istisna işi başarısız yapar
+        failed = self.job_queue.submit("load", lambda progress: {"success": False, "message": "GPU yok"})
+        raised = self.job_queue.submit("onnx", lambda progress: 1 / 0)
+        
+        # Assert
+        self.assertEqual(self.wait_for(failed)["error"], "GPU yok")
+        self.assertEqual(self.wait_for(raised)["status"], JOB_FAILED)
+        
+        # Test: bekleyen + çalışan iş sınırı aşılınca yeni iş reddedilir
+        blocking = [self.job_queue.submit("load", lambda progress: release.wait(5) and {"success": True}) for _ in range(2)]
+        
+        # Assert
+        self.assertTrue(all(blocking))
+        self.assertIsNone(self.job_queue.submit("load", lambda progress: {"success": True}))
+        
+        release.set()
+        self.assertEqual(self.wait_for(blocking[1])["status"], JOB_SUCCEEDED)
+
+
+class TestInferenceBatching(unittest.TestCase):
+    """Mikro-toplamalı çıkarım testleri"""
+    
+    def test_concurrent_requests_share_forward_pass(self):
+        calls = []
+        
+        def run_batch(texts):
+            calls.append(list(texts))
+            return [{"text": text} for text in texts]
+        
+        batcher = MicroBatcher("m", run_batch, max_batch_size=4, max_wait_ms=200)
+        self.addCleanup(batcher.close)
+        
+        # Test: üç istek (toplam 5 girdi) bekleme süresi içinde gelir
+        futures = [batcher.submit(["a"]), batcher.submit(["b", "c"]), batcher.submit(["d", "e"])]
+        results = [future.result(5) for future in futures]
+        
+        # Assert: sınır 4 olduğu için 4 + 1 girdilik iki ileri geçiş; sonuçlar doğru isteğe gider
+        self.assertEqual(calls, [["a", "b", "c", "d"], ["e"]])
+        self.assertEqual([[output["text"] for output in result["outputs"]] for result in results],
+                         [["a"], ["b", "c"], ["d", "e"]])
+        self.assertEqual(results[0]["batch_size"], 4)
+    
+    def test_pooled_model_runs_batches_concurrently(self):
+        barrier = threading.Barrier(2, timeout=5)
+        
+        def run_batch(texts):
+            # İki toplu iş aynı anda çalışmıyorsa bariyer zaman aşımına uğrar
+            barrier.wait()
+            return [{"text": text} for text in texts]
+        
+        batcher = MicroBatcher("m", run_batch, max_batch_size=1, max_wait_ms=0, concurrency=2)
+        self.addCleanup(batcher.close)
+        
+        # Test
+        futures = [batcher.submit([text]) for text in ("a", "b")]
+        
+        # Assert
+        self.assertEqual([future.result(5)["outputs"] for future in futures], [[{"text": "a"}], [{"text": "b"}]])
+    
+    def test_length_buckets_keep_short_inputs_apart(self):
+        calls = []
+        
+        def run_batch(texts):
+            calls.append(list(texts))
+            return [{} for _ in texts]
+        
+        batcher = MicroBatcher(
+            "m", run_batch, max_batch_size=8, max_wait_ms=100,
+            measure=lambda texts: [len(text.split()) for text in texts], boundaries=[4, 64]
+        )
+        self.addCleanup(batcher.close)
+        
+        short_a, short_b = "a b", "a b c"
+        long_a, long_b = "x " * 50, "y " * 40
+        
+        # Test
+        futures = [batcher.submit([text]) for text in (short_a, long_a, short_b, long_b)]
+        for future in futures:
+            future.result(5)
+        
+        # Assert: kısa ve uzun girdiler ayrı ileri geçişlerde, en eski kova önce
+        self.assertEqual(calls, [[short_a, short_b], [long_a, long_b]])
+        self.assertEqual(batcher.stats["padded_tokens"], 2 * 3 + 2 * 50)
+        self.assertAlmostEqual(batcher.padding_ratio(), 1 - 95 / 106)
+    
+    def test_run_batch_pools_without_padding(self):
+        gpu_manager = GPUManager(provider=SimulatedGPUProvider(gpu_count=1))
+        model_optimizer = ModelOptimizer(gpu_manager=gpu_manager)
+        
+        # İkinci metin bir token dolgulu
+        tokenizer = MagicMock(return_value={
+            "input_ids": torch.tensor([[5, 6], [7, 0]]),
+            "attention_mask": torch.tensor([[1, 1], [1, 0]]),
+        })
+        hidden = torch.tensor([[[1.0], [3.0]], [[5.0], [100.0]]])
+        model_optimizer.models["m"] = lambda **inputs: (hidden,)
+        model_optimizer.tokenizers["m"] = tokenizer
+        model_optimizer.model_configs["m"] = {"model_id": "m", "gpu_index": 0, "device": "cpu"}
+        model_optimizer.residency.add("m", 0, 100.0)
+        
+        inference = InferenceService(model_optimizer, max_wait_ms=0)
+        self.addCleanup(inference.shutdown)
+        
+        # Test
+        result = inference.submit("m", ["ab", "c"]).result(5)
+        
+        # Assert: dolgu token'ı ortalamaya katılmamalı
+        self.assertEqual([output["embedding"] for output in result["outputs"]], [[2.0], [5.0]])
+        self.assertEqual(model_optimizer.residency.get("m").hits, 1)
+        with self.assertRaises(KeyError):
+            inference.submit("missing", ["x"])
+        self.assertEqual(model_optimizer.residency.misses, 1)
+    
+    def test_stale_batcher_closed_off_request_path(self):
+        gpu_manager = GPUManager(provider=SimulatedGPUProvider(gpu_count=1))
+        model_optimizer = ModelOptimizer(gpu_manager=gpu_manager)
+        model_optimizer.models["m"] = lambda **inputs: (torch.ones(inputs["input_ids"].shape + (1,)),)
+        model_optimizer.tokenizers["m"] = MagicMock(return_value={
+            "input_ids": torch.tensor([[5]]), "attention_mask": torch.tensor([[1]])
+        })
+        model_optimizer.model_configs["m"] = {"model_id": "m", "gpu_index": 0, "device": "cpu"}
+        model_optimizer.residency.add("m", 0, 100.0)
+        
+        inference = InferenceService(model_optimizer, max_wait_ms=0)
+        self.addCleanup(inference.shutdown)
+        
+        # Boşaltılmış bir replikanın kapanması uzun süren toplayıcısı
+        release = threading.Event()
+        self.addCleanup(release.set)
+        closed = threading.Event()
+        stale = MagicMock()
+        stale.close.side_effect = lambda: release.wait(5) and closed.set()
+        inference._batchers["gone"] = stale
+        
+        # Test: yeni toplayıcı oluşturan istek eskinin kapanmasını beklememeli
+        started = time.monotonic()
+        future = inference.submit("m", ["a"])
+        
+        # Assert
+        self.assertLess(time.monotonic() - started, 2.0)
+        self.assertEqual(future.result(5)["replica_id"], "m")
+        self.assertNotIn("gone", inference._batchers)
+        release.set()
+        self.assertTrue(closed.wait(5))
+    
+    def test_batcher_rebuilt_when_concurrency_changes(self):
+        gpu_manager = GPUManager(provider=SimulatedGPUProvider(gpu_count=1))
+        model_optimizer = ModelOptimizer(gpu_manager=gpu_manager)
+        model_optimizer.models["m"] = lambda **inputs: (torch.ones(inputs["input_ids"].shape + (1,)),)
+        model_optimizer.tokenizers["m"] = MagicMock(return_value={
+            "input_ids": torch.tensor([[5]]), "attention_mask": torch.tensor([[1]])
+        })
+        model_optimizer.model_configs["m"] = {"model_id": "m", "gpu_index": 0, "device": "cpu"}
+        model_optimizer.residency.add("m", 0, 100.0)
+        
+        inference = InferenceService(model_optimizer, max_wait_ms=0)
+        self.addCleanup(inference.shutdown)
+        inference.submit("m", ["a"]).result(5)
+        first = inference._batchers["m"]
+        
+        # Test: model ONNX oturum havuzuyla yeniden yüklendi
+        with patch.object(model_optimizer, "inference_concurrency", return_value=3):
+            inference.submit("m", ["b"]).result(5)
+        
+        # Assert: eski eşzamanlılıkla çalışan toplayıcı yeniden kullanılmamalı
+        self.assertIsNot(inference._batchers["m"], first)
+        self.assertEqual(inference._batchers["m"].concurrency, 3)
+    
+    def test_requests_route_to_least_loaded_replica(self):
+        gpu_manager = GPUManager(provider=SimulatedGPUProvider(gpu_count=2))
+        model_optimizer = ModelOptimizer(gpu_manager=gpu_manager)
+        release = threading.Event()
+        self.addCleanup(release.set)
+        
+        def model_for(blocking):
+            def forward(**inputs):
+                if blocking:
+                    release.wait(5)
+                return (torch.ones(inputs["input_ids"].shape + (1,)),)
+            return forward
+        
+        # "m" replikası serbest bırakılana kadar meşgul kalır
+        for replica_id, gpu_index, blocking in (("m", 0, True), ("m#1", 1, False)):
+            model_optimizer.models[replica_id] = model_for(blocking)
+            model_optimizer.tokenizers[replica_id] = MagicMock(return_value={
+                "input_ids": torch.tensor([[5]]), "attention_mask": torch.tensor([[1]])
+            })
+            model_optimizer.model_configs[replica_id] = {
+                "model_id": replica_id, "gpu_index": gpu_index, "device": "cpu"
+            }
+            model_optimizer.residency.add(replica_id, gpu_index, 100.0)
+        
+        inference = InferenceService(model_optimizer, max_wait_ms=0)
+        self.addCleanup(inference.shutdown)
+        
+        # Test: ilk istek boştaki ilk replikaya, sonrakiler kuyruğu boş olana gitmeli
+        first = inference.submit("m", ["a"])
+        second = inference.submit("m", ["b"]).result(5)
+        third = inference.submit("m", ["c"]).result(5)
+        release.set()
+        
+        # Assert
+        self.assertEqual(first.result(5)["replica_id"], "m")
+        self.assertEqual([second["replica_id"], third["replica_id"]], ["m#1", "m#1"])
+        stats = inference.stats("m")
+        self.assertEqual(stats["inputs"], 3)
+        self.assertEqual([replica["inputs"] for replica in stats["replicas"]], [1, 2])
+
+
+class TestServiceRegistry(unittest.TestCase):
+    """Servis kaydı testleri"""
+    
+    @patch('app.services.service_registry.HuggingFaceIntegration')
+    @patch('app.services.service_registry.GPUManager')
+    def test_services_share_gpu_manager(self, mock_gpu_manager, mock_hf):
+        # Test
+        registry = ServiceRegistry()
+        
+        # Assert: tek bir GPU yöneticisi oluşturulmalı ve optimizer onu kullanmalı
+        mock_gpu_manager.assert_called_once()
+        self.assertIs(registry.model_optimizer.gpu_manager, registry.gpu_manager)
+        
+        registry.start()
+        self.addCleanup(registry.shutdown)
+        registry.gpu_manager.start_sampler.assert_called_once()
+
+
+class TestGPUStateCollector(unittest.TestCase):
+    """Prometheus GPU/model collector testleri"""
+    
+    def test_collects_snapshot_and_models_at_scrape_time(self):
+        gpu_manager = GPUManager(provider=SimulatedGPUProvider(
+            gpu_count=2, memory_traces=[[8192.0], [1024.0]], utilization_traces=[[40.0], [5.0]]
+        ))
+        model_optimizer = ModelOptimizer(gpu_manager=gpu_manager)
+        model_optimizer.models["m"] = MagicMock()
+        model_optimizer.model_configs["m"] = {
+            "model_id": "m", "gpu_index": 1, "device": "cuda:1", "weights_mb": 256.0
+        }
+        
+        registry = CollectorRegistry()
+        registry.register(GPUStateCollector(gpu_manager, model_optimizer))
+        
+        # Ölçüm yokken GPU serisi üretilmemeli
+        self.assertIsNone(registry.get_sample_value("gpu_memory_used_bytes", {"gpu_index": "0"}))
+        
+        # Test: ölçüm ve rezervasyon sonrası scrape
+        gpu_manager.refresh()
+        gpu_manager.reservations.reserve(0, 1000, owner="pending")
+        
+        # Assert
+        mb = 1024 * 1024
+        self.assertEqual(registry.get_sample_value("gpu_memory_used_bytes", {"gpu_index": "0"}), 8192 * mb)
+        self.assertEqual(registry.get_sample_value("gpu_memory_free_bytes", {"gpu_index": "1"}), (24576 - 1024) * mb)
+        self.assertEqual(registry.get_sample_value("gpu_memory_reserved_bytes", {"gpu_index": "0"}), 1000 * mb)
+        self.assertEqual(registry.get_sample_value("gpu_temperature_celsius", {"gpu_index": "0"}), 50.0)
+        self.assertEqual(registry.get_sample_value("models_loaded", {"gpu_index": "1"}), 1)
+        self.assertEqual(registry.get_sample_value("model_weights_bytes", {"model_id": "m", "gpu_index": "1"}), 256 * mb)
+        self.assertEqual(
+            registry.get_sample_value("gpu_foreign_process_memory_bytes", {"gpu_index": "0"}), 8192 * mb
+        )
+    
+    def test_model_registry_read_under_models_lock(self):
+        gpu_manager = GPUManager(provider=SimulatedGPUProvider(gpu_count=1))
+        model_optimizer = ModelOptimizer(gpu_manager=gpu_manager)
+        registry = CollectorRegistry()
+        registry.register(GPUStateCollector(gpu_manager, model_optimizer))
+        
+        # Başka bir thread modeli yayınlarken kaydı kilitli tutar
+        locked, release = threading.Event(), threading.Event()
+        self.addCleanup(release.set)
+        
+        def publish():
+            with model_optimizer.models_lock:
+                locked.set()
+                release.wait(5)
+                model_optimizer.models["m"] = MagicMock()
+                model_optimizer.model_configs["m"] = {"model_id": "m", "gpu_index": 0, "device": "cuda:0"}
+        
+        publisher = threading.Thread(target=publish)
+        publisher.start()
+        self.assertTrue(locked.wait(5))
+        
+        # Test
+        samples = []
+        scrape = threading.Thread(target=lambda: samples.append(registry.get_sample_value("models_loaded", {"gpu_index": "0"})))
+        scrape.start()
+        scrape.join(0.2)
+        
+        # Assert: scrape yayın bitene kadar beklemeli ve tutarlı kaydı görmeli
+        self.assertTrue(scrape.is_alive())
+        release.set()
+        scrape.join(5)
+        publisher.join(5)
+        self.assertEqual(samples, [1])
 
 
 if __name__ == '__main__':
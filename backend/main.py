@@ -14,9 +14,11 @@ from app.api.model_router import router as model_router
 from app.api.gpu_router import router as gpu_router
 from app.api.user_router import router as user_router
 from app.api.statistics_router import router as stats_router
+from app.api.job_router import router as job_router
 from app.auth.auth_router import router as auth_router
 from app.middlewares.logging_middleware import RequestLoggingMiddleware
 from app.middlewares.rate_limiter import RateLimiterMiddleware
+from app.services.service_registry import init_services, shutdown_services
 
 # Logger yapılandırma
 logging.basicConfig(
@@ -65,6 +67,7 @@ app.include_router(model_router, prefix="/models", tags=["Models"])
 app.include_router(gpu_router, prefix="/gpus", tags=["GPU Management"])
 app.include_router(user_router, prefix="/users", tags=["User Management"])
 app.include_router(stats_router, prefix="/stats", tags=["Statistics"])
+app.include_router(job_router, prefix="/jobs", tags=["Jobs"])
 
 @app.get("/health", tags=["System"])
 async def health_check():
@@ -90,6 +93,9 @@ async def startup_event():
     # Veritabanı tablolarını oluştur
     init_db()
     
+    # Paylaşılan servisleri oluştur ve GPU örnekleyiciyi başlat
+    init_services()
+    
     logger.info(f"Uygulama başlatıldı: {settings.ENVIRONMENT} ortamında")
     logger.info(f"Belgelere erişim: http://{settings.HOST}:{settings.PORT}/docs")
 
@@ -99,6 +105,9 @@ async def shutdown_event():
     Uygulama kapatıldığında çalışan fonksiyon
     """
     logger.info("Uygulama kapatılıyor...")
+    
+    # Paylaşılan servisleri durdur
+    shutdown_services()
 
 if __name__ == "__main__":
     import uvicorn
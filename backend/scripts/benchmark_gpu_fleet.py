@@ -0,0 +1,64 @@
+"""
+Simüle GPU filosu üzerinde telemetri ve yerleştirme yük testi
+
+Kullanım:
+    python scripts/benchmark_gpu_fleet.py --gpus 512 --samples 720 --readers 32
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.gpu_manager import GPUManager
+from app.services.gpu_providers import SimulatedGPUProvider
+
+def _timed(label: str, func, repeat: int) -> None:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40} {elapsed / repeat * 1e3:9.3f} ms/çağrı ({repeat} çağrı)")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--gpus", type=int, default=512, help="Simüle GPU sayısı")
+    parser.add_argument("--samples", type=int, default=720, help="Geçmişe yazılacak örnek sayısı")
+    parser.add_argument("--readers", type=int, default=32, help="Eşzamanlı /gpus okuyucu thread sayısı")
+    parser.add_argument("--seed", type=int, default=0, help="Simülasyon tohumu")
+    args = parser.parse_args()
+    
+    provider = SimulatedGPUProvider(gpu_count=args.gpus, seed=args.seed)
+    gpu_manager = GPUManager(update_interval=1, provider=provider)
+    
+    # Örnekleyicinin yaptığı işi doğrudan ölç (ölçüm + anlık görüntü + geçmiş)
+    _timed("refresh (örnekleme)", gpu_manager.refresh, args.samples)
+    
+    # Okuma yolu: örnekleyici çalışırken NVML/lock olmadan anlık görüntü
+    gpu_manager.start_sampler()
+    try:
+        _timed("detect_gpus (anlık görüntü okuma)", gpu_manager.detect_gpus, 200)
+        _timed("select_optimal_gpu", lambda: gpu_manager.select_optimal_gpu(min_memory_mb=4000), 200)
+        _timed("history.query (15 dk, 60 sn adım)", lambda: gpu_manager.history.query(0, window=900, step=60), 200)
+        
+        # Eşzamanlı okuyucular
+        reads_per_thread = 200
+        threads = [
+            threading.Thread(target=lambda: [gpu_manager.detect_gpus() for _ in range(reads_per_thread)])
+            for _ in range(args.readers)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        total_reads = args.readers * reads_per_thread
+        print(f"{'eşzamanlı detect_gpus':<40} {total_reads / elapsed:9.0f} okuma/sn ({args.readers} thread)")
+    finally:
+        gpu_manager.stop_sampler()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Uzunluk kovalamalı ve kovalamasız mikro-toplamanın dolgu verimliliği karşılaştırması
+
+İleri geçiş maliyeti (toplu iş boyutu x en uzun girdi) token başına sabit
+süre ile simüle edilir; model indirmeye veya GPU'ya gerek yoktur.
+
+Kullanım:
+    python scripts/benchmark_inference_bucketing.py --requests 2000 --clients 64 --buckets 16,32,64,128,256,512
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.inference import MicroBatcher
+
+def _make_texts(count: int, max_length: int, seed: int) -> list:
+    # Gerçek trafikteki gibi çoğu kısa, az sayıda uzun girdi (log-normal)
+    rng = np.random.default_rng(seed)
+    lengths = np.clip(rng.lognormal(mean=3.0, sigma=1.0, size=count), 1, max_length).astype(int)
+    return [" ".join(["tok"] * int(length)) for length in lengths]
+
+def _run(texts: list, boundaries: list, args: argparse.Namespace) -> dict:
+    def run_batch(batch: list) -> list:
+        padded = len(batch) * max(len(text.split()) for text in batch)
+        time.sleep(padded * args.token_cost_us / 1e6)
+        return [{} for _ in batch]
+    
+    batcher = MicroBatcher(
+        "benchmark",
+        run_batch,
+        max_batch_size=args.batch_size,
+        max_wait_ms=args.max_wait_ms,
+        measure=lambda batch: [len(text.split()) for text in batch],
+        boundaries=boundaries
+    )
+    
+    latencies = []
+    lock = threading.Lock()
+    per_client = [texts[i::args.clients] for i in range(args.clients)]
+    
+    def client(items: list) -> None:
+        for text in items:
+            start = time.perf_counter()
+            batcher.submit([text]).result()
+            with lock:
+                latencies.append(time.perf_counter() - start)
+    
+    threads = [threading.Thread(target=client, args=(items,)) for items in per_client]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    batcher.close()
+    
+    return {
+        "padding_ratio": batcher.padding_ratio() or 0.0,
+        "mean_batch": batcher.stats["inputs"] / max(batcher.stats["batches"], 1),
+        "throughput": len(texts) / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50)) * 1e3,
+        "p99_ms": float(np.percentile(latencies, 99)) * 1e3,
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000, help="Toplam istek sayısı")
+    parser.add_argument("--clients", type=int, default=64, help="Eşzamanlı istemci thread sayısı")
+    parser.add_argument("--batch-size", type=int, default=32, help="Tek ileri geçişte en fazla girdi")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="Toplama bekleme süresi (ms)")
+    parser.add_argument("--max-length", type=int, default=512, help="En uzun girdi (token)")
+    parser.add_argument("--token-cost-us", type=float, default=2.0, help="Dolgulu token başına simüle maliyet (µs)")
+    parser.add_argument("--buckets", default="16,32,64,128,256,512", help="Kova üst sınırları (virgülle)")
+    parser.add_argument("--seed", type=int, default=0, help="Girdi üretim tohumu")
+    args = parser.parse_args()
+    
+    texts = _make_texts(args.requests, args.max_length, args.seed)
+    boundaries = [int(value) for value in args.buckets.split(",") if value]
+    
+    print(f"{'mod':<12} {'dolgu':>8} {'ort. toplu':>11} {'istek/sn':>10} {'p50 ms':>9} {'p99 ms':>9}")
+    for label, bucket_list in (("kovasız", []), ("kovalı", boundaries)):
+        result = _run(texts, bucket_list, args)
+        print(
+            f"{label:<12} {result['padding_ratio']:8.1%} {result['mean_batch']:11.1f} "
+            f"{result['throughput']:10.0f} {result['p50_ms']:9.2f} {result['p99_ms']:9.2f}"
+        )
+
+if __name__ == "__main__":
+    main()
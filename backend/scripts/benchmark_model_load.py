@@ -0,0 +1,103 @@
+"""
+from_pretrained ile mmap safetensors yükleyicisinin süre ve tepe ana bellek (RSS) karşılaştırması
+
+Her yükleme ayrı bir alt süreçte çalışır; böylece tepe RSS ölçümleri ve
+sayfa önbelleği dışındaki durum birbirini etkilemez. --model-path
+verilmezse geçici dizinde rastgele ağırlıklı bir BERT modeli oluşturulur.
+
+Kullanım:
+    python scripts/benchmark_model_load.py --model-path /app/models/bert-base-uncased --device cuda:0 --fp16
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+LOADERS = ("from_pretrained", "safetensors-mmap")
+
+def _peak_rss_mb() -> float:
+    # Linux'ta ru_maxrss KB cinsindendir
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def _child(args: argparse.Namespace) -> None:
+    import torch
+    from transformers import AutoModel
+    
+    from app.services.model_loader import load_safetensors_model
+    
+    dtype = torch.float16 if args.fp16 else torch.float32
+    baseline = _peak_rss_mb()
+    
+    start = time.perf_counter()
+    if args.child == "safetensors-mmap":
+        model = load_safetensors_model(args.model_path, args.device, dtype)
+    else:
+        model = AutoModel.from_pretrained(args.model_path, torch_dtype=dtype).to(args.device)
+    if args.device.startswith("cuda"):
+        torch.cuda.synchronize(args.device)
+    elapsed = time.perf_counter() - start
+    
+    weights_mb = sum(p.numel() * p.element_size() for p in model.parameters()) / (1024 * 1024)
+    print(json.dumps({
+        "seconds": elapsed,
+        "peak_rss_mb": _peak_rss_mb() - baseline,
+        "weights_mb": weights_mb,
+    }))
+
+def _make_synthetic_model(path: str, layers: int) -> None:
+    from transformers import BertConfig, BertModel
+    
+    config = BertConfig(num_hidden_layers=layers)
+    BertModel(config).save_pretrained(path, safe_serialization=True)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model-path", help="safetensors içeren model dizini (verilmezse sentetik BERT)")
+    parser.add_argument("--device", default="cpu", help="Hedef cihaz (ör. cuda:0)")
+    parser.add_argument("--fp16", action="store_true", help="FP16 ağırlıklarla yükle")
+    parser.add_argument("--repeat", type=int, default=3, help="Yükleyici başına tekrar sayısı")
+    parser.add_argument("--layers", type=int, default=12, help="Sentetik modelin katman sayısı")
+    parser.add_argument("--child", choices=LOADERS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.child:
+        _child(args)
+        return
+    
+    temp_dir = None
+    if not args.model_path:
+        temp_dir = tempfile.mkdtemp(prefix="load_benchmark_")
+        args.model_path = temp_dir
+        _make_synthetic_model(temp_dir, args.layers)
+    
+    try:
+        print(f"{'yükleyici':<18} {'süre (sn)':>10} {'tepe RSS (MB)':>14} {'ağırlık (MB)':>13}")
+        for loader in LOADERS:
+            runs = []
+            for _ in range(args.repeat):
+                command = [
+                    sys.executable, os.path.abspath(__file__),
+                    "--model-path", args.model_path, "--device", args.device, "--child", loader,
+                ]
+                if args.fp16:
+                    command.append("--fp16")
+                output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+                runs.append(json.loads(output.strip().splitlines()[-1]))
+            
+            # Medyan çalıştırma (ilk çalıştırmanın soğuk sayfa önbelleği etkisini azaltır)
+            runs.sort(key=lambda run: run["seconds"])
+            run = runs[len(runs) // 2]
+            print(f"{loader:<18} {run['seconds']:10.2f} {run['peak_rss_mb']:14.0f} {run['weights_mb']:13.0f}")
+    finally:
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()